@@ -6,3 +6,6 @@ class ComprasDevolucionesConfig(AppConfig):
     name = 'compras.compras_devoluciones'
     verbose_name = 'Devoluciones Compras'
 
+    def ready(self):
+        from configuracion.documentos import devoluciones
+        devoluciones.COMPRAS.conectar_senales()
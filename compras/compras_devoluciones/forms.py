@@ -8,6 +8,8 @@ from configuracion.documentos.models import Documento
 from configuracion.articulos.models import Moneda, Articulo
 from configuracion.tablas.models import FormaPagoTipo
 from configuracion.disponibilidades.models import Disponibilidad
+from configuracion.disponibilidades import movimientos
+from configuracion.deposito.models import Deposito
 
 
 class ComprasDevolucionesCabezalForm(forms.ModelForm):
@@ -46,6 +48,8 @@ class ComprasDevolucionesCabezalForm(forms.ModelForm):
         
         # Disponibilidades activas (solo para contado)
         self.fields['disponibilidad'].queryset = Disponibilidad.objects.filter(activo='SI')
+        self.fields['deposito'].queryset = Deposito.objects.all()
+        self.fields['deposito'].required = False
         self.fields['disponibilidad'].required = False
         
         # Establecer tipo_compra siempre a CONVENCIONAL y ocultarlo
@@ -86,13 +90,19 @@ class ComprasDevolucionesCabezalForm(forms.ModelForm):
                 'disponibilidad': 'Debe seleccionar una disponibilidad para forma de pago contado.'
             })
         
+        # La disponibilidad se mueve en su moneda: el documento debe estar en la misma
+        if forma_pago and forma_pago.nombre == 'Contado':
+            error = movimientos.error_moneda(disponibilidad, cleaned_data.get('moneda'))
+            if error:
+                raise forms.ValidationError({'disponibilidad': error})
+        
         return cleaned_data
     
     class Meta:
         model = ComprasDevolucionesCabezal
         fields = [ 'id_proveedor', 'tipo_documento',
                     'serie_documento', 'numero_documento', 'forma_pago',
-                    'fecha_documento', 'moneda',
+                    'fecha_documento', 'moneda', 'deposito',
                      'precio_iva_inc', 'tipo_compra', 'disponibilidad',
                     'observaciones', 'sub_total', 'iva', 'importe_total']
         
@@ -104,6 +114,7 @@ class ComprasDevolucionesCabezalForm(forms.ModelForm):
             'forma_pago': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_forma_pago'}),
             'fecha_documento': forms.DateInput(attrs={'class': 'form-control form-control-sm', 'type': 'date', 'id': 'id_fecha_documento'}),
             'moneda': forms.Select(attrs={'class': 'form-control form-control-sm'}),
+            'deposito': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_deposito'}),
             'precio_iva_inc': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_precio_iva_inc'}, choices=[('SI', 'Sí'), ('NO', 'No')]),
             'disponibilidad': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_disponibilidad', 'style': 'width: 100%; min-width: 350px;'}),
             'tipo_compra': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_tipo_compra'}),
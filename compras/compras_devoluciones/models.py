@@ -1,13 +1,14 @@
 from django.db import models
-from django.utils import timezone
-from django.db.models import Sum
 from decimal import Decimal
-from configuracion.transacciones.models import Transaccion
+from configuracion.transacciones.models import SecuenciaTransaccion
 from configuracion.proveedores.models import Proveedor
 from configuracion.documentos.models import Documento
 from configuracion.articulos.models import Moneda, Articulo
 from configuracion.tablas.models import FormaPagoTipo
 from configuracion.disponibilidades.models import Disponibilidad
+from configuracion.deposito.models import Deposito
+from configuracion.documentos.servicios import actualizar_totales, linea_guardada, lineas_anteriores
+from configuracion.documentos import precios
 
 
 
@@ -98,6 +99,16 @@ class ComprasDevolucionesCabezal(models.Model):
         help_text='Solo para devoluciones de facturas contado',
     )
     
+    deposito = models.ForeignKey(
+        Deposito,
+        on_delete=models.PROTECT,
+        related_name='devoluciones_compras',
+        blank=True,
+        null=True,
+        verbose_name='Depósito',
+        help_text='Depósito que mueve el stock de los artículos stockeables',
+    )
+    
     observaciones = models.TextField(
         blank=True,
         null=True,
@@ -160,26 +171,7 @@ class ComprasDevolucionesCabezal(models.Model):
     def save(self, *args, **kwargs):
         # Generar transacción automáticamente si no existe
         if not self.transaccion:
-            now = timezone.now()
-            año = str(now.year)[-2:]
-            mes = str(now.month).zfill(2)
-            prefijo = f"{año}{mes}"
-            
-            # Buscar última transacción del mes
-            ultima = Transaccion.objects.filter(
-                transaccion__startswith=prefijo
-            ).order_by('-transaccion').first()
-            
-            if ultima and ultima.transaccion:
-                try:
-                    ultimo_num = int(ultima.transaccion[4:])
-                    nuevo_num = ultimo_num + 1
-                except ValueError:
-                    nuevo_num = 1
-            else:
-                nuevo_num = 1
-            
-            self.transaccion = f"{prefijo}{str(nuevo_num).zfill(6)}"
+            self.transaccion = SecuenciaTransaccion.siguiente()
         
         # Asignar tipo_documento por defecto como 'ncprov' si no está definido
         if not self.tipo_documento_id:
@@ -206,23 +198,18 @@ class ComprasDevolucionesCabezal(models.Model):
             if self.disponibilidad_id:
                 self.disponibilidad = None
         
-        super().save(*args, **kwargs)
+        # Actualizar totales desde las líneas antes de guardar, así el post_save
+        # ve los importes actuales (un cabezal nuevo todavía no tiene líneas)
+        if not self._state.adding:
+            self.actualizar_totales()
         
-        # Actualizar totales desde las líneas
-        self.actualizar_totales()
+        super().save(*args, **kwargs)
     
     def actualizar_totales(self):
         """Actualiza sub_total, iva e importe_total desde las líneas"""
-        lineas = self.lineas.all()
-        self.sub_total = lineas.aggregate(Sum('sub_total'))['sub_total__sum'] or 0
-        self.iva = lineas.aggregate(Sum('iva'))['iva__sum'] or 0
-        self.importe_total = lineas.aggregate(Sum('total'))['total__sum'] or 0
-        # Guardar sin llamar save() para evitar recursión
-        ComprasDevolucionesCabezal.objects.filter(transaccion=self.transaccion).update(
-            sub_total=self.sub_total,
-            iva=self.iva,
-            importe_total=self.importe_total
-        )
+        # Una sola sentencia UPDATE; luego refrescar los valores en memoria
+        actualizar_totales(self)
+        self.refresh_from_db(fields=['sub_total', 'iva', 'importe_total'])
 
 
 class ComprasDevolucionesLineas(models.Model):
@@ -320,7 +307,13 @@ class ComprasDevolucionesLineas(models.Model):
     def __str__(self):
         return f"{self.transaccion.transaccion} - Línea {self.linea}"
     
-    def save(self, *args, **kwargs):
+    def calcular_importes(self, contexto=None, tasas=None):
+        """
+        Calcula los importes de la línea (sin guardar).
+        
+        contexto y tasas permiten calcular un lote de líneas del mismo cabezal
+        sin repetir consultas (ver configuracion.documentos.precios).
+        """
         # Si hay id_compra_linea, calcular serie y numero desde la factura
         if self.id_compra_linea:
             compra = self.id_compra_linea.transaccion
@@ -339,57 +332,24 @@ class ComprasDevolucionesLineas(models.Model):
         if self.precio is None:
             self.precio = Decimal('0')
         
-        # Variable local para trabajar con el precio
-        precio = self.precio
-
-        # Verificar si el proveedor es monotributista o si es devolución movimiento proveedor (devmovprov)
-        es_monotributista = self.transaccion.monotributista == 'SI'
-        es_movprov = self.transaccion.tipo_documento and self.transaccion.tipo_documento.codigo == 'devmovprov'
-        
-        # Obtener IVA del artículo (pero si es monotributista o movprov, el IVA será 0)
-        if es_monotributista or es_movprov:
-            # Monotributista o Movimiento Proveedor: no cobra IVA, siempre es 0
-            iva_valor = Decimal('0')
-        elif self.id_articulo and self.id_articulo.iva:
-            iva_valor = Decimal(str(self.id_articulo.iva.valor))
-        else:
-            iva_valor = Decimal('0')
-        
-        # Calcular sub_total e iva según precio_iva_inc del cabezal
-        # IMPORTANTE: Los cálculos se hacen por unidad y luego se multiplican por cantidad
-        # Si es monotributista, precio_iva_inc siempre es 'SI', pero el IVA es 0
-        if self.transaccion.precio_iva_inc == 'SI':
-            # IVA incluido: precio_neto_unitario ya incluye IVA, hay que desglosarlo
-            # precio_neto_unitario = sub_total_unitario + iva_unitario = sub_total_unitario * (1 + iva)
-            # sub_total_unitario = precio_neto_unitario / (1 + iva)
-            # iva_unitario = precio_neto_unitario - sub_total_unitario
-            # Si es monotributista, iva_valor = 0, entonces sub_total = precio_neto y iva = 0
-            if iva_valor > 0:
-                sub_total_unitario = precio / (Decimal('1') + iva_valor)
-                iva_unitario = precio - sub_total_unitario
-            else:
-                # Sin IVA (monotributista o artículo sin IVA)
-                sub_total_unitario = precio
-                iva_unitario = Decimal('0')
-            
-            # Multiplicar por cantidad para sub_total e iva
-            self.sub_total = sub_total_unitario * self.cantidad
-            self.iva = iva_unitario * self.cantidad
-        else:
-            # IVA no incluido: precio_neto_unitario es la base, hay que sumarle IVA
-            # Si es monotributista, iva_valor = 0, entonces sub_total = precio_neto y iva = 0
-            sub_total_unitario = precio
-            iva_unitario = precio * iva_valor
-            
-            # Multiplicar por cantidad para sub_total e iva
-            self.sub_total = sub_total_unitario * self.cantidad
-            self.iva = iva_unitario * self.cantidad
+        if contexto is None:
+            contexto = precios.contexto_cabezal(self.transaccion)
+        importes = precios.calcular_lineas(precios.DEVOLUCION_COMPRA, contexto, [{
+            'articulo': self.id_articulo_id,
+            'precio': self.precio,
+            'cantidad': self.cantidad,
+        }], tasas)[0]
         
-        # Calcular total
-        self.total = self.sub_total + self.iva
+        self.sub_total = importes['sub_total']
+        self.iva = importes['iva']
+        self.total = importes['total']
+    
+    def save(self, *args, **kwargs):
+        self.calcular_importes()
+        anteriores = lineas_anteriores(type(self), [self.pk])
         
         super().save(*args, **kwargs)
         
-        # Actualizar totales del cabezal
+        # Actualizar totales del cabezal y los saldos que dependen de las líneas
         if self.transaccion:
-            self.transaccion.actualizar_totales()
\ No newline at end of file
+            linea_guardada(self, anteriores)
\ No newline at end of file
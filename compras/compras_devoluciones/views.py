@@ -1,10 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-import json
 from .models import ComprasDevolucionesCabezal, ComprasDevolucionesLineas
 from .forms import (
     ComprasDevolucionesCabezalForm, ComprasDevolucionesLineasForm, ComprasDevolucionesLineasFormSet
@@ -12,11 +12,17 @@ from .forms import (
 from configuracion.proveedores.models import Proveedor
 from configuracion.transacciones.models import Transaccion
 from configuracion.documentos.models import Documento
+from configuracion.documentos import devoluciones
+from configuracion.documentos.servicios import guardar_cabezal, registrar_lineas
 from configuracion.articulos.models import Articulo, CodigoProveedorCompra
-from configuracion.tablas.models import PlazoPago
+from configuracion.tablas import busqueda, datos_referencia
 from erp_demo.config import EMPRESA_NOMBRE
 
 
+# Documentos/líneas por página en las búsquedas de documento afectado
+POR_PAGINA_DOCUMENTOS = 50
+
+
 def lista_compras_devoluciones(request):
     """Vista para listar todas las devoluciones de compras con paginación"""
     compras_devoluciones = ComprasDevolucionesCabezal.objects.all().select_related(
@@ -78,24 +84,21 @@ def crear_compra_devolucion(request):
                 cabezal.precio_iva_inc = 'SI'
             cabezal.usuario = request.user.id if request.user.is_authenticated else None
             # La transacción y fecha_movimiento se generan automáticamente en el save()
-            cabezal.save()
+            guardar_cabezal(cabezal)
             
             # Guardar líneas - asegurar que tengan número de línea
             lineas = formset.save(commit=False)
-            lineas_guardadas = 0
-            for idx, linea in enumerate(lineas, start=1):
+            lineas_validas = []
+            for linea in lineas:
                 # Solo guardar si tiene artículo y cantidad válidos (ignorar líneas vacías)
-                if linea.id_articulo and linea.cantidad and linea.cantidad > 0:
-                    linea.transaccion = cabezal
-                    lineas_guardadas += 1
+                if linea.id_articulo_id and linea.cantidad and linea.cantidad > 0:
+                    lineas_validas.append(linea)
                     # Asignar número de línea si no tiene
                     if not linea.linea or linea.linea == 0:
-                        linea.linea = lineas_guardadas
-                    linea.save()
+                        linea.linea = len(lineas_validas)
             
-            # Eliminar líneas marcadas para eliminar
-            for obj in formset.deleted_objects:
-                obj.delete()
+            # Guardar en bloque, eliminar las marcadas y actualizar totales del cabezal
+            registrar_lineas(cabezal, lineas_validas, formset.deleted_objects)
             
             # Crear registro en tabla Transaccion
             try:
@@ -108,9 +111,6 @@ def crear_compra_devolucion(request):
                 )
             except Documento.DoesNotExist:
                 pass
-            
-            # Actualizar totales desde las líneas
-            cabezal.actualizar_totales()
         
             messages.success(request, f'Devolución de Compra {cabezal.transaccion} creada exitosamente.')
             return redirect('compras_devoluciones:detalle_compra_devolucion', transaccion=cabezal.transaccion)
@@ -141,70 +141,13 @@ def crear_compra_devolucion(request):
         if len(formset.forms) > 1:
             formset.forms = formset.forms[:1]
     
-    # Obtener datos para JavaScript
-    proveedores_data = []
-    for proveedor in Proveedor.objects.filter(activo='SI'):
-        proveedores_data.append({
-            'id': proveedor.id,
-            'codigo': proveedor.codigo,
-            'razon': proveedor.razon or '',
-            'nombre_comercial': proveedor.nombre_comercial or '',
-            'formadepago': proveedor.formadepago or '',
-            'monotributista': proveedor.monotributista or 'NO',
-        })
-    
-    formas_pago_data = []
-    for fp in PlazoPago.objects.all():
-        formas_pago_data.append({
-            'codigo': fp.codigo,
-            'descripcion': fp.descripcion,
-            'plazo_en_dias': int(fp.plazo_en_dias) if fp.plazo_en_dias else 0,
-            'fin_de_mes': bool(fp.fin_de_mes) if fp.fin_de_mes is not None else False,
-        })
-    
-    # Obtener artículos para el select - ordenar SER* primero
-    articulos_data = []
-    # Primero obtener artículos SER* (producto_id que empieza con SER)
-    articulos_ser = Articulo.objects.filter(
-        ACTIVO_COMPRAS='SI',
-        producto_id__startswith='SER'
-    ).select_related('iva').order_by('producto_id')
-    
-    # Luego obtener el resto de artículos
-    articulos_otros = Articulo.objects.filter(
-        ACTIVO_COMPRAS='SI'
-    ).exclude(
-        producto_id__startswith='SER'
-    ).select_related('iva').order_by('nombre')
-    
-    # Agregar primero los SER*
-    for articulo in articulos_ser:
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-            'es_ser': True,  # Flag para identificar artículos SER*
-        })
-    
-    # Luego agregar el resto
-    for articulo in articulos_otros:
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-            'es_ser': False,
-        })
-    
     context = {
         'form': form,
         'formset': formset,
         'titulo': 'Nueva Devolución de Compra',
         'empresa_nombre': EMPRESA_NOMBRE,
-        'proveedores_data': json.dumps(proveedores_data),
-        'formas_pago_data': json.dumps(formas_pago_data),
-        'articulos_data': json.dumps(articulos_data),
+        # Catálogos para JavaScript (se cargan desde /api/refdata/<tipo>, cacheados por versión)
+        'datos_referencia': datos_referencia.urls_scripts('proveedores', 'formas_pago', 'articulos_compras'),
     }
     return render(request, 'compras_devoluciones/form_compra_devolucion.html', context)
 
@@ -227,25 +170,21 @@ def editar_compra_devolucion(request, transaccion):
             # Si viene del campo hidden (monotributista), usar ese valor
             if 'precio_iva_inc' in request.POST and request.POST['precio_iva_inc'] == 'SI' and cabezal.id_proveedor and cabezal.id_proveedor.monotributista == 'SI':
                 cabezal.precio_iva_inc = 'SI'
-            cabezal.save()
+            guardar_cabezal(cabezal)
             
             # Guardar líneas
             lineas = formset.save(commit=False)
-            lineas_guardadas = 0
-            for idx, linea in enumerate(lineas, start=1):
-                if linea.id_articulo and linea.cantidad and linea.cantidad > 0:
-                    linea.transaccion = cabezal
-                    lineas_guardadas += 1
+            lineas_validas = []
+            for linea in lineas:
+                # Solo guardar si tiene artículo y cantidad válidos (ignorar líneas vacías)
+                if linea.id_articulo_id and linea.cantidad and linea.cantidad > 0:
+                    lineas_validas.append(linea)
+                    # Asignar número de línea si no tiene
                     if not linea.linea or linea.linea == 0:
-                        linea.linea = lineas_guardadas
-                    linea.save()
+                        linea.linea = len(lineas_validas)
             
-            # Eliminar líneas marcadas para eliminar
-            for obj in formset.deleted_objects:
-                obj.delete()
-            
-            # Actualizar totales
-            cabezal.actualizar_totales()
+            # Guardar en bloque, eliminar las marcadas y actualizar totales del cabezal
+            registrar_lineas(cabezal, lineas_validas, formset.deleted_objects)
             
             messages.success(request, f'Devolución de compra {cabezal.transaccion} actualizada exitosamente.')
             return redirect('compras_devoluciones:detalle_compra_devolucion', transaccion=cabezal.transaccion)
@@ -270,71 +209,14 @@ def editar_compra_devolucion(request, transaccion):
         form = ComprasDevolucionesCabezalForm(instance=compra_devolucion)
         formset = ComprasDevolucionesLineasFormSet(instance=compra_devolucion)
     
-    # Obtener datos para JavaScript
-    proveedores_data = []
-    for proveedor in Proveedor.objects.filter(activo='SI'):
-        proveedores_data.append({
-            'id': proveedor.id,
-            'codigo': proveedor.codigo,
-            'razon': proveedor.razon or '',
-            'nombre_comercial': proveedor.nombre_comercial or '',
-            'formadepago': proveedor.formadepago or '',
-            'monotributista': proveedor.monotributista or 'NO',
-        })
-    
-    formas_pago_data = []
-    for fp in PlazoPago.objects.all():
-        formas_pago_data.append({
-            'codigo': fp.codigo,
-            'descripcion': fp.descripcion,
-            'plazo_en_dias': int(fp.plazo_en_dias) if fp.plazo_en_dias else 0,
-            'fin_de_mes': bool(fp.fin_de_mes) if fp.fin_de_mes is not None else False,
-        })
-    
-    # Obtener artículos para el select - ordenar SER* primero
-    articulos_data = []
-    # Primero obtener artículos SER* (producto_id que empieza con SER)
-    articulos_ser = Articulo.objects.filter(
-        ACTIVO_COMPRAS='SI',
-        producto_id__startswith='SER'
-    ).select_related('iva').order_by('producto_id')
-    
-    # Luego obtener el resto de artículos
-    articulos_otros = Articulo.objects.filter(
-        ACTIVO_COMPRAS='SI'
-    ).exclude(
-        producto_id__startswith='SER'
-    ).select_related('iva').order_by('nombre')
-    
-    # Agregar primero los SER*
-    for articulo in articulos_ser:
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-            'es_ser': True,  # Flag para identificar artículos SER*
-        })
-    
-    # Luego agregar el resto
-    for articulo in articulos_otros:
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-            'es_ser': False,
-        })
-    
     context = {
         'form': form,
         'formset': formset,
         'compra_devolucion': compra_devolucion,
         'titulo': f'Editar Devolución de Compra {compra_devolucion.transaccion}',
         'empresa_nombre': EMPRESA_NOMBRE,
-        'proveedores_data': json.dumps(proveedores_data),
-        'formas_pago_data': json.dumps(formas_pago_data),
-        'articulos_data': json.dumps(articulos_data),
+        # Catálogos para JavaScript (se cargan desde /api/refdata/<tipo>, cacheados por versión)
+        'datos_referencia': datos_referencia.urls_scripts('proveedores', 'formas_pago', 'articulos_compras'),
     }
     return render(request, 'compras_devoluciones/form_compra_devolucion.html', context)
 
@@ -399,23 +281,11 @@ def buscar_proveedores(request):
     try:
         query = request.GET.get('q', '').strip()
         
-        if not query:
-            proveedores = Proveedor.objects.filter(activo='SI').order_by('razon', 'nombre_comercial')[:50]
-        else:
-            proveedores = Proveedor.objects.filter(
-                activo='SI'
-            ).filter(
-                razon__icontains=query
-            ) | Proveedor.objects.filter(
-                activo='SI'
-            ).filter(
-                nombre_comercial__icontains=query
-            ) | Proveedor.objects.filter(
-                activo='SI'
-            ).filter(
-                codigo__icontains=query
-            )
-            proveedores = proveedores.distinct().order_by('razon', 'nombre_comercial')[:50]
+        # Búsqueda indexada (trigramas en PostgreSQL, FTS5 en SQLite), ordenada por relevancia
+        proveedores = busqueda.buscar(
+            Proveedor.objects.filter(activo='SI').order_by('razon', 'nombre_comercial'),
+            'proveedores', query,
+        )
         
         resultados = []
         for proveedor in proveedores:
@@ -455,10 +325,13 @@ def buscar_articulos(request):
                 return JsonResponse({'results': []})
             
             # Buscar en CodigoProveedorCompra por código_proveedor y proveedor
-            codigos_proveedor = CodigoProveedorCompra.objects.filter(
-                proveedor_id=proveedor_id,
-                codigo_proveedor__icontains=query
-            ).select_related('articulo', 'articulo__iva')
+            codigos_proveedor = busqueda.buscar(
+                CodigoProveedorCompra.objects.filter(
+                    proveedor_id=proveedor_id,
+                    articulo__ACTIVO_COMPRAS='SI',
+                ).select_related('articulo', 'articulo__iva'),
+                'codigos_proveedor', query,
+            )
             
             resultados = []
             for codigo_prov in codigos_proveedor:
@@ -479,19 +352,11 @@ def buscar_articulos(request):
         
         else:
             # Buscar por nombre (modo por defecto)
-            if not query:
-                articulos = Articulo.objects.filter(ACTIVO_COMPRAS='SI').select_related('iva').order_by('nombre')[:50]
-            else:
-                articulos = Articulo.objects.filter(
-                    ACTIVO_COMPRAS='SI'
-                ).filter(
-                    nombre__icontains=query
-                ) | Articulo.objects.filter(
-                    ACTIVO_COMPRAS='SI'
-                ).filter(
-                    producto_id__icontains=query
-                )
-                articulos = articulos.distinct().select_related('iva').order_by('nombre')[:50]
+            # Búsqueda indexada (trigramas en PostgreSQL, FTS5 en SQLite), ordenada por relevancia
+            articulos = busqueda.buscar(
+                Articulo.objects.filter(ACTIVO_COMPRAS='SI').select_related('iva').order_by('nombre'),
+                'articulos', query,
+            )
             
             resultados = []
             for articulo in articulos:
@@ -521,7 +386,9 @@ def obtener_compras_proveedor(request):
     - devmovprov → solo trae movprov
     - ncimpo → solo trae factimp
     
-    Si se pasa articulo_id, solo muestra las compras que contienen ese artículo.
+    Solo trae compras con alguna línea que todavía tenga cantidad para devolver.
+    Si se pasa articulo_id, solo muestra las compras con saldo de ese artículo.
+    Paginado por cursor (?cursor=..., pagination.cursor en la respuesta).
     """
     try:
         proveedor_id = request.GET.get('proveedor_id', '').strip()
@@ -544,34 +411,25 @@ def obtener_compras_proveedor(request):
         # Obtener el tipo de documento de compra según el tipo de devolución
         tipo_documento_compra = mapeo_tipos.get(tipo_documento_devolucion)
         
-        # Filtrar compras del proveedor
+        # Filtrar compras del proveedor (índice proveedor + tipo_documento + fecha_documento)
         compras = ComprasCabezal.objects.filter(
             id_proveedor_id=proveedor_id
-        ).select_related('tipo_documento', 'id_proveedor')
+        ).select_related('tipo_documento')
         
         # Si se especificó tipo_documento_devolucion, filtrar por el tipo de compra correspondiente
         if tipo_documento_compra:
             compras = compras.filter(tipo_documento__codigo=tipo_documento_compra)
         
-        # Si se especificó articulo_id, filtrar solo las compras que tienen ese artículo
+        # Solo compras con líneas pendientes de devolver (del artículo, si se especificó)
+        lineas_pendientes = devoluciones.COMPRAS.lineas_con_saldo(
+            ComprasLineas.objects.filter(transaccion=OuterRef('pk'))
+        )
         if articulo_id:
-            # Obtener las transacciones de compras que tienen este artículo
-            compras_con_articulo = ComprasLineas.objects.filter(
-                id_articulo_id=articulo_id
-            ).values_list('transaccion', flat=True).distinct()
-            
-            # Filtrar por proveedor y tipo de documento si aplica
-            compras_filtradas = ComprasCabezal.objects.filter(
-                transaccion__in=compras_con_articulo,
-                id_proveedor_id=proveedor_id
-            )
-            
-            if tipo_documento_compra:
-                compras_filtradas = compras_filtradas.filter(tipo_documento__codigo=tipo_documento_compra)
-            
-            compras = compras_filtradas.select_related('tipo_documento', 'id_proveedor')
+            lineas_pendientes = lineas_pendientes.filter(id_articulo_id=articulo_id)
+        compras = compras.filter(Exists(lineas_pendientes))
         
-        compras = compras.order_by('-fecha_documento', '-transaccion')
+        # Continuar después de la última compra de la página anterior
+        compras, siguiente = devoluciones.pagina_documentos(compras, request.GET.get('cursor'), POR_PAGINA_DOCUMENTOS)
         
         resultados = []
         for compra in compras:
@@ -583,7 +441,10 @@ def obtener_compras_proveedor(request):
                 'text': f"{compra.serie_documento or ''} {compra.numero_documento} ({compra.tipo_documento.codigo if compra.tipo_documento else ''})",
             })
         
-        return JsonResponse({'results': resultados})
+        return JsonResponse({
+            'results': resultados,
+            'pagination': {'cursor': siguiente, 'more': siguiente is not None},
+        })
     except Exception as e:
         import traceback
         print(f"Error en obtener_compras_proveedor: {e}")
@@ -594,7 +455,9 @@ def obtener_compras_proveedor(request):
 @require_http_methods(["GET"])
 def obtener_lineas_compra(request):
     """API AJAX para obtener líneas (artículos) de una compra específica para devoluciones
+    Solo trae las líneas con cantidad pendiente de devolver (cantidad_disponible > 0).
     Si se pasa articulo_id, solo muestra las líneas de ese artículo.
+    Paginado por cursor (?cursor=..., pagination.cursor en la respuesta).
     """
     try:
         transaccion = request.GET.get('transaccion', '').strip()
@@ -612,16 +475,16 @@ def obtener_lineas_compra(request):
         except ComprasCabezal.DoesNotExist:
             return JsonResponse({'results': [], 'error': 'Compra no encontrada'}, status=404)
         
-        # Obtener líneas de la compra
-        lineas = ComprasLineas.objects.filter(
-            transaccion=compra
+        # Obtener líneas de la compra con saldo para devolver
+        lineas = devoluciones.COMPRAS.lineas_con_saldo(
+            ComprasLineas.objects.filter(transaccion=compra)
         ).select_related('id_articulo', 'id_articulo__iva')
         
         # Si se especificó articulo_id, filtrar solo las líneas de ese artículo
         if articulo_id:
             lineas = lineas.filter(id_articulo_id=articulo_id)
         
-        lineas = lineas.order_by('linea')
+        lineas, siguiente = devoluciones.pagina_lineas(lineas, request.GET.get('cursor'), POR_PAGINA_DOCUMENTOS)
         
         resultados = []
         for linea in lineas:
@@ -632,6 +495,8 @@ def obtener_lineas_compra(request):
                     'articulo_producto_id': linea.id_articulo.producto_id or '',
                     'articulo_nombre': linea.id_articulo.nombre or '',
                     'cantidad': float(linea.cantidad) if linea.cantidad else 0,
+                    'cantidad_devuelta': float(linea.cantidad_devuelta),
+                    'cantidad_disponible': float(linea.cantidad - linea.cantidad_devuelta),
                     'precio_neto': float(linea.precio_neto) if linea.precio_neto else 0,
                     'id_compra_linea': linea.id,
                     'iva_valor': float(linea.id_articulo.iva.valor) if linea.id_articulo.iva else 0,
@@ -639,6 +504,7 @@ def obtener_lineas_compra(request):
         
         return JsonResponse({
             'results': resultados,
+            'pagination': {'cursor': siguiente, 'more': siguiente is not None},
             'compra_info': {
                 'transaccion': compra.transaccion,
                 'serie_documento': compra.serie_documento or '',
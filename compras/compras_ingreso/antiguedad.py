@@ -0,0 +1,179 @@
+"""
+Antigüedad de acreedores y propuesta de pagos a proveedores.
+
+El saldo pendiente de cada compra a crédito es su importe_total menos las
+devoluciones a crédito en su misma moneda que la afectan (por id_compra_linea).
+Las demás devoluciones a crédito (sin factura asociada, o asociadas a una
+compra contado o en otra moneda) quedan como crédito a favor del proveedor en
+su moneda y se descuentan del total a pagar, igual que en la antigüedad de
+deudores.
+
+Todo se resuelve con consultas agrupadas (GROUP BY proveedor, moneda) y con el
+índice (forma_pago, fecha_vencimiento) de ComprasCabezal; el detalle de
+facturas de la propuesta se recorre con iterator() para no cargar decenas de
+miles de documentos en memoria.
+"""
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from configuracion.documentos import vencimientos
+
+
+CAMPOS_PROVEEDOR = {
+    'proveedor_codigo': F('id_proveedor__codigo'),
+    'proveedor_nombre': Coalesce('id_proveedor__razon', 'id_proveedor__nombre_comercial'),
+}
+
+# Línea de devolución que descuenta el saldo de una compra a crédito
+APLICADA = Q(
+    id_compra_linea__transaccion__forma_pago='CREDITO',
+    id_compra_linea__transaccion__moneda=F('transaccion__moneda'),
+)
+
+
+def facturas_pendientes():
+    """Compras a crédito con saldo pendiente (neto de devoluciones a crédito en su moneda)"""
+    from compras.compras_ingreso.models import ComprasCabezal
+    from compras.compras_devoluciones.models import ComprasDevolucionesLineas
+
+    devuelto = ComprasDevolucionesLineas.objects.filter(
+        id_compra_linea__transaccion=OuterRef('pk'),
+        transaccion__moneda=OuterRef('moneda'),
+        transaccion__forma_pago__nombre='Crédito',
+    ).order_by().values('id_compra_linea__transaccion').annotate(suma=Sum('total')).values('suma')[:1]
+
+    return ComprasCabezal.objects.filter(forma_pago='CREDITO').annotate(
+        pendiente=F('importe_total') - Coalesce(Subquery(devuelto), Value(vencimientos.CERO), output_field=vencimientos.DECIMAL),
+        vencimiento=Coalesce('fecha_vencimiento', 'fecha_documento'),
+    ).filter(pendiente__gt=0)
+
+
+def creditos_sin_aplicar():
+    """
+    Devoluciones a crédito que no descuentan una compra a crédito de su moneda, por proveedor y moneda.
+
+    Returns:
+        list[dict]: Una fila por (proveedor, moneda) con los datos del proveedor e 'importe'
+    """
+    from compras.compras_devoluciones.models import ComprasDevolucionesLineas
+
+    return list(ComprasDevolucionesLineas.objects.filter(
+        transaccion__forma_pago__nombre='Crédito',
+    ).exclude(APLICADA).order_by().values(
+        id_proveedor=F('transaccion__id_proveedor'),
+        moneda=F('transaccion__moneda'),
+    ).annotate(
+        proveedor_codigo=F('transaccion__id_proveedor__codigo'),
+        proveedor_nombre=Coalesce('transaccion__id_proveedor__razon', 'transaccion__id_proveedor__nombre_comercial'),
+        importe=Sum('total'),
+    ))
+
+
+def _agregar_creditos(filas, solo_credito=True):
+    """
+    Agrega 'creditos' y 'neto' a las filas agrupadas por (id_proveedor, moneda).
+
+    Con solo_credito los proveedores que solo tienen créditos sin aplicar suman
+    una fila sin importes por tramo.
+    """
+    por_clave = {(fila['id_proveedor'], fila['moneda']): fila for fila in filas}
+    for fila in filas:
+        fila['creditos'] = vencimientos.redondear(vencimientos.CERO)
+    for credito in creditos_sin_aplicar():
+        fila = por_clave.get((credito['id_proveedor'], credito['moneda']))
+        if fila is None:
+            if not solo_credito:
+                continue
+            fila = {campo: credito[campo] for campo in ('id_proveedor', 'moneda', 'proveedor_codigo', 'proveedor_nombre')}
+            fila.update({campo: vencimientos.CERO for campo, _ in vencimientos.titulos()}, total=vencimientos.CERO)
+            filas.append(vencimientos.redondear_filas([fila])[0])
+        fila['creditos'] = vencimientos.redondear(credito['importe'])
+    for fila in filas:
+        fila['neto'] = fila['total'] - fila['creditos']
+    filas.sort(key=lambda fila: (fila['moneda'], fila['proveedor_nombre'] or '', fila['id_proveedor']))
+    return filas
+
+
+def calcular(fecha_corte):
+    """
+    Antigüedad de acreedores a la fecha de corte.
+
+    Returns:
+        list[dict]: Una fila por (proveedor, moneda) con los importes por tramo,
+        'total', 'creditos' (devoluciones a crédito sin aplicar) y 'neto'
+    """
+    filas = facturas_pendientes().values('id_proveedor', 'moneda').annotate(
+        total=Sum('pendiente'),
+        **CAMPOS_PROVEEDOR,
+        **vencimientos.sumas_por_tramo(fecha_corte),
+    ).order_by('moneda', 'proveedor_nombre', 'id_proveedor')
+    return _agregar_creditos(vencimientos.redondear_filas(list(filas)))
+
+
+def propuesta_pagos(fecha_objetivo):
+    """
+    Resumen de la corrida de pagos: lo vencido a la fecha objetivo por proveedor.
+
+    Returns:
+        list[dict]: Una fila por (proveedor, moneda) con 'facturas' (cantidad),
+        'total', 'creditos' y 'a_pagar' (total menos créditos, nunca negativo)
+    """
+    from django.db.models import Count
+
+    filas = facturas_pendientes().filter(vencimiento__lte=fecha_objetivo).values('id_proveedor', 'moneda').annotate(
+        facturas=Count('pk'),
+        total=Sum('pendiente'),
+        **CAMPOS_PROVEEDOR,
+    ).order_by('moneda', 'proveedor_nombre', 'id_proveedor')
+    filas = _agregar_creditos(
+        [dict(fila, total=vencimientos.redondear(fila['total'])) for fila in filas], solo_credito=False,
+    )
+    for fila in filas:
+        fila['a_pagar'] = max(fila['neto'], vencimientos.CERO)
+    return filas
+
+
+def facturas_propuesta(fecha_objetivo, proveedor_id=None):
+    """Facturas incluidas en la propuesta (ordenadas por proveedor y vencimiento), leídas por lotes"""
+    facturas = facturas_pendientes().filter(vencimiento__lte=fecha_objetivo)
+    if proveedor_id:
+        facturas = facturas.filter(id_proveedor=proveedor_id)
+    filas = facturas.values(
+        'transaccion', 'id_proveedor', 'moneda', 'serie_documento', 'numero_documento',
+        'fecha_documento', 'vencimiento', 'importe_total', 'pendiente', **CAMPOS_PROVEEDOR,
+    ).order_by('id_proveedor', 'moneda', 'vencimiento', 'transaccion').iterator(chunk_size=2000)
+    for fila in filas:
+        fila['pendiente'] = vencimientos.redondear(fila['pendiente'])
+        yield fila
+
+
+def filas_csv_antiguedad(filas):
+    """Encabezado y filas de la antigüedad de acreedores para exportacion.generar_csv"""
+    columnas = (
+        ['Código', 'Proveedor', 'Moneda'] + [titulo for _, titulo in vencimientos.titulos()]
+        + ['Total', 'Créditos sin aplicar', 'Neto']
+    )
+    datos = (
+        [fila['proveedor_codigo'], fila['proveedor_nombre'], fila['moneda']]
+        + [fila[campo] for campo, _ in vencimientos.titulos()]
+        + [fila['total'], fila['creditos'], fila['neto']]
+        for fila in filas
+    )
+    return columnas, datos
+
+
+def filas_csv_propuesta(fecha_objetivo, proveedor_id=None):
+    """Encabezado y filas (una por factura) de la propuesta de pagos para exportacion.generar_csv"""
+    columnas = [
+        'Código', 'Proveedor', 'Moneda', 'Transacción', 'Documento',
+        'Fecha Documento', 'Vencimiento', 'Importe Total', 'Pendiente',
+    ]
+    datos = (
+        [
+            factura['proveedor_codigo'], factura['proveedor_nombre'], factura['moneda'], factura['transaccion'],
+            f"{factura['serie_documento'] or ''}-{factura['numero_documento'] or ''}".strip('-'),
+            factura['fecha_documento'], factura['vencimiento'], factura['importe_total'], factura['pendiente'],
+        ]
+        for factura in facturas_propuesta(fecha_objetivo, proveedor_id)
+    )
+    return columnas, datos
@@ -8,6 +8,8 @@ from configuracion.documentos.models import Documento
 from configuracion.articulos.models import Moneda, Articulo
 from configuracion.tablas.models import PlazoPago
 from configuracion.disponibilidades.models import Disponibilidad
+from configuracion.disponibilidades import movimientos
+from configuracion.deposito.models import Deposito
 
 
 class ComprasCabezalForm(forms.ModelForm):
@@ -42,6 +44,8 @@ class ComprasCabezalForm(forms.ModelForm):
         
         # Disponibilidades activas (solo para contado)
         self.fields['disponibilidad'].queryset = Disponibilidad.objects.filter(activo='SI')
+        self.fields['deposito'].queryset = Deposito.objects.all()
+        self.fields['deposito'].required = False
         self.fields['disponibilidad'].required = False
         
         # Configurar campos de totales según tipo de compra
@@ -92,6 +96,12 @@ class ComprasCabezalForm(forms.ModelForm):
                 'disponibilidad': 'Debe seleccionar una disponibilidad para forma de pago contado.'
             })
         
+        # La disponibilidad se mueve en su moneda: el documento debe estar en la misma
+        if forma_pago == 'CONTADO':
+            error = movimientos.error_moneda(disponibilidad, cleaned_data.get('moneda'))
+            if error:
+                raise forms.ValidationError({'disponibilidad': error})
+        
         # Validar plazo solo si es crédito
         if forma_pago == 'CREDITO':
             if not plazo:
@@ -146,7 +156,7 @@ class ComprasCabezalForm(forms.ModelForm):
         model = ComprasCabezal
         fields = [
             'id_proveedor', 'tipo_documento', 'serie_documento', 'numero_documento',
-            'forma_pago', 'fecha_documento', 'moneda',
+            'forma_pago', 'fecha_documento', 'moneda', 'deposito',
             'precio_iva_inc', 'plazo', 'fecha_vencimiento', 'disponibilidad',
             'tipo_compra', 'sub_total', 'iva', 'importe_total',
             'observaciones'
@@ -159,6 +169,7 @@ class ComprasCabezalForm(forms.ModelForm):
             'forma_pago': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_forma_pago'}),
             'fecha_documento': forms.DateInput(attrs={'class': 'form-control form-control-sm', 'type': 'date', 'id': 'id_fecha_documento'}),
             'moneda': forms.Select(attrs={'class': 'form-control form-control-sm'}),
+            'deposito': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_deposito'}),
             'precio_iva_inc': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_precio_iva_inc'}, choices=[('SI', 'Sí'), ('NO', 'No')]),
             'plazo': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_plazo'}),
             'fecha_vencimiento': forms.DateInput(attrs={'class': 'form-control form-control-sm', 'type': 'date', 'id': 'id_fecha_vencimiento'}),
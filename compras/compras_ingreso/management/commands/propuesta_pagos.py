@@ -0,0 +1,57 @@
+"""
+Corrida de pagos a proveedores: propuesta de facturas a pagar a una fecha.
+
+Muestra por proveedor y moneda lo vencido a la fecha objetivo, neto de las
+devoluciones a crédito, y opcionalmente escribe el detalle de facturas en un
+CSV (leído por lotes, sin cargar todas las facturas en memoria).
+
+Uso:
+    python manage.py propuesta_pagos --fecha 2026-11-30
+    python manage.py propuesta_pagos --fecha 2026-11-30 --csv propuesta.csv
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from compras.compras_ingreso import antiguedad
+from configuracion.tablas import exportacion
+
+
+class Command(BaseCommand):
+    help = 'Propone las facturas de compra a pagar hasta una fecha, netas de devoluciones a crédito'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', default='', help='Fecha objetivo AAAA-MM-DD (default: hoy)')
+        parser.add_argument('--proveedor', type=int, help='Limitar el detalle a un proveedor (id)')
+        parser.add_argument('--csv', dest='archivo_csv', help='Archivo donde escribir el detalle de facturas')
+
+    def handle(self, *args, **options):
+        try:
+            fecha = datetime.date.fromisoformat(options['fecha']) if options['fecha'] else timezone.localdate()
+        except ValueError:
+            raise CommandError(f"Fecha inválida: {options['fecha']} (use AAAA-MM-DD)")
+
+        filas = antiguedad.propuesta_pagos(fecha)
+        if options['proveedor']:
+            filas = [fila for fila in filas if fila['id_proveedor'] == options['proveedor']]
+
+        self.stdout.write(f"Propuesta de pagos al {fecha:%d/%m/%Y}\n")
+        self.stdout.write(f"{'Proveedor':<45} {'Mon':<4} {'Fact':>6} {'Vencido':>15} {'Créditos':>15} {'A pagar':>15}")
+        totales = {}
+        for fila in filas:
+            nombre = f"{fila['proveedor_codigo'] or ''} - {fila['proveedor_nombre'] or ''}"[:45]
+            self.stdout.write(
+                f"{nombre:<45} {fila['moneda']:<4} {fila['facturas']:>6} "
+                f"{fila['total']:>15,.2f} {fila['creditos']:>15,.2f} {fila['a_pagar']:>15,.2f}"
+            )
+            totales[fila['moneda']] = totales.get(fila['moneda'], 0) + fila['a_pagar']
+        for moneda, total in totales.items():
+            self.stdout.write(self.style.SUCCESS(f"Total a pagar {moneda}: {total:,.2f}"))
+
+        if options['archivo_csv']:
+            columnas, datos = antiguedad.filas_csv_propuesta(fecha, options['proveedor'])
+            with open(options['archivo_csv'], 'w', encoding='utf-8', newline='') as archivo:
+                for linea in exportacion.generar_csv(columnas, datos):
+                    archivo.write(linea)
+            self.stdout.write(f"Detalle de facturas en {options['archivo_csv']}")
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:27
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def cargar_cantidad_devuelta(apps, schema_editor):
+    """Inicializa cantidad_devuelta con las devoluciones ya registradas"""
+    ComprasLineas = apps.get_model('compras_ingreso', 'ComprasLineas')
+    ComprasDevolucionesLineas = apps.get_model('compras_devoluciones', 'ComprasDevolucionesLineas')
+
+    devuelto = ComprasDevolucionesLineas.objects.filter(
+        id_compra_linea=OuterRef('pk')
+    ).order_by().values('id_compra_linea').annotate(total=Sum('cantidad')).values('total')[:1]
+
+    ids = ComprasDevolucionesLineas.objects.filter(
+        id_compra_linea__isnull=False
+    ).values_list('id_compra_linea', flat=True).distinct()
+    ComprasLineas.objects.filter(pk__in=ids).update(
+        cantidad_devuelta=Coalesce(Subquery(devuelto), Value(Decimal('0')), output_field=DecimalField(max_digits=15, decimal_places=2))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras_ingreso', '0001_initial'),
+        ('compras_devoluciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compraslineas',
+            name='cantidad_devuelta',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Suma de las devoluciones de esta línea (la mantiene compras_devoluciones)', max_digits=15, verbose_name='Cantidad Devuelta'),
+        ),
+        migrations.AddIndex(
+            model_name='comprascabezal',
+            index=models.Index(fields=['id_proveedor', 'tipo_documento', 'fecha_documento'], name='compras_cab_prov_tipo_fecha'),
+        ),
+        migrations.RunPython(cargar_cantidad_devuelta, migrations.RunPython.noop),
+    ]
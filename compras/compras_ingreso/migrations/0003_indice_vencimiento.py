@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras_ingreso', '0002_cantidad_devuelta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comprascabezal',
+            index=models.Index(fields=['forma_pago', 'fecha_vencimiento'], name='compras_cab_fpago_venc'),
+        ),
+    ]
@@ -1,13 +1,15 @@
 from django.db import models
 from django.utils import timezone
-from django.db.models import Sum
 from decimal import Decimal
-from configuracion.transacciones.models import Transaccion
+from configuracion.transacciones.models import SecuenciaTransaccion
 from configuracion.proveedores.models import Proveedor
 from configuracion.documentos.models import Documento
 from configuracion.articulos.models import Moneda, Articulo
 from configuracion.tablas.models import PlazoPago
 from configuracion.disponibilidades.models import Disponibilidad
+from configuracion.deposito.models import Deposito
+from configuracion.documentos.servicios import actualizar_totales, linea_guardada, lineas_anteriores
+from configuracion.documentos import precios
 
 
 class ComprasCabezal(models.Model):
@@ -102,6 +104,16 @@ class ComprasCabezal(models.Model):
         help_text='Solo para forma de pago contado',
     )
     
+    deposito = models.ForeignKey(
+        Deposito,
+        on_delete=models.PROTECT,
+        related_name='compras',
+        blank=True,
+        null=True,
+        verbose_name='Depósito',
+        help_text='Depósito que mueve el stock de los artículos stockeables',
+    )
+    
     observaciones = models.TextField(
         blank=True,
         null=True,
@@ -164,6 +176,12 @@ class ComprasCabezal(models.Model):
         verbose_name_plural = 'Compras Cabezal'
         ordering = ['-fchhor', '-transaccion']
         db_table = 'compras_cabezal'
+        indexes = [
+            # Búsqueda de facturas de un proveedor para devoluciones
+            models.Index(fields=['id_proveedor', 'tipo_documento', 'fecha_documento'], name='compras_cab_prov_tipo_fecha'),
+            # Antigüedad de acreedores y propuesta de pagos: compras a crédito por vencimiento
+            models.Index(fields=['forma_pago', 'fecha_vencimiento'], name='compras_cab_fpago_venc'),
+        ]
     
     def __str__(self):
         return f"{self.transaccion} - {self.serie_documento} -{self.numero_documento}"
@@ -171,26 +189,7 @@ class ComprasCabezal(models.Model):
     def save(self, *args, **kwargs):
         # Generar transacción automáticamente si no existe
         if not self.transaccion:
-            now = timezone.now()
-            año = str(now.year)[-2:]
-            mes = str(now.month).zfill(2)
-            prefijo = f"{año}{mes}"
-            
-            # Buscar última transacción del mes
-            ultima = Transaccion.objects.filter(
-                transaccion__startswith=prefijo
-            ).order_by('-transaccion').first()
-            
-            if ultima and ultima.transaccion:
-                try:
-                    ultimo_num = int(ultima.transaccion[4:])
-                    nuevo_num = ultimo_num + 1
-                except ValueError:
-                    nuevo_num = 1
-            else:
-                nuevo_num = 1
-            
-            self.transaccion = f"{prefijo}{str(nuevo_num).zfill(6)}"
+            self.transaccion = SecuenciaTransaccion.siguiente()
         
         # Asignar tipo_documento siempre como 'facprov' (Factura Compra)
         if not self.tipo_documento_id:
@@ -236,23 +235,18 @@ class ComprasCabezal(models.Model):
         
         # Si es "elegir", la fecha_vencimiento la ingresa el usuario manualmente (no se calcula)
         
-        super().save(*args, **kwargs)
+        # Actualizar totales desde las líneas antes de guardar, así el post_save
+        # ve los importes actuales (un cabezal nuevo todavía no tiene líneas)
+        if not self._state.adding:
+            self.actualizar_totales()
         
-        # Actualizar totales desde las líneas
-        self.actualizar_totales()
+        super().save(*args, **kwargs)
     
     def actualizar_totales(self):
         """Actualiza sub_total, iva e importe_total desde las líneas"""
-        lineas = self.lineas.all()
-        self.sub_total = lineas.aggregate(Sum('sub_total'))['sub_total__sum'] or 0
-        self.iva = lineas.aggregate(Sum('iva'))['iva__sum'] or 0
-        self.importe_total = lineas.aggregate(Sum('total'))['total__sum'] or 0
-        # Guardar sin llamar save() para evitar recursión
-        ComprasCabezal.objects.filter(transaccion=self.transaccion).update(
-            sub_total=self.sub_total,
-            iva=self.iva,
-            importe_total=self.importe_total
-        )
+        # Una sola sentencia UPDATE; luego refrescar los valores en memoria
+        actualizar_totales(self)
+        self.refresh_from_db(fields=['sub_total', 'iva', 'importe_total'])
 
 
 class ComprasLineas(models.Model):
@@ -328,6 +322,18 @@ class ComprasLineas(models.Model):
         help_text='sub_total + iva',
     )
     
+    cantidad_devuelta = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='Cantidad Devuelta',
+        help_text='Suma de las devoluciones de esta línea (la mantiene compras_devoluciones)',
+    )
+    
+    # Campos que mantienen otros documentos: no se pisan al editar la compra
+    CAMPOS_ACUMULADOS = ('cantidad_devuelta',)
+    
     class Meta:
         verbose_name = 'Compra Línea'
         verbose_name_plural = 'Compras Líneas'
@@ -338,74 +344,38 @@ class ComprasLineas(models.Model):
     def __str__(self):
         return f"{self.transaccion.transaccion} - Línea {self.linea}"
     
-    def save(self, *args, **kwargs):
+    def calcular_importes(self, contexto=None, tasas=None):
+        """
+        Calcula los importes de la línea (sin guardar).
+        
+        contexto y tasas permiten calcular un lote de líneas del mismo cabezal
+        sin repetir consultas (ver configuracion.documentos.precios).
+        """
         # Validar que precio_original no sea None
         if self.precio_original is None:
             self.precio_original = Decimal('0')
         
-        # Calcular descuento decimal
-        descuento_decimal = Decimal(str(self.descuento)) / Decimal('100') if self.descuento else Decimal('0')
+        if contexto is None:
+            contexto = precios.contexto_cabezal(self.transaccion)
+        importes = precios.calcular_lineas(precios.COMPRA, contexto, [{
+            'articulo': self.id_articulo_id,
+            'precio': self.precio_original,
+            'cantidad': self.cantidad,
+            'descuento': self.descuento,
+        }], tasas)[0]
         
-        # Verificar si el proveedor es monotributista o el tipo de documento
-        es_monotributista = self.transaccion.monotributista == 'SI'
-        es_movprov = self.transaccion.tipo_documento and self.transaccion.tipo_documento.codigo == 'movprov'
-        es_factimp = self.transaccion.tipo_documento and self.transaccion.tipo_documento.codigo == 'factimp'
-        
-        # Obtener IVA del artículo (pero si es monotributista, movprov o factimp, el IVA será 0)
-        if es_monotributista or es_movprov or es_factimp:
-            # Monotributista, Movimiento Proveedor o Factura Importación: no cobra IVA, siempre es 0
-            iva_valor = Decimal('0')
-        elif self.id_articulo and self.id_articulo.iva:
-            iva_valor = Decimal(str(self.id_articulo.iva.valor))
-        else:
-            iva_valor = Decimal('0')
-        
-        # Calcular precio_neto, sub_total e iva según precio_iva_inc del cabezal
-        # IMPORTANTE: Los cálculos se hacen por unidad y luego se multiplican por cantidad
-        # Si es monotributista, precio_iva_inc siempre es 'SI', pero el IVA es 0
-        if self.transaccion.precio_iva_inc == 'SI':
-            # IVA incluido: primero dividir precio_original por (1+IVA), luego aplicar descuento
-            # Orden correcto: precio_original / (1+IVA) * (1-descuento)
-            if iva_valor > 0:
-                # Primero quitar IVA del precio original
-                precio_sin_iva = self.precio_original / (Decimal('1') + iva_valor)
-                # Luego aplicar descuento
-                sub_total_unitario = precio_sin_iva * (Decimal('1') - descuento_decimal)
-                # Calcular IVA sobre el sub_total
-                iva_unitario = sub_total_unitario * iva_valor
-            else:
-                # Sin IVA (monotributista, movprov, factimp o artículo sin IVA)
-                # Solo aplicar descuento
-                sub_total_unitario = self.precio_original * (Decimal('1') - descuento_decimal)
-                iva_unitario = Decimal('0')
-            
-            # precio_neto es el precio después de quitar IVA y aplicar descuento
-            self.precio_neto = sub_total_unitario
-            
-            # Multiplicar por cantidad para sub_total e iva
-            self.sub_total = sub_total_unitario * self.cantidad
-            self.iva = iva_unitario * self.cantidad
-        else:
-            # IVA no incluido: aplicar descuento directamente, luego calcular IVA
-            # precio_neto = precio_original * (1 - descuento)
-            precio_neto_unitario = self.precio_original * (Decimal('1') - descuento_decimal)
-            self.precio_neto = precio_neto_unitario
-            
-            # sub_total = precio_neto (sin IVA)
-            sub_total_unitario = precio_neto_unitario
-            # iva = precio_neto * IVA%
-            iva_unitario = precio_neto_unitario * iva_valor
-            
-            # Multiplicar por cantidad para sub_total e iva
-            self.sub_total = sub_total_unitario * self.cantidad
-            self.iva = iva_unitario * self.cantidad
-        
-        # Calcular total
-        self.total = self.sub_total + self.iva
+        self.precio_neto = importes['precio_neto']
+        self.sub_total = importes['sub_total']
+        self.iva = importes['iva']
+        self.total = importes['total']
+    
+    def save(self, *args, **kwargs):
+        self.calcular_importes()
+        anteriores = lineas_anteriores(type(self), [self.pk])
         
         super().save(*args, **kwargs)
         
-        # Actualizar totales del cabezal
+        # Actualizar totales del cabezal y los saldos que dependen de las líneas
         if self.transaccion:
-            self.transaccion.actualizar_totales()
+            linea_guardada(self, anteriores)
     
\ No newline at end of file
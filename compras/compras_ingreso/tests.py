@@ -0,0 +1,101 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from compras.compras_devoluciones.models import ComprasDevolucionesCabezal, ComprasDevolucionesLineas
+from compras.compras_ingreso import antiguedad
+from compras.compras_ingreso.models import ComprasCabezal, ComprasLineas
+from configuracion.articulos.models import IVA, Articulo, Moneda, TipoArticulo
+from configuracion.documentos.models import Documento
+from configuracion.proveedores.models import Proveedor
+from configuracion.tablas.models import FormaPagoTipo
+
+
+CORTE = datetime.date(2025, 4, 20)
+
+
+class AntiguedadAcreedoresTests(TestCase):
+    """Saldos a pagar por tramo y propuesta de pagos, netos de devoluciones a crédito"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Moneda.objects.create(codigo='UYU', nombre='Peso uruguayo')
+        Moneda.objects.create(codigo='USD', nombre='Dólar')
+        Documento.objects.create(codigo='efactura', nombre='e-Factura')
+        Documento.objects.create(codigo='nc', nombre='Nota de crédito')
+        iva = IVA.objects.create(codigo='iva_b', nombre='IVA Básico', valor=Decimal('0.22'))
+        servicio = TipoArticulo.objects.create(codigo='SER', nombre='Servicio')
+        cls.articulo = Articulo.objects.create(nombre='Servicio', tipo_articulo=servicio, iva=iva)
+        cls.proveedor = Proveedor.objects.create(codigo='P1', razon='Proveedor')
+        cls.otro = Proveedor.objects.create(codigo='P2', razon='Otro proveedor')
+        cls.credito = FormaPagoTipo.objects.create(nombre='Crédito')
+
+    def comprar(self, vencimiento, cantidad, forma_pago='CREDITO', moneda='UYU'):
+        compra = ComprasCabezal.objects.create(
+            id_proveedor=self.proveedor, tipo_documento_id='efactura', numero_documento=str(vencimiento),
+            forma_pago=forma_pago, fecha_documento=vencimiento, fecha_vencimiento=vencimiento, moneda_id=moneda,
+            plazo='elegir',
+        )
+        return ComprasLineas.objects.create(
+            transaccion=compra, linea=1, id_articulo=self.articulo, cantidad=cantidad, precio_original=100,
+        )
+
+    def devolver(self, cantidad, linea=None, proveedor=None, moneda='UYU'):
+        devolucion = ComprasDevolucionesCabezal.objects.create(
+            id_proveedor=proveedor or self.proveedor, tipo_documento_id='nc', numero_documento='1',
+            forma_pago=self.credito, fecha_documento=CORTE, moneda_id=moneda,
+        )
+        return ComprasDevolucionesLineas.objects.create(
+            transaccion=devolucion, linea=1, id_articulo=self.articulo, id_compra_linea=linea,
+            numero_doc_afectado=linea.transaccion.numero_documento if linea else '', cantidad=cantidad, precio=100,
+        )
+
+    def fila(self, filas, proveedor, moneda='UYU'):
+        return next(fila for fila in filas if (fila['id_proveedor'], fila['moneda']) == (proveedor.pk, moneda))
+
+    def test_tramos_por_vencimiento(self):
+        self.comprar(datetime.date(2025, 4, 25), 1)
+        self.comprar(datetime.date(2025, 3, 10), 2)
+
+        fila = self.fila(antiguedad.calcular(CORTE), self.proveedor)
+
+        self.assertEqual(fila['corriente'], Decimal('122.00'))
+        self.assertEqual(fila['d60'], Decimal('244.00'))
+        self.assertEqual(fila['total'], Decimal('366.00'))
+
+    def test_devolucion_aplicada_descuenta_la_compra(self):
+        linea = self.comprar(datetime.date(2025, 3, 10), 2)
+        devolucion = self.devolver(1, linea)
+
+        fila = self.fila(antiguedad.calcular(CORTE), self.proveedor)
+
+        self.assertEqual(fila['d60'], Decimal('244.00') - devolucion.total)
+        self.assertEqual(fila['creditos'], Decimal('0.00'))
+
+    def test_devolucion_en_otra_moneda_es_credito_en_su_moneda(self):
+        linea = self.comprar(datetime.date(2025, 3, 10), 2)
+        devolucion = self.devolver(1, linea, moneda='USD')
+
+        filas = antiguedad.calcular(CORTE)
+
+        self.assertEqual(self.fila(filas, self.proveedor)['total'], Decimal('244.00'))
+        self.assertEqual(self.fila(filas, self.proveedor, 'USD')['creditos'], devolucion.total)
+
+    def test_propuesta_de_pagos(self):
+        self.comprar(datetime.date(2025, 3, 10), 2)
+        self.comprar(datetime.date(2025, 5, 10), 5)
+        contado = self.comprar(datetime.date(2025, 3, 10), 1, forma_pago='CONTADO')
+        devolucion = self.devolver(1, contado)
+        self.devolver(1, proveedor=self.otro)
+
+        filas = antiguedad.propuesta_pagos(CORTE)
+
+        # Los proveedores que solo tienen créditos no entran en la corrida de pagos
+        self.assertEqual(len(filas), 1)
+        fila = filas[0]
+        self.assertEqual(fila['facturas'], 1)
+        self.assertEqual(fila['total'], Decimal('244.00'))
+        self.assertEqual(fila['creditos'], devolucion.total)
+        self.assertEqual(fila['a_pagar'], Decimal('244.00') - devolucion.total)
+        self.assertEqual(len(list(antiguedad.facturas_propuesta(CORTE))), 1)
@@ -8,6 +8,8 @@ urlpatterns = [
     # URLs para compras
     path('compras/', views.lista_compras, name='lista_compras'),
     path('compras/nueva/', views.crear_compra, name='crear_compra'),
+    path('compras/antiguedad-acreedores/', views.antiguedad_acreedores, name='antiguedad_acreedores'),
+    path('compras/propuesta-pagos/', views.propuesta_pagos, name='propuesta_pagos'),
     path('compras/<str:transaccion>/', views.detalle_compra, name='detalle_compra'),
     path('compras/<str:transaccion>/editar/', views.editar_compra, name='editar_compra'),
     path('compras/<str:transaccion>/eliminar/', views.eliminar_compra, name='eliminar_compra'),
@@ -1,19 +1,21 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import transaction
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-import json
 from .models import ComprasCabezal, ComprasLineas
 from .forms import (
     ComprasCabezalForm, ComprasLineasForm, ComprasLineasFormSet
 )
 from configuracion.proveedores.models import Proveedor
-from configuracion.tablas.models import PlazoPago
 from configuracion.transacciones.models import Transaccion
 from configuracion.documentos.models import Documento
+from configuracion.documentos import vencimientos
+from configuracion.documentos.servicios import guardar_cabezal, registrar_lineas
 from configuracion.articulos.models import Articulo, CodigoProveedorCompra
+from configuracion.tablas import busqueda, datos_referencia, exportacion
+from . import antiguedad
 from erp_demo.config import EMPRESA_NOMBRE
 
 
@@ -50,6 +52,87 @@ def lista_compras(request):
     return render(request, 'compras_ingreso/lista_compras.html', context)
 
 
+def _fecha_parametro(request, nombre):
+    """Fecha AAAA-MM-DD del GET o hoy si falta o es inválida"""
+    import datetime
+    from django.utils import timezone
+
+    try:
+        return datetime.date.fromisoformat(request.GET.get(nombre, ''))
+    except ValueError:
+        return timezone.localdate()
+
+
+def _respuesta_csv(columnas, datos, nombre_archivo):
+    response = StreamingHttpResponse(
+        exportacion.generar_csv(columnas, datos),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+
+def antiguedad_acreedores(request):
+    """Vista del informe de antigüedad de acreedores (compras a crédito por vencimiento)"""
+    fecha_corte = _fecha_parametro(request, 'fecha_corte')
+    filas = antiguedad.calcular(fecha_corte)
+
+    moneda = request.GET.get('moneda', '')
+    monedas = sorted({fila['moneda'] for fila in filas})
+    if moneda:
+        filas = [fila for fila in filas if fila['moneda'] == moneda]
+
+    if request.GET.get('formato') == 'csv':
+        columnas, datos = antiguedad.filas_csv_antiguedad(filas)
+        return _respuesta_csv(columnas, datos, f'antiguedad_acreedores_{fecha_corte.isoformat()}.csv')
+
+    context = {
+        'filas': filas,
+        'totales': vencimientos.totales(filas, campos_extra=('total', 'creditos', 'neto')),
+        'tramos': vencimientos.titulos(),
+        'fecha_corte': fecha_corte,
+        'moneda': moneda,
+        'monedas': monedas,
+        'empresa_nombre': EMPRESA_NOMBRE,
+        'titulo': 'Antigüedad de Acreedores',
+    }
+    return render(request, 'compras_ingreso/antiguedad_acreedores.html', context)
+
+
+def propuesta_pagos(request):
+    """Vista de la propuesta de pagos: facturas vencidas a la fecha objetivo, netas de créditos"""
+    fecha_objetivo = _fecha_parametro(request, 'fecha_objetivo')
+    proveedor_id = request.GET.get('proveedor') or None
+
+    if request.GET.get('formato') == 'csv':
+        columnas, datos = antiguedad.filas_csv_propuesta(fecha_objetivo, proveedor_id)
+        return _respuesta_csv(columnas, datos, f'propuesta_pagos_{fecha_objetivo.isoformat()}.csv')
+
+    filas = antiguedad.propuesta_pagos(fecha_objetivo)
+
+    # Detalle de facturas de un proveedor (la lista completa se descarga en CSV)
+    facturas = None
+    if proveedor_id:
+        facturas = list(antiguedad.facturas_propuesta(fecha_objetivo, proveedor_id))
+
+    totales = {}
+    for fila in filas:
+        total = totales.setdefault(fila['moneda'], {'facturas': 0, 'total': 0, 'creditos': 0, 'a_pagar': 0})
+        for campo in total:
+            total[campo] += fila[campo]
+
+    context = {
+        'filas': filas,
+        'totales': totales,
+        'facturas': facturas,
+        'proveedor_id': proveedor_id,
+        'fecha_objetivo': fecha_objetivo,
+        'empresa_nombre': EMPRESA_NOMBRE,
+        'titulo': 'Propuesta de Pagos',
+    }
+    return render(request, 'compras_ingreso/propuesta_pagos.html', context)
+
+
 @transaction.atomic
 def crear_compra(request):
     """Vista para crear una nueva compra con guardado transaccional"""
@@ -116,24 +199,21 @@ def crear_compra(request):
                 if 'precio_iva_inc' in request.POST and request.POST['precio_iva_inc'] == 'SI' and cabezal.id_proveedor and cabezal.id_proveedor.monotributista == 'SI':
                     cabezal.precio_iva_inc = 'SI'
                 # La transacción y fecha_movimiento se generan automáticamente en el save()
-                cabezal.save()
+                guardar_cabezal(cabezal)
                 
                 # Guardar líneas - asegurar que tengan número de línea
                 lineas = formset.save(commit=False)
-                lineas_guardadas = 0
-                for idx, linea in enumerate(lineas, start=1):
+                lineas_validas = []
+                for linea in lineas:
                     # Solo guardar si tiene artículo y cantidad válidos (ignorar líneas vacías)
-                    if linea.id_articulo and linea.cantidad and linea.cantidad > 0:
-                        linea.transaccion = cabezal
-                        lineas_guardadas += 1
+                    if linea.id_articulo_id and linea.cantidad and linea.cantidad > 0:
+                        lineas_validas.append(linea)
                         # Asignar número de línea si no tiene
                         if not linea.linea or linea.linea == 0:
-                            linea.linea = lineas_guardadas
-                        linea.save()
+                            linea.linea = len(lineas_validas)
                 
-                # Eliminar líneas marcadas para eliminar
-                for obj in formset.deleted_objects:
-                    obj.delete()
+                # Guardar en bloque, eliminar las marcadas y actualizar totales del cabezal
+                registrar_lineas(cabezal, lineas_validas, formset.deleted_objects)
                 
                 # Crear registro en tabla Transaccion
                 try:
@@ -146,9 +226,6 @@ def crear_compra(request):
                     )
                 except Documento.DoesNotExist:
                     pass
-                
-                # Actualizar totales desde las líneas
-                cabezal.actualizar_totales()
             
                 messages.success(request, f'Compra {cabezal.transaccion} creada exitosamente.')
                 return redirect('compras_ingreso:detalle_compra', transaccion=cabezal.transaccion)
@@ -179,45 +256,13 @@ def crear_compra(request):
         if len(formset.forms) > 1:
             formset.forms = formset.forms[:1]
     
-    # Obtener datos para JavaScript
-    proveedores_data = []
-    for proveedor in Proveedor.objects.filter(activo='SI'):
-        proveedores_data.append({
-            'id': proveedor.id,
-            'codigo': proveedor.codigo,
-            'razon': proveedor.razon or '',
-            'nombre_comercial': proveedor.nombre_comercial or '',
-            'formadepago': proveedor.formadepago or '',
-            'monotributista': proveedor.monotributista or 'NO',
-        })
-    
-    formas_pago_data = []
-    for fp in PlazoPago.objects.all():
-        formas_pago_data.append({
-            'codigo': fp.codigo,
-            'descripcion': fp.descripcion,
-            'plazo_en_dias': int(fp.plazo_en_dias) if fp.plazo_en_dias else 0,
-            'fin_de_mes': bool(fp.fin_de_mes) if fp.fin_de_mes is not None else False,
-        })
-    
-    # Obtener artículos para el select
-    articulos_data = []
-    for articulo in Articulo.objects.filter(ACTIVO_COMPRAS='SI').select_related('iva'):
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-        })
-    
     context = {
         'form': form,
         'formset': formset,
         'titulo': 'Nueva Compra',
         'empresa_nombre': EMPRESA_NOMBRE,
-        'proveedores_data': json.dumps(proveedores_data),
-        'formas_pago_data': json.dumps(formas_pago_data),
-        'articulos_data': json.dumps(articulos_data),
+        # Catálogos para JavaScript (se cargan desde /api/refdata/<tipo>, cacheados por versión)
+        'datos_referencia': datos_referencia.urls_scripts('proveedores', 'formas_pago', 'articulos_compras'),
     }
     return render(request, 'compras_ingreso/form_compra.html', context)
 
@@ -240,20 +285,13 @@ def editar_compra(request, transaccion):
             # Si viene del campo hidden (monotributista), usar ese valor
             if 'precio_iva_inc' in request.POST and request.POST['precio_iva_inc'] == 'SI' and cabezal.id_proveedor and cabezal.id_proveedor.monotributista == 'SI':
                 cabezal.precio_iva_inc = 'SI'
-            cabezal.save()
+            guardar_cabezal(cabezal)
             
             # Guardar líneas
             lineas = formset.save(commit=False)
-            for linea in lineas:
-                linea.transaccion = cabezal
-                linea.save()
             
-            # Eliminar líneas marcadas para eliminar
-            for obj in formset.deleted_objects:
-                obj.delete()
-            
-            # Actualizar totales
-            cabezal.actualizar_totales()
+            # Guardar en bloque, eliminar las marcadas y actualizar totales del cabezal
+            registrar_lineas(cabezal, lineas, formset.deleted_objects)
             
             messages.success(request, f'Compra {cabezal.transaccion} actualizada exitosamente.')
             return redirect('compras_ingreso:detalle_compra', transaccion=cabezal.transaccion)
@@ -263,46 +301,14 @@ def editar_compra(request, transaccion):
         form = ComprasCabezalForm(instance=compra)
         formset = ComprasLineasFormSet(instance=compra)
     
-    # Obtener datos para JavaScript
-    proveedores_data = []
-    for proveedor in Proveedor.objects.filter(activo='SI'):
-        proveedores_data.append({
-            'id': proveedor.id,
-            'codigo': proveedor.codigo,
-            'razon': proveedor.razon or '',
-            'nombre_comercial': proveedor.nombre_comercial or '',
-            'formadepago': proveedor.formadepago or '',
-            'monotributista': proveedor.monotributista or 'NO',
-        })
-    
-    formas_pago_data = []
-    for fp in PlazoPago.objects.all():
-        formas_pago_data.append({
-            'codigo': fp.codigo,
-            'descripcion': fp.descripcion,
-            'plazo_en_dias': int(fp.plazo_en_dias) if fp.plazo_en_dias else 0,
-            'fin_de_mes': bool(fp.fin_de_mes) if fp.fin_de_mes is not None else False,
-        })
-    
-    # Obtener artículos para el select
-    articulos_data = []
-    for articulo in Articulo.objects.filter(ACTIVO_COMPRAS='SI').select_related('iva'):
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-        })
-    
     context = {
         'form': form,
         'formset': formset,
         'compra': compra,
         'titulo': f'Editar Compra {compra.transaccion}',
         'empresa_nombre': EMPRESA_NOMBRE,
-        'proveedores_data': json.dumps(proveedores_data),
-        'formas_pago_data': json.dumps(formas_pago_data),
-        'articulos_data': json.dumps(articulos_data),
+        # Catálogos para JavaScript (se cargan desde /api/refdata/<tipo>, cacheados por versión)
+        'datos_referencia': datos_referencia.urls_scripts('proveedores', 'formas_pago', 'articulos_compras'),
     }
     return render(request, 'compras_ingreso/form_compra.html', context)
 
@@ -367,23 +373,11 @@ def buscar_proveedores(request):
     try:
         query = request.GET.get('q', '').strip()
         
-        if not query:
-            proveedores = Proveedor.objects.filter(activo='SI').order_by('razon', 'nombre_comercial')[:50]
-        else:
-            proveedores = Proveedor.objects.filter(
-                activo='SI'
-            ).filter(
-                razon__icontains=query
-            ) | Proveedor.objects.filter(
-                activo='SI'
-            ).filter(
-                nombre_comercial__icontains=query
-            ) | Proveedor.objects.filter(
-                activo='SI'
-            ).filter(
-                codigo__icontains=query
-            )
-            proveedores = proveedores.distinct().order_by('razon', 'nombre_comercial')[:50]
+        # Búsqueda indexada (trigramas en PostgreSQL, FTS5 en SQLite), ordenada por relevancia
+        proveedores = busqueda.buscar(
+            Proveedor.objects.filter(activo='SI').order_by('razon', 'nombre_comercial'),
+            'proveedores', query,
+        )
         
         resultados = []
         for proveedor in proveedores:
@@ -423,10 +417,13 @@ def buscar_articulos(request):
                 return JsonResponse({'results': []})
             
             # Buscar en CodigoProveedorCompra por código_proveedor y proveedor
-            codigos_proveedor = CodigoProveedorCompra.objects.filter(
-                proveedor_id=proveedor_id,
-                codigo_proveedor__icontains=query
-            ).select_related('articulo', 'articulo__iva')
+            codigos_proveedor = busqueda.buscar(
+                CodigoProveedorCompra.objects.filter(
+                    proveedor_id=proveedor_id,
+                    articulo__ACTIVO_COMPRAS='SI',
+                ).select_related('articulo', 'articulo__iva'),
+                'codigos_proveedor', query,
+            )
             
             resultados = []
             for codigo_prov in codigos_proveedor:
@@ -445,19 +442,11 @@ def buscar_articulos(request):
         
         else:
             # Buscar por nombre (modo por defecto)
-            if not query:
-                articulos = Articulo.objects.filter(ACTIVO_COMPRAS='SI').select_related('iva').order_by('nombre')[:50]
-            else:
-                articulos = Articulo.objects.filter(
-                    ACTIVO_COMPRAS='SI'
-                ).filter(
-                    nombre__icontains=query
-                ) | Articulo.objects.filter(
-                    ACTIVO_COMPRAS='SI'
-                ).filter(
-                    producto_id__icontains=query
-                )
-                articulos = articulos.distinct().select_related('iva').order_by('nombre')[:50]
+            # Búsqueda indexada (trigramas en PostgreSQL, FTS5 en SQLite), ordenada por relevancia
+            articulos = busqueda.buscar(
+                Articulo.objects.filter(ACTIVO_COMPRAS='SI').select_related('iva').order_by('nombre'),
+                'articulos', query,
+            )
             
             resultados = []
             for articulo in articulos:
@@ -1,6 +1,6 @@
 from unfold.admin import ModelAdmin
 from django.contrib import admin
-from .models import TipoArticulo, Familia, SubFamilia, Articulo, CodigoProveedorCompra, Moneda, IVA
+from .models import TipoArticulo, Familia, SubFamilia, Articulo, CodigoProveedorCompra, Moneda, TipoCambio, IVA
 
 
 @admin.register(TipoArticulo)
@@ -46,6 +46,13 @@ class MonedaAdmin(ModelAdmin):
     list_editable = ('activo',)
 
 
+@admin.register(TipoCambio)
+class TipoCambioAdmin(ModelAdmin):
+    list_display = ('moneda', 'fecha', 'cotizacion')
+    list_filter = ('moneda',)
+    date_hierarchy = 'fecha'
+
+
 @admin.register(IVA)
 class IVAAdmin(ModelAdmin):
     list_display = ('codigo', 'nombre', 'valor', 'activo')
@@ -7,3 +7,8 @@ class ArticulosConfig(AppConfig):
     label = 'articulos'  # Mantener el label original para compatibilidad con migraciones
     verbose_name = 'Artículos'
 
+
+    def ready(self):
+        from configuracion.articulos import costos, cotizaciones
+        cotizaciones.conectar_senales()
+        costos.conectar_senales()
@@ -0,0 +1,251 @@
+"""
+Costo promedio ponderado de los artículos stockeables.
+
+CostoPromedio guarda, por artículo y por cada fecha con movimientos, la
+existencia y el costo promedio (en moneda base) al cierre del día. Las compras
+entran al sub_total de la línea (sin IVA, convertido con cotizaciones a la
+fecha del documento) y las devoluciones de compra salen a su propio sub_total;
+ventas y devoluciones de venta mueven la existencia al costo vigente.
+
+Al registrar, modificar o eliminar un documento solo se recalculan sus
+artículos y solo desde la fecha del documento: se parte de la última fila
+anterior a esa fecha y se reprocesan los días siguientes. Un documento del día
+reprocesa un solo día; uno con fecha atrasada, desde esa fecha en adelante.
+Las líneas de venta de esos días reciben el costo recalculado (costo_unitario),
+así el costo de ventas y el margen se obtienen con una suma.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from configuracion.articulos import cotizaciones
+from configuracion.documentos.senales import documento_registrado, registrando_lineas
+
+
+CERO = Decimal('0')
+
+CUATRO_DECIMALES = Decimal('0.0001')
+
+# origen -> modelo del cabezal 'app_label.Modelo'
+ORIGENES = {
+    'COMPRA': 'compras_ingreso.ComprasCabezal',
+    'DEVOLUCION_COMPRA': 'compras_devoluciones.ComprasDevolucionesCabezal',
+    'VENTA': 'ventas_ingreso.VentasCabezal',
+    'DEVOLUCION_VENTA': 'ventas_devoluciones.VentasDevolucionesCabezal',
+}
+
+FILTRO_STOCKEABLE = {
+    'id_articulo__tipo_articulo__stockeable': 'SI',
+    'id_articulo__ACTIVO_STOCK': 'SI',
+}
+
+
+def _modelo(origen):
+    from django.apps import apps
+    return apps.get_model(ORIGENES[origen])
+
+
+def _lineas(origen):
+    return _modelo(origen).lineas.field.model.objects
+
+
+def _dias(articulos, desde):
+    """
+    Movimientos agrupados por artículo y día desde la fecha (4 consultas agrupadas).
+
+    Returns:
+        dict: {articulo_id: {fecha: {'entrada', 'importe', 'salida'}}}
+    """
+    monedas = cotizaciones.tabla()
+    dias = {}
+
+    def dia(articulo, fecha):
+        return dias.setdefault(articulo, {}).setdefault(
+            fecha, {'entrada': CERO, 'importe': CERO, 'salida': CERO, 'sin_costo': CERO, 'ventas': False}
+        )
+
+    for origen, signo in (('COMPRA', 1), ('DEVOLUCION_COMPRA', -1)):
+        filas = _lineas(origen).filter(
+            id_articulo__in=articulos, transaccion__fecha_documento__gte=desde, **FILTRO_STOCKEABLE,
+        ).order_by().values('id_articulo', 'transaccion__fecha_documento', 'transaccion__moneda').annotate(
+            cantidad=Sum('cantidad'), importe=Sum('sub_total'),
+        )
+        for fila in filas:
+            actual = dia(fila['id_articulo'], fila['transaccion__fecha_documento'])
+            factor = cotizaciones.factor(
+                fila['transaccion__moneda'], cotizaciones.MONEDA_BASE, fila['transaccion__fecha_documento'], monedas,
+            )
+            if factor is None:
+                # Sin cotización la entrada se valoriza al costo promedio vigente
+                actual['sin_costo'] += signo * (fila['cantidad'] or CERO)
+                continue
+            actual['entrada'] += signo * (fila['cantidad'] or CERO)
+            actual['importe'] += signo * Decimal(fila['importe'] or 0) * factor
+
+    for origen, signo in (('VENTA', 1), ('DEVOLUCION_VENTA', -1)):
+        filas = _lineas(origen).filter(
+            id_articulo__in=articulos, transaccion__fecha_documento__gte=desde, **FILTRO_STOCKEABLE,
+        ).order_by().values('id_articulo', 'transaccion__fecha_documento').annotate(cantidad=Sum('cantidad'))
+        for fila in filas:
+            actual = dia(fila['id_articulo'], fila['transaccion__fecha_documento'])
+            actual['salida'] += signo * (fila['cantidad'] or CERO)
+            # Aunque ventas y devoluciones se compensen, las líneas del día reciben el costo
+            actual['ventas'] = True
+
+    return dias
+
+
+def _aplicar_dia(existencia, costo, movimiento):
+    """Existencia y costo al cierre del día: primero las entradas, después las salidas"""
+    entrada, importe = movimiento['entrada'], movimiento['importe']
+    if entrada:
+        nueva = existencia + entrada
+        if existencia > 0 and nueva > 0:
+            costo = (existencia * costo + importe) / nueva
+        elif entrada > 0 and importe > 0:
+            # Sin existencia positiva previa el costo es el de la entrada
+            costo = importe / entrada
+        existencia = nueva
+    existencia += movimiento['sin_costo'] - movimiento['salida']
+    return existencia, costo.quantize(CUATRO_DECIMALES)
+
+
+def estado_anterior(articulo_id, fecha):
+    """(existencia, costo) al cierre del último día con movimientos anterior a la fecha"""
+    from configuracion.articulos.models import CostoPromedio
+
+    fila = CostoPromedio.objects.filter(articulo_id=articulo_id, fecha__lt=fecha).order_by('-fecha').values_list(
+        'existencia', 'costo_unitario',
+    ).first()
+    return fila or (CERO, CERO)
+
+
+@transaction.atomic
+def recalcular(articulos, desde):
+    """
+    Recalcula el costo promedio de los artículos desde la fecha (inclusive).
+
+    Reescribe las filas de CostoPromedio desde esa fecha y el costo_unitario
+    de las líneas de venta de los días reprocesados. Los artículos quedan
+    bloqueados (en orden de clave) hasta el fin de la transacción, así dos
+    documentos simultáneos del mismo artículo se recalculan uno después del otro.
+
+    Returns:
+        int: Cantidad de días recalculados
+    """
+    from configuracion.articulos.models import Articulo, CostoPromedio
+    from ventas.ventas_ingreso.models import VentasLineas
+
+    articulos = list(Articulo.objects.select_for_update(of=('self',)).filter(
+        pk__in=set(articulos), tipo_articulo__stockeable='SI', ACTIVO_STOCK='SI',
+    ).order_by('pk').values_list('pk', flat=True))
+    if not articulos:
+        return 0
+
+    dias = _dias(articulos, desde)
+    nuevas = []
+    costos_venta = []
+    for articulo in articulos:
+        existencia, costo = estado_anterior(articulo, desde)
+        for fecha, movimiento in sorted(dias.get(articulo, {}).items()):
+            existencia, costo = _aplicar_dia(existencia, costo, movimiento)
+            nuevas.append(CostoPromedio(articulo_id=articulo, fecha=fecha, existencia=existencia, costo_unitario=costo))
+            if movimiento['ventas']:
+                costos_venta.append((articulo, fecha, costo))
+
+    CostoPromedio.objects.filter(articulo__in=articulos, fecha__gte=desde).delete()
+    CostoPromedio.objects.bulk_create(nuevas)
+    for articulo, fecha, costo in costos_venta:
+        VentasLineas.objects.filter(
+            id_articulo=articulo, transaccion__fecha_documento=fecha,
+        ).exclude(costo_unitario=costo).update(costo_unitario=costo)
+    return len(nuevas)
+
+
+def costo_actual(articulo_id, fecha=None):
+    """Costo promedio del artículo al cierre de la fecha (el último si no se indica)"""
+    from configuracion.articulos.models import CostoPromedio
+
+    costos = CostoPromedio.objects.filter(articulo_id=articulo_id)
+    if fecha is not None:
+        costos = costos.filter(fecha__lte=fecha)
+    return costos.order_by('-fecha').values_list('costo_unitario', flat=True).first() or CERO
+
+
+def recalcular_documento(origen, transaccion_id, articulos=(), desde=None):
+    """
+    Recalcula los artículos del documento desde su fecha.
+
+    Args:
+        articulos: Artículos extra (líneas eliminadas o de antes de la modificación)
+        desde: Fecha anterior del documento si cambió (se toma la menor)
+    """
+    datos = _modelo(origen).objects.filter(pk=transaccion_id).values_list('fecha_documento', flat=True).first()
+    articulos = set(articulos) | set(
+        _lineas(origen).filter(transaccion=transaccion_id).values_list('id_articulo', flat=True)
+    )
+    fechas = [fecha for fecha in (datos, desde) if fecha]
+    if articulos and fechas:
+        recalcular(articulos, min(fechas))
+
+
+def _receptor_registrado(origen):
+    def receptor(sender, cabezal, lineas=(), eliminadas=(), anteriores=None, **kwargs):
+        articulos = {linea.id_articulo_id for linea in list(lineas) + list(eliminadas)}
+        articulos |= {linea.id_articulo_id for linea in (anteriores or {}).values()}
+        recalcular_documento(origen, cabezal.pk, articulos, desde=cabezal.__dict__.pop('_costo_desde', None))
+    return receptor
+
+
+def _receptor_pre_save(sender, instance, raw=False, **kwargs):
+    # La fecha y la moneda anteriores deciden si hay que recalcular al guardar el cabezal
+    instance._costo_anterior = None
+    if not raw and instance.pk:
+        instance._costo_anterior = type(instance).objects.filter(pk=instance.pk).values_list(
+            'fecha_documento', 'moneda',
+        ).first()
+
+
+def _receptor_post_save(origen):
+    def receptor(sender, instance, raw=False, created=False, **kwargs):
+        anterior = getattr(instance, '_costo_anterior', None)
+        if raw or created or anterior is None:
+            return
+        fecha, moneda = anterior
+        if fecha != instance.fecha_documento or moneda != instance.moneda_id:
+            if registrando_lineas(instance):
+                # Se recalcula una vez, al registrar las líneas, desde la fecha anterior
+                instance._costo_desde = fecha
+            else:
+                recalcular_documento(origen, instance.pk, desde=fecha)
+    return receptor
+
+
+def _receptor_pre_delete(sender, instance, **kwargs):
+    instance._costo_articulos = set(instance.lineas.values_list('id_articulo', flat=True))
+
+
+def _receptor_post_delete(sender, instance, **kwargs):
+    articulos = getattr(instance, '_costo_articulos', ())
+    if articulos:
+        recalcular(articulos, instance.fecha_documento)
+
+
+# Se guardan a nivel de módulo: las señales mantienen referencias débiles a los receptores
+_RECEPTORES = {origen: (_receptor_registrado(origen), _receptor_post_save(origen)) for origen in ORIGENES}
+
+
+def conectar_senales():
+    """Conecta las señales de compras, ventas y devoluciones (desde ArticulosConfig.ready)"""
+    for origen in ORIGENES:
+        modelo = _modelo(origen)
+        registrado, guardado = _RECEPTORES[origen]
+        documento_registrado.connect(
+            registrado, sender=modelo.lineas.field.model, dispatch_uid=f'costos_registrado_{origen}'
+        )
+        pre_save.connect(_receptor_pre_save, sender=modelo, dispatch_uid=f'costos_pre_save_{origen}')
+        post_save.connect(guardado, sender=modelo, dispatch_uid=f'costos_post_save_{origen}')
+        pre_delete.connect(_receptor_pre_delete, sender=modelo, dispatch_uid=f'costos_pre_delete_{origen}')
+        post_delete.connect(_receptor_post_delete, sender=modelo, dispatch_uid=f'costos_post_delete_{origen}')
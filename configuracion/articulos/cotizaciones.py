@@ -0,0 +1,196 @@
+"""
+Tipos de cambio por fecha y conversión de importes entre monedas.
+
+Cada TipoCambio rige desde su fecha hasta la siguiente cotización de la misma
+moneda. La tabla completa se carga una vez por proceso en listas ordenadas por
+fecha y la cotización a una fecha se busca con bisect (O(log n), sin consultas).
+Al guardar o eliminar un tipo de cambio se incrementa su versión en la base
+(configuracion.tablas.versiones); cada proceso compara esa versión antes de usar
+su copia y la recarga si cambió.
+
+Las conversiones pasan por la moneda base (UYU): importe * cotización(origen) /
+cotización(destino), ambas a la fecha del documento.
+"""
+import bisect
+import threading
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save
+
+from configuracion.tablas import versiones
+
+
+MONEDA_BASE = 'UYU'
+
+CLAVE_VERSION = 'tipos_cambio'
+
+UNO = Decimal('1')
+
+_tabla = {'version': None, 'monedas': {}}
+_bloqueo = threading.Lock()
+
+
+def _cargar():
+    """{moneda: ([fechas], [cotizaciones])} ordenado por fecha, en una sola consulta"""
+    from configuracion.articulos.models import TipoCambio
+
+    monedas = {}
+    for moneda, fecha, cotizacion in TipoCambio.objects.order_by('moneda', 'fecha').values_list(
+        'moneda', 'fecha', 'cotizacion'
+    ):
+        fechas, cotizaciones = monedas.setdefault(moneda, ([], []))
+        fechas.append(fecha)
+        cotizaciones.append(cotizacion)
+    return monedas
+
+
+def tabla():
+    """Tabla de cotizaciones del proceso, recargada si otro proceso la modificó"""
+    version = versiones.obtener(CLAVE_VERSION)
+    if _tabla['version'] != version:
+        with _bloqueo:
+            if _tabla['version'] != version:
+                _tabla['monedas'] = _cargar()
+                _tabla['version'] = version
+    return _tabla['monedas']
+
+
+def cotizacion(moneda, fecha, monedas=None):
+    """
+    Cotización de la moneda (en moneda base) vigente a la fecha.
+
+    Returns:
+        Decimal | None: None si no hay cotización anterior o igual a la fecha
+    """
+    if moneda == MONEDA_BASE:
+        return UNO
+    fechas, cotizaciones = (tabla() if monedas is None else monedas).get(moneda, ((), ()))
+    posicion = bisect.bisect_right(fechas, fecha)
+    return cotizaciones[posicion - 1] if posicion else None
+
+
+def factor(origen, destino, fecha, monedas=None):
+    """Factor para pasar importes de origen a destino a la fecha (None si falta alguna cotización)"""
+    if origen == destino:
+        return UNO
+    monedas = tabla() if monedas is None else monedas
+    desde = cotizacion(origen, fecha, monedas)
+    hasta = cotizacion(destino, fecha, monedas)
+    if desde is None or not hasta:
+        return None
+    return desde / hasta
+
+
+def convertir(importe, origen, fecha, destino=MONEDA_BASE):
+    """Importe convertido a la moneda destino, redondeado a 2 decimales (None sin cotización)"""
+    multiplicador = factor(origen, destino, fecha)
+    if multiplicador is None:
+        return None
+    return (Decimal(importe or 0) * multiplicador).quantize(Decimal('0.01'))
+
+
+def total_convertido(queryset, destino=MONEDA_BASE, importe='importe_total', moneda='moneda', fecha='fecha_documento'):
+    """
+    Suma de un queryset de documentos convertida a la moneda destino.
+
+    Agrupa en la base por (moneda, fecha), así se convierte una fila por
+    combinación y no una por documento.
+
+    Returns:
+        tuple: (total en destino, set de monedas sin cotización a alguna fecha)
+    """
+    monedas = tabla()
+    total = Decimal('0')
+    sin_cotizacion = set()
+    grupos = queryset.order_by().values_list(moneda, fecha).annotate(suma=Sum(importe))
+    for codigo, dia, suma in grupos:
+        multiplicador = factor(codigo, destino, dia, monedas)
+        if multiplicador is None:
+            sin_cotizacion.add(codigo)
+            continue
+        total += Decimal(suma or 0) * multiplicador
+    return total.quantize(Decimal('0.01')), sin_cotizacion
+
+
+def consolidar(totales_por_moneda, fecha, destino=MONEDA_BASE):
+    """
+    Convierte y suma totales de informe {moneda: {campo: importe}} a una moneda.
+
+    Returns:
+        dict | None: {campo: importe en destino}, o None si falta alguna cotización
+    """
+    monedas = tabla()
+    consolidado = {}
+    for codigo, totales in totales_por_moneda.items():
+        multiplicador = factor(codigo, destino, fecha, monedas)
+        if multiplicador is None:
+            return None
+        for campo, importe in totales.items():
+            consolidado[campo] = consolidado.get(campo, Decimal('0')) + Decimal(importe or 0) * multiplicador
+    return {campo: importe.quantize(Decimal('0.01')) for campo, importe in consolidado.items()}
+
+
+def _cotizaciones_vector(moneda, fechas, monedas):
+    """Cotizaciones de una moneda para un array datetime64[D] (NaN antes de la primera)"""
+    import numpy as np
+
+    if moneda == MONEDA_BASE:
+        return np.ones(len(fechas))
+    tabla_fechas, tabla_cotizaciones = monedas.get(moneda, ((), ()))
+    resultado = np.full(len(fechas), np.nan)
+    if not tabla_fechas:
+        return resultado
+    posiciones = np.searchsorted(np.array(tabla_fechas, dtype='datetime64[D]'), fechas, side='right') - 1
+    validas = posiciones >= 0
+    resultado[validas] = np.array(tabla_cotizaciones, dtype=float)[posiciones[validas]]
+    return resultado
+
+
+def convertir_dataframe(df, destino=MONEDA_BASE, importe='importe_total', moneda='moneda', fecha='fecha_documento', columna=None):
+    """
+    Agrega al DataFrame la columna del importe convertido a destino (por defecto 'importe_<destino>').
+
+    La búsqueda de cotizaciones es vectorizada (numpy.searchsorted por moneda);
+    las filas sin cotización quedan en NaN. Devuelve una copia.
+    """
+    import numpy as np
+    import pandas as pd
+
+    monedas = tabla()
+    columna = columna or f'importe_{destino.lower()}'
+    df = df.copy()
+    fechas = pd.to_datetime(df[fecha]).to_numpy(dtype='datetime64[D]')
+    codigos = df[moneda].to_numpy()
+
+    hasta = _cotizaciones_vector(destino, fechas, monedas)
+    desde = np.full(len(df), np.nan)
+    for codigo in pd.unique(codigos):
+        filas = codigos == codigo
+        desde[filas] = _cotizaciones_vector(codigo, fechas[filas], monedas)
+
+    df[columna] = (df[importe].astype(float) * desde / hasta).round(2)
+    return df
+
+
+def convertir_queryset(queryset, destino=MONEDA_BASE, campos=(), importe='importe_total', moneda='moneda', fecha='fecha_documento'):
+    """DataFrame de los documentos (campos + importe, moneda y fecha) con el importe convertido a destino"""
+    import pandas as pd
+
+    columnas = list(dict.fromkeys([*campos, importe, moneda, fecha]))
+    filas = queryset.order_by().values_list(*columnas).iterator(chunk_size=2000)
+    df = pd.DataFrame.from_records(filas, columns=columnas)
+    return convertir_dataframe(df, destino, importe, moneda, fecha)
+
+
+def invalidar(**kwargs):
+    """Descarta la tabla cargada en todos los procesos"""
+    versiones.incrementar(CLAVE_VERSION)
+
+
+def conectar_senales():
+    """Invalida la tabla al modificar tipos de cambio (desde ArticulosConfig.ready)"""
+    from configuracion.articulos.models import TipoCambio
+
+    post_save.connect(invalidar, sender=TipoCambio, dispatch_uid='tipos_cambio_save')
+    post_delete.connect(invalidar, sender=TipoCambio, dispatch_uid='tipos_cambio_delete')
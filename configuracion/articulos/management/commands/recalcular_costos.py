@@ -0,0 +1,47 @@
+"""
+Recalcula el costo promedio ponderado de los artículos stockeables.
+
+Procesa los artículos por lotes (cada lote en su transacción) y reescribe
+CostoPromedio y el costo_unitario de las líneas de venta desde la fecha
+indicada. Sin --desde parte de la primera fecha con documentos (carga inicial
+o después de cargar cotizaciones atrasadas).
+
+Uso:
+    python manage.py recalcular_costos
+    python manage.py recalcular_costos --desde 2026-01-01 --articulo 15
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from configuracion.articulos import costos
+from configuracion.articulos.models import Articulo
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el costo promedio ponderado de los artículos stockeables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', default='', help='Fecha desde la que recalcular AAAA-MM-DD (default: desde el inicio)')
+        parser.add_argument('--articulo', type=int, help='Recalcular un solo artículo (id)')
+        parser.add_argument('--lote', type=int, default=200, help='Artículos por lote (default: 200)')
+
+    def handle(self, *args, **options):
+        if options['desde']:
+            try:
+                desde = datetime.date.fromisoformat(options['desde'])
+            except ValueError:
+                raise CommandError(f"Fecha inválida: {options['desde']} (use AAAA-MM-DD)")
+        else:
+            desde = datetime.date.min
+
+        articulos = Articulo.objects.filter(tipo_articulo__stockeable='SI', ACTIVO_STOCK='SI')
+        if options['articulo']:
+            articulos = articulos.filter(pk=options['articulo'])
+        ids = list(articulos.order_by('pk').values_list('pk', flat=True))
+
+        dias = 0
+        for inicio in range(0, len(ids), options['lote']):
+            dias += costos.recalcular(ids[inicio:inicio + options['lote']], desde)
+
+        self.stdout.write(self.style.SUCCESS(f"Costos recalculados: {len(ids)} artículos, {dias} días con movimientos"))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0002_auto_20251128_1109'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TipoCambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(help_text='Fecha desde la que rige la cotización', verbose_name='Fecha')),
+                ('cotizacion', models.DecimalField(decimal_places=6, help_text='Pesos uruguayos por una unidad de la moneda', max_digits=15, verbose_name='Cotización')),
+                ('moneda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tipos_cambio', to='articulos.moneda', verbose_name='Moneda')),
+            ],
+            options={
+                'verbose_name': 'Tipo de Cambio',
+                'verbose_name_plural': 'Tipos de Cambio',
+                'db_table': 'config_tipo_cambio',
+                'ordering': ['moneda', '-fecha'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tipocambio',
+            constraint=models.UniqueConstraint(fields=('moneda', 'fecha'), name='tipo_cambio_moneda_fecha_unico'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0003_tipo_cambio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostoPromedio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('existencia', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Existencia')),
+                ('costo_unitario', models.DecimalField(decimal_places=4, default=0, max_digits=15, verbose_name='Costo Unitario')),
+                ('fchhor', models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')),
+                ('articulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='costos', to='articulos.articulo', verbose_name='Artículo')),
+            ],
+            options={
+                'verbose_name': 'Costo Promedio',
+                'verbose_name_plural': 'Costos Promedio',
+                'db_table': 'config_articulo_costo',
+                'ordering': ['articulo', '-fecha'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='costopromedio',
+            constraint=models.UniqueConstraint(fields=('articulo', 'fecha'), name='costo_articulo_fecha_unico'),
+        ),
+    ]
@@ -61,6 +61,35 @@ class Moneda(models.Model):
         return f"{self.codigo} - {self.nombre}"
 
 
+class TipoCambio(models.Model):
+    """Cotización de una moneda en moneda base (UYU), vigente desde la fecha hasta la siguiente cotización"""
+    moneda = models.ForeignKey(
+        Moneda,
+        on_delete=models.CASCADE,
+        related_name='tipos_cambio',
+        verbose_name='Moneda'
+    )
+    fecha = models.DateField(verbose_name='Fecha', help_text='Fecha desde la que rige la cotización')
+    cotizacion = models.DecimalField(
+        max_digits=15,
+        decimal_places=6,
+        verbose_name='Cotización',
+        help_text='Pesos uruguayos por una unidad de la moneda'
+    )
+
+    class Meta:
+        verbose_name = 'Tipo de Cambio'
+        verbose_name_plural = 'Tipos de Cambio'
+        ordering = ['moneda', '-fecha']
+        db_table = 'config_tipo_cambio'
+        constraints = [
+            models.UniqueConstraint(fields=['moneda', 'fecha'], name='tipo_cambio_moneda_fecha_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.moneda_id} {self.fecha:%d/%m/%Y}: {self.cotizacion}"
+
+
 class TipoArticulo(models.Model):
     """Modelo para representar el tipo de artículo"""
     codigo = models.CharField(
@@ -425,3 +454,30 @@ class CodigoProveedorCompra(models.Model):
 
     def __str__(self):
         return f"{self.articulo.producto_id} - {self.proveedor.razon} - {self.codigo_proveedor}"
+
+
+class CostoPromedio(models.Model):
+    """Existencia y costo promedio ponderado (UYU) de un artículo al cierre de una fecha con movimientos"""
+    articulo = models.ForeignKey(
+        Articulo,
+        on_delete=models.CASCADE,
+        related_name='costos',
+        verbose_name='Artículo'
+    )
+    fecha = models.DateField(verbose_name='Fecha')
+    existencia = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Existencia')
+    costo_unitario = models.DecimalField(max_digits=15, decimal_places=4, default=0, verbose_name='Costo Unitario')
+    fchhor = models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        verbose_name = 'Costo Promedio'
+        verbose_name_plural = 'Costos Promedio'
+        ordering = ['articulo', '-fecha']
+        db_table = 'config_articulo_costo'
+        constraints = [
+            models.UniqueConstraint(fields=['articulo', 'fecha'], name='costo_articulo_fecha_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.articulo_id} {self.fecha:%d/%m/%Y}: {self.costo_unitario}"
+
@@ -0,0 +1,126 @@
+import datetime
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from compras.compras_ingreso.models import ComprasCabezal, ComprasLineas
+from configuracion.articulos import costos
+from configuracion.articulos.models import IVA, Articulo, CostoPromedio, Moneda, TipoArticulo
+from configuracion.clientes.models import Cliente
+from configuracion.documentos.models import Documento
+from configuracion.proveedores.models import Proveedor
+from configuracion.tablas.models import FormaPagoTipo
+from ventas.ventas_devoluciones.models import VentasDevolucionesCabezal, VentasDevolucionesLineas
+from ventas.ventas_ingreso.models import VentasCabezal, VentasLineas
+
+
+def movimiento(entrada=0, importe=0, salida=0, sin_costo=0):
+    return {
+        'entrada': Decimal(entrada), 'importe': Decimal(importe), 'salida': Decimal(salida),
+        'sin_costo': Decimal(sin_costo), 'ventas': bool(salida),
+    }
+
+
+class AplicarDiaTests(SimpleTestCase):
+    """Existencia y costo promedio al cierre de un día"""
+
+    def test_entrada_pondera_el_costo(self):
+        self.assertEqual(
+            costos._aplicar_dia(Decimal('10'), Decimal('5'), movimiento(entrada=10, importe=70)),
+            (Decimal('20'), Decimal('6.0000')),
+        )
+
+    def test_salida_no_cambia_el_costo(self):
+        self.assertEqual(
+            costos._aplicar_dia(Decimal('10'), Decimal('5'), movimiento(salida=4)),
+            (Decimal('6'), Decimal('5.0000')),
+        )
+
+    def test_entrada_sin_existencia_previa_toma_el_costo_de_la_entrada(self):
+        self.assertEqual(
+            costos._aplicar_dia(Decimal('-3'), Decimal('5'), movimiento(entrada=5, importe=40)),
+            (Decimal('2'), Decimal('8.0000')),
+        )
+
+    def test_entrada_sin_cotizacion_al_costo_vigente(self):
+        self.assertEqual(
+            costos._aplicar_dia(Decimal('10'), Decimal('5'), movimiento(sin_costo=5)),
+            (Decimal('15'), Decimal('5.0000')),
+        )
+
+    def test_devolucion_de_compra(self):
+        self.assertEqual(
+            costos._aplicar_dia(Decimal('10'), Decimal('5'), movimiento(entrada=-5, importe=-40)),
+            (Decimal('5'), Decimal('2.0000')),
+        )
+
+
+class RecalcularTests(TestCase):
+    """Recalcular desde la fecha del documento y pasar el costo a las líneas de venta"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Moneda.objects.create(codigo='UYU', nombre='Peso uruguayo')
+        Documento.objects.create(codigo='efactura', nombre='e-Factura')
+        Documento.objects.create(codigo='nc', nombre='Nota de crédito')
+        iva = IVA.objects.create(codigo='iva_b', nombre='IVA Básico', valor=Decimal('0.22'))
+        stockeable = TipoArticulo.objects.create(codigo='PRO', nombre='Producto', stockeable='SI')
+        cls.articulo = Articulo.objects.create(nombre='Tornillo', tipo_articulo=stockeable, iva=iva)
+        cls.proveedor = Proveedor.objects.create(codigo='P1', razon='Proveedor')
+        cls.cliente = Cliente.objects.create(codigo='C1', razon_social='Cliente')
+        cls.credito = FormaPagoTipo.objects.create(nombre='Crédito')
+
+    def comprar(self, fecha, cantidad, precio):
+        compra = ComprasCabezal.objects.create(
+            id_proveedor=self.proveedor, tipo_documento_id='efactura', numero_documento=str(fecha),
+            forma_pago='CONTADO', fecha_documento=fecha, moneda_id='UYU',
+        )
+        return ComprasLineas.objects.create(
+            transaccion=compra, linea=1, id_articulo=self.articulo, cantidad=cantidad, precio_original=precio,
+        )
+
+    def vender(self, fecha, cantidad):
+        venta = VentasCabezal.objects.create(
+            id_cliente=self.cliente, tipo_documento_id='efactura', numero_documento=str(fecha),
+            forma_pago='CONTADO', fecha_documento=fecha, moneda_id='UYU',
+        )
+        return VentasLineas.objects.create(
+            transaccion=venta, linea=1, id_articulo=self.articulo, cantidad=cantidad, precio_original=100,
+        )
+
+    def test_costo_promedio_por_dia(self):
+        self.comprar(datetime.date(2025, 3, 1), 10, 5)
+        self.comprar(datetime.date(2025, 3, 2), 10, 7)
+
+        self.assertEqual(
+            list(CostoPromedio.objects.filter(articulo=self.articulo).order_by('fecha').values_list(
+                'existencia', 'costo_unitario',
+            )),
+            [(Decimal('10.00'), Decimal('5.0000')), (Decimal('20.00'), Decimal('6.0000'))],
+        )
+        self.assertEqual(costos.costo_actual(self.articulo.pk), Decimal('6.0000'))
+
+    def test_compra_atrasada_corrige_las_ventas_posteriores(self):
+        self.comprar(datetime.date(2025, 3, 1), 10, 5)
+        venta = self.vender(datetime.date(2025, 3, 5), 4)
+        self.assertEqual(VentasLineas.objects.get(pk=venta.pk).costo_unitario, Decimal('5.0000'))
+
+        self.comprar(datetime.date(2025, 3, 3), 10, 7)
+
+        self.assertEqual(VentasLineas.objects.get(pk=venta.pk).costo_unitario, Decimal('6.0000'))
+
+    def test_venta_y_devolucion_del_mismo_dia_reciben_el_costo(self):
+        self.comprar(datetime.date(2025, 3, 1), 10, 5)
+        venta = self.vender(datetime.date(2025, 3, 5), 2)
+        devolucion = VentasDevolucionesCabezal.objects.create(
+            id_cliente=self.cliente, tipo_documento_id='nc', numero_documento='1',
+            forma_pago=self.credito, fecha_documento=datetime.date(2025, 3, 5), moneda_id='UYU',
+        )
+        VentasDevolucionesLineas.objects.create(
+            transaccion=devolucion, linea=1, id_articulo=self.articulo, id_venta_linea=venta,
+            numero_doc_afectado=venta.transaccion.numero_documento, cantidad=2, precio=100,
+        )
+
+        self.comprar(datetime.date(2025, 3, 3), 10, 7)
+
+        self.assertEqual(VentasLineas.objects.get(pk=venta.pk).costo_unitario, Decimal('6.0000'))
@@ -393,9 +393,11 @@ def eliminar_articulo(request, pk):
 def detalle_articulo(request, pk):
     """Vista para ver el detalle de un artículo"""
     articulo = get_object_or_404(Articulo, pk=pk)
+    stock = articulo.stock_depositos.select_related('deposito').order_by('deposito__nombre')
     
     context = {
         'articulo': articulo,
+        'stock': stock,
         'empresa_nombre': EMPRESA_NOMBRE,
     }
     return render(request, 'articulos/articulo/detalle_articulo.html', context)
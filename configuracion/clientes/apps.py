@@ -7,3 +7,6 @@ class ClientesConfig(AppConfig):
     label = 'clientes'
     verbose_name = 'Clientes'
 
+    def ready(self):
+        from configuracion.clientes import cuenta_corriente
+        cuenta_corriente.conectar_senales()
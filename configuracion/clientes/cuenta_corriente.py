@@ -0,0 +1,159 @@
+"""
+Cuenta corriente de clientes.
+
+Cada venta o devolución a crédito deja movimientos con signo en
+MovimientoCuentaCorriente (+ venta, - devolución). Al registrar, modificar o
+eliminar un documento se compara lo que debería haber en la cuenta con lo ya
+registrado para esa transacción y se agrega solo la diferencia, así el historial
+conserva las correcciones y el saldo corrido por cliente y moneda nunca se
+recalcula hacia atrás.
+
+SaldoCliente guarda el saldo actual de cada (cliente, moneda): la deuda de un
+cliente se lee con una consulta por clave, sin sumar movimientos.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from configuracion.documentos.senales import LibroDocumentos
+
+
+CERO = Decimal('0')
+
+# origen -> (modelo del cabezal 'app_label.Modelo', signo)
+ORIGENES = {
+    'VENTA': ('ventas_ingreso.VentasCabezal', 1),
+    'DEVOLUCION': ('ventas_devoluciones.VentasDevolucionesCabezal', -1),
+}
+
+
+def _es_credito(origen, datos):
+    # En ventas forma_pago es CONTADO/CREDITO; en devoluciones es un FormaPagoTipo
+    if origen == 'VENTA':
+        return datos['forma_pago'] == 'CREDITO'
+    return datos['forma_pago__nombre'] == 'Crédito'
+
+
+def _datos_documento(origen, transaccion_id):
+    from django.apps import apps
+
+    modelo = apps.get_model(ORIGENES[origen][0])
+    campos = ['id_cliente', 'moneda', 'fecha_documento', 'serie_documento', 'numero_documento', 'importe_total']
+    campos.append('forma_pago' if origen == 'VENTA' else 'forma_pago__nombre')
+    return modelo.objects.filter(pk=transaccion_id).values(*campos).first()
+
+
+def registrar_movimiento(cliente_id, moneda_id, importe, fecha, origen, transaccion_id, documento=''):
+    """
+    Agrega un movimiento y actualiza el saldo del cliente en esa moneda.
+
+    La fila de SaldoCliente se bloquea (select_for_update) para que dos
+    documentos simultáneos del mismo cliente no calculen el mismo saldo corrido.
+    """
+    from configuracion.clientes.models import MovimientoCuentaCorriente, SaldoCliente
+
+    with transaction.atomic():
+        saldo, _ = SaldoCliente.objects.select_for_update().get_or_create(
+            cliente_id=cliente_id, moneda_id=moneda_id,
+        )
+        nuevo_saldo = saldo.saldo + importe
+        movimiento = MovimientoCuentaCorriente.objects.create(
+            cliente_id=cliente_id,
+            moneda_id=moneda_id,
+            fecha=fecha,
+            origen=origen,
+            transaccion=transaccion_id,
+            documento=documento,
+            importe=importe,
+            saldo=nuevo_saldo,
+        )
+        SaldoCliente.objects.filter(pk=saldo.pk).update(saldo=nuevo_saldo, fchhor=timezone.now())
+    return movimiento
+
+
+@transaction.atomic
+def sincronizar_documento(origen, transaccion_id):
+    """
+    Lleva la cuenta corriente al estado actual del documento.
+
+    Args:
+        origen: 'VENTA' o 'DEVOLUCION'
+        transaccion_id: Clave del cabezal (si ya no existe, se revierte todo lo registrado)
+
+    Returns:
+        list: Movimientos agregados (vacía si no hubo cambios)
+    """
+    from configuracion.clientes.models import MovimientoCuentaCorriente
+
+    datos = _datos_documento(origen, transaccion_id)
+
+    # Lo que el documento debería sumar a cada (cliente, moneda)
+    objetivo = {}
+    if datos and _es_credito(origen, datos):
+        signo = ORIGENES[origen][1]
+        objetivo[(datos['id_cliente'], datos['moneda'])] = signo * (datos['importe_total'] or CERO)
+
+    registrado = {
+        (fila['cliente'], fila['moneda']): fila['total']
+        for fila in MovimientoCuentaCorriente.objects.filter(
+            origen=origen, transaccion=transaccion_id,
+        ).order_by().values('cliente', 'moneda').annotate(total=Sum('importe'))
+    }
+
+    if datos:
+        fecha = datos['fecha_documento']
+        documento = f"{datos['serie_documento'] or ''}-{datos['numero_documento'] or ''}".strip('-')
+    else:
+        fecha = timezone.localdate()
+        documento = ''
+
+    movimientos = []
+    # Primero las reversiones (cliente/moneda que ya no corresponden), después los importes nuevos
+    for clave in sorted(set(objetivo) | set(registrado), key=lambda c: c in objetivo):
+        diferencia = objetivo.get(clave, CERO) - registrado.get(clave, CERO)
+        if diferencia:
+            cliente_id, moneda_id = clave
+            movimientos.append(
+                registrar_movimiento(cliente_id, moneda_id, diferencia, fecha, origen, transaccion_id, documento)
+            )
+    return movimientos
+
+
+def saldo_actual(cliente_id, moneda_id):
+    """Saldo actual del cliente en la moneda (0 si no tiene movimientos)"""
+    from configuracion.clientes.models import SaldoCliente
+
+    saldo = SaldoCliente.objects.filter(
+        cliente_id=cliente_id, moneda_id=moneda_id,
+    ).values_list('saldo', flat=True).first()
+    return saldo if saldo is not None else CERO
+
+
+def saldos_por_cliente(ids_clientes):
+    """
+    Saldos distintos de cero de varios clientes en una consulta.
+
+    Returns:
+        dict: {cliente_id: [{'moneda': código, 'saldo': Decimal}, ...]}
+    """
+    from configuracion.clientes.models import SaldoCliente
+
+    saldos = {}
+    filas = SaldoCliente.objects.filter(
+        cliente_id__in=list(ids_clientes),
+    ).exclude(saldo=0).order_by('moneda').values_list('cliente_id', 'moneda_id', 'saldo')
+    for cliente_id, moneda_id, saldo in filas:
+        saldos.setdefault(cliente_id, []).append({'moneda': moneda_id, 'saldo': saldo})
+    return saldos
+
+
+LIBRO = LibroDocumentos(
+    'ctacte', {origen: etiqueta for origen, (etiqueta, _signo) in ORIGENES.items()}, sincronizar_documento,
+)
+
+
+def conectar_senales():
+    """Conecta las señales de ventas y devoluciones (desde ClientesConfig.ready)"""
+    LIBRO.conectar()
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:32
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def cargar_cuenta_corriente(apps, schema_editor):
+    """Genera los movimientos de las ventas y devoluciones a crédito ya registradas, por fecha"""
+    VentasCabezal = apps.get_model('ventas_ingreso', 'VentasCabezal')
+    VentasDevolucionesCabezal = apps.get_model('ventas_devoluciones', 'VentasDevolucionesCabezal')
+    MovimientoCuentaCorriente = apps.get_model('clientes', 'MovimientoCuentaCorriente')
+    SaldoCliente = apps.get_model('clientes', 'SaldoCliente')
+
+    campos = ('transaccion', 'id_cliente', 'moneda', 'fecha_documento', 'serie_documento', 'numero_documento', 'importe_total')
+    documentos = [
+        ('VENTA', 1, fila)
+        for fila in VentasCabezal.objects.filter(forma_pago='CREDITO').values(*campos)
+    ] + [
+        ('DEVOLUCION', -1, fila)
+        for fila in VentasDevolucionesCabezal.objects.filter(forma_pago__nombre='Crédito').values(*campos)
+    ]
+    documentos.sort(key=lambda d: (d[2]['fecha_documento'], d[2]['transaccion']))
+
+    saldos = {}
+    movimientos = []
+    for origen, signo, fila in documentos:
+        importe = signo * (fila['importe_total'] or Decimal('0'))
+        if not importe:
+            continue
+        clave = (fila['id_cliente'], fila['moneda'])
+        saldos[clave] = saldos.get(clave, Decimal('0')) + importe
+        movimientos.append(MovimientoCuentaCorriente(
+            cliente_id=clave[0],
+            moneda_id=clave[1],
+            fecha=fila['fecha_documento'],
+            origen=origen,
+            transaccion=fila['transaccion'],
+            documento=f"{fila['serie_documento'] or ''}-{fila['numero_documento'] or ''}".strip('-'),
+            importe=importe,
+            saldo=saldos[clave],
+        ))
+    MovimientoCuentaCorriente.objects.bulk_create(movimientos, batch_size=1000)
+    SaldoCliente.objects.bulk_create(
+        [SaldoCliente(cliente_id=c, moneda_id=m, saldo=saldo) for (c, m), saldo in saldos.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0002_auto_20251128_1109'),
+        ('clientes', '0001_initial'),
+        ('ventas_ingreso', '0002_cantidad_devuelta'),
+        ('ventas_devoluciones', '0004_ventasdevolucionescabezal_monotributista'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoCliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('saldo', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Saldo')),
+                ('fchhor', models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='clientes.cliente', verbose_name='Cliente')),
+                ('moneda', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='saldos_clientes', to='articulos.moneda', verbose_name='Moneda')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Cliente',
+                'verbose_name_plural': 'Saldos de Clientes',
+                'db_table': 'config_cliente_saldo',
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimientoCuentaCorriente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('origen', models.CharField(choices=[('VENTA', 'Venta'), ('DEVOLUCION', 'Devolución')], max_length=20, verbose_name='Origen')),
+                ('transaccion', models.CharField(max_length=10, verbose_name='Transacción')),
+                ('documento', models.CharField(blank=True, default='', max_length=100, verbose_name='Documento')),
+                ('importe', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Importe')),
+                ('saldo', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Saldo')),
+                ('fchhor', models.DateTimeField(auto_now_add=True, verbose_name='Fecha/Hora')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_cuenta_corriente', to='clientes.cliente', verbose_name='Cliente')),
+                ('moneda', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movimientos_cuenta_corriente', to='articulos.moneda', verbose_name='Moneda')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Cuenta Corriente',
+                'verbose_name_plural': 'Movimientos de Cuenta Corriente',
+                'db_table': 'config_cliente_cuenta_corriente',
+                'ordering': ['cliente', 'moneda', 'id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='saldocliente',
+            constraint=models.UniqueConstraint(fields=('cliente', 'moneda'), name='saldo_cliente_moneda_unico'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocuentacorriente',
+            index=models.Index(fields=['cliente', 'moneda', 'id'], name='ctacte_cli_moneda_id'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocuentacorriente',
+            index=models.Index(fields=['origen', 'transaccion'], name='ctacte_origen_transaccion'),
+        ),
+        migrations.RunPython(cargar_cuenta_corriente, migrations.RunPython.noop),
+    ]
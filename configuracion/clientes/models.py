@@ -219,3 +219,80 @@ class Cliente(models.Model):
     def nombre_completo(self):
         return self.nombre_comercial or self.razon_social or ''
 
+
+
+class MovimientoCuentaCorriente(models.Model):
+    """
+    Movimiento de la cuenta corriente de un cliente.
+
+    Se genera al registrar, modificar o eliminar una venta o devolución a crédito
+    (ver configuracion.clientes.cuenta_corriente): importe es la diferencia con
+    signo respecto de lo ya registrado para el documento (+ aumenta la deuda) y
+    saldo es el saldo del cliente en esa moneda después del movimiento.
+    """
+    ORIGENES = [
+        ('VENTA', 'Venta'),
+        ('DEVOLUCION', 'Devolución'),
+    ]
+
+    cliente = models.ForeignKey(
+        Cliente,
+        on_delete=models.CASCADE,
+        related_name='movimientos_cuenta_corriente',
+        verbose_name='Cliente',
+    )
+    moneda = models.ForeignKey(
+        'articulos.Moneda',
+        on_delete=models.PROTECT,
+        related_name='movimientos_cuenta_corriente',
+        verbose_name='Moneda',
+    )
+    fecha = models.DateField(verbose_name='Fecha')
+    origen = models.CharField(max_length=20, choices=ORIGENES, verbose_name='Origen')
+    transaccion = models.CharField(max_length=10, verbose_name='Transacción')
+    documento = models.CharField(max_length=100, blank=True, default='', verbose_name='Documento')
+    importe = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Importe')
+    saldo = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Saldo')
+    fchhor = models.DateTimeField(auto_now_add=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        verbose_name = 'Movimiento de Cuenta Corriente'
+        verbose_name_plural = 'Movimientos de Cuenta Corriente'
+        ordering = ['cliente', 'moneda', 'id']
+        db_table = 'config_cliente_cuenta_corriente'
+        indexes = [
+            models.Index(fields=['cliente', 'moneda', 'id'], name='ctacte_cli_moneda_id'),
+            models.Index(fields=['origen', 'transaccion'], name='ctacte_origen_transaccion'),
+        ]
+
+    def __str__(self):
+        return f"{self.cliente_id} {self.moneda_id} {self.transaccion}: {self.importe}"
+
+
+class SaldoCliente(models.Model):
+    """Saldo actual de la cuenta corriente por cliente y moneda (una fila por par)"""
+    cliente = models.ForeignKey(
+        Cliente,
+        on_delete=models.CASCADE,
+        related_name='saldos',
+        verbose_name='Cliente',
+    )
+    moneda = models.ForeignKey(
+        'articulos.Moneda',
+        on_delete=models.PROTECT,
+        related_name='saldos_clientes',
+        verbose_name='Moneda',
+    )
+    saldo = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Saldo')
+    fchhor = models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        verbose_name = 'Saldo de Cliente'
+        verbose_name_plural = 'Saldos de Clientes'
+        db_table = 'config_cliente_saldo'
+        constraints = [
+            models.UniqueConstraint(fields=['cliente', 'moneda'], name='saldo_cliente_moneda_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.cliente_id} {self.moneda_id}: {self.saldo}"
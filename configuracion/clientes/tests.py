@@ -0,0 +1,75 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from configuracion.articulos.models import IVA, Articulo, Moneda, TipoArticulo
+from configuracion.clientes import cuenta_corriente
+from configuracion.clientes.models import Cliente, MovimientoCuentaCorriente
+from configuracion.documentos.models import Documento
+from ventas.ventas_ingreso.models import VentasCabezal, VentasLineas
+
+
+class SincronizarCuentaCorrienteTests(TestCase):
+    """La cuenta corriente registra solo la diferencia entre el documento y lo ya registrado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Moneda.objects.create(codigo='UYU', nombre='Peso uruguayo')
+        Moneda.objects.create(codigo='USD', nombre='Dólar')
+        Documento.objects.create(codigo='efactura', nombre='e-Factura')
+        iva = IVA.objects.create(codigo='iva_b', nombre='IVA Básico', valor=Decimal('0.22'))
+        servicio = TipoArticulo.objects.create(codigo='SER', nombre='Servicio')
+        cls.articulo = Articulo.objects.create(nombre='Servicio', tipo_articulo=servicio, iva=iva)
+        cls.cliente = Cliente.objects.create(codigo='C1', razon_social='Cliente')
+
+    def setUp(self):
+        self.venta = VentasCabezal.objects.create(
+            id_cliente=self.cliente, tipo_documento_id='efactura', numero_documento='1',
+            forma_pago='CREDITO', fecha_documento=datetime.date(2025, 3, 10), moneda_id='UYU',
+        )
+        self.linea = VentasLineas.objects.create(
+            transaccion=self.venta, linea=1, id_articulo=self.articulo, cantidad=2, precio_original=122,
+        )
+
+    def importes(self):
+        return list(MovimientoCuentaCorriente.objects.filter(transaccion=self.venta.pk).order_by('pk').values_list(
+            'moneda', 'importe', 'saldo',
+        ))
+
+    def test_alta_de_linea(self):
+        self.assertEqual(self.importes(), [('UYU', Decimal('244.00'), Decimal('244.00'))])
+        self.assertEqual(cuenta_corriente.saldo_actual(self.cliente.pk, 'UYU'), Decimal('244.00'))
+
+    def test_modificacion_registra_la_diferencia(self):
+        self.linea.cantidad = 3
+        self.linea.save()
+
+        self.assertEqual(self.importes()[1:], [('UYU', Decimal('122.00'), Decimal('366.00'))])
+        self.assertEqual(cuenta_corriente.saldo_actual(self.cliente.pk, 'UYU'), Decimal('366.00'))
+
+    def test_cambio_de_moneda_revierte_y_registra(self):
+        self.venta.moneda_id = 'USD'
+        self.venta.save()
+
+        self.assertEqual(self.importes()[1:], [
+            ('UYU', Decimal('-244.00'), Decimal('0.00')),
+            ('USD', Decimal('244.00'), Decimal('244.00')),
+        ])
+
+    def test_pasar_a_contado_revierte(self):
+        self.venta.forma_pago = 'CONTADO'
+        self.venta.save()
+
+        self.assertEqual(cuenta_corriente.saldo_actual(self.cliente.pk, 'UYU'), Decimal('0.00'))
+
+    def test_sin_cambios_no_agrega_movimientos(self):
+        self.venta.save()
+
+        self.assertEqual(len(self.importes()), 1)
+
+    def test_eliminar_el_documento_revierte(self):
+        self.venta.delete()
+
+        self.assertEqual(sum(importe for _, importe, _ in self.importes()), Decimal('0'))
+        self.assertEqual(cuenta_corriente.saldo_actual(self.cliente.pk, 'UYU'), Decimal('0.00'))
@@ -6,6 +6,7 @@ urlpatterns = [
     path('clientes/', views.lista_clientes, name='lista_clientes'),
     path('clientes/nuevo/', views.crear_cliente, name='crear_cliente'),
     path('clientes/<int:pk>/', views.detalle_cliente, name='detalle_cliente'),
+    path('clientes/<int:pk>/cuenta-corriente/', views.estado_cuenta_cliente, name='estado_cuenta_cliente'),
     path('clientes/<int:pk>/editar/', views.editar_cliente, name='editar_cliente'),
     path('clientes/<int:pk>/eliminar/', views.eliminar_cliente, name='eliminar_cliente'),
     path('formas-pago/', views.lista_formas_pago, name='lista_formas_pago'),
@@ -1,8 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+import datetime
 from erp_demo.decorators import acceso_por_app
-from .models import Cliente, FormaPago
+from .models import Cliente, FormaPago, MovimientoCuentaCorriente
 from .forms import ClienteForm
 from erp_demo.config import EMPRESA_NOMBRE
 
@@ -113,11 +115,56 @@ def detalle_cliente(request, pk):
     
     context = {
         'cliente': cliente,
+        'saldos': cliente.saldos.exclude(saldo=0).order_by('moneda'),
         'empresa_nombre': EMPRESA_NOMBRE,
     }
     return render(request, 'clientes/detalle_cliente.html', context)
 
 
+def _fecha_parametro(valor):
+    """Fecha de un parámetro AAAA-MM-DD (input type=date) o None si falta o no es válida"""
+    try:
+        return datetime.date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+@acceso_por_app(['configuracion', 'gerencia_le_stage'])
+def estado_cuenta_cliente(request, pk):
+    """Vista del estado de cuenta corriente de un cliente en una moneda (saldo corrido)"""
+    cliente = get_object_or_404(Cliente, pk=pk)
+    saldos = list(cliente.saldos.order_by('moneda'))
+
+    # Moneda elegida; por defecto la primera en la que el cliente tiene movimientos
+    moneda = request.GET.get('moneda') or (saldos[0].moneda_id if saldos else '')
+    saldo = next((s.saldo for s in saldos if s.moneda_id == moneda), 0)
+
+    movimientos = MovimientoCuentaCorriente.objects.filter(cliente=cliente, moneda_id=moneda)
+    # Rango de fechas (las fechas inválidas se ignoran)
+    fecha_desde = _fecha_parametro(request.GET.get('fecha_desde'))
+    fecha_hasta = _fecha_parametro(request.GET.get('fecha_hasta'))
+    if fecha_desde:
+        movimientos = movimientos.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        movimientos = movimientos.filter(fecha__lte=fecha_hasta)
+
+    # Más recientes primero; el saldo de cada fila es el acumulado al registrarse
+    paginator = Paginator(movimientos.order_by('-id'), 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    context = {
+        'cliente': cliente,
+        'saldos': saldos,
+        'moneda': moneda,
+        'saldo': saldo,
+        'movimientos': page_obj,
+        'fecha_desde': fecha_desde.isoformat() if fecha_desde else '',
+        'fecha_hasta': fecha_hasta.isoformat() if fecha_hasta else '',
+        'empresa_nombre': EMPRESA_NOMBRE,
+    }
+    return render(request, 'clientes/estado_cuenta_cliente.html', context)
+
+
 @acceso_por_app(['configuracion', 'gerencia_le_stage'])
 def lista_formas_pago(request):
     """Vista para listar todas las formas de pago"""
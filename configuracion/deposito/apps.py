@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class DepositoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'configuracion.deposito'
+    label = 'deposito'
+    verbose_name = 'Depósitos'
+
+    def ready(self):
+        from configuracion.deposito import stock
+        stock.conectar_senales()
@@ -0,0 +1,59 @@
+"""
+Reconstruye el stock por (artículo, depósito) desde los movimientos.
+
+Agrupa los movimientos en la base y escribe StockDeposito por lotes con
+bulk_create, sin cargar todos los saldos en memoria. Con --documentos primero
+vuelve a sincronizar los movimientos de cada documento (por ejemplo después de
+asignar depósitos a documentos viejos o de marcar un tipo de artículo como
+stockeable).
+
+Uso:
+    python manage.py reconstruir_stock
+    python manage.py reconstruir_stock --documentos --lote 5000
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from configuracion.deposito import stock
+from configuracion.deposito.models import MovimientoStock, StockDeposito
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el stock por artículo y depósito desde los movimientos de stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000, help='Filas por lote (default: 2000)')
+        parser.add_argument('--documentos', action='store_true', help='Sincronizar antes los movimientos de todos los documentos')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+
+        if options['documentos']:
+            for origen in stock.ORIGENES:
+                modelo = stock._modelo(origen)
+                agregados = 0
+                for transaccion_id in modelo.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=lote):
+                    agregados += len(stock.sincronizar_documento(origen, transaccion_id))
+                self.stdout.write(f"{origen}: {agregados} movimientos agregados")
+
+        saldos = MovimientoStock.objects.order_by().values('articulo', 'deposito').annotate(cantidad=Sum('cantidad'))
+        escritos = 0
+        with transaction.atomic():
+            StockDeposito.objects.all().delete()
+            pendientes = []
+            for fila in saldos.iterator(chunk_size=lote):
+                if not fila['cantidad']:
+                    continue
+                pendientes.append(StockDeposito(
+                    articulo_id=fila['articulo'], deposito_id=fila['deposito'], cantidad=fila['cantidad'],
+                ))
+                if len(pendientes) >= lote:
+                    StockDeposito.objects.bulk_create(pendientes)
+                    escritos += len(pendientes)
+                    pendientes = []
+            if pendientes:
+                StockDeposito.objects.bulk_create(pendientes)
+                escritos += len(pendientes)
+
+        self.stdout.write(self.style.SUCCESS(f"Stock reconstruido: {escritos} saldos por artículo y depósito"))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0003_tipo_cambio'),
+        ('deposito', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockDeposito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Cantidad')),
+                ('fchhor', models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')),
+                ('articulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_depositos', to='articulos.articulo', verbose_name='Artículo')),
+                ('deposito', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='deposito.deposito', verbose_name='Depósito')),
+            ],
+            options={
+                'verbose_name': 'Stock por Depósito',
+                'verbose_name_plural': 'Stock por Depósito',
+                'db_table': 'config_stock',
+                'ordering': ['articulo', 'deposito'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimientoStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('origen', models.CharField(choices=[('COMPRA', 'Compra'), ('DEVOLUCION_COMPRA', 'Devolución de Compra'), ('VENTA', 'Venta'), ('DEVOLUCION_VENTA', 'Devolución de Venta')], max_length=20, verbose_name='Origen')),
+                ('transaccion', models.CharField(max_length=10, verbose_name='Transacción')),
+                ('documento', models.CharField(blank=True, default='', max_length=50, verbose_name='Documento')),
+                ('cantidad', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Cantidad')),
+                ('fchhor', models.DateTimeField(auto_now_add=True, verbose_name='Fecha/Hora')),
+                ('articulo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movimientos_stock', to='articulos.articulo', verbose_name='Artículo')),
+                ('deposito', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movimientos_stock', to='deposito.deposito', verbose_name='Depósito')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock',
+                'verbose_name_plural': 'Movimientos de Stock',
+                'db_table': 'config_stock_movimientos',
+                'ordering': ['-fecha', '-id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockdeposito',
+            constraint=models.UniqueConstraint(fields=('articulo', 'deposito'), name='stock_articulo_deposito_unico'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientostock',
+            index=models.Index(fields=['articulo', 'deposito', 'fecha'], name='stock_mov_art_dep_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientostock',
+            index=models.Index(fields=['origen', 'transaccion'], name='stock_mov_origen_transaccion'),
+        ),
+    ]
@@ -23,3 +23,75 @@ class Deposito(models.Model):
     def __str__(self):
         return self.nombre
 
+
+
+class MovimientoStock(models.Model):
+    """Movimiento de stock de un artículo en un depósito (positivo = entrada, negativo = salida)"""
+    ORIGENES = [
+        ('COMPRA', 'Compra'),
+        ('DEVOLUCION_COMPRA', 'Devolución de Compra'),
+        ('VENTA', 'Venta'),
+        ('DEVOLUCION_VENTA', 'Devolución de Venta'),
+    ]
+
+    articulo = models.ForeignKey(
+        'articulos.Articulo',
+        on_delete=models.PROTECT,
+        related_name='movimientos_stock',
+        verbose_name='Artículo'
+    )
+    deposito = models.ForeignKey(
+        Deposito,
+        on_delete=models.PROTECT,
+        related_name='movimientos_stock',
+        verbose_name='Depósito'
+    )
+    fecha = models.DateField(verbose_name='Fecha')
+    origen = models.CharField(max_length=20, choices=ORIGENES, verbose_name='Origen')
+    transaccion = models.CharField(max_length=10, verbose_name='Transacción')
+    documento = models.CharField(max_length=50, blank=True, default='', verbose_name='Documento')
+    cantidad = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Cantidad')
+    fchhor = models.DateTimeField(auto_now_add=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        verbose_name = 'Movimiento de Stock'
+        verbose_name_plural = 'Movimientos de Stock'
+        ordering = ['-fecha', '-id']
+        db_table = 'config_stock_movimientos'
+        indexes = [
+            models.Index(fields=['articulo', 'deposito', 'fecha'], name='stock_mov_art_dep_fecha'),
+            models.Index(fields=['origen', 'transaccion'], name='stock_mov_origen_transaccion'),
+        ]
+
+    def __str__(self):
+        return f"{self.articulo_id} {self.deposito_id} {self.fecha:%d/%m/%Y}: {self.cantidad}"
+
+
+class StockDeposito(models.Model):
+    """Stock actual de un artículo en un depósito (suma de sus movimientos)"""
+    articulo = models.ForeignKey(
+        'articulos.Articulo',
+        on_delete=models.CASCADE,
+        related_name='stock_depositos',
+        verbose_name='Artículo'
+    )
+    deposito = models.ForeignKey(
+        Deposito,
+        on_delete=models.CASCADE,
+        related_name='stock',
+        verbose_name='Depósito'
+    )
+    cantidad = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Cantidad')
+    fchhor = models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        verbose_name = 'Stock por Depósito'
+        verbose_name_plural = 'Stock por Depósito'
+        ordering = ['articulo', 'deposito']
+        db_table = 'config_stock'
+        constraints = [
+            models.UniqueConstraint(fields=['articulo', 'deposito'], name='stock_articulo_deposito_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.articulo_id} en {self.deposito_id}: {self.cantidad}"
@@ -0,0 +1,166 @@
+"""
+Stock perpetuo por artículo y depósito.
+
+Las compras, ventas y sus devoluciones con depósito mueven el stock de los
+artículos stockeables (TipoArticulo.stockeable y ACTIVO_STOCK en 'SI'). Al
+registrar, modificar o eliminar un documento se compara lo que debería haber
+movido por (artículo, depósito) con lo ya registrado para esa transacción y se
+insertan solo las diferencias, todas con un único bulk_create.
+
+StockDeposito guarda el saldo por (artículo, depósito) y se ajusta con las
+mismas diferencias, así consultar el stock es una lectura por índice. Si se
+desincroniza, el comando reconstruir_stock lo recalcula desde los movimientos.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from configuracion.documentos.senales import LibroDocumentos
+
+
+CERO = Decimal('0')
+
+# origen -> (modelo del cabezal 'app_label.Modelo', signo del movimiento)
+ORIGENES = {
+    'COMPRA': ('compras_ingreso.ComprasCabezal', 1),
+    'DEVOLUCION_COMPRA': ('compras_devoluciones.ComprasDevolucionesCabezal', -1),
+    'VENTA': ('ventas_ingreso.VentasCabezal', -1),
+    'DEVOLUCION_VENTA': ('ventas_devoluciones.VentasDevolucionesCabezal', 1),
+}
+
+FILTRO_STOCKEABLE = {
+    'id_articulo__tipo_articulo__stockeable': 'SI',
+    'id_articulo__ACTIVO_STOCK': 'SI',
+}
+
+
+def _modelo(origen):
+    from django.apps import apps
+    return apps.get_model(ORIGENES[origen][0])
+
+
+def _cantidades_documento(origen, transaccion_id):
+    """{(articulo_id, deposito_id): cantidad con signo} que el documento debería mover"""
+    lineas = _modelo(origen).lineas.field.model.objects.filter(
+        transaccion=transaccion_id,
+        transaccion__deposito__isnull=False,
+        **FILTRO_STOCKEABLE,
+    ).order_by().values('id_articulo', 'transaccion__deposito').annotate(cantidad=Sum('cantidad'))
+    signo = ORIGENES[origen][1]
+    return {
+        (fila['id_articulo'], fila['transaccion__deposito']): signo * (fila['cantidad'] or CERO)
+        for fila in lineas
+    }
+
+
+def aplicar_saldos(diferencias):
+    """
+    Suma las diferencias {(articulo_id, deposito_id): cantidad} a StockDeposito.
+
+    Lee los saldos afectados con select_for_update en una consulta y los
+    actualiza con bulk_update; los que no existen se crean con bulk_create.
+    """
+    from configuracion.deposito.models import StockDeposito
+
+    diferencias = {clave: cantidad for clave, cantidad in diferencias.items() if cantidad}
+    if not diferencias:
+        return
+    articulos = {articulo for articulo, _ in diferencias}
+    depositos = {deposito for _, deposito in diferencias}
+    with transaction.atomic():
+        existentes = {
+            (saldo.articulo_id, saldo.deposito_id): saldo
+            for saldo in StockDeposito.objects.select_for_update().filter(
+                articulo__in=articulos, deposito__in=depositos,
+            )
+        }
+        ahora = timezone.now()
+        actualizar, crear = [], []
+        for (articulo, deposito), cantidad in diferencias.items():
+            saldo = existentes.get((articulo, deposito))
+            if saldo is None:
+                crear.append(StockDeposito(articulo_id=articulo, deposito_id=deposito, cantidad=cantidad))
+            else:
+                saldo.cantidad += cantidad
+                saldo.fchhor = ahora
+                actualizar.append(saldo)
+        if actualizar:
+            StockDeposito.objects.bulk_update(actualizar, ['cantidad', 'fchhor'])
+        if crear:
+            StockDeposito.objects.bulk_create(crear)
+
+
+@transaction.atomic
+def sincronizar_documento(origen, transaccion_id):
+    """
+    Lleva los movimientos de stock al estado actual del documento.
+
+    Args:
+        origen: Clave de ORIGENES
+        transaccion_id: Clave del cabezal (si ya no existe, se revierte todo lo registrado)
+
+    Returns:
+        list: Movimientos agregados (vacía si no hubo cambios)
+    """
+    from configuracion.deposito.models import MovimientoStock
+
+    datos = _modelo(origen).objects.filter(pk=transaccion_id).values(
+        'fecha_documento', 'serie_documento', 'numero_documento',
+    ).first()
+    objetivo = _cantidades_documento(origen, transaccion_id) if datos else {}
+    registrado = {
+        (fila['articulo'], fila['deposito']): fila['cantidad']
+        for fila in MovimientoStock.objects.filter(
+            origen=origen, transaccion=transaccion_id,
+        ).order_by().values('articulo', 'deposito').annotate(cantidad=Sum('cantidad'))
+    }
+
+    diferencias = {
+        clave: objetivo.get(clave, CERO) - registrado.get(clave, CERO)
+        for clave in set(objetivo) | set(registrado)
+    }
+    diferencias = {clave: cantidad for clave, cantidad in diferencias.items() if cantidad}
+    if not diferencias:
+        return []
+
+    fecha = datos['fecha_documento'] if datos else timezone.localdate()
+    documento = ''
+    if datos:
+        documento = f"{datos['serie_documento'] or ''}-{datos['numero_documento'] or ''}".strip('-')
+    movimientos = MovimientoStock.objects.bulk_create([
+        MovimientoStock(
+            articulo_id=articulo,
+            deposito_id=deposito,
+            fecha=fecha,
+            origen=origen,
+            transaccion=transaccion_id,
+            documento=documento,
+            cantidad=cantidad,
+        )
+        for (articulo, deposito), cantidad in diferencias.items()
+    ])
+    aplicar_saldos(diferencias)
+    return movimientos
+
+
+def stock_actual(articulo_id, deposito_id=None):
+    """Stock del artículo en el depósito (o en todos los depósitos si no se indica)"""
+    from configuracion.deposito.models import StockDeposito
+
+    saldos = StockDeposito.objects.filter(articulo_id=articulo_id)
+    if deposito_id is not None:
+        cantidad = saldos.filter(deposito_id=deposito_id).values_list('cantidad', flat=True).first()
+        return cantidad if cantidad is not None else CERO
+    return saldos.aggregate(total=Sum('cantidad'))['total'] or CERO
+
+
+LIBRO = LibroDocumentos(
+    'stock', {origen: etiqueta for origen, (etiqueta, _signo) in ORIGENES.items()}, sincronizar_documento,
+)
+
+
+def conectar_senales():
+    """Conecta las señales de compras, ventas y devoluciones (desde DepositoConfig.ready)"""
+    LIBRO.conectar()
@@ -0,0 +1,69 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from compras.compras_ingreso.models import ComprasCabezal, ComprasLineas
+from configuracion.articulos.models import IVA, Articulo, Moneda, TipoArticulo
+from configuracion.deposito import stock
+from configuracion.deposito.models import Deposito, MovimientoStock
+from configuracion.documentos.models import Documento
+from configuracion.proveedores.models import Proveedor
+
+
+class SincronizarStockTests(TestCase):
+    """El stock registra solo la diferencia entre el documento y lo ya movido"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Moneda.objects.create(codigo='UYU', nombre='Peso uruguayo')
+        Documento.objects.create(codigo='efactura', nombre='e-Factura')
+        iva = IVA.objects.create(codigo='iva_b', nombre='IVA Básico', valor=Decimal('0.22'))
+        stockeable = TipoArticulo.objects.create(codigo='PRO', nombre='Producto', stockeable='SI')
+        cls.articulo = Articulo.objects.create(nombre='Tornillo', tipo_articulo=stockeable, iva=iva)
+        cls.otro = Articulo.objects.create(nombre='Tuerca', tipo_articulo=stockeable, iva=iva)
+        cls.deposito = Deposito.objects.create(nombre='Central')
+        cls.proveedor = Proveedor.objects.create(codigo='P1', razon='Proveedor')
+
+    def setUp(self):
+        self.compra = ComprasCabezal.objects.create(
+            id_proveedor=self.proveedor, tipo_documento_id='efactura', numero_documento='1',
+            forma_pago='CONTADO', fecha_documento=datetime.date(2025, 3, 10), moneda_id='UYU',
+            deposito=self.deposito,
+        )
+        self.linea = ComprasLineas.objects.create(
+            transaccion=self.compra, linea=1, id_articulo=self.articulo, cantidad=10, precio_original=5,
+        )
+
+    def movimientos(self):
+        return list(MovimientoStock.objects.filter(transaccion=self.compra.pk).order_by('pk').values_list(
+            'articulo', 'cantidad',
+        ))
+
+    def test_alta_de_linea(self):
+        self.assertEqual(self.movimientos(), [(self.articulo.pk, Decimal('10'))])
+        self.assertEqual(stock.stock_actual(self.articulo.pk, self.deposito.pk), Decimal('10'))
+
+    def test_modificacion_registra_la_diferencia(self):
+        self.linea.cantidad = 7
+        self.linea.save()
+
+        self.assertEqual(self.movimientos(), [(self.articulo.pk, Decimal('10')), (self.articulo.pk, Decimal('-3'))])
+        self.assertEqual(stock.stock_actual(self.articulo.pk, self.deposito.pk), Decimal('7'))
+
+    def test_cambio_de_articulo(self):
+        self.linea.id_articulo = self.otro
+        self.linea.save()
+
+        self.assertEqual(stock.stock_actual(self.articulo.pk, self.deposito.pk), Decimal('0'))
+        self.assertEqual(stock.stock_actual(self.otro.pk, self.deposito.pk), Decimal('10'))
+
+    def test_sin_cambios_no_agrega_movimientos(self):
+        self.assertEqual(stock.sincronizar_documento('COMPRA', self.compra.pk), [])
+        self.assertEqual(len(self.movimientos()), 1)
+
+    def test_eliminar_el_documento_revierte(self):
+        self.compra.delete()
+
+        self.assertEqual(sum(cantidad for _, cantidad in self.movimientos()), Decimal('0'))
+        self.assertEqual(stock.stock_actual(self.articulo.pk, self.deposito.pk), Decimal('0'))
@@ -5,3 +5,7 @@ class DisponibilidadesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "configuracion.disponibilidades"
     label = "disponibilidades"
+
+    def ready(self):
+        from configuracion.disponibilidades import movimientos
+        movimientos.conectar_senales()
@@ -0,0 +1,85 @@
+"""
+Fotos de saldo de las disponibilidades (cierre diario o mensual).
+
+Cada foto parte de la anterior y suma solo los movimientos del período, así
+el cierre no recorre todo el historial. Volver a ejecutarlo para la misma
+fecha recalcula la foto.
+
+Uso:
+    python manage.py cerrar_saldos_disponibilidades                 # cierre diario de ayer
+    python manage.py cerrar_saldos_disponibilidades --periodo mes   # cierre del mes anterior
+    python manage.py cerrar_saldos_disponibilidades --periodo mes --desde 2025-01-01
+"""
+import calendar
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from configuracion.disponibilidades import movimientos
+from configuracion.disponibilidades.models import Disponibilidad, MovimientoDisponibilidad
+
+
+def fin_de_mes(fecha):
+    return fecha.replace(day=calendar.monthrange(fecha.year, fecha.month)[1])
+
+
+def fechas_de_cierre(periodo, desde, hasta):
+    """Fechas de cierre entre desde y hasta (inclusive), en orden"""
+    if periodo == 'D':
+        dias = (hasta - desde).days
+        return [desde + datetime.timedelta(days=n) for n in range(dias + 1)]
+    fechas = []
+    fecha = fin_de_mes(desde)
+    while fecha <= hasta:
+        fechas.append(fecha)
+        fecha = fin_de_mes(fecha + datetime.timedelta(days=1))
+    return fechas
+
+
+class Command(BaseCommand):
+    help = 'Genera las fotos de saldo diarias o mensuales de las disponibilidades'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', choices=['dia', 'mes'], default='dia', help='Cierre diario o mensual (default: dia)')
+        parser.add_argument('--fecha', default='', help='Fecha de cierre AAAA-MM-DD (default: ayer / fin del mes anterior)')
+        parser.add_argument('--desde', default='', help='Generar todos los cierres desde esta fecha hasta --fecha')
+
+    def _fecha(self, valor):
+        try:
+            return datetime.date.fromisoformat(valor)
+        except ValueError:
+            raise CommandError(f"Fecha inválida: {valor} (use AAAA-MM-DD)")
+
+    def handle(self, *args, **options):
+        periodo = 'D' if options['periodo'] == 'dia' else 'M'
+        hoy = timezone.localdate()
+
+        if options['fecha']:
+            hasta = self._fecha(options['fecha'])
+        elif periodo == 'D':
+            hasta = hoy - datetime.timedelta(days=1)
+        else:
+            hasta = hoy.replace(day=1) - datetime.timedelta(days=1)
+        if periodo == 'M':
+            hasta = fin_de_mes(hasta)
+
+        desde = self._fecha(options['desde']) if options['desde'] else hasta
+        fechas = fechas_de_cierre(periodo, desde, hasta)
+
+        fotos = 0
+        for disponibilidad_id in Disponibilidad.objects.values_list('pk', flat=True):
+            # Sin movimientos hasta la fecha no hace falta foto
+            primera = MovimientoDisponibilidad.objects.filter(
+                disponibilidad_id=disponibilidad_id,
+            ).order_by('fecha').values_list('fecha', flat=True).first()
+            if primera is None:
+                continue
+            for fecha in fechas:
+                if fecha >= primera:
+                    movimientos.tomar_foto(disponibilidad_id, periodo, fecha)
+                    fotos += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{fotos} foto(s) de saldo {options['periodo']} generadas ({desde:%d/%m/%Y} - {hasta:%d/%m/%Y})"
+        ))
@@ -0,0 +1,34 @@
+"""
+Vuelve a sincronizar los movimientos de las disponibilidades con sus documentos.
+
+Revierte los movimientos que ya no corresponden (documentos en otra moneda que
+la disponibilidad o anteriores a su fecha de ingreso al sistema) y agrega los
+que falten. Las fotos de saldo se corrigen con cada movimiento.
+
+Uso:
+    python manage.py resincronizar_disponibilidades
+    python manage.py resincronizar_disponibilidades --disponibilidad 3
+"""
+from django.core.management.base import BaseCommand
+
+from configuracion.disponibilidades import movimientos
+from configuracion.disponibilidades.models import Disponibilidad
+
+
+class Command(BaseCommand):
+    help = 'Vuelve a sincronizar los movimientos de las disponibilidades con sus documentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--disponibilidad', type=int, help='Solo esta disponibilidad (id)')
+
+    def handle(self, *args, **options):
+        disponibilidades = Disponibilidad.objects.order_by('pk')
+        if options['disponibilidad']:
+            disponibilidades = disponibilidades.filter(pk=options['disponibilidad'])
+
+        cantidad = 0
+        for disponibilidad_id in disponibilidades.values_list('pk', flat=True):
+            movimientos.sincronizar_disponibilidad(disponibilidad_id)
+            cantidad += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{cantidad} disponibilidad(es) sincronizadas"))
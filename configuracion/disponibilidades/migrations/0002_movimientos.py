@@ -0,0 +1,98 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:38
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def cargar_movimientos(apps, schema_editor):
+    """Genera los movimientos de los documentos al contado ya registrados"""
+    MovimientoDisponibilidad = apps.get_model('disponibilidades', 'MovimientoDisponibilidad')
+    documentos = [
+        ('VENTA', 1, apps.get_model('ventas_ingreso', 'VentasCabezal'), {'forma_pago': 'CONTADO'}),
+        ('DEVOLUCION_VENTA', -1, apps.get_model('ventas_devoluciones', 'VentasDevolucionesCabezal'), {'forma_pago__nombre': 'Contado'}),
+        ('COMPRA', -1, apps.get_model('compras_ingreso', 'ComprasCabezal'), {'forma_pago': 'CONTADO'}),
+        ('DEVOLUCION_COMPRA', 1, apps.get_model('compras_devoluciones', 'ComprasDevolucionesCabezal'), {'forma_pago__nombre': 'Contado'}),
+    ]
+    movimientos = []
+    for origen, signo, modelo, filtro in documentos:
+        filas = modelo.objects.filter(disponibilidad__isnull=False, **filtro).values(
+            'transaccion', 'disponibilidad', 'fecha_documento', 'serie_documento', 'numero_documento', 'importe_total',
+        )
+        for fila in filas.iterator():
+            importe = signo * (fila['importe_total'] or Decimal('0'))
+            if importe:
+                movimientos.append(MovimientoDisponibilidad(
+                    disponibilidad_id=fila['disponibilidad'],
+                    fecha=fila['fecha_documento'],
+                    origen=origen,
+                    transaccion=fila['transaccion'],
+                    documento=f"{fila['serie_documento'] or ''}-{fila['numero_documento'] or ''}".strip('-'),
+                    importe=importe,
+                ))
+    MovimientoDisponibilidad.objects.bulk_create(movimientos, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disponibilidades', '0001_initial'),
+        ('ventas_ingreso', '0003_indice_vencimiento'),
+        ('ventas_devoluciones', '0004_ventasdevolucionescabezal_monotributista'),
+        ('compras_ingreso', '0003_indice_vencimiento'),
+        ('compras_devoluciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoDisponibilidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('origen', models.CharField(choices=[('VENTA', 'Venta'), ('DEVOLUCION_VENTA', 'Devolución de Venta'), ('COMPRA', 'Compra'), ('DEVOLUCION_COMPRA', 'Devolución de Compra')], max_length=20, verbose_name='Origen')),
+                ('transaccion', models.CharField(max_length=10, verbose_name='Transacción')),
+                ('documento', models.CharField(blank=True, default='', max_length=100, verbose_name='Documento')),
+                ('importe', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Importe')),
+                ('fchhor', models.DateTimeField(auto_now_add=True, verbose_name='Fecha/Hora')),
+                ('disponibilidad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='disponibilidades.disponibilidad', verbose_name='Disponibilidad')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Disponibilidad',
+                'verbose_name_plural': 'Movimientos de Disponibilidades',
+                'db_table': 'config_disponibilidades_movimientos',
+                'ordering': ['disponibilidad', 'fecha', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoDisponibilidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(choices=[('D', 'Diario'), ('M', 'Mensual')], max_length=1, verbose_name='Período')),
+                ('fecha', models.DateField(verbose_name='Fecha de Cierre')),
+                ('acumulado', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Movimientos Acumulados')),
+                ('fchhor', models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')),
+                ('disponibilidad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='disponibilidades.disponibilidad', verbose_name='Disponibilidad')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Disponibilidad',
+                'verbose_name_plural': 'Saldos de Disponibilidades',
+                'db_table': 'config_disponibilidades_saldos',
+                'ordering': ['disponibilidad', '-fecha'],
+                'indexes': [models.Index(fields=['disponibilidad', 'fecha'], name='disp_saldo_disp_fecha')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='saldodisponibilidad',
+            constraint=models.UniqueConstraint(fields=('disponibilidad', 'periodo', 'fecha'), name='disp_saldo_periodo_fecha_unico'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientodisponibilidad',
+            index=models.Index(fields=['disponibilidad', 'fecha'], name='disp_mov_disp_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientodisponibilidad',
+            index=models.Index(fields=['origen', 'transaccion'], name='disp_mov_origen_transaccion'),
+        ),
+        migrations.RunPython(cargar_movimientos, migrations.RunPython.noop),
+    ]
@@ -189,3 +189,84 @@ class Disponibilidad(models.Model):
             self.codigo = f"{prefijo}{str(nuevo_num).zfill(6)}"
         
         super().save(*args, **kwargs)
+
+
+class MovimientoDisponibilidad(models.Model):
+    """
+    Movimiento de una disponibilidad generado por un documento al contado.
+
+    importe tiene signo (+ ingreso, - egreso) y es la diferencia respecto de lo
+    ya registrado para el documento (ver configuracion.disponibilidades.movimientos).
+    """
+    ORIGENES = [
+        ('VENTA', 'Venta'),
+        ('DEVOLUCION_VENTA', 'Devolución de Venta'),
+        ('COMPRA', 'Compra'),
+        ('DEVOLUCION_COMPRA', 'Devolución de Compra'),
+    ]
+
+    disponibilidad = models.ForeignKey(
+        Disponibilidad,
+        on_delete=models.CASCADE,
+        related_name='movimientos',
+        verbose_name='Disponibilidad',
+    )
+    fecha = models.DateField(verbose_name='Fecha')
+    origen = models.CharField(max_length=20, choices=ORIGENES, verbose_name='Origen')
+    transaccion = models.CharField(max_length=10, verbose_name='Transacción')
+    documento = models.CharField(max_length=100, blank=True, default='', verbose_name='Documento')
+    importe = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='Importe')
+    fchhor = models.DateTimeField(auto_now_add=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        db_table = 'config_disponibilidades_movimientos'
+        verbose_name = 'Movimiento de Disponibilidad'
+        verbose_name_plural = 'Movimientos de Disponibilidades'
+        ordering = ['disponibilidad', 'fecha', 'id']
+        indexes = [
+            models.Index(fields=['disponibilidad', 'fecha'], name='disp_mov_disp_fecha'),
+            models.Index(fields=['origen', 'transaccion'], name='disp_mov_origen_transaccion'),
+        ]
+
+    def __str__(self):
+        return f"{self.disponibilidad_id} {self.fecha} {self.transaccion}: {self.importe}"
+
+
+class SaldoDisponibilidad(models.Model):
+    """
+    Foto del saldo de una disponibilidad al cierre de un día o de un mes.
+
+    acumulado es la suma de los movimientos con fecha <= fecha (sin el saldo
+    inicial, que se suma al consultar, así editar saldo_inicial no invalida las
+    fotos). Un movimiento con fecha anterior a una foto la corrige con un UPDATE.
+    """
+    PERIODOS = [
+        ('D', 'Diario'),
+        ('M', 'Mensual'),
+    ]
+
+    disponibilidad = models.ForeignKey(
+        Disponibilidad,
+        on_delete=models.CASCADE,
+        related_name='saldos',
+        verbose_name='Disponibilidad',
+    )
+    periodo = models.CharField(max_length=1, choices=PERIODOS, verbose_name='Período')
+    fecha = models.DateField(verbose_name='Fecha de Cierre')
+    acumulado = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Movimientos Acumulados')
+    fchhor = models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        db_table = 'config_disponibilidades_saldos'
+        verbose_name = 'Saldo de Disponibilidad'
+        verbose_name_plural = 'Saldos de Disponibilidades'
+        ordering = ['disponibilidad', '-fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['disponibilidad', 'periodo', 'fecha'], name='disp_saldo_periodo_fecha_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['disponibilidad', 'fecha'], name='disp_saldo_disp_fecha'),
+        ]
+
+    def __str__(self):
+        return f"{self.disponibilidad_id} {self.periodo} {self.fecha}: {self.acumulado}"
@@ -0,0 +1,263 @@
+"""
+Movimientos y saldos de las disponibilidades (bancos, IEDEs y cajas).
+
+Las ventas, compras y devoluciones al contado mueven la disponibilidad del
+documento: al registrar, modificar o eliminar uno se compara lo que debería
+haber movido con lo ya registrado para esa transacción y se agrega solo la
+diferencia (igual que la cuenta corriente de clientes). Las diferencias se
+registran en la fecha del documento, así un documento eliminado o corregido
+deja de contar también en los saldos de fechas pasadas.
+
+Solo mueven la disponibilidad los documentos en su misma moneda (los
+formularios rechazan las demás; las que ya existen se listan en el detalle de
+la disponibilidad con documentos_en_otra_moneda) y con fecha desde su
+fecha_ingreso_sistema: lo anterior ya está en saldo_inicial. Cambiar la moneda
+o la fecha de ingreso de una disponibilidad vuelve a sincronizar sus documentos.
+
+Saldo a una fecha = saldo_inicial + acumulado de la última foto
+(SaldoDisponibilidad, diaria o mensual) anterior a la fecha + movimientos
+entre la foto y la fecha: con fotos mensuales nunca se suma más de un mes de
+movimientos. Las fotos se generan con el comando cerrar_saldos_disponibilidades;
+un movimiento con fecha anterior a fotos ya tomadas las corrige con un UPDATE.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+
+from configuracion.documentos.senales import LibroDocumentos
+
+
+CERO = Decimal('0')
+
+# origen -> (modelo del cabezal 'app_label.Modelo', signo del movimiento)
+ORIGENES = {
+    'VENTA': ('ventas_ingreso.VentasCabezal', 1),
+    'DEVOLUCION_VENTA': ('ventas_devoluciones.VentasDevolucionesCabezal', -1),
+    'COMPRA': ('compras_ingreso.ComprasCabezal', -1),
+    'DEVOLUCION_COMPRA': ('compras_devoluciones.ComprasDevolucionesCabezal', 1),
+}
+
+# En ventas y compras forma_pago es CONTADO/CREDITO; en devoluciones es un FormaPagoTipo
+_FORMA_PAGO_TEXTO = ('VENTA', 'COMPRA')
+
+
+def _modelo(origen):
+    from django.apps import apps
+    return apps.get_model(ORIGENES[origen][0])
+
+
+def _campo_forma_pago(origen):
+    return 'forma_pago' if origen in _FORMA_PAGO_TEXTO else 'forma_pago__nombre'
+
+
+def _filtro_contado(origen):
+    return {'forma_pago': 'CONTADO'} if origen in _FORMA_PAGO_TEXTO else {'forma_pago__nombre': 'Contado'}
+
+
+def _datos_documento(origen, transaccion_id):
+    campos = [
+        'disponibilidad', 'fecha_documento', 'serie_documento', 'numero_documento', 'importe_total', 'moneda',
+        'disponibilidad__moneda', 'disponibilidad__fecha_ingreso_sistema', _campo_forma_pago(origen),
+    ]
+    return _modelo(origen).objects.filter(pk=transaccion_id).values(*campos).first()
+
+
+def _es_contado(origen, datos):
+    if origen in _FORMA_PAGO_TEXTO:
+        return datos['forma_pago'] == 'CONTADO'
+    return datos['forma_pago__nombre'] == 'Contado'
+
+
+def _mueve_disponibilidad(origen, datos):
+    """Documento al contado en la moneda de su disponibilidad, desde su fecha de ingreso al sistema"""
+    if not (datos['disponibilidad'] and _es_contado(origen, datos)):
+        return False
+    if datos['moneda'] != datos['disponibilidad__moneda']:
+        return False
+    ingreso = datos['disponibilidad__fecha_ingreso_sistema']
+    return ingreso is None or datos['fecha_documento'] >= ingreso
+
+
+def error_moneda(disponibilidad, moneda):
+    """Mensaje de error si el documento no está en la moneda de la disponibilidad (para los formularios)"""
+    if disponibilidad and moneda and disponibilidad.moneda_id != moneda.pk:
+        return (
+            f'La disponibilidad está en {disponibilidad.moneda_id} y el documento en {moneda.pk}: '
+            f'elija una disponibilidad en {moneda.pk}.'
+        )
+    return None
+
+
+def documentos_en_otra_moneda(disponibilidad):
+    """
+    Documentos al contado de la disponibilidad en otra moneda (no generan movimientos).
+
+    Returns:
+        list[dict]: origen, origen_nombre, transaccion, fecha_documento, documento, moneda e importe_total
+    """
+    from configuracion.disponibilidades.models import MovimientoDisponibilidad
+
+    nombres = dict(MovimientoDisponibilidad.ORIGENES)
+    documentos = []
+    for origen in ORIGENES:
+        filas = _modelo(origen).objects.filter(
+            disponibilidad=disponibilidad, **_filtro_contado(origen),
+        ).exclude(moneda=disponibilidad.moneda_id).values(
+            'transaccion', 'fecha_documento', 'serie_documento', 'numero_documento', 'moneda', 'importe_total',
+        )
+        for fila in filas:
+            fila['origen'] = origen
+            fila['origen_nombre'] = nombres[origen]
+            fila['documento'] = f"{fila['serie_documento'] or ''}-{fila['numero_documento'] or ''}".strip('-')
+            documentos.append(fila)
+    documentos.sort(key=lambda fila: (fila['fecha_documento'], fila['transaccion']), reverse=True)
+    return documentos
+
+
+def registrar_movimiento(disponibilidad_id, importe, fecha, origen, transaccion_id, documento=''):
+    """Agrega un movimiento y corrige las fotos de saldo desde su fecha en adelante"""
+    from configuracion.disponibilidades.models import MovimientoDisponibilidad, SaldoDisponibilidad
+
+    with transaction.atomic():
+        movimiento = MovimientoDisponibilidad.objects.create(
+            disponibilidad_id=disponibilidad_id,
+            fecha=fecha,
+            origen=origen,
+            transaccion=transaccion_id,
+            documento=documento,
+            importe=importe,
+        )
+        SaldoDisponibilidad.objects.filter(
+            disponibilidad_id=disponibilidad_id, fecha__gte=fecha,
+        ).update(acumulado=F('acumulado') + importe)
+    return movimiento
+
+
+@transaction.atomic
+def sincronizar_documento(origen, transaccion_id):
+    """
+    Lleva los movimientos de disponibilidades al estado actual del documento.
+
+    Args:
+        origen: Clave de ORIGENES
+        transaccion_id: Clave del cabezal (si ya no existe, se revierte todo lo registrado)
+
+    Returns:
+        list: Movimientos agregados (vacía si no hubo cambios)
+    """
+    from configuracion.disponibilidades.models import MovimientoDisponibilidad
+
+    datos = _datos_documento(origen, transaccion_id)
+
+    # Por (disponibilidad, fecha): si el documento cambia de fecha o se elimina,
+    # la reversión queda en la fecha original y los saldos históricos no lo incluyen
+    objetivo = {}
+    documento = ''
+    if datos and _mueve_disponibilidad(origen, datos):
+        clave = (datos['disponibilidad'], datos['fecha_documento'])
+        objetivo[clave] = ORIGENES[origen][1] * (datos['importe_total'] or CERO)
+    if datos:
+        documento = f"{datos['serie_documento'] or ''}-{datos['numero_documento'] or ''}".strip('-')
+
+    registrado = {
+        (fila['disponibilidad'], fila['fecha']): fila['total']
+        for fila in MovimientoDisponibilidad.objects.filter(
+            origen=origen, transaccion=transaccion_id,
+        ).order_by().values('disponibilidad', 'fecha').annotate(total=Sum('importe'))
+    }
+
+    movimientos = []
+    for clave in sorted(set(objetivo) | set(registrado), key=lambda c: c in objetivo):
+        diferencia = objetivo.get(clave, CERO) - registrado.get(clave, CERO)
+        if diferencia:
+            disponibilidad_id, fecha = clave
+            movimientos.append(
+                registrar_movimiento(disponibilidad_id, diferencia, fecha, origen, transaccion_id, documento)
+            )
+    return movimientos
+
+
+def sincronizar_disponibilidad(disponibilidad_id):
+    """Vuelve a sincronizar todos los documentos de la disponibilidad (al cambiar su moneda o fecha de ingreso)"""
+    from configuracion.disponibilidades.models import MovimientoDisponibilidad
+
+    for origen in ORIGENES:
+        ids = set(_modelo(origen).objects.filter(disponibilidad_id=disponibilidad_id).values_list('pk', flat=True))
+        ids.update(MovimientoDisponibilidad.objects.filter(
+            disponibilidad_id=disponibilidad_id, origen=origen,
+        ).values_list('transaccion', flat=True))
+        for transaccion_id in ids:
+            sincronizar_documento(origen, transaccion_id)
+
+
+def acumulado_a_fecha(disponibilidad_id, fecha, usar_foto_del_dia=True):
+    """
+    Suma de los movimientos hasta la fecha (inclusive): última foto + movimientos posteriores.
+
+    Con usar_foto_del_dia=False se parte de una foto anterior a la fecha (para
+    recalcular la foto de ese mismo día).
+    """
+    from configuracion.disponibilidades.models import MovimientoDisponibilidad, SaldoDisponibilidad
+
+    fotos = SaldoDisponibilidad.objects.filter(disponibilidad_id=disponibilidad_id)
+    fotos = fotos.filter(fecha__lte=fecha) if usar_foto_del_dia else fotos.filter(fecha__lt=fecha)
+    foto = fotos.order_by('-fecha').values('fecha', 'acumulado').first()
+
+    movimientos = MovimientoDisponibilidad.objects.filter(disponibilidad_id=disponibilidad_id, fecha__lte=fecha)
+    base = CERO
+    if foto:
+        movimientos = movimientos.filter(fecha__gt=foto['fecha'])
+        base = foto['acumulado']
+    total = base + (movimientos.aggregate(total=Sum('importe'))['total'] or CERO)
+    return total.quantize(Decimal('0.01'))
+
+
+def saldo_a_fecha(disponibilidad, fecha=None):
+    """Saldo de la disponibilidad al cierre de la fecha (hoy por defecto)"""
+    fecha = fecha or timezone.localdate()
+    return (disponibilidad.saldo_inicial or CERO) + acumulado_a_fecha(disponibilidad.pk, fecha)
+
+
+def tomar_foto(disponibilidad_id, periodo, fecha):
+    """Crea o recalcula la foto de saldo de la disponibilidad al cierre de la fecha"""
+    from configuracion.disponibilidades.models import SaldoDisponibilidad
+
+    foto, _ = SaldoDisponibilidad.objects.update_or_create(
+        disponibilidad_id=disponibilidad_id,
+        periodo=periodo,
+        fecha=fecha,
+        defaults={'acumulado': acumulado_a_fecha(disponibilidad_id, fecha, usar_foto_del_dia=False)},
+    )
+    return foto
+
+
+def _disponibilidad_por_guardar(sender, instance, raw=False, **kwargs):
+    # Moneda y fecha de ingreso anteriores, para saber si cambian los documentos que cuentan
+    instance._moneda_ingreso_anterior = None
+    if not raw and instance.pk:
+        instance._moneda_ingreso_anterior = sender.objects.filter(pk=instance.pk).values_list(
+            'moneda', 'fecha_ingreso_sistema',
+        ).first()
+
+
+def _disponibilidad_guardada(sender, instance, created=False, raw=False, **kwargs):
+    anterior = getattr(instance, '_moneda_ingreso_anterior', None)
+    if not raw and not created and anterior and anterior != (instance.moneda_id, instance.fecha_ingreso_sistema):
+        sincronizar_disponibilidad(instance.pk)
+
+
+LIBRO = LibroDocumentos(
+    'disponibilidad', {origen: etiqueta for origen, (etiqueta, _signo) in ORIGENES.items()}, sincronizar_documento,
+)
+
+
+def conectar_senales():
+    """Conecta las señales de los documentos al contado y de las disponibilidades (desde DisponibilidadesConfig.ready)"""
+    from configuracion.disponibilidades.models import Disponibilidad
+
+    pre_save.connect(_disponibilidad_por_guardar, sender=Disponibilidad, dispatch_uid='disponibilidad_pre_save')
+    post_save.connect(_disponibilidad_guardada, sender=Disponibilidad, dispatch_uid='disponibilidad_post_save')
+    LIBRO.conectar()
@@ -1,3 +1,79 @@
+import datetime
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from compras.compras_ingreso.models import ComprasCabezal, ComprasLineas
+from configuracion.articulos.models import IVA, Articulo, Moneda, TipoArticulo
+from configuracion.disponibilidades import movimientos
+from configuracion.disponibilidades.models import Disponibilidad, MovimientoDisponibilidad
+from configuracion.documentos.models import Documento
+from configuracion.proveedores.models import Proveedor
+
+
+MARZO = datetime.date(2025, 3, 10)
+
+ABRIL = datetime.date(2025, 4, 5)
+
+
+class SincronizarDisponibilidadTests(TestCase):
+    """Los documentos al contado mueven su disponibilidad por diferencias, en la fecha del documento"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Moneda.objects.create(codigo='UYU', nombre='Peso uruguayo')
+        Moneda.objects.create(codigo='USD', nombre='Dólar')
+        Documento.objects.create(codigo='efactura', nombre='e-Factura')
+        iva = IVA.objects.create(codigo='iva_b', nombre='IVA Básico', valor=Decimal('0.22'))
+        servicio = TipoArticulo.objects.create(codigo='SER', nombre='Servicio')
+        cls.articulo = Articulo.objects.create(nombre='Servicio', tipo_articulo=servicio, iva=iva)
+        cls.proveedor = Proveedor.objects.create(codigo='P1', razon='Proveedor')
+        cls.caja = Disponibilidad.objects.create(
+            tipo='CAJA', nombre_institucion='Caja', moneda_id='UYU', saldo_inicial=Decimal('1000'),
+        )
+
+    def setUp(self):
+        self.compra = ComprasCabezal.objects.create(
+            id_proveedor=self.proveedor, tipo_documento_id='efactura', numero_documento='1',
+            forma_pago='CONTADO', fecha_documento=MARZO, moneda_id='UYU', disponibilidad=self.caja,
+        )
+        self.linea = ComprasLineas.objects.create(
+            transaccion=self.compra, linea=1, id_articulo=self.articulo, cantidad=10, precio_original=5,
+        )
+
+    def importes(self):
+        return list(MovimientoDisponibilidad.objects.filter(transaccion=self.compra.pk).order_by('pk').values_list(
+            'fecha', 'importe',
+        ))
+
+    def test_compra_al_contado(self):
+        self.assertEqual(self.importes(), [(MARZO, Decimal('-61.00'))])
+        self.assertEqual(movimientos.saldo_a_fecha(self.caja, MARZO), Decimal('939.00'))
+
+    def test_modificacion_registra_la_diferencia(self):
+        self.linea.cantidad = 20
+        self.linea.save()
+
+        self.assertEqual(self.importes(), [(MARZO, Decimal('-61.00')), (MARZO, Decimal('-61.00'))])
+
+    def test_cambio_de_fecha_revierte_en_la_fecha_original(self):
+        self.compra.fecha_documento = ABRIL
+        self.compra.save()
+
+        self.assertEqual(self.importes()[1:], [(MARZO, Decimal('61.00')), (ABRIL, Decimal('-61.00'))])
+        self.assertEqual(movimientos.saldo_a_fecha(self.caja, MARZO), Decimal('1000.00'))
+        self.assertEqual(movimientos.saldo_a_fecha(self.caja, ABRIL), Decimal('939.00'))
+
+    def test_corrige_las_fotos_posteriores(self):
+        movimientos.tomar_foto(self.caja.pk, 'M', datetime.date(2025, 3, 31))
+
+        self.compra.delete()
+
+        self.assertEqual(movimientos.saldo_a_fecha(self.caja, datetime.date(2025, 3, 31)), Decimal('1000.00'))
+
+    def test_otra_moneda_no_mueve_la_disponibilidad(self):
+        self.compra.moneda_id = 'USD'
+        self.compra.save()
+
+        self.assertEqual(sum(importe for _, importe in self.importes()), Decimal('0'))
+        self.assertEqual(len(movimientos.documentos_en_otra_moneda(self.caja)), 1)
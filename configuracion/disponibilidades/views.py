@@ -1,5 +1,8 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.utils import timezone
+import datetime
+from . import movimientos
 from .models import Disponibilidad
 from .forms import DisponibilidadForm
 from erp_demo.config import EMPRESA_NOMBRE
@@ -78,8 +81,22 @@ def detalle_disponibilidad(request, pk):
     """Vista para ver el detalle de una disponibilidad"""
     disponibilidad = get_object_or_404(Disponibilidad, pk=pk)
     
+    # Saldo a la fecha pedida (hoy por defecto): última foto + movimientos posteriores
+    try:
+        fecha_saldo = datetime.date.fromisoformat(request.GET.get('fecha', ''))
+    except ValueError:
+        fecha_saldo = timezone.localdate()
+    
     context = {
         'disponibilidad': disponibilidad,
+        'fecha_saldo': fecha_saldo,
+        'saldo': movimientos.saldo_a_fecha(disponibilidad, fecha_saldo),
+        'ultimos_movimientos': disponibilidad.movimientos.order_by('-fecha', '-id')[:20],
+        'documentos_en_otra_moneda': movimientos.documentos_en_otra_moneda(disponibilidad),
+        'cierres_mensuales': [
+            (foto.fecha, (disponibilidad.saldo_inicial or 0) + foto.acumulado)
+            for foto in disponibilidad.saldos.filter(periodo='M').order_by('-fecha')[:12]
+        ],
         'empresa_nombre': EMPRESA_NOMBRE,
     }
     return render(request, 'disponibilidades/detalle_disponibilidad.html', context)
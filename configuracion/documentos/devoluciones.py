@@ -0,0 +1,141 @@
+"""
+Cantidad devuelta por línea de documento (ComprasLineas / VentasLineas.cantidad_devuelta).
+
+Se recalcula desde las devoluciones cada vez que se registra, modifica o
+elimina una línea de devolución, para que las búsquedas de facturas y líneas a
+devolver puedan descartar las que ya se devolvieron por completo sin sumar
+todas las devoluciones en cada consulta.
+
+Las búsquedas de documentos y líneas a devolver se paginan por cursor: la
+página siguiente continúa después del último documento (fecha, transacción) o
+de la última línea vista, sin OFFSET.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+
+from configuracion.documentos.senales import documento_registrado
+from configuracion.tablas.navegacion import codificar_cursor, decodificar_cursor
+
+
+POR_PAGINA = 50
+
+
+def _modelo(nombre):
+    from django.apps import apps
+    return apps.get_model(nombre)
+
+
+class CantidadDevuelta:
+    """
+    Cantidad devuelta de las líneas de un documento.
+
+    Args:
+        lineas: Modelo de líneas del documento 'app_label.Modelo'
+        devoluciones: Modelo de líneas de la devolución 'app_label.Modelo'
+        campo: FK de la línea de devolución a la línea del documento (id_compra_linea)
+        nombre: Prefijo de los dispatch_uid de las señales
+    """
+
+    def __init__(self, lineas, devoluciones, campo, nombre):
+        self.lineas = lineas
+        self.devoluciones = devoluciones
+        self.campo = campo
+        self.nombre = nombre
+
+    def recalcular(self, ids_linea):
+        """Recalcula cantidad_devuelta de las líneas indicadas con un solo UPDATE"""
+        ids = {id_linea for id_linea in ids_linea if id_linea}
+        if not ids:
+            return
+
+        devuelto = _modelo(self.devoluciones).objects.filter(
+            **{self.campo: OuterRef('pk')}
+        ).order_by().values(self.campo).annotate(total=Sum('cantidad')).values('total')[:1]
+
+        _modelo(self.lineas).objects.filter(pk__in=ids).update(
+            cantidad_devuelta=Coalesce(
+                Subquery(devuelto),
+                Value(Decimal('0')),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            )
+        )
+
+    @staticmethod
+    def lineas_con_saldo(queryset):
+        """Filtra las líneas que todavía tienen cantidad para devolver"""
+        return queryset.filter(cantidad__gt=F('cantidad_devuelta'))
+
+    def _documento_registrado(self, sender, lineas, anteriores, **kwargs):
+        # registrar_lineas o el save() de una línea suelta; líneas afectadas antes y
+        # después del registro (pudo cambiar la línea afectada)
+        ids = {getattr(linea, f'{self.campo}_id') for linea in lineas}
+        ids.update(getattr(linea, f'{self.campo}_id') for linea in anteriores.values())
+        self.recalcular(ids)
+
+    def _linea_eliminada(self, sender, instance, **kwargs):
+        # Líneas eliminadas con su cabezal (cascada) o sueltas
+        self.recalcular([getattr(instance, f'{self.campo}_id')])
+
+    def conectar_senales(self):
+        """Conecta las señales de las líneas de devolución (desde el AppConfig.ready de la app)"""
+        devoluciones = _modelo(self.devoluciones)
+        documento_registrado.connect(
+            self._documento_registrado, sender=devoluciones, weak=False, dispatch_uid=f'{self.nombre}_registradas'
+        )
+        post_delete.connect(self._linea_eliminada, sender=devoluciones, weak=False, dispatch_uid=f'{self.nombre}_post_delete')
+
+
+COMPRAS = CantidadDevuelta(
+    'compras_ingreso.ComprasLineas', 'compras_devoluciones.ComprasDevolucionesLineas',
+    'id_compra_linea', 'compras_devoluciones',
+)
+
+VENTAS = CantidadDevuelta(
+    'ventas_ingreso.VentasLineas', 'ventas_devoluciones.VentasDevolucionesLineas',
+    'id_venta_linea', 'ventas_devoluciones',
+)
+
+
+def pagina_documentos(cabezales, token, por_pagina=POR_PAGINA):
+    """
+    Página de cabezales ordenados por fecha y transacción descendentes.
+
+    Returns:
+        tuple: (cabezales de la página, cursor de la página siguiente o None)
+    """
+    cursor = decodificar_cursor(token)
+    if cursor and 'fecha' in cursor and 'transaccion' in cursor:
+        cabezales = cabezales.filter(
+            Q(fecha_documento__lt=cursor['fecha'])
+            | Q(fecha_documento=cursor['fecha'], transaccion__lt=cursor['transaccion'])
+        )
+
+    cabezales = list(cabezales.order_by('-fecha_documento', '-transaccion')[:por_pagina + 1])
+    if len(cabezales) <= por_pagina:
+        return cabezales, None
+    cabezales = cabezales[:por_pagina]
+    return cabezales, codificar_cursor({
+        'fecha': cabezales[-1].fecha_documento.isoformat(),
+        'transaccion': cabezales[-1].transaccion,
+    })
+
+
+def pagina_lineas(lineas, token, por_pagina=POR_PAGINA):
+    """
+    Página de líneas de un documento ordenadas por número de línea.
+
+    Returns:
+        tuple: (líneas de la página, cursor de la página siguiente o None)
+    """
+    cursor = decodificar_cursor(token)
+    if cursor and 'linea' in cursor:
+        lineas = lineas.filter(linea__gt=cursor['linea'])
+
+    lineas = list(lineas.order_by('linea')[:por_pagina + 1])
+    if len(lineas) <= por_pagina:
+        return lineas, None
+    lineas = lineas[:por_pagina]
+    return lineas, codificar_cursor({'linea': lineas[-1].linea})
@@ -0,0 +1,163 @@
+"""
+Cálculo de precios e IVA de las líneas de documentos.
+
+Un único motor para las cuatro familias de líneas (ventas, compras y sus
+devoluciones). Recibe el contexto del cabezal (tipo de documento, IVA incluido,
+monotributista) y un lote de líneas, y devuelve precio_neto, sub_total, iva y
+total de cada una. Las tasas de IVA de todos los artículos del lote se
+resuelven en una sola consulta.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from configuracion.articulos.models import Articulo
+
+
+VENTA = 'venta'
+COMPRA = 'compra'
+DEVOLUCION_COMPRA = 'devolucion_compra'
+DEVOLUCION_VENTA = 'devolucion_venta'
+
+FAMILIAS = (VENTA, COMPRA, DEVOLUCION_COMPRA, DEVOLUCION_VENTA)
+
+# Tipos de documento que no discriminan IVA (el IVA de la línea es 0)
+DOCUMENTOS_SIN_IVA = {
+    VENTA: {'movcli', 'factexpo'},
+    COMPRA: {'movprov', 'factimp'},
+    DEVOLUCION_COMPRA: {'devmovprov'},
+    DEVOLUCION_VENTA: {'devmovcli'},
+}
+
+CERO = Decimal('0')
+UNO = Decimal('1')
+CIEN = Decimal('100')
+CENTESIMOS = Decimal('0.01')
+
+
+def _decimal(valor):
+    """Convierte a Decimal tolerando None, cadenas vacías y coma decimal"""
+    if valor is None or valor == '':
+        return CERO
+    if isinstance(valor, Decimal):
+        return valor
+    return Decimal(str(valor).replace(',', '.'))
+
+
+def contexto_cabezal(cabezal):
+    """Arma el contexto de cálculo a partir de un cabezal (guardado o no)"""
+    tipo_documento = cabezal.tipo_documento_id
+    return {
+        'tipo_documento': tipo_documento,
+        'precio_iva_inc': getattr(cabezal, 'precio_iva_inc', 'SI') or 'SI',
+        'monotributista': getattr(cabezal, 'monotributista', 'NO') == 'SI',
+    }
+
+
+def aplica_iva(familia, contexto):
+    """Indica si el documento discrimina el IVA de los artículos"""
+    tipo_documento = contexto.get('tipo_documento')
+    if familia == VENTA:
+        # En ventas solo la factura electrónica discrimina IVA
+        return tipo_documento == 'efactura'
+    if familia in (COMPRA, DEVOLUCION_COMPRA) and contexto.get('monotributista'):
+        return False
+    return tipo_documento not in DOCUMENTOS_SIN_IVA[familia]
+
+
+def tasas_iva(ids_articulos):
+    """Devuelve {id_articulo: tasa IVA} para todos los artículos en una sola consulta"""
+    ids = {id_articulo for id_articulo in ids_articulos if id_articulo}
+    if not ids:
+        return {}
+    return {
+        id_articulo: _decimal(valor)
+        for id_articulo, valor in Articulo.objects.filter(id__in=ids).values_list('id', 'iva__valor')
+    }
+
+
+def calcular_linea(familia, precio, cantidad, descuento, tasa_iva, precio_iva_inc):
+    """
+    Calcula los importes de una línea.
+
+    Args:
+        familia: VENTA, COMPRA, DEVOLUCION_COMPRA o DEVOLUCION_VENTA
+        precio: precio_original (ventas/compras) o precio (devoluciones)
+        cantidad: Cantidad de la línea
+        descuento: Porcentaje de descuento (ej: 5 para 5%)
+        tasa_iva: Tasa de IVA ya resuelta (0 si el documento no discrimina IVA)
+        precio_iva_inc: 'SI' o 'NO' según el cabezal
+
+    Returns:
+        dict: precio_neto (unitario), sub_total, iva y total
+    """
+    precio = _decimal(precio)
+    cantidad = _decimal(cantidad)
+    factor_descuento = UNO - _decimal(descuento) / CIEN
+    tasa_iva = _decimal(tasa_iva)
+
+    if familia == COMPRA and precio_iva_inc == 'SI':
+        # Compras con IVA incluido: primero se quita el IVA y después se aplica el descuento
+        precio_sin_iva = precio / (UNO + tasa_iva) if tasa_iva > 0 else precio
+        sub_total_unitario = precio_sin_iva * factor_descuento
+        iva_unitario = sub_total_unitario * tasa_iva
+        precio_neto = sub_total_unitario
+    elif familia == VENTA or precio_iva_inc == 'SI':
+        # IVA incluido (en ventas siempre): el precio con descuento se desglosa
+        precio_neto = precio * factor_descuento
+        if tasa_iva > 0:
+            sub_total_unitario = precio_neto / (UNO + tasa_iva)
+            iva_unitario = precio_neto - sub_total_unitario
+        else:
+            sub_total_unitario = precio_neto
+            iva_unitario = CERO
+    else:
+        # IVA no incluido: el precio con descuento es la base y se le suma el IVA
+        precio_neto = precio * factor_descuento
+        sub_total_unitario = precio_neto
+        iva_unitario = precio_neto * tasa_iva
+
+    sub_total = sub_total_unitario * cantidad
+    iva = iva_unitario * cantidad
+    return {
+        'precio_neto': precio_neto,
+        'sub_total': sub_total,
+        'iva': iva,
+        'total': sub_total + iva,
+    }
+
+
+def calcular_lineas(familia, contexto, lineas, tasas=None):
+    """
+    Calcula un lote de líneas con el mismo contexto de cabezal.
+
+    Args:
+        familia: VENTA, COMPRA, DEVOLUCION_COMPRA o DEVOLUCION_VENTA
+        contexto: dict con tipo_documento, precio_iva_inc y monotributista
+        lineas: Iterable de dicts con articulo, precio, cantidad y descuento
+        tasas: {id_articulo: tasa} ya resuelto (si no, se consulta una vez)
+
+    Returns:
+        list: Un dict de importes por línea, en el mismo orden
+    """
+    lineas = list(lineas)
+    con_iva = aplica_iva(familia, contexto)
+    if tasas is None:
+        tasas = tasas_iva(linea.get('articulo') for linea in lineas) if con_iva else {}
+    precio_iva_inc = contexto.get('precio_iva_inc') or 'SI'
+    # Las devoluciones no tienen descuento: el precio ya es el unitario final
+    con_descuento = familia in (VENTA, COMPRA)
+
+    return [
+        calcular_linea(
+            familia,
+            linea.get('precio'),
+            linea.get('cantidad'),
+            linea.get('descuento') if con_descuento else None,
+            tasas.get(linea.get('articulo'), CERO) if con_iva else CERO,
+            precio_iva_inc,
+        )
+        for linea in lineas
+    ]
+
+
+def redondear(valor):
+    """Redondea a 2 decimales (como se guarda en la base de datos)"""
+    return _decimal(valor).quantize(CENTESIMOS, rounding=ROUND_HALF_UP)
@@ -0,0 +1,76 @@
+"""
+Señales del registro de documentos.
+
+registrar_lineas escribe las líneas con bulk_create/bulk_update, que no disparan
+post_save, así que los saldos que dependen de las líneas (cantidades devueltas,
+stock, cuenta corriente, etc.) se actualizan escuchando documento_registrado.
+"""
+from django.dispatch import Signal
+
+
+# Se envía al terminar registrar_lineas, dentro de la misma transacción.
+#   sender: modelo de líneas (VentasLineas, ComprasLineas, ...)
+#   cabezal: cabezal del documento
+#   lineas: líneas nuevas o modificadas, ya guardadas
+#   eliminadas: líneas eliminadas
+#   anteriores: {pk: línea como estaba en la base antes del registro} para las
+#       líneas modificadas y eliminadas (permite calcular diferencias)
+documento_registrado = Signal()
+
+
+def registrando_lineas(cabezal):
+    """El cabezal se guardó con guardar_cabezal y sus líneas todavía no se registraron"""
+    return getattr(cabezal, '_registrando_lineas', False)
+
+
+class LibroDocumentos:
+    """
+    Receptores de un libro que se lleva por documento (stock, movimientos de
+    disponibilidades, cuenta corriente de clientes).
+
+    sincronizar(origen, transaccion_id) lleva el libro al estado actual del
+    documento; se llama una vez por escritura: al registrar las líneas
+    (documento_registrado, también desde el save() de una línea suelta) y al
+    guardar o eliminar el cabezal solo. El post_save de un cabezal guardado con
+    guardar_cabezal se saltea: sus líneas se registran a continuación.
+
+    Args:
+        nombre: Prefijo de los dispatch_uid de las señales
+        origenes: {origen: modelo del cabezal 'app_label.Modelo'}
+        sincronizar: Función (origen, transaccion_id)
+    """
+
+    def __init__(self, nombre, origenes, sincronizar):
+        self.nombre = nombre
+        self.origenes = origenes
+        self.sincronizar = sincronizar
+        self._origen = {}
+
+    def _registrado(self, sender, cabezal, **kwargs):
+        self.sincronizar(self._origen[type(cabezal)], cabezal.pk)
+
+    def _cabezal_guardado(self, sender, instance, raw=False, **kwargs):
+        if not raw and not registrando_lineas(instance):
+            self.sincronizar(self._origen[sender], instance.pk)
+
+    def _cabezal_eliminado(self, sender, instance, **kwargs):
+        self.sincronizar(self._origen[sender], instance.pk)
+
+    def conectar(self):
+        """Conecta las señales de los cabezales y sus líneas (desde el AppConfig.ready del libro)"""
+        from django.apps import apps
+        from django.db.models.signals import post_delete, post_save
+
+        for origen, etiqueta in self.origenes.items():
+            cabezal = apps.get_model(etiqueta)
+            self._origen[cabezal] = origen
+            documento_registrado.connect(
+                self._registrado, sender=cabezal.lineas.field.model, weak=False,
+                dispatch_uid=f'{self.nombre}_registrado_{origen}',
+            )
+            post_save.connect(
+                self._cabezal_guardado, sender=cabezal, weak=False, dispatch_uid=f'{self.nombre}_post_save_{origen}'
+            )
+            post_delete.connect(
+                self._cabezal_eliminado, sender=cabezal, weak=False, dispatch_uid=f'{self.nombre}_post_delete_{origen}'
+            )
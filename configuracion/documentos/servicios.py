@@ -0,0 +1,148 @@
+"""
+Servicio de registro de documentos (ventas, compras y sus devoluciones).
+
+En lugar de guardar línea por línea (cada save() recalculaba los totales del
+cabezal con varias consultas), las líneas se calculan en memoria, se escriben
+en bloque con bulk_create/bulk_update y los totales del cabezal se actualizan
+con una única sentencia UPDATE.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from configuracion.documentos import precios
+from configuracion.documentos.senales import documento_registrado
+
+
+def campos_actualizables(modelo):
+    """
+    Campos concretos que se escriben en bulk_update: sin la clave primaria ni los
+    acumulados que mantienen otros documentos (CAMPOS_ACUMULADOS del modelo).
+    """
+    acumulados = getattr(modelo, 'CAMPOS_ACUMULADOS', ())
+    return [
+        campo.name for campo in modelo._meta.concrete_fields
+        if not campo.primary_key and campo.name not in acumulados
+    ]
+
+
+def actualizar_totales(cabezal):
+    """
+    Actualiza sub_total, iva e importe_total del cabezal desde sus líneas
+    con una sola sentencia UPDATE (las sumas se resuelven como subconsultas).
+    """
+    modelo_lineas = cabezal.lineas.model
+    lineas = modelo_lineas.objects.filter(
+        transaccion=OuterRef('pk')
+    ).order_by().values('transaccion')
+
+    def suma(campo):
+        return Coalesce(
+            Subquery(lineas.annotate(suma=Sum(campo)).values('suma')[:1]),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        )
+
+    type(cabezal).objects.filter(pk=cabezal.pk).update(
+        sub_total=suma('sub_total'),
+        iva=suma('iva'),
+        importe_total=suma('total'),
+    )
+
+
+def lineas_anteriores(modelo_lineas, ids):
+    """{pk: línea como está en la base}, solo si alguien escucha documento_registrado"""
+    ids = [pk for pk in ids if pk]
+    if not ids or not documento_registrado.has_listeners(modelo_lineas):
+        return {}
+    return modelo_lineas.objects.in_bulk(ids)
+
+
+def guardar_cabezal(cabezal):
+    """
+    Guarda el cabezal de un documento cuyas líneas se registran a continuación
+    con registrar_lineas: los saldos que escuchan el post_save del cabezal
+    (stock, cuenta corriente, etc.) esperan a documento_registrado y se
+    sincronizan una sola vez.
+    """
+    cabezal._registrando_lineas = True
+    cabezal.save()
+
+
+def linea_guardada(linea, anteriores):
+    """
+    Después del save() de una línea suelta (admin, shell): actualiza los totales
+    del cabezal y envía documento_registrado como registrar_lineas.
+    """
+    cabezal = linea.transaccion
+    cabezal.actualizar_totales()
+    documento_registrado.send(
+        sender=type(linea),
+        cabezal=cabezal,
+        lineas=[linea],
+        eliminadas=(),
+        anteriores=anteriores,
+    )
+    cabezal.__dict__.pop('_registrando_lineas', None)
+
+
+@transaction.atomic
+def registrar_lineas(cabezal, lineas, eliminadas=()):
+    """
+    Guarda las líneas de un documento en bloque y actualiza los totales del cabezal.
+
+    Si el cabezal se acaba de guardar con guardar_cabezal, los saldos que
+    esperaban a las líneas se sincronizan con el documento_registrado de aquí.
+
+    Args:
+        cabezal: Cabezal ya guardado (VentasCabezal, ComprasCabezal o devoluciones)
+        lineas: Líneas nuevas o modificadas (por ejemplo, formset.save(commit=False))
+        eliminadas: Líneas a eliminar (por ejemplo, formset.deleted_objects)
+    """
+    modelo_lineas = cabezal.lineas.model
+
+    ids_eliminar = [linea.pk for linea in eliminadas if linea.pk]
+
+    # Estado previo de las líneas modificadas/eliminadas, solo si alguien lo usa
+    anteriores = lineas_anteriores(modelo_lineas, ids_eliminar + [linea.pk for linea in lineas])
+
+    if ids_eliminar:
+        modelo_lineas.objects.filter(pk__in=ids_eliminar).delete()
+
+    # En devoluciones, cargar la línea original con su cabezal en una consulta
+    relaciones = [
+        f'{campo}__transaccion' for campo in ('id_compra_linea', 'id_venta_linea')
+        if any(f.name == campo for f in modelo_lineas._meta.concrete_fields)
+    ]
+    if relaciones:
+        prefetch_related_objects(lineas, *relaciones)
+
+    # Contexto del cabezal y tasas de IVA se resuelven una vez para todo el lote
+    contexto = precios.contexto_cabezal(cabezal)
+    tasas = precios.tasas_iva(linea.id_articulo_id for linea in lineas)
+
+    nuevas = []
+    existentes = []
+    for linea in lineas:
+        linea.transaccion = cabezal
+        linea.calcular_importes(contexto, tasas)
+        if linea.pk:
+            existentes.append(linea)
+        else:
+            nuevas.append(linea)
+
+    if nuevas:
+        modelo_lineas.objects.bulk_create(nuevas)
+    if existentes:
+        modelo_lineas.objects.bulk_update(existentes, campos_actualizables(modelo_lineas))
+
+    actualizar_totales(cabezal)
+
+    documento_registrado.send(
+        sender=modelo_lineas,
+        cabezal=cabezal,
+        lineas=lineas,
+        eliminadas=eliminadas,
+        anteriores=anteriores,
+    )
+    cabezal.__dict__.pop('_registrando_lineas', None)
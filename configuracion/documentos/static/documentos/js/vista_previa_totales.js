@@ -0,0 +1,95 @@
+// Vista previa de importes de las líneas de un documento.
+// Los importes (precio neto, sub total, IVA y total) se calculan en el servidor
+// con el mismo motor que se usa al guardar (configuracion.documentos.precios),
+// así el formulario no repite las fórmulas en JavaScript.
+//
+// Uso en el template:
+//   <div id="vista-previa-totales" data-url="{% url 'vista_previa_totales' %}" data-familia="venta"></div>
+//   <script src="{% static 'documentos/js/vista_previa_totales.js' %}"></script>
+// y desde el formulario llamar a programarVistaPreviaTotales() cuando cambie una línea.
+
+(function() {
+    let temporizador = null;
+    let ultimaSolicitud = 0;
+
+    function obtenerConfiguracion() {
+        return document.getElementById('vista-previa-totales');
+    }
+
+    function valorDe(elemento) {
+        return elemento ? elemento.value : '';
+    }
+
+    function filaEliminada(row) {
+        if (row.style.display === 'none') return true;
+        const deleteCheckbox = row.querySelector('.delete-checkbox');
+        const deleteField = row.querySelector('input[name*="-DELETE"]');
+        return (deleteCheckbox && deleteCheckbox.value === '1') || (deleteField && deleteField.checked);
+    }
+
+    function datosLinea(row) {
+        const articulo = row.querySelector('.articulo-select') || row.querySelector('input[name*="-id_articulo"]');
+        return {
+            articulo: valorDe(articulo) || null,
+            precio: valorDe(row.querySelector('.precio-original-input') || row.querySelector('.precio-input')) || 0,
+            cantidad: valorDe(row.querySelector('.cantidad-input')) || 0,
+            descuento: valorDe(row.querySelector('.descuento-input')) || 0,
+        };
+    }
+
+    function mostrar(row, clase, valor) {
+        const display = row.querySelector(clase);
+        if (display) display.textContent = Number(valor || 0).toFixed(2);
+    }
+
+    function actualizarVistaPreviaTotales() {
+        const configuracion = obtenerConfiguracion();
+        if (!configuracion) return;
+
+        const filas = Array.from(document.querySelectorAll('.linea-row')).filter(row => !filaEliminada(row));
+        const csrf = document.querySelector('input[name="csrfmiddlewaretoken"]');
+        const solicitud = ++ultimaSolicitud;
+
+        fetch(configuracion.dataset.url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrf ? csrf.value : '',
+            },
+            body: JSON.stringify({
+                familia: configuracion.dataset.familia,
+                tipo_documento: valorDe(document.getElementById('id_tipo_documento')),
+                precio_iva_inc: valorDe(document.getElementById('id_precio_iva_inc')) || 'SI',
+                id_proveedor: valorDe(document.getElementById('id_proveedor')) || null,
+                lineas: filas.map(datosLinea),
+            }),
+        })
+            .then(response => response.json())
+            .then(data => {
+                // Ignorar respuestas de solicitudes anteriores
+                if (solicitud !== ultimaSolicitud || !data.lineas) return;
+
+                filas.forEach((row, indice) => {
+                    const importes = data.lineas[indice] || {};
+                    mostrar(row, '.precio-neto-display', importes.precio_neto);
+                    mostrar(row, '.sub-total-display', importes.sub_total);
+                    mostrar(row, '.iva-display', importes.iva);
+                    mostrar(row, '.total-display', importes.total);
+                });
+
+                const totalSubTotal = document.getElementById('total-subtotal');
+                const totalIva = document.getElementById('total-iva');
+                const totalTotal = document.getElementById('total-total');
+                if (totalSubTotal) totalSubTotal.textContent = Number(data.sub_total).toFixed(2);
+                if (totalIva) totalIva.textContent = Number(data.iva).toFixed(2);
+                if (totalTotal) totalTotal.textContent = Number(data.total).toFixed(2);
+            })
+            .catch(error => console.error('Error al calcular la vista previa de totales:', error));
+    }
+
+    // Agrupa cambios seguidos (por ejemplo, al tipear) en una sola solicitud
+    window.programarVistaPreviaTotales = function() {
+        clearTimeout(temporizador);
+        temporizador = setTimeout(actualizarVistaPreviaTotales, 250);
+    };
+})();
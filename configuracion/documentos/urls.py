@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('documentos/vista-previa-totales/', views.vista_previa_totales, name='vista_previa_totales'),
+]
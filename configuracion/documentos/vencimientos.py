@@ -0,0 +1,84 @@
+"""
+Tramos de antigüedad por fecha de vencimiento, compartidos por los informes
+de deudores (ventas) y acreedores (compras).
+
+Los días vencidos se comparan contra fechas calculadas en Python (vencimiento
+<= corte - N días) en lugar de restar fechas en SQL, así la misma expresión
+sirve en SQLite y PostgreSQL.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+# (campo, título, días vencidos desde, hasta); None = sin límite
+TRAMOS = [
+    ('corriente', 'Corriente', None, 0),
+    ('d30', '1-30', 1, 30),
+    ('d60', '31-60', 31, 60),
+    ('d90', '61-90', 61, 90),
+    ('d120', '91-120', 91, 120),
+    ('mas120', '+120', 121, None),
+]
+
+CERO = Decimal('0')
+
+DECIMAL = DecimalField(max_digits=15, decimal_places=2)
+
+
+def condicion_tramo(desde, hasta, fecha_corte, campo='vencimiento'):
+    """Filtro sobre la fecha de vencimiento para los días vencidos entre desde y hasta"""
+    condicion = {}
+    if desde is not None:
+        condicion[f'{campo}__lte'] = fecha_corte - datetime.timedelta(days=desde)
+    if hasta is not None:
+        condicion[f'{campo}__gt'] = fecha_corte - datetime.timedelta(days=hasta + 1)
+    return condicion
+
+
+def sumas_por_tramo(fecha_corte, importe='pendiente', campo='vencimiento'):
+    """Anotaciones SUM(CASE ...) por tramo para usar en values(...).annotate(**)"""
+    return {
+        nombre: Coalesce(
+            Sum(Case(
+                When(then=F(importe), **condicion_tramo(desde, hasta, fecha_corte, campo)),
+                default=Value(CERO),
+                output_field=DECIMAL,
+            )),
+            Value(CERO),
+            output_field=DECIMAL,
+        )
+        for nombre, _, desde, hasta in TRAMOS
+    }
+
+
+def redondear(valor):
+    """Importe a 2 decimales (SQLite devuelve las restas de decimales como float)"""
+    return Decimal(valor or 0).quantize(Decimal('0.01'))
+
+
+def redondear_filas(filas, campos_extra=('total',)):
+    """Redondea en el lugar los importes por tramo y los campos extra de cada fila"""
+    campos = [campo for campo, *_ in TRAMOS] + list(campos_extra)
+    for fila in filas:
+        for campo in campos:
+            fila[campo] = redondear(fila[campo])
+    return filas
+
+
+def titulos():
+    """[(campo, título)] de los tramos para los templates"""
+    return [(campo, titulo) for campo, titulo, *_ in TRAMOS]
+
+
+def totales(filas, campos_extra=('total',)):
+    """Totales por moneda de las filas de un informe de antigüedad"""
+    campos = [campo for campo, *_ in TRAMOS] + list(campos_extra)
+    por_moneda = {}
+    for fila in filas:
+        total = por_moneda.setdefault(fila['moneda'], dict.fromkeys(campos, CERO))
+        for campo in campos:
+            total[campo] += fila[campo] or CERO
+    return por_moneda
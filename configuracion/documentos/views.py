@@ -0,0 +1,68 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+import json
+from decimal import InvalidOperation
+from configuracion.documentos import precios
+from configuracion.proveedores.models import Proveedor
+
+
+@require_http_methods(["POST"])
+def vista_previa_totales(request):
+    """
+    Endpoint AJAX: calcula precio_neto, sub_total, iva y total de las líneas
+    de un formulario con el mismo motor que se usa al guardar.
+    
+    Recibe un JSON con familia (venta, compra, devolucion_compra, devolucion_venta),
+    tipo_documento, precio_iva_inc, id_proveedor (opcional) y lineas
+    [{articulo, precio, cantidad, descuento}].
+    """
+    try:
+        datos = json.loads(request.body or '{}')
+        familia = datos.get('familia')
+        if familia not in precios.FAMILIAS:
+            return JsonResponse({'error': 'Familia de documento inválida'}, status=400)
+        
+        # monotributista se toma del proveedor (no del navegador)
+        monotributista = False
+        id_proveedor = datos.get('id_proveedor')
+        if id_proveedor and familia in (precios.COMPRA, precios.DEVOLUCION_COMPRA):
+            monotributista = Proveedor.objects.filter(
+                pk=id_proveedor, monotributista='SI'
+            ).exists()
+        
+        contexto = {
+            'tipo_documento': datos.get('tipo_documento') or None,
+            'precio_iva_inc': datos.get('precio_iva_inc') or 'SI',
+            'monotributista': monotributista,
+        }
+        lineas = datos.get('lineas') or []
+        for linea in lineas:
+            try:
+                linea['articulo'] = int(linea.get('articulo')) if linea.get('articulo') else None
+            except (TypeError, ValueError):
+                linea['articulo'] = None
+        
+        importes = precios.calcular_lineas(familia, contexto, lineas)
+        
+        # Redondear como se guarda en la base y totalizar desde los valores redondeados
+        resultados = []
+        totales = {'sub_total': 0, 'iva': 0, 'total': 0}
+        for importe in importes:
+            redondeado = {campo: precios.redondear(valor) for campo, valor in importe.items()}
+            for campo in totales:
+                totales[campo] += redondeado[campo]
+            resultados.append({campo: float(valor) for campo, valor in redondeado.items()})
+        
+        return JsonResponse({
+            'lineas': resultados,
+            'sub_total': float(totales['sub_total']),
+            'iva': float(totales['iva']),
+            'total': float(totales['total']),
+        })
+    except (ValueError, InvalidOperation) as e:
+        return JsonResponse({'error': f'Datos inválidos: {e}'}, status=400)
+    except Exception as e:
+        import traceback
+        print(f"Error en vista_previa_totales: {e}")
+        print(traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
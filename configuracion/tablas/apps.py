@@ -7,3 +7,8 @@ class TablasConfig(AppConfig):
     label = 'tablas'
     verbose_name = 'Tablas de Base de Datos'
 
+    def ready(self):
+        from configuracion.tablas import busqueda, datos_referencia, metadatos
+        datos_referencia.conectar_senales()
+        busqueda.conectar_senales()
+        metadatos.conectar_senales()
@@ -0,0 +1,194 @@
+"""
+Búsqueda indexada de clientes, proveedores, artículos y códigos de proveedor
+para los autocompletados de los formularios (buscar_clientes, buscar_proveedores,
+buscar_articulos).
+
+- PostgreSQL: índices GIN con pg_trgm sobre los campos de búsqueda (los mantiene
+  la base de datos); los resultados se ordenan por coincidencia de prefijo y
+  similitud de trigramas.
+- SQLite: tabla virtual FTS5 (config_busqueda_fts) que se mantiene sincronizada
+  con señales post_save/post_delete; búsqueda por prefijo ordenada por bm25,
+  restringida en la misma consulta a los ids del queryset del llamador.
+- Otros motores (o SQLite sin FTS5): icontains sobre los mismos campos.
+"""
+import re
+
+from django.db import connection, DatabaseError
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+
+
+TABLA_FTS = 'config_busqueda_fts'
+
+# tipo -> (modelo 'app_label.Modelo', campos de búsqueda)
+TIPOS = {
+    'clientes': ('clientes.Cliente', ('codigo', 'razon_social', 'nombre_comercial')),
+    'proveedores': ('proveedores.Proveedor', ('codigo', 'razon', 'nombre_comercial')),
+    'articulos': ('articulos.Articulo', ('producto_id', 'nombre')),
+    'codigos_proveedor': ('articulos.CodigoProveedorCompra', ('codigo_proveedor',)),
+}
+
+_fts_disponible = None
+
+
+def fts_disponible():
+    """Indica si existe la tabla FTS5 (solo SQLite); se consulta una vez por proceso"""
+    global _fts_disponible
+    if connection.vendor != 'sqlite':
+        return False
+    if _fts_disponible is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLA_FTS]
+            )
+            _fts_disponible = cursor.fetchone() is not None
+    return _fts_disponible
+
+
+def _texto(objeto, campos):
+    return ' '.join(str(getattr(objeto, campo) or '') for campo in campos)
+
+
+def _consulta_fts(query):
+    """Convierte el texto del usuario en una consulta FTS5 de prefijos: "car"* AND "sas"*"""
+    terminos = [t for t in re.split(r'\W+', query) if t]
+    return ' AND '.join(f'"{termino}"*' for termino in terminos)
+
+
+def _buscar_fts(queryset, tipo, query, limite):
+    consulta = _consulta_fts(query)
+    if not consulta:
+        return list(queryset[:limite])
+
+    # Los filtros del queryset (activo, proveedor, etc.) van dentro de la consulta,
+    # antes del LIMIT, para que los candidatos de otros filtros no ocupen lugares
+    filtro_sql, filtro_params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT objeto_id FROM {TABLA_FTS} WHERE tipo = %s AND {TABLA_FTS} MATCH %s "
+            f"AND objeto_id IN ({filtro_sql}) ORDER BY rank LIMIT %s",
+            [tipo, consulta, *filtro_params, limite],
+        )
+        ids = [int(fila[0]) for fila in cursor.fetchall()]
+
+    # Mantener el orden del índice
+    objetos = queryset.in_bulk(ids)
+    return [objetos[pk] for pk in ids if pk in objetos]
+
+
+def _buscar_trigramas(queryset, campos, query, limite):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    coincide = Q()
+    for campo in campos:
+        coincide |= Q(**{f'{campo}__icontains': query})
+
+    similitud = [TrigramSimilarity(campo, query) for campo in campos]
+    return list(
+        queryset.filter(coincide).annotate(
+            es_prefijo=Case(
+                *[When(**{f'{campo}__istartswith': query}, then=Value(1)) for campo in campos],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            similitud=Greatest(*similitud) if len(similitud) > 1 else similitud[0],
+        ).order_by('-es_prefijo', '-similitud', *(queryset.query.order_by or queryset.model._meta.ordering))[:limite]
+    )
+
+
+def buscar(queryset, tipo, query, limite=50):
+    """
+    Busca en el queryset (ya filtrado y ordenado) por los campos del tipo.
+
+    Args:
+        queryset: Queryset base (ej: Cliente.objects.filter(activo='SI'))
+        tipo: 'clientes', 'proveedores', 'articulos' o 'codigos_proveedor'
+        query: Texto ingresado por el usuario
+        limite: Cantidad máxima de resultados
+
+    Returns:
+        list: Objetos ordenados por relevancia
+    """
+    query = (query or '').strip()
+    if not query:
+        return list(queryset[:limite])
+
+    campos = TIPOS[tipo][1]
+    try:
+        if connection.vendor == 'postgresql':
+            return _buscar_trigramas(queryset, campos, query, limite)
+        if fts_disponible():
+            return _buscar_fts(queryset, tipo, query, limite)
+    except DatabaseError:
+        # Índice no disponible o consulta inválida: usar la búsqueda simple
+        pass
+
+    coincide = Q()
+    for campo in campos:
+        coincide |= Q(**{f'{campo}__icontains': query})
+    return list(queryset.filter(coincide)[:limite])
+
+
+# ==================== Sincronización del índice FTS (SQLite) ====================
+
+def indexar(tipo, objeto):
+    """Inserta o actualiza el texto de búsqueda de un objeto"""
+    if not fts_disponible():
+        return
+    campos = TIPOS[tipo][1]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE tipo = %s AND objeto_id = %s", [tipo, objeto.pk])
+        cursor.execute(
+            f"INSERT INTO {TABLA_FTS} (tipo, objeto_id, texto) VALUES (%s, %s, %s)",
+            [tipo, objeto.pk, _texto(objeto, campos)],
+        )
+
+
+def desindexar(tipo, pk):
+    if not fts_disponible():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE tipo = %s AND objeto_id = %s", [tipo, pk])
+
+
+def reconstruir_indice(apps_registry=None):
+    """Vuelve a cargar el índice FTS completo desde las tablas maestras (solo SQLite)"""
+    from django.apps import apps as apps_global
+    apps_registry = apps_registry or apps_global
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS}")
+        for tipo, (etiqueta, campos) in TIPOS.items():
+            modelo = apps_registry.get_model(etiqueta)
+            filas = [
+                (tipo, fila[0], ' '.join(str(valor or '') for valor in fila[1:]))
+                for fila in modelo.objects.values_list('pk', *campos).iterator()
+            ]
+            cursor.executemany(
+                f"INSERT INTO {TABLA_FTS} (tipo, objeto_id, texto) VALUES (%s, %s, %s)", filas
+            )
+
+
+def _tipo_de(sender):
+    etiqueta = f'{sender._meta.app_label}.{sender.__name__}'
+    for tipo, (etiqueta_tipo, campos) in TIPOS.items():
+        if etiqueta_tipo == etiqueta:
+            return tipo
+    return None
+
+
+def _objeto_guardado(sender, instance, **kwargs):
+    indexar(_tipo_de(sender), instance)
+
+
+def _objeto_eliminado(sender, instance, **kwargs):
+    desindexar(_tipo_de(sender), instance.pk)
+
+
+def conectar_senales():
+    """Conecta post_save/post_delete de los modelos buscables (desde TablasConfig.ready)"""
+    from django.apps import apps
+    for tipo, (etiqueta, campos) in TIPOS.items():
+        modelo = apps.get_model(etiqueta)
+        post_save.connect(_objeto_guardado, sender=modelo, dispatch_uid=f'busqueda_save_{etiqueta}')
+        post_delete.connect(_objeto_eliminado, sender=modelo, dispatch_uid=f'busqueda_delete_{etiqueta}')
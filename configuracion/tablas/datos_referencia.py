@@ -0,0 +1,142 @@
+"""
+Catálogos de referencia para los formularios (clientes, proveedores, plazos de
+pago, artículos y tipos de pulido de piezas).
+
+Antes cada formulario de ventas, compras y devoluciones recorría todos los
+clientes/proveedores/artículos activos y los incrustaba como JSON en el HTML.
+Ahora se sirven desde /api/refdata/<tipo>: cada catálogo tiene una versión
+(VersionDatosReferencia) que se incrementa al guardar o eliminar un registro,
+el contenido se cachea por (tipo, versión) y la respuesta lleva un ETag, así el
+navegador lo reutiliza mientras no cambie.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+
+from configuracion.tablas import versiones
+from configuracion.tablas.models import PlazoPago
+
+
+# Las versiones anteriores de un catálogo no se vuelven a pedir: vencen a las 24 horas
+TIMEOUT = 60 * 60 * 24
+
+
+def _clientes():
+    from configuracion.clientes.models import Cliente
+    return [
+        {
+            'id': cliente.id,
+            'codigo': cliente.codigo,
+            'razon_social': cliente.razon_social or '',
+            'nombre_comercial': cliente.nombre_comercial or '',
+            'formadepago': cliente.forma_pago or '',  # Mapear forma_pago a formadepago para consistencia con compras
+        }
+        for cliente in Cliente.objects.filter(activo='SI')
+    ]
+
+
+def _proveedores():
+    from configuracion.proveedores.models import Proveedor
+    return [
+        {
+            'id': proveedor.id,
+            'codigo': proveedor.codigo,
+            'razon': proveedor.razon or '',
+            'nombre_comercial': proveedor.nombre_comercial or '',
+            'formadepago': proveedor.formadepago or '',
+            'monotributista': proveedor.monotributista or 'NO',
+        }
+        for proveedor in Proveedor.objects.filter(activo='SI')
+    ]
+
+
+def _formas_pago():
+    return [
+        {
+            'codigo': fp.codigo,
+            'descripcion': fp.descripcion,
+            'plazo_en_dias': int(fp.plazo_en_dias) if fp.plazo_en_dias else 0,
+            'fin_de_mes': bool(fp.fin_de_mes) if fp.fin_de_mes is not None else False,
+        }
+        for fp in PlazoPago.objects.all()
+    ]
+
+
+def _articulos(**filtro):
+    """Artículos activos: primero los SER* (por producto_id), luego el resto por nombre"""
+    from configuracion.articulos.models import Articulo
+    articulos = Articulo.objects.filter(**filtro).select_related('iva')
+    articulos_ser = articulos.filter(producto_id__startswith='SER').order_by('producto_id')
+    articulos_otros = articulos.exclude(producto_id__startswith='SER').order_by('nombre')
+
+    datos = []
+    for es_ser, grupo in ((True, articulos_ser), (False, articulos_otros)):
+        for articulo in grupo:
+            datos.append({
+                'id': articulo.id,
+                'nombre': articulo.nombre or '',
+                'producto_id': articulo.producto_id or '',
+                'precio_venta': float(articulo.precio_venta) if articulo.precio_venta else 0,
+                'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
+                'es_ser': es_ser,  # Flag para identificar artículos SER*
+            })
+    return datos
+
+
+def _tipos_pulido_piezas():
+    from industria_le_stage.models import TipoPulidoPiezas
+    return list(TipoPulidoPiezas.objects.order_by('nombre').values('id', 'nombre'))
+
+
+# tipo -> función que arma el catálogo
+TIPOS = {
+    'clientes': _clientes,
+    'proveedores': _proveedores,
+    'formas_pago': _formas_pago,
+    'articulos_comercial': lambda: _articulos(ACTIVO_COMERCIAL='SI'),
+    'articulos_compras': lambda: _articulos(ACTIVO_COMPRAS='SI'),
+    'tipos_pulido_piezas': _tipos_pulido_piezas,
+}
+
+# 'app_label.Modelo' -> catálogos que dependen de él
+DEPENDENCIAS = {
+    'clientes.Cliente': ['clientes'],
+    'proveedores.Proveedor': ['proveedores'],
+    'tablas.PlazoPago': ['formas_pago'],
+    'articulos.Articulo': ['articulos_comercial', 'articulos_compras'],
+    'articulos.IVA': ['articulos_comercial', 'articulos_compras'],
+    'industria_le_stage.TipoPulidoPiezas': ['tipos_pulido_piezas'],
+}
+
+
+def urls_scripts(*tipos):
+    """
+    {tipo: URL versionada del script del catálogo} para los templates de formularios.
+    Las versiones de todos los catálogos se leen en una sola consulta.
+    """
+    actuales = versiones.obtener_varias(tipos)
+    return {
+        tipo: f"{reverse('api_datos_referencia_js', args=[tipo])}?v={actuales[tipo]}"
+        for tipo in tipos
+    }
+
+
+def obtener_datos(tipo, version=None):
+    """Catálogo serializable, cacheado por (tipo, versión)"""
+    if version is None:
+        version = versiones.obtener(tipo)
+    return cache.get_or_set(f'refdata:{tipo}:{version}', TIPOS[tipo], timeout=TIMEOUT)
+
+
+def _catalogo_modificado(sender, **kwargs):
+    for tipo in DEPENDENCIAS.get(f'{sender._meta.app_label}.{sender.__name__}', []):
+        versiones.incrementar(tipo)
+
+
+def conectar_senales():
+    """Conecta post_save/post_delete de los modelos de origen (desde TablasConfig.ready)"""
+    from django.apps import apps
+    for etiqueta in DEPENDENCIAS:
+        modelo = apps.get_model(etiqueta)
+        post_save.connect(_catalogo_modificado, sender=modelo, dispatch_uid=f'refdata_save_{etiqueta}')
+        post_delete.connect(_catalogo_modificado, sender=modelo, dispatch_uid=f'refdata_delete_{etiqueta}')
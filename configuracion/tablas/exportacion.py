@@ -0,0 +1,142 @@
+"""
+Exportación de tablas en streaming (CSV y Excel).
+
+La exportación anterior hacía SELECT * con fetchall(), armaba un DataFrame y
+escribía el xlsx completo en un BytesIO: con tablas grandes (ventas_lineas) el
+worker tenía varias copias de la tabla en memoria. Ahora las filas se leen por
+lotes con un cursor del lado del servidor (chunked_cursor: cursor con nombre en
+PostgreSQL) y se escriben a medida que llegan:
+
+- CSV: StreamingHttpResponse, nunca hay más de un lote en memoria.
+- Excel: openpyxl en modo write_only sobre un archivo temporal, que después se
+  envía con FileResponse.
+
+Se puede elegir qué columnas exportar y filtrar por rango de fechas sobre una
+columna de tipo fecha.
+"""
+import csv
+import datetime
+import tempfile
+
+from django.db import connection
+
+
+TAMANO_LOTE = 2000
+
+TIPOS_FECHA = ('DateField', 'DateTimeField')
+
+
+def columnas_fecha(descripcion):
+    """Columnas de la tabla que se pueden usar para filtrar por fecha"""
+    return [nombre for nombre, tipo in descripcion if tipo in TIPOS_FECHA]
+
+
+def _parsear_fecha(valor):
+    if not valor:
+        return None
+    try:
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {valor} (use AAAA-MM-DD)")
+
+
+def armar_consulta(tabla, descripcion, columnas=None, columna_fecha=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Arma el SELECT de la exportación con las columnas elegidas y el filtro de fechas.
+
+    Args:
+        tabla: Nombre de la tabla (ya validado)
+        descripcion: Resultado de metadatos.describir_columnas(tabla)
+        columnas: Columnas a exportar (None o vacío = todas)
+        columna_fecha: Columna sobre la que se aplica el rango de fechas
+        fecha_desde, fecha_hasta: 'AAAA-MM-DD' (ambas inclusive)
+
+    Returns:
+        tuple: (sql, parámetros, columnas exportadas)
+
+    Raises:
+        ValueError: Columna inexistente o fecha inválida
+    """
+    existentes = [nombre for nombre, _ in descripcion]
+    columnas = [c for c in (columnas or []) if c] or existentes
+    invalidas = [c for c in columnas if c not in existentes]
+    if invalidas:
+        raise ValueError(f"Columnas inexistentes: {', '.join(invalidas)}")
+
+    quote = connection.ops.quote_name
+    sql = f"SELECT {', '.join(quote(c) for c in columnas)} FROM {quote(tabla)}"
+    condiciones = []
+    parametros = []
+
+    desde = _parsear_fecha(fecha_desde)
+    hasta = _parsear_fecha(fecha_hasta)
+    if desde or hasta:
+        if columna_fecha not in columnas_fecha(descripcion):
+            raise ValueError("Seleccione una columna de fecha para filtrar")
+        if desde:
+            condiciones.append(f"{quote(columna_fecha)} >= %s")
+            parametros.append(desde)
+        if hasta:
+            # Hasta inclusive también para columnas con hora
+            condiciones.append(f"{quote(columna_fecha)} < %s")
+            parametros.append(hasta + datetime.timedelta(days=1))
+
+    if condiciones:
+        sql += ' WHERE ' + ' AND '.join(condiciones)
+    return sql, parametros, columnas
+
+
+def iterar_filas(sql, parametros, tamano_lote=TAMANO_LOTE):
+    """Genera las filas de la consulta leyendo de a lotes con un cursor del servidor"""
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, parametros)
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            yield from lote
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def generar_csv(columnas, filas):
+    """Genera el CSV línea por línea (con BOM para que Excel reconozca UTF-8)"""
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(columnas)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def _valor_excel(valor):
+    """Adapta los valores que openpyxl no acepta tal cual"""
+    if isinstance(valor, datetime.datetime) and valor.tzinfo is not None:
+        return valor.replace(tzinfo=None)
+    if isinstance(valor, (bytes, memoryview)):
+        return bytes(valor).hex()
+    return valor
+
+
+def escribir_excel(columnas, filas):
+    """
+    Escribe las filas en un xlsx con openpyxl write_only (memoria constante).
+
+    Returns:
+        Archivo temporal posicionado al inicio (se borra al cerrarse)
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Datos')
+    hoja.append(columnas)
+    for fila in filas:
+        hoja.append([_valor_excel(valor) for valor in fila])
+
+    archivo = tempfile.TemporaryFile(suffix='.xlsx')
+    libro.save(archivo)
+    archivo.seek(0)
+    return archivo
@@ -0,0 +1,101 @@
+"""
+Perfil de arranque: tiempo de importación por módulo de django.setup()
+
+Ejecuta un intérprete nuevo con `python -X importtime`, hace django.setup() y
+carga el URLconf (lo mismo que paga cada worker de gunicorn antes de atender
+el primer request) y muestra los módulos que más tardan en importarse.
+
+Uso:
+    python manage.py perfil_arranque
+    python manage.py perfil_arranque --top 40 --orden propio
+    python manage.py perfil_arranque --solo-setup --filtro configuracion
+"""
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Módulos pesados que no deberían cargarse en el arranque
+MODULOS_PESADOS = ('pandas', 'numpy', 'openpyxl')
+
+SCRIPT_ARRANQUE = """
+import django
+django.setup()
+if {cargar_urls}:
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+"""
+
+
+def parsear_importtime(salida):
+    """
+    Convierte la salida de -X importtime en una lista de
+    (modulo, propio_us, acumulado_us, profundidad).
+    """
+    modulos = []
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        partes = linea[len('import time:'):].split('|')
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # Encabezado
+        nombre = partes[2].rstrip()
+        profundidad = (len(nombre) - len(nombre.lstrip())) // 2
+        modulos.append((nombre.strip(), int(partes[0]), int(partes[1]), profundidad))
+    return modulos
+
+
+class Command(BaseCommand):
+    help = 'Muestra el tiempo de importación por módulo de django.setup() y del URLconf'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Cantidad de módulos a mostrar (default: 25)')
+        parser.add_argument(
+            '--orden', choices=['acumulado', 'propio'], default='acumulado',
+            help='Ordenar por tiempo acumulado (con dependencias) o propio (default: acumulado)',
+        )
+        parser.add_argument('--filtro', default='', help='Mostrar solo módulos cuyo nombre empiece con este texto')
+        parser.add_argument('--solo-setup', action='store_true', help='No cargar el URLconf (solo django.setup())')
+
+    def handle(self, *args, **options):
+        entorno = os.environ.copy()
+        entorno.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+
+        script = SCRIPT_ARRANQUE.format(cargar_urls=not options['solo_setup'])
+        resultado = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=settings.BASE_DIR,
+            env=entorno,
+            capture_output=True,
+            text=True,
+        )
+        if resultado.returncode != 0:
+            raise CommandError(f'Error en el arranque:\n{resultado.stderr[-2000:]}')
+
+        modulos = parsear_importtime(resultado.stderr)
+        if not modulos:
+            raise CommandError('No se obtuvieron tiempos de importación')
+
+        # El tiempo total es la suma de los acumulados de nivel superior
+        total_us = sum(acumulado for _, _, acumulado, profundidad in modulos if profundidad == 0)
+
+        indice = 2 if options['orden'] == 'acumulado' else 1
+        filtrados = [m for m in modulos if m[0].startswith(options['filtro'])]
+        filtrados.sort(key=lambda m: m[indice], reverse=True)
+
+        self.stdout.write(f"{'Módulo':<60} {'Propio (ms)':>12} {'Acumulado (ms)':>15}")
+        self.stdout.write('-' * 89)
+        for nombre, propio, acumulado, _ in filtrados[:options['top']]:
+            self.stdout.write(f'{nombre:<60} {propio / 1000:>12.1f} {acumulado / 1000:>15.1f}')
+        self.stdout.write('-' * 89)
+        self.stdout.write(f'Módulos importados: {len(modulos)}')
+        self.stdout.write(self.style.SUCCESS(f'Tiempo total de importación: {total_us / 1000:.1f} ms'))
+
+        cargados = sorted({m[0].split('.')[0] for m in modulos} & set(MODULOS_PESADOS))
+        if cargados:
+            self.stdout.write(self.style.WARNING(
+                f"Módulos pesados cargados en el arranque: {', '.join(cargados)}"
+            ))
@@ -0,0 +1,106 @@
+"""
+Metadatos de las tablas de la base de datos (lista de tablas, columnas y clave
+primaria) para el módulo Tablas.
+
+Antes se consultaban information_schema / sqlite_master en cada request; ahora
+se guardan en el cache de Django y se descartan después de un migrate
+(señal post_migrate) o al vencer el timeout. La versión de la clave vive en la
+base (configuracion.tablas.versiones), así un migrate descarta los metadatos de
+todos los procesos.
+
+En SQLite la lista no incluye la tabla virtual de búsqueda (busqueda.TABLA_FTS)
+ni sus tablas internas de FTS5 (config_busqueda_fts_data, _idx, _content...).
+"""
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection, DatabaseError
+from django.db.models.signals import post_migrate
+
+from configuracion.tablas import versiones
+from configuracion.tablas.busqueda import TABLA_FTS
+
+
+TIMEOUT = 60 * 60
+
+CLAVE_TABLAS = 'tablas:lista'
+CLAVE_VERSION = 'tablas:version'
+
+
+def _clave(nombre):
+    # Versión en la clave: invalidar() descarta los metadatos de todas las tablas a la vez
+    return f'{nombre}:v{versiones.obtener(CLAVE_VERSION)}'
+
+
+def _es_tabla_fts(tabla):
+    return tabla == TABLA_FTS or tabla.startswith(f'{TABLA_FTS}_')
+
+
+def _leer_tablas():
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE type='table'
+                AND name NOT LIKE 'sqlite_%'
+                AND name NOT LIKE 'django_%'
+                ORDER BY name
+            """)
+            return [row[0] for row in cursor.fetchall() if not _es_tabla_fts(row[0])]
+        else:
+            # Para PostgreSQL, MySQL, etc.
+            cursor.execute("""
+                SELECT table_name
+                FROM information_schema.tables
+                WHERE table_schema = 'public'
+                AND table_type = 'BASE TABLE'
+                ORDER BY table_name
+            """)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def tablas_disponibles():
+    """Nombres de todas las tablas de la base de datos (cacheado)"""
+    return cache.get_or_set(_clave(CLAVE_TABLAS), _leer_tablas, timeout=TIMEOUT)
+
+
+def _leer_columnas(tabla):
+    with connection.cursor() as cursor:
+        descripcion = connection.introspection.get_table_description(cursor, tabla)
+        clave_primaria = connection.introspection.get_primary_key_column(cursor, tabla)
+    columnas = []
+    for info in descripcion:
+        try:
+            tipo = connection.introspection.get_field_type(info.type_code, info)
+        except KeyError:
+            tipo = 'TextField'
+        columnas.append((info.name, tipo))
+    return {'columnas': columnas, 'clave_primaria': clave_primaria}
+
+
+def _metadatos_tabla(tabla):
+    return cache.get_or_set(_clave(f'tablas:columnas:{tabla}'), lambda: _leer_columnas(tabla), timeout=TIMEOUT)
+
+
+def describir_columnas(tabla):
+    """Devuelve [(columna, tipo de campo Django)] en el orden de la tabla (cacheado)"""
+    return _metadatos_tabla(tabla)['columnas']
+
+
+def clave_primaria(tabla):
+    """Columna de la clave primaria de la tabla o None (cacheado)"""
+    return _metadatos_tabla(tabla)['clave_primaria']
+
+
+def invalidar(**kwargs):
+    """Descarta los metadatos cacheados de todas las tablas (en todos los procesos)"""
+    try:
+        versiones.incrementar(CLAVE_VERSION)
+    except DatabaseError:
+        # Migrate parcial de una base nueva: la tabla de versiones todavía no existe
+        pass
+
+
+def conectar_senales():
+    """Invalida los metadatos después de cada migrate (desde TablasConfig.ready)"""
+    # Con sender la señal llega una vez por migrate y no una vez por aplicación
+    post_migrate.connect(invalidar, sender=apps.get_app_config('tablas'), dispatch_uid='tablas_metadatos_post_migrate')
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tablas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionDatosReferencia',
+            fields=[
+                ('tipo', models.CharField(help_text='Catálogo (ej: clientes, proveedores, articulos_compras)', max_length=50, primary_key=True, serialize=False, verbose_name='Tipo')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Versión')),
+            ],
+            options={
+                'verbose_name': 'Versión de Datos de Referencia',
+                'verbose_name_plural': 'Versiones de Datos de Referencia',
+                'db_table': 'config_version_datos_referencia',
+                'ordering': ['tipo'],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:10
+
+from django.db import migrations
+
+
+# (tabla, columna) con índice de trigramas en PostgreSQL
+COLUMNAS_TRIGRAMAS = [
+    ('config_cliente_maestro', 'codigo'),
+    ('config_cliente_maestro', 'razon_social'),
+    ('config_cliente_maestro', 'nombre_comercial'),
+    ('config_proveedores_maestro', 'codigo'),
+    ('config_proveedores_maestro', 'razon'),
+    ('config_proveedores_maestro', 'nombre_comercial'),
+    ('config_articulos_maestro', 'producto_id'),
+    ('config_articulos_maestro', 'nombre'),
+    ('config_codigoproveedorcompra', 'codigo_proveedor'),
+]
+
+
+def crear_indices(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for tabla, columna in COLUMNAS_TRIGRAMAS:
+            # Misma expresión que genera icontains/istartswith: UPPER(col::text)
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {tabla}_{columna}_trgm '
+                f'ON {tabla} USING gin ((UPPER("{columna}"::text)) gin_trgm_ops)'
+            )
+    elif connection.vendor == 'sqlite':
+        from configuracion.tablas.busqueda import TABLA_FTS, reconstruir_indice
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5("
+                f"tipo UNINDEXED, objeto_id UNINDEXED, texto, "
+                f"tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except Exception:
+            # SQLite sin FTS5: la búsqueda usa icontains
+            return
+        reconstruir_indice(apps)
+
+
+def eliminar_indices(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        for tabla, columna in COLUMNAS_TRIGRAMAS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {tabla}_{columna}_trgm')
+    elif connection.vendor == 'sqlite':
+        from configuracion.tablas.busqueda import TABLA_FTS
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA_FTS}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tablas', '0002_versiondatosreferencia'),
+        ('clientes', '0001_initial'),
+        ('proveedores', '0001_initial'),
+        ('articulos', '0002_auto_20251128_1109'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -60,3 +60,37 @@ class PlazoPago(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.descripcion}"
 
+
+
+class VersionDatosReferencia(models.Model):
+    """
+    Versión de cada catálogo que se sirve en /api/refdata/<tipo>.
+    
+    Se incrementa al guardar o eliminar un registro del modelo de origen
+    (ver configuracion.tablas.datos_referencia); la versión forma parte del
+    ETag y de la clave de caché, así los navegadores reutilizan el catálogo
+    hasta que cambia.
+    
+    Los demás datos cacheados (declaración de IVA, antigüedad de deudores,
+    tipos de cambio) guardan aquí su versión con configuracion.tablas.versiones.
+    """
+    
+    tipo = models.CharField(
+        max_length=50,
+        primary_key=True,
+        verbose_name='Tipo',
+        help_text='Catálogo (ej: clientes, proveedores, articulos_compras)'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Versión',
+    )
+    
+    class Meta:
+        verbose_name = 'Versión de Datos de Referencia'
+        verbose_name_plural = 'Versiones de Datos de Referencia'
+        ordering = ['tipo']
+        db_table = 'config_version_datos_referencia'
+    
+    def __str__(self):
+        return f"{self.tipo} v{self.version}"
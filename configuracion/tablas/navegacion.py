@@ -0,0 +1,240 @@
+"""
+Navegación paginada de tablas para el módulo Tablas.
+
+En lugar de SELECT * con todas las filas en el HTML, cada página se lee con
+paginación por clave (keyset): se ordena por la columna elegida más la clave
+primaria como desempate y la página siguiente continúa después de la última
+fila vista (WHERE (col, pk) > (v, p)), sin OFFSET. La proyección de columnas,
+el orden y los filtros por columna se resuelven en SQL.
+
+El total de filas es exacto para tablas chicas; para tablas grandes se usa la
+estimación del motor (pg_class.reltuples en PostgreSQL, sqlite_stat1 en
+SQLite) o un conteo acotado cuando hay filtros.
+"""
+import base64
+import datetime
+import decimal
+import json
+import uuid
+
+from django.db import connection
+
+
+POR_PAGINA = 50
+MAXIMO_POR_PAGINA = 500
+
+# Por encima de esta cantidad de filas el total se estima en lugar de contarse
+UMBRAL_CONTEO = 10000
+
+
+def codificar_cursor(datos):
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+
+
+def decodificar_cursor(token):
+    """Devuelve el dict del cursor o None si el token es inválido"""
+    if not token:
+        return None
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        return None
+    return datos if isinstance(datos, dict) else None
+
+
+def _valor_cursor(valor):
+    """Valor serializable que la base de datos vuelve a comparar igual que el original"""
+    if isinstance(valor, (datetime.date, datetime.time, decimal.Decimal, uuid.UUID)):
+        # str() de un datetime usa ' ' como separador, igual que Django al guardar en SQLite
+        return str(valor)
+    if isinstance(valor, (bytes, memoryview)):
+        return None
+    return valor
+
+
+def condiciones_filtros(filtros):
+    """
+    Filtros por columna (contiene, sin distinguir mayúsculas) sobre el texto del valor.
+
+    Args:
+        filtros: {columna: texto} con columnas ya validadas
+
+    Returns:
+        tuple: (lista de condiciones SQL, parámetros)
+    """
+    quote = connection.ops.quote_name
+    condiciones = []
+    parametros = []
+    for columna, texto in filtros.items():
+        condiciones.append(f"UPPER(CAST({quote(columna)} AS TEXT)) LIKE %s")
+        parametros.append(f'%{texto.upper()}%')
+    return condiciones, parametros
+
+
+def _condicion_keyset(columna, pk, cursor, descendente, hacia_atras):
+    """Condición para continuar después (o antes) de la fila del cursor"""
+    quote = connection.ops.quote_name
+    adelante = '<' if descendente else '>'
+    atras = '>' if descendente else '<'
+    operador = atras if hacia_atras else adelante
+    pk_sql = quote(pk)
+
+    if columna == pk:
+        return f"{pk_sql} {operador} %s", [cursor['pk']]
+
+    col = quote(columna)
+    valor = cursor.get('v')
+    # Los NULL van al final del orden (ORDER BY col IS NULL)
+    if not hacia_atras:
+        if valor is None:
+            return f"({col} IS NULL AND {pk_sql} {operador} %s)", [cursor['pk']]
+        return (
+            f"({col} IS NULL OR {col} {operador} %s OR ({col} = %s AND {pk_sql} {operador} %s))",
+            [valor, valor, cursor['pk']],
+        )
+    if valor is None:
+        return f"({col} IS NOT NULL OR {pk_sql} {operador} %s)", [cursor['pk']]
+    return (
+        f"({col} IS NOT NULL AND ({col} {operador} %s OR ({col} = %s AND {pk_sql} {operador} %s)))",
+        [valor, valor, cursor['pk']],
+    )
+
+
+def _orden_sql(columna, pk, descendente, hacia_atras):
+    quote = connection.ops.quote_name
+    invertir = descendente != hacia_atras
+    direccion = 'DESC' if invertir else 'ASC'
+    if columna == pk:
+        return f"{quote(pk)} {direccion}"
+    nulos = 'DESC' if hacia_atras else 'ASC'
+    return f"({quote(columna)} IS NULL) {nulos}, {quote(columna)} {direccion}, {quote(pk)} {direccion}"
+
+
+def consultar_pagina(tabla, pk, columnas, orden=None, descendente=False, filtros=None,
+                     despues=None, antes=None, por_pagina=POR_PAGINA):
+    """
+    Lee una página de la tabla.
+
+    Args:
+        tabla: Nombre de la tabla (ya validado)
+        pk: Columna de la clave primaria (None = paginación por OFFSET)
+        columnas: Columnas a mostrar (ya validadas)
+        orden: Columna de orden (por defecto la clave primaria)
+        descendente: Orden descendente
+        filtros: {columna: texto}
+        despues / antes: Cursor (dict) de la página siguiente / anterior
+
+    Returns:
+        dict: filas, cursor_siguiente, cursor_anterior
+    """
+    quote = connection.ops.quote_name
+    condiciones, parametros = condiciones_filtros(filtros or {})
+    por_pagina = max(1, min(por_pagina, MAXIMO_POR_PAGINA))
+
+    if pk is None:
+        # Sin clave primaria no hay keyset posible: OFFSET con el cursor como número de fila
+        desplazamiento = (antes or despues or {}).get('offset', 0)
+        if antes:
+            desplazamiento = max(0, desplazamiento - por_pagina)
+        orden_sql = f"{quote(orden)} {'DESC' if descendente else 'ASC'}" if orden else '1'
+        sql = f"SELECT {', '.join(quote(c) for c in columnas)} FROM {quote(tabla)}"
+        if condiciones:
+            sql += ' WHERE ' + ' AND '.join(condiciones)
+        sql += f" ORDER BY {orden_sql} LIMIT {por_pagina + 1} OFFSET {int(desplazamiento)}"
+        with connection.cursor() as cursor:
+            cursor.execute(sql, parametros)
+            filas = cursor.fetchall()
+        return {
+            'filas': filas[:por_pagina],
+            'cursor_siguiente': codificar_cursor({'offset': desplazamiento + por_pagina}) if len(filas) > por_pagina else None,
+            'cursor_anterior': codificar_cursor({'offset': desplazamiento}) if desplazamiento else None,
+        }
+
+    orden = orden or pk
+    hacia_atras = antes is not None
+    cursor_datos = antes if hacia_atras else despues
+
+    # La clave primaria y la columna de orden se leen aunque no estén proyectadas (para el cursor)
+    seleccion = list(columnas)
+    for extra in (orden, pk):
+        if extra not in seleccion:
+            seleccion.append(extra)
+    indice_orden = seleccion.index(orden)
+    indice_pk = seleccion.index(pk)
+
+    if cursor_datos is not None and 'pk' in cursor_datos:
+        condicion, parametros_keyset = _condicion_keyset(orden, pk, cursor_datos, descendente, hacia_atras)
+        condiciones = condiciones + [condicion]
+        parametros = parametros + parametros_keyset
+
+    sql = f"SELECT {', '.join(quote(c) for c in seleccion)} FROM {quote(tabla)}"
+    if condiciones:
+        sql += ' WHERE ' + ' AND '.join(condiciones)
+    sql += f" ORDER BY {_orden_sql(orden, pk, descendente, hacia_atras)} LIMIT {por_pagina + 1}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        filas = cursor.fetchall()
+
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+    if hacia_atras:
+        filas.reverse()
+
+    def cursor_de(fila):
+        return codificar_cursor({'v': _valor_cursor(fila[indice_orden]), 'pk': _valor_cursor(fila[indice_pk])})
+
+    if hacia_atras:
+        hay_siguiente, hay_anterior = True, hay_mas
+    else:
+        hay_siguiente, hay_anterior = hay_mas, cursor_datos is not None
+
+    return {
+        'filas': [fila[:len(columnas)] for fila in filas],
+        'cursor_siguiente': cursor_de(filas[-1]) if filas and hay_siguiente else None,
+        'cursor_anterior': cursor_de(filas[0]) if filas and hay_anterior else None,
+    }
+
+
+def _filas_estimadas(tabla):
+    """Cantidad de filas según las estadísticas del motor (None si no hay)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [tabla])
+            fila = cursor.fetchone()
+            # reltuples es -1 si la tabla nunca se analizó
+            return fila[0] if fila and fila[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [tabla])
+            fila = cursor.fetchone()
+            return int(fila[0].split()[0]) if fila and fila[0] else None
+    return None
+
+
+def contar_filas(tabla, filtros=None):
+    """
+    Total de filas para mostrar en el navegador.
+
+    Returns:
+        dict: total y tipo ('exacto', 'estimado' o 'minimo' = hay más de total)
+    """
+    condiciones, parametros = condiciones_filtros(filtros or {})
+    if not condiciones:
+        estimado = _filas_estimadas(tabla)
+        if estimado is not None and estimado > UMBRAL_CONTEO:
+            return {'total': estimado, 'tipo': 'estimado'}
+
+    # Conteo acotado: nunca recorre más de UMBRAL_CONTEO + 1 filas
+    quote = connection.ops.quote_name
+    sql = f"SELECT 1 FROM {quote(tabla)}"
+    if condiciones:
+        sql += ' WHERE ' + ' AND '.join(condiciones)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM ({sql} LIMIT {UMBRAL_CONTEO + 1}) conteo", parametros)
+        total = cursor.fetchone()[0]
+    if total > UMBRAL_CONTEO:
+        return {'total': UMBRAL_CONTEO, 'tipo': 'minimo'}
+    return {'total': total, 'tipo': 'exacto'}
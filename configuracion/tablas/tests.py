@@ -0,0 +1,58 @@
+from django.db import connection
+from django.test import TestCase
+
+from configuracion.proveedores.models import Proveedor
+from configuracion.tablas import busqueda, metadatos, versiones
+
+
+class BuscarFtsTests(TestCase):
+    """Búsqueda FTS5 (SQLite): los filtros del queryset se aplican antes del límite"""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('La búsqueda FTS5 solo se usa con SQLite')
+        busqueda._fts_disponible = None
+        if not busqueda.fts_disponible():
+            self.skipTest('SQLite sin FTS5')
+
+    def test_filtro_del_queryset_con_mas_de_500_candidatos(self):
+        # 600 proveedores inactivos que coinciden mejor con el prefijo que los activos
+        Proveedor.objects.bulk_create(
+            Proveedor(codigo=f'1{numero:05d}', razon='1', activo='NO') for numero in range(600)
+        )
+        activos = [
+            Proveedor.objects.create(codigo=f'2{numero:05d}', razon=f'1 Proveedor activo {numero}', activo='SI')
+            for numero in range(3)
+        ]
+        busqueda.reconstruir_indice()
+
+        resultados = busqueda.buscar(Proveedor.objects.filter(activo='SI'), 'proveedores', '1')
+
+        self.assertEqual({proveedor.pk for proveedor in resultados}, {proveedor.pk for proveedor in activos})
+
+    def test_limite(self):
+        Proveedor.objects.bulk_create(
+            Proveedor(codigo=f'1{numero:05d}', razon='Proveedor', activo='SI') for numero in range(20)
+        )
+        busqueda.reconstruir_indice()
+
+        resultados = busqueda.buscar(Proveedor.objects.filter(activo='SI'), 'proveedores', 'prov', limite=5)
+
+        self.assertEqual(len(resultados), 5)
+
+
+class MetadatosTests(TestCase):
+    """Lista de tablas del módulo Tablas y su invalidación"""
+
+    def test_no_lista_las_tablas_de_fts(self):
+        tablas = metadatos.tablas_disponibles()
+
+        self.assertIn('config_proveedores_maestro', tablas)
+        self.assertFalse([tabla for tabla in tablas if tabla.startswith(busqueda.TABLA_FTS)])
+
+    def test_invalidar_incrementa_la_version_en_la_base(self):
+        antes = versiones.obtener(metadatos.CLAVE_VERSION)
+
+        metadatos.invalidar()
+
+        self.assertEqual(versiones.obtener(metadatos.CLAVE_VERSION), antes + 1)
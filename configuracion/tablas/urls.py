@@ -4,5 +4,7 @@ from . import views
 urlpatterns = [
     path('tablas/', views.lista_tablas, name='lista_tablas'),
     path('tablas/exportar/<str:tabla>/', views.exportar_tabla_excel, name='exportar_tabla_excel'),
+    path('api/refdata/<str:tipo>.js', views.api_datos_referencia, {'formato': 'js'}, name='api_datos_referencia_js'),
+    path('api/refdata/<str:tipo>', views.api_datos_referencia, name='api_datos_referencia'),
 ]
 
@@ -0,0 +1,41 @@
+"""
+Versiones de los datos cacheados, guardadas en la base (VersionDatosReferencia).
+
+El proyecto no configura CACHES, así que el cache de Django es un LocMemCache
+por proceso: una versión guardada en ese cache solo la incrementa el proceso que
+recibió la escritura y los demás seguirían usando sus copias viejas. La versión
+vive en una fila de la base, compartida por todos los procesos, y forma parte de
+la clave de cache: al incrementarla ningún proceso vuelve a leer sus entradas
+anteriores, que vencen por el timeout con que se guardaron (todos los usuarios
+de este módulo guardan con un timeout finito). Las copias que un proceso guarda
+en memoria (cotizaciones, menú lateral) se comparan con la versión y se
+reemplazan en la siguiente lectura. Leerla es una consulta por clave primaria.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from configuracion.tablas.models import VersionDatosReferencia
+
+
+def obtener(clave):
+    """Versión actual (1 si todavía no se incrementó)"""
+    version = VersionDatosReferencia.objects.filter(tipo=clave).values_list('version', flat=True).first()
+    return version or 1
+
+
+def obtener_varias(claves):
+    """{clave: versión} de todas las claves en una sola consulta"""
+    versiones = dict(VersionDatosReferencia.objects.filter(tipo__in=claves).values_list('tipo', 'version'))
+    return {clave: versiones.get(clave, 1) for clave in claves}
+
+
+def incrementar(clave):
+    """Incrementa la versión con un UPDATE atómico"""
+    if VersionDatosReferencia.objects.filter(tipo=clave).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            VersionDatosReferencia.objects.create(tipo=clave, version=2)
+    except IntegrityError:
+        # Otro proceso creó la fila al mismo tiempo
+        VersionDatosReferencia.objects.filter(tipo=clave).update(version=F('version') + 1)
@@ -1,34 +1,17 @@
 from django.shortcuts import render
-from django.http import HttpResponse
-from django.db import connection
+from django.http import FileResponse, HttpResponse, JsonResponse, Http404, StreamingHttpResponse
 from django.apps import apps
-import pandas as pd
-from io import BytesIO
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_http_methods
+import json
 from erp_demo.config import EMPRESA_NOMBRE
+from configuracion.tablas import datos_referencia, exportacion, metadatos, navegacion, versiones
 
 
 def obtener_tablas_disponibles():
-    """Obtiene todas las tablas de la base de datos"""
-    with connection.cursor() as cursor:
-        if connection.vendor == 'sqlite':
-            cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' 
-                AND name NOT LIKE 'sqlite_%'
-                AND name NOT LIKE 'django_%'
-                ORDER BY name
-            """)
-        else:
-            # Para PostgreSQL, MySQL, etc.
-            cursor.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
-                AND table_type = 'BASE TABLE'
-                ORDER BY table_name
-            """)
-        
-        tablas = [row[0] for row in cursor.fetchall()]
+    """Obtiene todas las tablas de la base de datos (la lista se cachea en metadatos)"""
+    tablas = metadatos.tablas_disponibles()
     
     # También obtener modelos registrados para nombres más amigables
     modelos_info = {}
@@ -43,46 +26,98 @@ def obtener_tablas_disponibles():
     return tablas, modelos_info
 
 
+def _url_con(parametros, **cambios):
+    """Query string de la página actual con algunos parámetros cambiados (None = quitar)"""
+    parametros = parametros.copy()
+    for clave, valor in cambios.items():
+        if valor is None:
+            parametros.pop(clave, None)
+        else:
+            parametros[clave] = valor
+    return '?' + parametros.urlencode()
+
+
 def lista_tablas(request):
-    """Vista principal para seleccionar y ver tablas"""
+    """
+    Vista principal para seleccionar y ver tablas.
+
+    Parámetros GET:
+        tabla: tabla seleccionada
+        columnas: columnas a mostrar (por defecto todas)
+        orden, dir: columna de orden y 'asc' / 'desc'
+        f_<columna>: filtro "contiene" sobre la columna
+        despues / antes: cursor de la página siguiente / anterior
+    """
     tablas, modelos_info = obtener_tablas_disponibles()
     
     # Tabla seleccionada
     tabla_seleccionada = request.GET.get('tabla', '')
     datos = None
     columnas = None
+    todas_columnas = []
+    columnas_fecha = []
+    encabezados = []
+    conteo = None
+    url_siguiente = None
+    url_anterior = None
+    url_primera = None
     nombre_amigable = None
     
     if tabla_seleccionada:
         try:
-            # Validar que la tabla existe
-            if tabla_seleccionada not in tablas:
+            # Validar que la tabla existe y el nombre (solo letras, números y guiones bajos)
+            if tabla_seleccionada not in tablas or not all(c.isalnum() or c == '_' for c in tabla_seleccionada):
                 datos = []
                 columnas = []
             else:
-                # Validar nombre de tabla
-                if not all(c.isalnum() or c == '_' for c in tabla_seleccionada):
-                    datos = []
-                    columnas = []
-                else:
-                    with connection.cursor() as cursor:
-                        # Obtener columnas
-                        if connection.vendor == 'sqlite':
-                            cursor.execute(f'PRAGMA table_info("{tabla_seleccionada}")')
-                            columnas_info = cursor.fetchall()
-                            columnas = [col[1] for col in columnas_info]  # nombre de columna
-                        else:
-                            cursor.execute("""
-                                SELECT column_name 
-                                FROM information_schema.columns 
-                                WHERE table_name = %s
-                                ORDER BY ordinal_position
-                            """, [tabla_seleccionada])
-                            columnas = [row[0] for row in cursor.fetchall()]
-                        
-                        # Obtener datos
-                        cursor.execute(f'SELECT * FROM "{tabla_seleccionada}"')
-                        datos = cursor.fetchall()
+                descripcion = metadatos.describir_columnas(tabla_seleccionada)
+                pk = metadatos.clave_primaria(tabla_seleccionada)
+                todas_columnas = [nombre for nombre, _ in descripcion]
+                columnas_fecha = exportacion.columnas_fecha(descripcion)
+                
+                # Proyección, orden y filtros (solo columnas existentes)
+                columnas = [c for c in request.GET.getlist('columnas') if c in todas_columnas] or todas_columnas
+                orden = request.GET.get('orden')
+                if orden not in todas_columnas:
+                    orden = None
+                descendente = request.GET.get('dir') == 'desc'
+                filtros = {
+                    columna: request.GET[f'f_{columna}'].strip()
+                    for columna in todas_columnas
+                    if request.GET.get(f'f_{columna}', '').strip()
+                }
+                
+                pagina = navegacion.consultar_pagina(
+                    tabla_seleccionada, pk, columnas,
+                    orden=orden,
+                    descendente=descendente,
+                    filtros=filtros,
+                    despues=navegacion.decodificar_cursor(request.GET.get('despues')),
+                    antes=navegacion.decodificar_cursor(request.GET.get('antes')),
+                )
+                datos = pagina['filas']
+                conteo = navegacion.contar_filas(tabla_seleccionada, filtros)
+                
+                # Enlaces de navegación conservando tabla, columnas, orden y filtros
+                parametros = request.GET.copy()
+                parametros.pop('despues', None)
+                parametros.pop('antes', None)
+                if pagina['cursor_siguiente']:
+                    url_siguiente = _url_con(parametros, despues=pagina['cursor_siguiente'])
+                if pagina['cursor_anterior']:
+                    url_anterior = _url_con(parametros, antes=pagina['cursor_anterior'])
+                if request.GET.get('despues') or request.GET.get('antes'):
+                    url_primera = _url_con(parametros)
+                
+                for columna in columnas:
+                    actual = (orden or pk) == columna
+                    encabezados.append({
+                        'nombre': columna,
+                        'orden': ('desc' if descendente else 'asc') if actual else None,
+                        # Clic en la columna actual invierte el orden
+                        'url_orden': _url_con(parametros, orden=columna, dir='desc' if actual and not descendente else 'asc'),
+                        'filtro': filtros.get(columna, ''),
+                    })
             
             # Nombre amigable si existe
             if tabla_seleccionada in modelos_info:
@@ -137,6 +172,13 @@ def lista_tablas(request):
         'tabla_seleccionada': tabla_seleccionada,
         'datos': datos,
         'columnas': columnas,
+        'todas_columnas': todas_columnas,
+        'columnas_fecha': columnas_fecha,
+        'encabezados': encabezados,
+        'conteo': conteo,
+        'url_siguiente': url_siguiente,
+        'url_anterior': url_anterior,
+        'url_primera': url_primera,
         'nombre_amigable': nombre_amigable,
         'empresa_nombre': EMPRESA_NOMBRE,
     }
@@ -145,7 +187,13 @@ def lista_tablas(request):
 
 
 def exportar_tabla_excel(request, tabla):
-    """Exporta una tabla a Excel"""
+    """
+    Exporta una tabla a Excel o CSV (?formato=csv) leyendo las filas por lotes.
+
+    Parámetros GET opcionales:
+        columnas: una o más columnas a exportar (por defecto todas)
+        columna_fecha, fecha_desde, fecha_hasta: rango de fechas (AAAA-MM-DD, inclusive)
+    """
     try:
         # Validar que la tabla existe en la lista de tablas disponibles
         tablas_disponibles, _ = obtener_tablas_disponibles()
@@ -156,49 +204,77 @@ def exportar_tabla_excel(request, tabla):
         if not all(c.isalnum() or c == '_' for c in tabla):
             return HttpResponse("Nombre de tabla inválido", status=400)
         
-        with connection.cursor() as cursor:
-            # Obtener datos usando parámetros seguros
-            if connection.vendor == 'sqlite':
-                # SQLite no soporta parámetros en nombres de tablas, pero ya validamos
-                cursor.execute(f'SELECT * FROM "{tabla}"')
-                datos = cursor.fetchall()
-                
-                # Obtener nombres de columnas
-                cursor.execute(f'PRAGMA table_info("{tabla}")')
-                columnas_info = cursor.fetchall()
-                columnas = [col[1] for col in columnas_info]
-            else:
-                # Para otros SGBD usar parámetros
-                cursor.execute(f'SELECT * FROM "{tabla}"')
-                datos = cursor.fetchall()
-                
-                cursor.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = %s
-                    ORDER BY ordinal_position
-                """, [tabla])
-                columnas = [row[0] for row in cursor.fetchall()]
-        
-        # Crear DataFrame
-        df = pd.DataFrame(datos, columns=columnas)
+        try:
+            sql, parametros, columnas = exportacion.armar_consulta(
+                tabla,
+                metadatos.describir_columnas(tabla),
+                columnas=request.GET.getlist('columnas'),
+                columna_fecha=request.GET.get('columna_fecha'),
+                fecha_desde=request.GET.get('fecha_desde'),
+                fecha_hasta=request.GET.get('fecha_hasta'),
+            )
+        except ValueError as e:
+            return HttpResponse(str(e), status=400)
         
-        # Crear archivo Excel en memoria
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Datos')
+        filas = exportacion.iterar_filas(sql, parametros)
         
-        output.seek(0)
+        if request.GET.get('formato') == 'csv':
+            response = StreamingHttpResponse(
+                exportacion.generar_csv(columnas, filas),
+                content_type='text/csv; charset=utf-8',
+            )
+            response['Content-Disposition'] = f'attachment; filename="{tabla}.csv"'
+            return response
         
-        # Preparar respuesta
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return FileResponse(
+            exportacion.escribir_excel(columnas, filas),
+            as_attachment=True,
+            filename=f'{tabla}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         )
-        response['Content-Disposition'] = f'attachment; filename="{tabla}.xlsx"'
-        
-        return response
     
     except Exception as e:
         return HttpResponse(f"Error al exportar: {str(e)}", status=500)
 
+
+def _etag_datos_referencia(request, tipo, formato='json'):
+    """ETag del catálogo: cambia cuando se incrementa su versión"""
+    if tipo not in datos_referencia.TIPOS:
+        return None
+    request.version_datos_referencia = versiones.obtener(tipo)
+    return f"{tipo}-{request.version_datos_referencia}-{formato}"
+
+
+@require_http_methods(["GET"])
+@condition(etag_func=_etag_datos_referencia)
+def api_datos_referencia(request, tipo, formato='json'):
+    """
+    Catálogo de referencia para los formularios (/api/refdata/<tipo>).
+    
+    formato='json' devuelve {'version': N, 'results': [...]}. formato='js'
+    devuelve un script que carga el catálogo en window.datosReferencia, para
+    incluirlo con <script src> antes del código del formulario.
+    """
+    if tipo not in datos_referencia.TIPOS:
+        raise Http404(f'Catálogo desconocido: {tipo}')
+    
+    version = getattr(request, 'version_datos_referencia', None) or versiones.obtener(tipo)
+    datos = datos_referencia.obtener_datos(tipo, version)
+    
+    if formato == 'js':
+        contenido = (
+            'window.datosReferencia = window.datosReferencia || {};\n'
+            f'window.datosReferencia[{json.dumps(tipo)}] = {json.dumps(datos, cls=DjangoJSONEncoder)};\n'
+        )
+        response = HttpResponse(contenido, content_type='application/javascript; charset=utf-8')
+    else:
+        response = JsonResponse({'version': version, 'results': datos})
+    
+    # Con ?v=<versión actual> la URL es inmutable: el navegador la reutiliza sin consultar.
+    # Sin versión (o con una vieja) debe revalidar con el ETag.
+    if request.GET.get('v') == str(version):
+        patch_cache_control(response, private=True, max_age=86400)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
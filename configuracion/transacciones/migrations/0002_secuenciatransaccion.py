@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaTransaccion',
+            fields=[
+                ('periodo', models.CharField(help_text='Formato: AAMM (ej: 2511 para noviembre 2025)', max_length=4, primary_key=True, serialize=False, verbose_name='Período')),
+                ('ultimo_numero', models.PositiveIntegerField(default=0, verbose_name='Último Número')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Transacción',
+                'verbose_name_plural': 'Secuencias de Transacción',
+                'db_table': 'config_transacciones_secuencia',
+            },
+        ),
+    ]
@@ -1,7 +1,103 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Max
+from django.utils import timezone
 from configuracion.documentos.models import Documento
 
 
+class SecuenciaTransaccion(models.Model):
+    """
+    Último número de transacción asignado por mes (AAMM).
+    
+    Reemplaza la búsqueda de la última transacción del mes: el número se
+    incrementa con un UPDATE sobre una única fila, que queda bloqueada hasta
+    el fin de la transacción, así dos procesos nunca obtienen el mismo número.
+    """
+    
+    periodo = models.CharField(
+        max_length=4,
+        primary_key=True,
+        verbose_name='Período',
+        help_text='Formato: AAMM (ej: 2511 para noviembre 2025)'
+    )
+    
+    ultimo_numero = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Último Número',
+    )
+    
+    class Meta:
+        verbose_name = 'Secuencia de Transacción'
+        verbose_name_plural = 'Secuencias de Transacción'
+        db_table = 'config_transacciones_secuencia'
+    
+    def __str__(self):
+        return f"{self.periodo} - {self.ultimo_numero}"
+    
+    MAXIMO_NUMERO = 999999
+    
+    @staticmethod
+    def periodo_de(fecha=None):
+        """Devuelve el prefijo AAMM para la fecha dada (por defecto, ahora)"""
+        fecha = fecha or timezone.now()
+        return f"{fecha.year % 100:02d}{fecha.month:02d}"
+    
+    @classmethod
+    def _crear_periodo(cls, periodo):
+        """Crea la fila del mes partiendo del último número ya usado en Transaccion"""
+        ultima = Transaccion.objects.filter(
+            transaccion__startswith=periodo
+        ).aggregate(ultima=Max('transaccion'))['ultima']
+        try:
+            ultimo_numero = int(ultima[4:]) if ultima else 0
+        except ValueError:
+            ultimo_numero = 0
+        try:
+            with transaction.atomic():
+                cls.objects.create(periodo=periodo, ultimo_numero=ultimo_numero)
+        except IntegrityError:
+            # Otro proceso creó la fila al mismo tiempo; se usa la existente
+            pass
+    
+    @classmethod
+    def reservar(cls, cantidad=1, fecha=None):
+        """
+        Reserva un bloque de números de transacción consecutivos.
+        
+        Args:
+            cantidad: Cantidad de números a reservar (para importaciones masivas)
+            fecha: Fecha que define el prefijo AAMM (por defecto, ahora)
+        
+        Returns:
+            list: Números de transacción con formato AAMMXXXXXX
+        """
+        if cantidad < 1:
+            raise ValueError('La cantidad a reservar debe ser al menos 1.')
+        
+        periodo = cls.periodo_de(fecha)
+        with transaction.atomic():
+            # UPDATE atómico: bloquea la fila del mes hasta el fin de la transacción
+            actualizadas = cls.objects.filter(periodo=periodo).update(
+                ultimo_numero=F('ultimo_numero') + cantidad
+            )
+            if not actualizadas:
+                cls._crear_periodo(periodo)
+                cls.objects.filter(periodo=periodo).update(
+                    ultimo_numero=F('ultimo_numero') + cantidad
+                )
+            ultimo = cls.objects.values_list('ultimo_numero', flat=True).get(periodo=periodo)
+            
+            if ultimo > cls.MAXIMO_NUMERO:
+                raise ValueError(f'Se agotaron los números de transacción del período {periodo}.')
+        
+        primero = ultimo - cantidad + 1
+        return [f"{periodo}{str(numero).zfill(6)}" for numero in range(primero, ultimo + 1)]
+    
+    @classmethod
+    def siguiente(cls, fecha=None):
+        """Devuelve el próximo número de transacción (AAMMXXXXXX)"""
+        return cls.reservar(1, fecha)[0]
+
+
 class Transaccion(models.Model):
     """Modelo para representar una transacción en el sistema"""
     
@@ -46,26 +142,7 @@ class Transaccion(models.Model):
     def save(self, *args, **kwargs):
         # Generar transaccion automáticamente si no existe
         if not self.transaccion:  # Cambiar de self.codigo
-            from datetime import datetime
-            now = datetime.now()
-            año_mes = f"{now.year % 100:02d}{now.month:02d}"
-            
-            # Obtener el último número correlativo del mes
-            ultima = Transaccion.objects.filter(
-                transaccion__startswith=año_mes  # Cambiar codigo__ por transaccion__
-            ).order_by('-transaccion').first()  # Cambiar -codigo por -transaccion
-            
-            if ultima and ultima.transaccion:  # Cambiar codigo por transaccion
-                try:
-                    ultimo_num = int(ultima.transaccion[4:])  # Cambiar codigo por transaccion
-                    nuevo_num = ultimo_num + 1
-                except:
-                    nuevo_num = 1
-            else:
-                nuevo_num = 1
-            
-            # Formatear con ceros a la izquierda
-            self.transaccion = f"{año_mes}{str(nuevo_num).zfill(6)}"  # Cambiar codigo por transaccion
+            self.transaccion = SecuenciaTransaccion.siguiente()
         
         super().save(*args, **kwargs)
         
@@ -0,0 +1,21 @@
+"""
+Vistas de administración del proceso (solo staff)
+"""
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from erp_demo.context_processors import estadisticas_cache_menu, invalidar_cache_menu
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def cache_menu(request):
+    """
+    GET: aciertos/fallos del cache del menú lateral de este proceso.
+    POST: descarta el menú cacheado en todos los procesos (cada uno vuelve a leer
+    config.xlsx en su próximo request).
+    """
+    if request.method == 'POST':
+        invalidar_cache_menu()
+    return JsonResponse(estadisticas_cache_menu())
@@ -1,7 +1,44 @@
+"""
+Context processors globales: nombre de la empresa y menú lateral.
+
+El menú lateral se arma desde la hoja 'menu' de config.xlsx. Leer el Excel con
+pandas/openpyxl es caro y el context processor corre en cada template
+renderizado (incluido el login y las páginas de error), así que el menú ya
+armado se guarda en memoria del proceso, uno por rol (gerencia, mineria,
+industria, anonimo). Los menús de todos los roles se arman juntos, con una sola
+lectura del Excel, y se vuelven a armar cuando cambia la fecha de modificación
+del archivo o la versión del menú.
+
+La versión se guarda en la base (configuracion.tablas.versiones) y no en el
+proceso: invalidar desde la vista de administración
+(erp_demo.admin_views.cache_menu) la incrementa y todos los workers rearman el
+menú en su próximo request, no solo el que recibió el POST.
+"""
 from erp_demo.config import EMPRESA_NOMBRE
 from pathlib import Path
-import os
-import pandas as pd
+import threading
+
+from django.db import DatabaseError
+
+from configuracion.tablas import versiones
+
+
+EXCEL_MENU = Path(__file__).parent.parent / 'config.xlsx'
+
+# Rol -> secciones de nivel 1 que puede ver (None = todas)
+SECCIONES_POR_ROL = {
+    'gerencia': None,  # Gerencia ve todo
+    'mineria': ['Minería Le Stage'],  # Mineria solo ve Minería Le Stage
+    'industria': ['Industria Le Stage'],  # Industria solo ve Industria Le Stage
+    'anonimo': [],  # Usuario no autenticado o sin permisos específicos
+}
+
+CLAVE_VERSION = 'menu_lateral'
+
+_cache_menu = {}  # rol -> menú ya armado para el template
+_clave_menu = None  # (mtime de config.xlsx, versión del menú) con la que se armó el cache
+_estadisticas_menu = {'aciertos': 0, 'fallos': 0, 'invalidaciones': 0}
+_lock_menu = threading.Lock()
 
 
 def empresa_context(request):
@@ -11,296 +48,379 @@ def empresa_context(request):
     }
 
 
-def menu_context(request):
-    """Context processor para generar el menú lateral desde el Excel"""
-    menu_data = []
-    
-    # Determinar qué secciones puede ver el usuario
-    user = getattr(request, 'user', None)
-    usuario_username = user.username if user and user.is_authenticated else None
-    
-    # Definir permisos por usuario
-    secciones_permitidas = []
-    if usuario_username == 'gerencia' or (user and user.is_superuser):
-        # Gerencia ve todo
-        secciones_permitidas = None  # None significa todas las secciones
-    elif usuario_username == 'mineria':
-        # Mineria solo ve Minería Le Stage
-        secciones_permitidas = ['Minería Le Stage']
-    elif usuario_username == 'industria':
-        # Industria solo ve Industria Le Stage
-        secciones_permitidas = ['Industria Le Stage']
-    else:
-        # Usuario no autenticado o sin permisos específicos - no ve nada
-        secciones_permitidas = []
-    
-    try:
-        # Ruta al archivo Excel
-        excel_path = Path(__file__).parent.parent / 'config.xlsx'
-        
-        if excel_path.exists():
-            # Leer el Excel
-            df = pd.read_excel(excel_path, sheet_name='menu')
-            
-            # Mapear nivel 2 a URLs
-            url_map = {
-                'Clientes': 'lista_clientes',
-                'Proveedores': 'lista_proveedores',
-                'Artículos': 'lista_articulos',
-                'Disponibilidades': 'lista_disponibilidades',
-                'Transacciones': 'lista_transacciones',
-                'IVA': 'lista_ivas',
-                'Forma de pago': 'lista_formas_pago',
-                'Formas de pago': 'lista_formas_pago',
-                'Formas de Pago': 'lista_formas_pago',
-                'Ingresos compras': 'compras_ingreso:lista_compras',
-                'Devoluciones compras': 'compras_devoluciones:lista_compras_devoluciones',
-                'Devoluciones Compras': 'compras_devoluciones:lista_compras_devoluciones',
-                'Ingresos ventas': 'ventas_ingreso:lista_ventas',
-                'Ventas': 'ventas_ingreso:lista_ventas',
-                'Devoluciones ventas': 'ventas_devoluciones:lista_ventas_devoluciones',
-                'Devoluciones Ventas': 'ventas_devoluciones:lista_ventas_devoluciones',
-                'Minería Le Stage': 'mineria_le_stage:lista_equipos',
-                'Mineria Le Stage': 'mineria_le_stage:lista_equipos',
-                'Tablas': 'lista_tablas',
-                'Depósitos': 'lista_depositos',
-            }
-            
-            # Agrupar por nivel 1 y evitar duplicados
-            menu_structure = {}
-            seen_items = set()  # Para evitar duplicados
-            
-            for _, row in df.iterrows():
-                nivel1 = str(row['nivel 1']).strip() if pd.notna(row['nivel 1']) else ''
-                nivel2 = str(row['nivel 2']).strip() if pd.notna(row['nivel 2']) else ''
-                
-                if not nivel1 or not nivel2:
-                    continue
-                
-                # Ignorar "Minería Le Stage" si aparece como nivel 2 (se agregará como nivel 1 después)
-                # Comparación flexible para capturar variaciones
-                nivel2_lower = nivel2.lower().strip()
-                if 'mineria' in nivel2_lower and 'stage' in nivel2_lower:
-                    continue
-                
-                if nivel1 not in menu_structure:
-                    menu_structure[nivel1] = []
-                
-                # Crear clave única para evitar duplicados
-                item_key = (nivel1, nivel2)
-                if item_key not in seen_items:
-                    seen_items.add(item_key)
-                    
-                    item = {
-                        'nombre': nivel2,
-                        'url': url_map.get(nivel2, '#'),
-                        'hijos': []
-                    }
-                    
-                    # Agregar nivel 3 para Clientes -> Lista + Nuevo + Canales Comerciales
-                    if nivel2 == 'Clientes':
-                        item['hijos'].append({
-                            'nombre': 'Lista de Clientes',
-                            'url': 'lista_clientes'
-                        })
-                        item['hijos'].append({
-                            'nombre': 'Nuevo Cliente',
-                            'url': 'crear_cliente'
-                        })
-                        item['hijos'].append({
-                            'nombre': 'Canales Comerciales',
-                            'url': 'lista_canales'
-                        })
-                    
-                    # Agregar nivel 3 para Artículos -> Tipos, Familias, SubFamilias
-                    if nivel2 == 'Artículos':
-                        item['hijos'] = [
-                            {'nombre': 'Lista de Artículos', 'url': 'lista_articulos'},
-                            {'nombre': 'Tipos de Artículo', 'url': 'lista_tipos_articulo'},
-                            {'nombre': 'Familias', 'url': 'lista_familias'},
-                            {'nombre': 'Sub Familias', 'url': 'lista_subfamilias'},
-                        ]
-                    
-                    # Agregar nivel 3 para Ingresos compras -> Lista + Nueva
-                    if nivel2 == 'Ingresos compras':
-                        item['hijos'] = [
-                            {'nombre': 'Lista de Compras', 'url': 'compras_ingreso:lista_compras'},
-                            {'nombre': 'Nueva Compra', 'url': 'compras_ingreso:crear_compra'},
-                        ]
-                    
-                    # Agregar nivel 3 para Devoluciones compras -> Lista + Nueva
-                    if nivel2 == 'Devoluciones compras' or nivel2 == 'Devoluciones Compras':
-                        item['hijos'] = [
-                            {'nombre': 'Lista de Devoluciones', 'url': 'compras_devoluciones:lista_compras_devoluciones'},
-                            {'nombre': 'Nueva Devolución', 'url': 'compras_devoluciones:crear_compra_devolucion'},
-                        ]
-                    
-                    # Agregar nivel 3 para Ingresos ventas -> Lista + Nueva
-                    if nivel2 == 'Ingresos ventas' or nivel2 == 'Ventas':
-                        item['hijos'] = [
-                            {'nombre': 'Lista de Ventas', 'url': 'ventas_ingreso:lista_ventas'},
-                            {'nombre': 'Nueva Venta', 'url': 'ventas_ingreso:crear_venta'},
-                        ]
-                    
-                    # Agregar nivel 3 para Devoluciones ventas -> Lista + Nueva
-                    if nivel2 == 'Devoluciones ventas' or nivel2 == 'Devoluciones Ventas':
-                        item['hijos'] = [
-                            {'nombre': 'Lista de Devoluciones', 'url': 'ventas_devoluciones:lista_ventas_devoluciones'},
-                            {'nombre': 'Nueva Devolución', 'url': 'ventas_devoluciones:crear_venta_devolucion'},
-                        ]
-                    
-                    menu_structure[nivel1].append(item)
-            
-            # Agregar "Tablas" a la sección Configuración si existe
-            if 'Configuración' in menu_structure:
-                # Verificar si ya existe "Tablas" en Configuración
-                existe_tablas = any(item['nombre'] == 'Tablas' for item in menu_structure['Configuración'])
-                if not existe_tablas:
-                    menu_structure['Configuración'].append({
-                        'nombre': 'Tablas',
-                        'url': 'lista_tablas',
-                        'hijos': []
-                    })
-            
-            # Eliminar "Minería Le Stage" de cualquier nivel 1 donde aparezca como nivel 2
-            # Usar comparación flexible para capturar variaciones
-            for nivel1_key in list(menu_structure.keys()):
-                menu_structure[nivel1_key] = [
-                    item for item in menu_structure[nivel1_key]
-                    if not ('mineria' in item['nombre'].lower() and 'stage' in item['nombre'].lower())
-                ]
-            
-            # Agregar "Minería Le Stage" como nivel 1 (al mismo nivel que Configuración y Compras)
-            menu_structure['Minería Le Stage'] = [
-                {'nombre': 'Equipos', 'url': 'mineria_le_stage:lista_equipos'},
-                {'nombre': 'Equipos Corte', 'url': 'mineria_le_stage:lista_equipos_corte'},
-                {'nombre': 'Piedras/Canteras', 'url': 'mineria_le_stage:lista_piedras_canteras'},
-                {'nombre': 'Producción Equipos', 'url': 'mineria_le_stage:lista_produccion_equipos'},
-                {'nombre': 'Costos Equipos', 'url': 'mineria_le_stage:lista_costos'},
-                {'nombre': 'Piezas de Corte en Cantera', 'url': 'mineria_le_stage:lista_piezas_corte_cantera'},
-            ]
-            
-            # Agregar "Industria Le Stage" como nivel 1
-            menu_structure['Industria Le Stage'] = [
-                {'nombre': 'Tipos de Pulido Piezas', 'url': 'industria_le_stage:lista_tipos_pulido_piezas'},
-                {'nombre': 'Piezas de Corte en Industria', 'url': 'industria_le_stage:lista_piezas_corte_cantera_industria'},
-            ]
-            
-            # Agregar "Gerencia" como nivel 1
-            menu_structure['Gerencia'] = [
-                {
-                    'nombre': 'Control de Producción',
-                    'url': '#',
-                    'hijos': [
-                        {'nombre': 'Piezas de Corte', 'url': 'gerencia_le_stage:control_produccion_piezas_corte'},
-                    ]
-                }
-            ]
-            
-            # Filtrar menú según permisos del usuario
-            # Si secciones_permitidas es None, mostrar todo (gerencia)
-            # Si es una lista, filtrar solo esas secciones
-            if secciones_permitidas is not None and len(secciones_permitidas) > 0:
-                menu_structure = {
-                    nivel1: hijos 
-                    for nivel1, hijos in menu_structure.items() 
-                    if nivel1 in secciones_permitidas
-                }
-            
-            # Convertir a lista para el template
-            menu_data = [
-                {
-                    'nombre': nivel1,
-                    'hijos': hijos
-                }
-                for nivel1, hijos in menu_structure.items()
-            ]
-    except Exception as e:
-        # Si hay error, usar menú por defecto (filtrar según usuario)
-        menu_default = [
+# Menú que se usa si no se puede leer el Excel
+MENU_POR_DEFECTO = [
+    {
+        'nombre': 'Configuración',
+        'hijos': [
+            {'nombre': 'Clientes', 'url': 'lista_clientes', 'hijos': [
+                {'nombre': 'Canales Comerciales', 'url': 'lista_canales'}
+            ]},
+            {'nombre': 'Proveedores', 'url': 'lista_proveedores', 'hijos': []},
+            {'nombre': 'Artículos', 'url': 'lista_articulos', 'hijos': [
+                {'nombre': 'Lista de Artículos', 'url': 'lista_articulos'},
+                {'nombre': 'Tipos de Artículo', 'url': 'lista_tipos_articulo'},
+                {'nombre': 'Familias', 'url': 'lista_familias'},
+                {'nombre': 'Sub Familias', 'url': 'lista_subfamilias'},
+            ]},
+            {'nombre': 'Tablas', 'url': 'lista_tablas', 'hijos': []},
+        ]
+    },
+    {
+        'nombre': 'Operaciones',
+        'hijos': [
+            {'nombre': 'Compras', 'url': 'compras_ingreso:lista_compras', 'hijos': [
+                {'nombre': 'Lista de Compras', 'url': 'compras_ingreso:lista_compras'},
+                {'nombre': 'Nueva Compra', 'url': 'compras_ingreso:crear_compra'},
+            ]},
+            {'nombre': 'Devoluciones Compras', 'url': 'compras_devoluciones:lista_compras_devoluciones', 'hijos': [
+                {'nombre': 'Lista de Devoluciones', 'url': 'compras_devoluciones:lista_compras_devoluciones'},
+                {'nombre': 'Nueva Devolución', 'url': 'compras_devoluciones:crear_compra_devolucion'},
+            ]},
+            {'nombre': 'Ventas', 'url': 'ventas_ingreso:lista_ventas', 'hijos': [
+                {'nombre': 'Lista de Ventas', 'url': 'ventas_ingreso:lista_ventas'},
+                {'nombre': 'Nueva Venta', 'url': 'ventas_ingreso:crear_venta'},
+            ]},
+            {'nombre': 'Devoluciones Ventas', 'url': 'ventas_devoluciones:lista_ventas_devoluciones', 'hijos': [
+                {'nombre': 'Lista de Devoluciones', 'url': 'ventas_devoluciones:lista_ventas_devoluciones'},
+                {'nombre': 'Nueva Devolución', 'url': 'ventas_devoluciones:crear_venta_devolucion'},
+            ]},
+        ]
+    },
+    {
+        'nombre': 'Minería Le Stage',
+        'hijos': [
+            {'nombre': 'Equipos', 'url': 'mineria_le_stage:lista_equipos'},
+            {'nombre': 'Equipos Corte', 'url': 'mineria_le_stage:lista_equipos_corte'},
+            {'nombre': 'Piedras/Canteras', 'url': 'mineria_le_stage:lista_piedras_canteras'},
+            {'nombre': 'Producción Equipos', 'url': 'mineria_le_stage:lista_produccion_equipos'},
+            {'nombre': 'Costos Equipos', 'url': 'mineria_le_stage:lista_costos'},
+            {'nombre': 'Piezas de Corte en Cantera', 'url': 'mineria_le_stage:lista_piezas_corte_cantera'},
+        ]
+    },
+    {
+        'nombre': 'Industria Le Stage',
+        'hijos': [
+            {'nombre': 'Tipos de Pulido Piezas', 'url': 'industria_le_stage:lista_tipos_pulido_piezas'},
+            {'nombre': 'Piezas de Corte en Industria', 'url': 'industria_le_stage:lista_piezas_corte_cantera_industria'},
+        ]
+    },
+    {
+        'nombre': 'Gerencia',
+        'hijos': [
             {
-                'nombre': 'Configuración',
+                'nombre': 'Control de Producción',
+                'url': '#',
                 'hijos': [
-                    {'nombre': 'Clientes', 'url': 'lista_clientes', 'hijos': [
-                        {'nombre': 'Canales Comerciales', 'url': 'lista_canales'}
-                    ]},
-                    {'nombre': 'Proveedores', 'url': 'lista_proveedores', 'hijos': []},
-                    {'nombre': 'Artículos', 'url': 'lista_articulos', 'hijos': [
-                        {'nombre': 'Lista de Artículos', 'url': 'lista_articulos'},
-                        {'nombre': 'Tipos de Artículo', 'url': 'lista_tipos_articulo'},
-                        {'nombre': 'Familias', 'url': 'lista_familias'},
-                        {'nombre': 'Sub Familias', 'url': 'lista_subfamilias'},
-                    ]},
-                    {'nombre': 'Tablas', 'url': 'lista_tablas', 'hijos': []},
+                    {'nombre': 'Piezas de Corte', 'url': 'gerencia_le_stage:control_produccion_piezas_corte'},
                 ]
             },
             {
-                'nombre': 'Operaciones',
+                'nombre': 'Análisis Comercial',
+                'url': '#',
                 'hijos': [
-                    {'nombre': 'Compras', 'url': 'compras_ingreso:lista_compras', 'hijos': [
-                        {'nombre': 'Lista de Compras', 'url': 'compras_ingreso:lista_compras'},
-                        {'nombre': 'Nueva Compra', 'url': 'compras_ingreso:crear_compra'},
-                    ]},
-                    {'nombre': 'Devoluciones Compras', 'url': 'compras_devoluciones:lista_compras_devoluciones', 'hijos': [
-                        {'nombre': 'Lista de Devoluciones', 'url': 'compras_devoluciones:lista_compras_devoluciones'},
-                        {'nombre': 'Nueva Devolución', 'url': 'compras_devoluciones:crear_compra_devolucion'},
-                    ]},
-                    {'nombre': 'Ventas', 'url': 'ventas_ingreso:lista_ventas', 'hijos': [
-                        {'nombre': 'Lista de Ventas', 'url': 'ventas_ingreso:lista_ventas'},
-                        {'nombre': 'Nueva Venta', 'url': 'ventas_ingreso:crear_venta'},
-                    ]},
-                    {'nombre': 'Devoluciones Ventas', 'url': 'ventas_devoluciones:lista_ventas_devoluciones', 'hijos': [
-                        {'nombre': 'Lista de Devoluciones', 'url': 'ventas_devoluciones:lista_ventas_devoluciones'},
-                        {'nombre': 'Nueva Devolución', 'url': 'ventas_devoluciones:crear_venta_devolucion'},
-                    ]},
+                    {'nombre': 'Ventas por Mes', 'url': 'gerencia_le_stage:cubo_ventas'},
+                    {'nombre': 'Compras por Proveedor', 'url': 'gerencia_le_stage:gasto_proveedores'},
+                    {'nombre': 'Declaración de IVA', 'url': 'gerencia_le_stage:declaracion_iva'},
                 ]
-            },
-            {
-                'nombre': 'Minería Le Stage',
-                'hijos': [
-                    {'nombre': 'Equipos', 'url': 'mineria_le_stage:lista_equipos'},
-                    {'nombre': 'Equipos Corte', 'url': 'mineria_le_stage:lista_equipos_corte'},
-                    {'nombre': 'Piedras/Canteras', 'url': 'mineria_le_stage:lista_piedras_canteras'},
-                    {'nombre': 'Producción Equipos', 'url': 'mineria_le_stage:lista_produccion_equipos'},
-                    {'nombre': 'Costos Equipos', 'url': 'mineria_le_stage:lista_costos'},
-                    {'nombre': 'Piezas de Corte en Cantera', 'url': 'mineria_le_stage:lista_piezas_corte_cantera'},
+            }
+        ]
+    }
+]
+
+
+def _menu_desde_excel(excel_path):
+    """Lee la hoja 'menu' del Excel y devuelve {nivel 1: [items]} sin filtrar por rol"""
+    # pandas (y numpy/openpyxl) se importa acá y no al cargar el módulo: solo se
+    # necesita al armar el menú, no en el arranque de cada worker
+    import pandas as pd
+    
+    df = pd.read_excel(excel_path, sheet_name='menu')
+    
+    # Mapear nivel 2 a URLs
+    url_map = {
+        'Clientes': 'lista_clientes',
+        'Proveedores': 'lista_proveedores',
+        'Artículos': 'lista_articulos',
+        'Disponibilidades': 'lista_disponibilidades',
+        'Transacciones': 'lista_transacciones',
+        'IVA': 'lista_ivas',
+        'Forma de pago': 'lista_formas_pago',
+        'Formas de pago': 'lista_formas_pago',
+        'Formas de Pago': 'lista_formas_pago',
+        'Ingresos compras': 'compras_ingreso:lista_compras',
+        'Devoluciones compras': 'compras_devoluciones:lista_compras_devoluciones',
+        'Devoluciones Compras': 'compras_devoluciones:lista_compras_devoluciones',
+        'Ingresos ventas': 'ventas_ingreso:lista_ventas',
+        'Ventas': 'ventas_ingreso:lista_ventas',
+        'Devoluciones ventas': 'ventas_devoluciones:lista_ventas_devoluciones',
+        'Devoluciones Ventas': 'ventas_devoluciones:lista_ventas_devoluciones',
+        'Minería Le Stage': 'mineria_le_stage:lista_equipos',
+        'Mineria Le Stage': 'mineria_le_stage:lista_equipos',
+        'Tablas': 'lista_tablas',
+        'Depósitos': 'lista_depositos',
+    }
+
+    # Agrupar por nivel 1 y evitar duplicados
+    menu_structure = {}
+    seen_items = set()  # Para evitar duplicados
+
+    for _, row in df.iterrows():
+        nivel1 = str(row['nivel 1']).strip() if pd.notna(row['nivel 1']) else ''
+        nivel2 = str(row['nivel 2']).strip() if pd.notna(row['nivel 2']) else ''
+
+        if not nivel1 or not nivel2:
+            continue
+
+        # Ignorar "Minería Le Stage" si aparece como nivel 2 (se agregará como nivel 1 después)
+        # Comparación flexible para capturar variaciones
+        nivel2_lower = nivel2.lower().strip()
+        if 'mineria' in nivel2_lower and 'stage' in nivel2_lower:
+            continue
+
+        if nivel1 not in menu_structure:
+            menu_structure[nivel1] = []
+
+        # Crear clave única para evitar duplicados
+        item_key = (nivel1, nivel2)
+        if item_key not in seen_items:
+            seen_items.add(item_key)
+
+            item = {
+                'nombre': nivel2,
+                'url': url_map.get(nivel2, '#'),
+                'hijos': []
+            }
+
+            # Agregar nivel 3 para Clientes -> Lista + Nuevo + Canales Comerciales
+            if nivel2 == 'Clientes':
+                item['hijos'].append({
+                    'nombre': 'Lista de Clientes',
+                    'url': 'lista_clientes'
+                })
+                item['hijos'].append({
+                    'nombre': 'Nuevo Cliente',
+                    'url': 'crear_cliente'
+                })
+                item['hijos'].append({
+                    'nombre': 'Canales Comerciales',
+                    'url': 'lista_canales'
+                })
+
+            # Agregar nivel 3 para Artículos -> Tipos, Familias, SubFamilias
+            if nivel2 == 'Artículos':
+                item['hijos'] = [
+                    {'nombre': 'Lista de Artículos', 'url': 'lista_articulos'},
+                    {'nombre': 'Tipos de Artículo', 'url': 'lista_tipos_articulo'},
+                    {'nombre': 'Familias', 'url': 'lista_familias'},
+                    {'nombre': 'Sub Familias', 'url': 'lista_subfamilias'},
                 ]
-            },
-            {
-                'nombre': 'Industria Le Stage',
-                'hijos': [
-                    {'nombre': 'Tipos de Pulido Piezas', 'url': 'industria_le_stage:lista_tipos_pulido_piezas'},
-                    {'nombre': 'Piezas de Corte en Industria', 'url': 'industria_le_stage:lista_piezas_corte_cantera_industria'},
+
+            # Agregar nivel 3 para Ingresos compras -> Lista + Nueva
+            if nivel2 == 'Ingresos compras':
+                item['hijos'] = [
+                    {'nombre': 'Lista de Compras', 'url': 'compras_ingreso:lista_compras'},
+                    {'nombre': 'Nueva Compra', 'url': 'compras_ingreso:crear_compra'},
                 ]
-            },
-            {
-                'nombre': 'Gerencia',
-                'hijos': [
-                    {
-                        'nombre': 'Control de Producción',
-                        'url': '#',
-                        'hijos': [
-                            {'nombre': 'Piezas de Corte', 'url': 'gerencia_le_stage:control_produccion_piezas_corte'},
-                        ]
-                    }
+
+            # Agregar nivel 3 para Devoluciones compras -> Lista + Nueva
+            if nivel2 == 'Devoluciones compras' or nivel2 == 'Devoluciones Compras':
+                item['hijos'] = [
+                    {'nombre': 'Lista de Devoluciones', 'url': 'compras_devoluciones:lista_compras_devoluciones'},
+                    {'nombre': 'Nueva Devolución', 'url': 'compras_devoluciones:crear_compra_devolucion'},
                 ]
-            }
+
+            # Agregar nivel 3 para Ingresos ventas -> Lista + Nueva
+            if nivel2 == 'Ingresos ventas' or nivel2 == 'Ventas':
+                item['hijos'] = [
+                    {'nombre': 'Lista de Ventas', 'url': 'ventas_ingreso:lista_ventas'},
+                    {'nombre': 'Nueva Venta', 'url': 'ventas_ingreso:crear_venta'},
+                ]
+
+            # Agregar nivel 3 para Devoluciones ventas -> Lista + Nueva
+            if nivel2 == 'Devoluciones ventas' or nivel2 == 'Devoluciones Ventas':
+                item['hijos'] = [
+                    {'nombre': 'Lista de Devoluciones', 'url': 'ventas_devoluciones:lista_ventas_devoluciones'},
+                    {'nombre': 'Nueva Devolución', 'url': 'ventas_devoluciones:crear_venta_devolucion'},
+                ]
+
+            menu_structure[nivel1].append(item)
+
+    # Agregar "Tablas" a la sección Configuración si existe
+    if 'Configuración' in menu_structure:
+        # Verificar si ya existe "Tablas" en Configuración
+        existe_tablas = any(item['nombre'] == 'Tablas' for item in menu_structure['Configuración'])
+        if not existe_tablas:
+            menu_structure['Configuración'].append({
+                'nombre': 'Tablas',
+                'url': 'lista_tablas',
+                'hijos': []
+            })
+
+    # Eliminar "Minería Le Stage" de cualquier nivel 1 donde aparezca como nivel 2
+    # Usar comparación flexible para capturar variaciones
+    for nivel1_key in list(menu_structure.keys()):
+        menu_structure[nivel1_key] = [
+            item for item in menu_structure[nivel1_key]
+            if not ('mineria' in item['nombre'].lower() and 'stage' in item['nombre'].lower())
         ]
-        
-        # Filtrar menú por defecto según permisos del usuario
+
+    # Agregar "Minería Le Stage" como nivel 1 (al mismo nivel que Configuración y Compras)
+    menu_structure['Minería Le Stage'] = [
+        {'nombre': 'Equipos', 'url': 'mineria_le_stage:lista_equipos'},
+        {'nombre': 'Equipos Corte', 'url': 'mineria_le_stage:lista_equipos_corte'},
+        {'nombre': 'Piedras/Canteras', 'url': 'mineria_le_stage:lista_piedras_canteras'},
+        {'nombre': 'Producción Equipos', 'url': 'mineria_le_stage:lista_produccion_equipos'},
+        {'nombre': 'Costos Equipos', 'url': 'mineria_le_stage:lista_costos'},
+        {'nombre': 'Piezas de Corte en Cantera', 'url': 'mineria_le_stage:lista_piezas_corte_cantera'},
+    ]
+
+    # Agregar "Industria Le Stage" como nivel 1
+    menu_structure['Industria Le Stage'] = [
+        {'nombre': 'Tipos de Pulido Piezas', 'url': 'industria_le_stage:lista_tipos_pulido_piezas'},
+        {'nombre': 'Piezas de Corte en Industria', 'url': 'industria_le_stage:lista_piezas_corte_cantera_industria'},
+    ]
+
+    # Agregar "Gerencia" como nivel 1
+    menu_structure['Gerencia'] = [
+        {
+            'nombre': 'Control de Producción',
+            'url': '#',
+            'hijos': [
+                {'nombre': 'Piezas de Corte', 'url': 'gerencia_le_stage:control_produccion_piezas_corte'},
+            ]
+        },
+        {
+            'nombre': 'Análisis Comercial',
+            'url': '#',
+            'hijos': [
+                {'nombre': 'Ventas por Mes', 'url': 'gerencia_le_stage:cubo_ventas'},
+                {'nombre': 'Compras por Proveedor', 'url': 'gerencia_le_stage:gasto_proveedores'},
+                {'nombre': 'Declaración de IVA', 'url': 'gerencia_le_stage:declaracion_iva'},
+            ]
+        }
+    ]
+    
+    return menu_structure
+
+
+def rol_menu(user):
+    """Rol con el que se cachea el menú: gerencia, mineria, industria o anonimo"""
+    usuario_username = user.username if user and user.is_authenticated else None
+    if usuario_username == 'gerencia' or (user and user.is_superuser):
+        return 'gerencia'
+    if usuario_username in ('mineria', 'industria'):
+        return usuario_username
+    return 'anonimo'
+
+
+def _construir_menu(rol, menu_structure):
+    """Arma el menú del rol (lista de secciones para el template) desde la hoja ya leída"""
+    secciones_permitidas = SECCIONES_POR_ROL[rol]
+    
+    if menu_structure is None:
+        # Si hubo error al leer el Excel, usar menú por defecto (filtrar según usuario)
         if secciones_permitidas is not None:
             if len(secciones_permitidas) > 0:
-                menu_data = [
-                    seccion for seccion in menu_default 
+                return [
+                    seccion for seccion in MENU_POR_DEFECTO 
                     if seccion['nombre'] in secciones_permitidas
                 ]
-            else:
-                menu_data = []
-        else:
-            # Gerencia ve todo
-            menu_data = menu_default
+            return []
+        # Gerencia ve todo
+        return MENU_POR_DEFECTO
+    
+    # Filtrar menú según permisos del usuario
+    # Si secciones_permitidas es None, mostrar todo (gerencia)
+    # Si es una lista, filtrar solo esas secciones
+    if secciones_permitidas is not None and len(secciones_permitidas) > 0:
+        menu_structure = {
+            nivel1: hijos 
+            for nivel1, hijos in menu_structure.items() 
+            if nivel1 in secciones_permitidas
+        }
+    
+    # Convertir a lista para el template
+    return [
+        {
+            'nombre': nivel1,
+            'hijos': hijos
+        }
+        for nivel1, hijos in menu_structure.items()
+    ]
+
+
+def _construir_menus(excel_path):
+    """{rol: menú} de todos los roles con una sola lectura del Excel"""
+    menu_structure = {}
+    try:
+        if excel_path.exists():
+            menu_structure = _menu_desde_excel(excel_path)
+    except Exception:
+        menu_structure = None
+    return {rol: _construir_menu(rol, menu_structure) for rol in SECCIONES_POR_ROL}
+
+
+def _mtime(excel_path):
+    try:
+        return excel_path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _version_menu():
+    try:
+        return versiones.obtener(CLAVE_VERSION)
+    except DatabaseError:
+        # Sin acceso a la base (p. ej. una transacción abortada) se sigue con el menú cacheado
+        return _clave_menu[1] if _clave_menu else None
+
+
+def obtener_menu(rol, excel_path=EXCEL_MENU):
+    """Menú del rol desde el cache del proceso; se rearma si cambió el Excel o la versión"""
+    global _clave_menu
+    clave = (_mtime(excel_path), _version_menu())
+    with _lock_menu:
+        if clave != _clave_menu:
+            # El archivo cambió, se invalidó (o es la primera vez): descartar todos los roles
+            _cache_menu.clear()
+            _clave_menu = clave
+        menu_data = _cache_menu.get(rol)
+        if menu_data is not None:
+            _estadisticas_menu['aciertos'] += 1
+            return menu_data
+        _estadisticas_menu['fallos'] += 1
     
+    menus = _construir_menus(excel_path)
+    with _lock_menu:
+        if _clave_menu == clave:
+            _cache_menu.update(menus)
+    return menus[rol]
+
+
+def invalidar_cache_menu():
+    """Descarta el menú cacheado de todos los roles en todos los procesos"""
+    versiones.incrementar(CLAVE_VERSION)
+    with _lock_menu:
+        _estadisticas_menu['invalidaciones'] += 1
+
+
+def estadisticas_cache_menu():
+    """Aciertos, fallos e invalidaciones del cache del menú de este proceso (para monitoreo)"""
+    with _lock_menu:
+        mtime, version = _clave_menu or (None, None)
+        return {
+            **_estadisticas_menu,
+            'roles_cacheados': sorted(_cache_menu),
+            'mtime': mtime,
+            'version': version,
+        }
+
+
+def menu_context(request):
+    """Context processor para generar el menú lateral desde el Excel"""
+    # Determinar qué secciones puede ver el usuario
+    user = getattr(request, 'user', None)
     return {
-        'menu_lateral': menu_data,
+        'menu_lateral': obtener_menu(rol_menu(user)),
     }
-
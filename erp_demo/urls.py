@@ -6,9 +6,10 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
-from erp_demo import auth_views
+from erp_demo import admin_views, auth_views
 
 urlpatterns = [
+    path('admin/cache-menu/', admin_views.cache_menu, name='cache_menu'),
     path('admin/', admin.site.urls),
     # Autenticación
     path('login/', auth_views.login_view, name='login'),
@@ -18,6 +19,7 @@ urlpatterns = [
     path('', include('configuracion.proveedores.urls')),
     path('', include('configuracion.articulos.urls')),
     path('', include('configuracion.disponibilidades.urls')),
+    path('', include('configuracion.documentos.urls')),
     path('', include('configuracion.transacciones.urls')),
     path('', include('configuracion.tablas.urls')),
     path('', include('configuracion.deposito.urls')),
@@ -5,3 +5,9 @@ class GerenciaLeStageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gerencia_le_stage'
     verbose_name = 'Gerencia Le Stage'
+
+    def ready(self):
+        from gerencia_le_stage import cubo_compras, cubo_ventas, declaracion_iva
+        cubo_ventas.conectar_senales()
+        cubo_compras.conectar_senales()
+        declaracion_iva.conectar_senales()
@@ -0,0 +1,66 @@
+"""
+Costos de industrialización de las piezas de corte, calculados en la base.
+
+Los costos se agregan como anotaciones del QuerySet (ExpressionWrapper sobre
+F), así el listado puede ordenar y filtrar por cualquiera de ellos y los
+totales de todo el conjunto filtrado salen de un solo aggregate:
+
+- costo_tallado = kilos_despues_tallado * precio_por_kilo_tallado
+- costo_pulido = pulido_por_kilo * kilos_despues_tallado
+- costos_industrializacion = costo_tallado + costo_pulido + extra_carlos
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+IMPORTE = DecimalField(max_digits=30, decimal_places=4)
+
+CERO = Decimal('0')
+
+CENTESIMOS = Decimal('0.01')
+
+COSTOS = ('costo_tallado', 'costo_pulido', 'extra_carlos', 'costos_industrializacion')
+
+# Columnas por las que se puede ordenar el listado
+ORDENES = {
+    'id': 'ID',
+    'nombre_piedra': 'Nombre',
+    'fecha_industria': 'Fecha Industria',
+    'kilos_recepcion_industria': 'Kilos Industria',
+    'costo_tallado': 'Costo Tallado',
+    'costo_pulido': 'Costo Pulido',
+    'extra_carlos': 'Extra Carlos',
+    'costos_industrializacion': 'Costos Industrialización',
+}
+
+
+def anotar_costos(piezas):
+    """Agrega al QuerySet de PiezasCorteCantera las columnas de costos"""
+    return piezas.annotate(
+        costo_tallado=ExpressionWrapper(F('kilos_despues_tallado') * F('precio_por_kilo_tallado'), output_field=IMPORTE),
+        costo_pulido=ExpressionWrapper(F('pulido_por_kilo') * F('kilos_despues_tallado'), output_field=IMPORTE),
+    ).annotate(
+        costos_industrializacion=ExpressionWrapper(
+            F('costo_tallado') + F('costo_pulido') + F('extra_carlos'), output_field=IMPORTE,
+        ),
+    )
+
+
+def totales(piezas):
+    """Suma de kilos y costos del QuerySet anotado, en una sola consulta"""
+    campos = ('kilos_recepcion_industria',) + COSTOS
+    # Los alias del aggregate no pueden repetir los nombres de las anotaciones
+    sumas = piezas.order_by().aggregate(**{
+        f'total_{campo}': Coalesce(Sum(campo), Value(CERO), output_field=IMPORTE) for campo in campos
+    })
+    # SQLite devuelve algunas sumas de decimales con ruido de float
+    return {campo: Decimal(sumas[f'total_{campo}']).quantize(CENTESIMOS) for campo in campos}
+
+
+def orden_parametro(valor, por_defecto='-fecha_creacion'):
+    """Orden del listado ('campo' o '-campo' de ORDENES) o el orden por defecto"""
+    if valor and valor.lstrip('-') in ORDENES:
+        return valor
+    return por_defecto
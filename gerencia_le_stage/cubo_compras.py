@@ -0,0 +1,58 @@
+"""
+Cubo de compras: tabla resumen por (mes, proveedor, artículo, tipo de
+documento, moneda) con cantidad, sub_total, iva y total, neta de devoluciones
+de compra (que restan bajo su propio tipo de documento).
+
+Se mantiene por tramos (mes, proveedor) con cubos.Cubo. El comando
+reconstruir_cubo_compras regenera todo mes por mes.
+"""
+from django.apps import apps
+
+from gerencia_le_stage.cubos import Cubo
+
+
+CUBO = Cubo(
+    modelo='gerencia_le_stage.CuboCompras',
+    fuentes=(
+        ('compras_ingreso.ComprasLineas', 1),
+        ('compras_devoluciones.ComprasDevolucionesLineas', -1),
+    ),
+    # Campos del cubo -> campos de las líneas
+    clave={
+        'mes': 'mes',
+        'proveedor_id': 'transaccion__id_proveedor',
+        'articulo_id': 'id_articulo',
+        'tipo_documento_id': 'transaccion__tipo_documento',
+        'moneda_id': 'transaccion__moneda',
+    },
+    tercero='id_proveedor',
+    nombre='cubo_compras',
+)
+
+agregar = CUBO.agregar
+recalcular = CUBO.recalcular
+meses_con_documentos = CUBO.meses_con_documentos
+reconstruir_mes = CUBO.reconstruir_mes
+reconstruir = CUBO.reconstruir
+
+
+def etiquetas(dimension, ids):
+    """{id: descripción} de los valores de la dimensión (proveedor, articulo o tipo_documento)"""
+    if dimension == 'proveedor':
+        from configuracion.proveedores.models import Proveedor
+        return {
+            pk: razon or nombre_comercial
+            for pk, razon, nombre_comercial in Proveedor.objects.filter(pk__in=ids).values_list(
+                'pk', 'razon', 'nombre_comercial',
+            )
+        }
+    modelo = {
+        'articulo': 'articulos.Articulo',
+        'tipo_documento': 'documentos.Documento',
+    }[dimension]
+    return dict(apps.get_model(modelo).objects.filter(pk__in=ids).values_list('pk', 'nombre'))
+
+
+def conectar_senales():
+    """Mantiene el cubo al escribir compras o devoluciones (desde GerenciaLeStageConfig.ready)"""
+    CUBO.conectar_senales()
@@ -0,0 +1,100 @@
+"""
+Cubo de ventas: tabla resumen por (mes, cliente, artículo, canal comercial,
+moneda, tipo de documento) con cantidad, sub_total, iva y total, neta de
+devoluciones (que suman en negativo bajo su propio tipo de documento).
+
+Se mantiene por tramos (mes, cliente) con cubos.Cubo; además, si cambia el
+canal comercial de un cliente se recalculan sus meses (el cubo usa el canal
+actual). El comando reconstruir_cubo_ventas regenera todo mes por mes.
+"""
+from django.apps import apps
+from django.db.models.signals import post_save, pre_save
+
+from gerencia_le_stage.cubos import Cubo
+
+
+CUBO = Cubo(
+    modelo='gerencia_le_stage.CuboVentas',
+    fuentes=(
+        ('ventas_ingreso.VentasLineas', 1),
+        ('ventas_devoluciones.VentasDevolucionesLineas', -1),
+    ),
+    # Campos del cubo -> campos de las líneas
+    clave={
+        'mes': 'mes',
+        'cliente_id': 'transaccion__id_cliente',
+        'articulo_id': 'id_articulo',
+        'canal_comercial_id': 'transaccion__id_cliente__canal_comercial',
+        'moneda_id': 'transaccion__moneda',
+        'tipo_documento_id': 'transaccion__tipo_documento',
+    },
+    tercero='id_cliente',
+    nombre='cubo_ventas',
+)
+
+agregar = CUBO.agregar
+recalcular = CUBO.recalcular
+meses_con_documentos = CUBO.meses_con_documentos
+reconstruir_mes = CUBO.reconstruir_mes
+reconstruir = CUBO.reconstruir
+
+
+# Dimensiones y medidas de la tabla dinámica
+DIMENSIONES = {
+    'cliente': 'Cliente',
+    'articulo': 'Artículo',
+    'canal_comercial': 'Canal Comercial',
+    'tipo_documento': 'Tipo de Documento',
+}
+
+TITULOS_MEDIDAS = {
+    'total': 'Total',
+    'sub_total': 'Sub Total',
+    'iva': 'IVA',
+    'cantidad': 'Cantidad',
+}
+
+
+def etiquetas(dimension, ids):
+    """{id: descripción} de los valores de la dimensión"""
+    if dimension == 'cliente':
+        from configuracion.clientes.models import Cliente
+        return {
+            pk: razon_social or nombre_comercial
+            for pk, razon_social, nombre_comercial in Cliente.objects.filter(pk__in=ids).values_list(
+                'pk', 'razon_social', 'nombre_comercial',
+            )
+        }
+    modelo = {
+        'articulo': 'articulos.Articulo',
+        'canal_comercial': 'canal_comercial.CanalComercial',
+        'tipo_documento': 'documentos.Documento',
+    }[dimension]
+    return dict(apps.get_model(modelo).objects.filter(pk__in=ids).values_list('pk', 'nombre'))
+
+
+def _receptor_cliente_pre_save(sender, instance, raw=False, **kwargs):
+    instance._cubo_canal_anterior = None
+    if not raw and instance.pk:
+        instance._cubo_canal_anterior = type(instance).objects.filter(pk=instance.pk).values_list(
+            'canal_comercial', flat=True,
+        ).first()
+
+
+def _receptor_cliente_post_save(sender, instance, raw=False, created=False, **kwargs):
+    # El canal del cubo es el actual del cliente: si cambia se recalculan sus meses
+    from gerencia_le_stage.models import CuboVentas
+
+    if raw or created or getattr(instance, '_cubo_canal_anterior', None) == instance.canal_comercial_id:
+        return
+    meses = CuboVentas.objects.filter(cliente=instance.pk).values_list('mes', flat=True).distinct()
+    recalcular({(mes, instance.pk) for mes in meses})
+
+
+def conectar_senales():
+    """Mantiene el cubo al escribir ventas, devoluciones o clientes (desde GerenciaLeStageConfig.ready)"""
+    from configuracion.clientes.models import Cliente
+
+    CUBO.conectar_senales()
+    pre_save.connect(_receptor_cliente_pre_save, sender=Cliente, dispatch_uid='cubo_ventas_cliente_pre_save')
+    post_save.connect(_receptor_cliente_post_save, sender=Cliente, dispatch_uid='cubo_ventas_cliente_post_save')
@@ -0,0 +1,223 @@
+"""
+Mantenimiento de los cubos de gerencia (tablas resumen por mes).
+
+Un cubo agrega las líneas de un documento y de su devolución (con signo
+negativo) por mes y por las claves de la definición. Se mantiene por tramos
+(mes, tercero): al registrar, modificar o eliminar un documento se borran las
+filas del tramo y se vuelven a agregar desde las líneas de ese cliente o
+proveedor en ese mes. Si el documento cambió de mes o de tercero se recalculan
+los dos tramos. La reconstrucción completa procesa un mes por transacción.
+
+Antes de borrar un tramo se bloquean las filas de sus terceros (clientes o
+proveedores, SELECT ... FOR UPDATE en orden de clave): dos documentos del mismo
+tercero y mes que se registran a la vez recalculan el tramo uno después del
+otro, en lugar de borrar cada uno las filas que ve e insertar los dos. La clave
+única del cubo impide filas repetidas si igual se cruzan.
+"""
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from configuracion.documentos.senales import documento_registrado, registrando_lineas
+from gerencia_le_stage.pivot import primer_dia, siguiente_mes
+
+
+MEDIDAS = ('cantidad', 'sub_total', 'iva', 'total')
+
+# Tramos por consulta al recalcular muchos a la vez
+TRAMOS_POR_CONSULTA = 100
+
+
+def _modelo(nombre, registro=None):
+    # registro: apps históricas cuando se llama desde una migración
+    if registro is None:
+        from django.apps import apps as registro
+    return registro.get_model(nombre)
+
+
+def _filtro_mes(mes):
+    return Q(transaccion__fecha_documento__gte=mes, transaccion__fecha_documento__lt=siguiente_mes(mes))
+
+
+class Cubo:
+    """
+    Definición de un cubo.
+
+    Args:
+        modelo: Modelo del cubo 'app_label.Modelo'
+        fuentes: ((modelo de líneas 'app_label.Modelo', signo), ...)
+        clave: {campo del cubo: campo de las líneas}; debe incluir 'mes'
+        tercero: Campo del cabezal que define el tramo (id_cliente / id_proveedor)
+        nombre: Prefijo de los dispatch_uid de las señales
+    """
+
+    def __init__(self, modelo, fuentes, clave, tercero, nombre):
+        self.modelo = modelo
+        self.fuentes = fuentes
+        self.clave = clave
+        self.tercero = tercero
+        self.nombre = nombre
+        # Campo del cubo que corresponde al tercero del cabezal (cliente / proveedor)
+        self.campo_tercero = next(
+            campo[:-3] for campo, origen in clave.items() if origen == f'transaccion__{tercero}'
+        )
+
+    def agregar(self, filtro, registro=None):
+        """
+        Agrega las líneas de las fuentes que cumplen el filtro.
+
+        Returns:
+            dict: {clave del cubo (tupla en el orden de clave): {medida: importe}}
+        """
+        celdas = {}
+        for nombre, signo in self.fuentes:
+            filas = _modelo(nombre, registro).objects.filter(filtro).annotate(
+                mes=TruncMonth('transaccion__fecha_documento'),
+            ).order_by().values(*self.clave.values()).annotate(
+                **{f'suma_{medida}': Sum(medida) for medida in MEDIDAS}
+            )
+            for fila in filas:
+                clave = tuple(fila[campo] for campo in self.clave.values())
+                celda = celdas.setdefault(clave, dict.fromkeys(MEDIDAS, Decimal('0')))
+                for medida in MEDIDAS:
+                    celda[medida] += signo * Decimal(fila[f'suma_{medida}'] or 0)
+        return celdas
+
+    def _filas(self, celdas, registro=None):
+        modelo = _modelo(self.modelo, registro)
+        return [
+            modelo(**dict(zip(self.clave, clave)), **{medida: importe.quantize(Decimal('0.01')) for medida, importe in medidas.items()})
+            for clave, medidas in celdas.items()
+        ]
+
+    def recalcular(self, tramos):
+        """
+        Vuelve a agregar los tramos {(mes, tercero_id)} desde las líneas.
+
+        Returns:
+            int: Filas del cubo escritas
+        """
+        modelo = _modelo(self.modelo)
+        # Por tercero y mes: los lotes bloquean los terceros siempre en orden creciente
+        tramos = sorted(
+            {(primer_dia(mes), tercero) for mes, tercero in tramos if mes and tercero},
+            key=lambda tramo: (tramo[1], tramo[0]),
+        )
+        escritas = 0
+        for inicio in range(0, len(tramos), TRAMOS_POR_CONSULTA):
+            lote = tramos[inicio:inicio + TRAMOS_POR_CONSULTA]
+            with transaction.atomic():
+                self._bloquear_terceros({tercero for _, tercero in lote})
+                modelo.objects.filter(reduce(or_, (
+                    Q(mes=mes, **{self.campo_tercero: tercero}) for mes, tercero in lote
+                ))).delete()
+                filas = self._filas(self.agregar(reduce(or_, (
+                    _filtro_mes(mes) & Q(**{f'transaccion__{self.tercero}': tercero}) for mes, tercero in lote
+                ))))
+                modelo.objects.bulk_create(filas)
+            escritas += len(filas)
+        return escritas
+
+    def _bloquear_terceros(self, ids):
+        """Bloquea los clientes o proveedores hasta el fin de la transacción (en orden de clave)"""
+        cabezal = _modelo(self.fuentes[0][0]).transaccion.field.related_model
+        terceros = cabezal._meta.get_field(self.tercero).related_model
+        list(terceros.objects.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk', flat=True))
+
+    def meses_con_documentos(self, desde=None, registro=None):
+        """Meses (primer día) con documentos de alguna fuente, en orden"""
+        meses = set()
+        for nombre, _ in self.fuentes:
+            cabezales = _modelo(nombre, registro).transaccion.field.related_model.objects.all()
+            if desde:
+                cabezales = cabezales.filter(fecha_documento__gte=desde)
+            meses.update(cabezales.dates('fecha_documento', 'month'))
+        return sorted(meses)
+
+    def reconstruir_mes(self, mes, lote=2000, registro=None):
+        """Regenera las filas de un mes completo (una transacción por mes)"""
+        modelo = _modelo(self.modelo, registro)
+        with transaction.atomic():
+            modelo.objects.filter(mes=mes).delete()
+            filas = self._filas(self.agregar(_filtro_mes(mes), registro), registro)
+            modelo.objects.bulk_create(filas, batch_size=lote)
+        return len(filas)
+
+    def reconstruir(self, desde=None, lote=2000):
+        """
+        Regenera el cubo mes por mes (desde el mes indicado o completo).
+
+        Returns:
+            list: [(mes, filas escritas)]
+        """
+        meses = self.meses_con_documentos(desde)
+        # Meses que quedaron sin documentos (se eliminaron todos)
+        sobrantes = _modelo(self.modelo).objects.exclude(mes__in=meses)
+        if desde:
+            sobrantes = sobrantes.filter(mes__gte=desde)
+        sobrantes.delete()
+        return [(mes, self.reconstruir_mes(mes, lote)) for mes in meses]
+
+    # Señales
+
+    def _tramo(self, cabezal):
+        return (cabezal.fecha_documento, getattr(cabezal, f'{self.tercero}_id'))
+
+    def _datos(self, cabezal):
+        return (
+            cabezal.fecha_documento, getattr(cabezal, f'{self.tercero}_id'),
+            cabezal.moneda_id, cabezal.tipo_documento_id,
+        )
+
+    def _receptor_registrado(self, sender, cabezal, **kwargs):
+        # registrar_lineas o el save() de una línea suelta; incluye el tramo anterior
+        # si el cabezal cambió al guardarse con guardar_cabezal
+        tramos = {self._tramo(cabezal)}
+        anterior = cabezal.__dict__.pop('_cubo_tramo_anterior', None)
+        if anterior:
+            tramos.add(anterior)
+        self.recalcular(tramos)
+
+    def _receptor_linea_eliminada(self, sender, instance, origin=None, **kwargs):
+        # Al eliminar el cabezal las líneas se borran en cascada: se recalcula una vez en el cabezal
+        if origin is instance:
+            self.recalcular({self._tramo(instance.transaccion)})
+
+    def _receptor_cabezal_pre_save(self, sender, instance, raw=False, **kwargs):
+        instance._cubo_anterior = None
+        if not raw and instance.pk:
+            instance._cubo_anterior = type(instance).objects.filter(pk=instance.pk).values_list(
+                'fecha_documento', self.tercero, 'moneda', 'tipo_documento',
+            ).first()
+
+    def _receptor_cabezal_post_save(self, sender, instance, raw=False, created=False, **kwargs):
+        anterior = getattr(instance, '_cubo_anterior', None)
+        if raw or created or anterior is None:
+            return
+        if anterior == self._datos(instance):
+            return
+        if registrando_lineas(instance):
+            # Se recalcula una vez, al registrar las líneas
+            instance._cubo_tramo_anterior = anterior[:2]
+        else:
+            self.recalcular({self._tramo(instance), anterior[:2]})
+
+    def _receptor_cabezal_eliminado(self, sender, instance, **kwargs):
+        self.recalcular({self._tramo(instance)})
+
+    def conectar_senales(self):
+        """Conecta las señales de los documentos de las fuentes"""
+        for nombre, _ in self.fuentes:
+            lineas = _modelo(nombre)
+            cabezal = lineas.transaccion.field.related_model
+            uid = f'{self.nombre}_{lineas.__name__}'
+            documento_registrado.connect(self._receptor_registrado, sender=lineas, weak=False, dispatch_uid=f'{uid}_registrado')
+            post_delete.connect(self._receptor_linea_eliminada, sender=lineas, weak=False, dispatch_uid=f'{uid}_linea_delete')
+            pre_save.connect(self._receptor_cabezal_pre_save, sender=cabezal, weak=False, dispatch_uid=f'{uid}_pre_save')
+            post_save.connect(self._receptor_cabezal_post_save, sender=cabezal, weak=False, dispatch_uid=f'{uid}_post_save')
+            post_delete.connect(self._receptor_cabezal_eliminado, sender=cabezal, weak=False, dispatch_uid=f'{uid}_delete')
@@ -0,0 +1,275 @@
+"""
+Declaración mensual de IVA.
+
+Suma la base imponible (sub_total) y el IVA de las líneas por tasa
+(IVA.codigo del artículo) para las cuatro familias de documentos: ventas y
+devoluciones de venta (débito fiscal), compras y devoluciones de compra
+(crédito fiscal). Los documentos que no discriminan IVA
+(precios.DOCUMENTOS_SIN_IVA: movimientos internos, exportaciones e
+importaciones) no integran la declaración.
+
+Cada familia se resuelve con una sola consulta agrupada por fecha, moneda y
+tasa para todo el período pedido; los importes se pasan a moneda base con
+cotizaciones a la fecha del documento y se acumulan por mes.
+
+Los meses cerrados (anteriores al mes actual) se cachean por mes, con la versión
+general y la del mes (configuracion.tablas.versiones, en la base) en la clave.
+Registrar, modificar o eliminar un documento incrementa solo la versión del mes
+de su fecha (y la del de la fecha anterior si cambió); cambiar artículos, tasas
+o tipos de cambio incrementa la versión general y descarta todos los meses.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from configuracion.articulos import cotizaciones
+from configuracion.documentos import precios
+from configuracion.documentos.senales import documento_registrado
+from configuracion.tablas import versiones
+from gerencia_le_stage.pivot import meses_entre, primer_dia, siguiente_mes
+
+
+TIMEOUT = 60 * 60 * 24 * 31
+
+CLAVE_VERSION = 'declaracion_iva'
+
+CERO = Decimal('0')
+
+CENTESIMOS = Decimal('0.01')
+
+# familia -> (modelo de líneas 'app_label.Modelo', título)
+FAMILIAS = {
+    precios.VENTA: ('ventas_ingreso.VentasLineas', 'Ventas'),
+    precios.DEVOLUCION_VENTA: ('ventas_devoluciones.VentasDevolucionesLineas', 'Devoluciones de Ventas'),
+    precios.COMPRA: ('compras_ingreso.ComprasLineas', 'Compras'),
+    precios.DEVOLUCION_COMPRA: ('compras_devoluciones.ComprasDevolucionesLineas', 'Devoluciones de Compras'),
+}
+
+SIN_TASA = 'sin_iva'
+
+
+def _lineas(familia):
+    from django.apps import apps
+    return apps.get_model(FAMILIAS[familia][0])
+
+
+def mes_cerrado(mes):
+    """Un mes está cerrado cuando ya empezó el siguiente"""
+    from django.utils import timezone
+
+    return siguiente_mes(mes) <= timezone.localdate()
+
+
+def _fila(mes, codigo, tasas):
+    nombre, valor = tasas.get(codigo, ('Artículos sin IVA asignado', None))
+    fila = {'mes': mes, 'iva_codigo': codigo, 'iva_nombre': nombre, 'tasa': valor}
+    for familia in FAMILIAS:
+        fila[f'{familia}_base'] = CERO
+        fila[f'{familia}_iva'] = CERO
+    return fila
+
+
+def _cerrar_fila(fila):
+    for familia in FAMILIAS:
+        fila[f'{familia}_base'] = fila[f'{familia}_base'].quantize(CENTESIMOS)
+        fila[f'{familia}_iva'] = fila[f'{familia}_iva'].quantize(CENTESIMOS)
+    fila['debito'] = fila[f'{precios.VENTA}_iva'] - fila[f'{precios.DEVOLUCION_VENTA}_iva']
+    fila['credito'] = fila[f'{precios.COMPRA}_iva'] - fila[f'{precios.DEVOLUCION_COMPRA}_iva']
+    fila['saldo'] = fila['debito'] - fila['credito']
+    return fila
+
+
+def calcular(desde, hasta):
+    """
+    Declaración de los meses entre desde y hasta (primeros días, inclusive), sin cache.
+
+    Returns:
+        dict: {mes: {'filas': [una por tasa de IVA], 'sin_cotizacion': [(moneda, fecha)]}}
+        Las filas tienen base e IVA por familia ('{familia}_base', '{familia}_iva'),
+        'debito', 'credito' y 'saldo' en moneda base. Los importes en monedas sin
+        cotización a la fecha quedan fuera y se informan en sin_cotizacion.
+    """
+    from configuracion.articulos.models import IVA
+
+    tasas = {codigo: (nombre, valor) for codigo, nombre, valor in IVA.objects.values_list('codigo', 'nombre', 'valor')}
+    monedas = cotizaciones.tabla()
+    meses = {mes: {'filas': {}, 'sin_cotizacion': set()} for mes in meses_entre(desde, hasta)}
+    if not meses:
+        return {}
+
+    for familia in FAMILIAS:
+        grupos = _lineas(familia).objects.filter(
+            transaccion__fecha_documento__gte=min(meses),
+            transaccion__fecha_documento__lt=siguiente_mes(max(meses)),
+        ).exclude(
+            transaccion__tipo_documento__in=precios.DOCUMENTOS_SIN_IVA[familia],
+        ).order_by().values(
+            'transaccion__fecha_documento', 'transaccion__moneda', 'id_articulo__iva',
+        ).annotate(base=Sum('sub_total'), iva=Sum('iva'))
+        for grupo in grupos:
+            fecha, moneda = grupo['transaccion__fecha_documento'], grupo['transaccion__moneda']
+            actual = meses[primer_dia(fecha)]
+            factor = cotizaciones.factor(moneda, cotizaciones.MONEDA_BASE, fecha, monedas)
+            if factor is None:
+                actual['sin_cotizacion'].add((moneda, fecha))
+                continue
+            codigo = grupo['id_articulo__iva'] or SIN_TASA
+            fila = actual['filas'].get(codigo)
+            if fila is None:
+                fila = actual['filas'][codigo] = _fila(primer_dia(fecha), codigo, tasas)
+            fila[f'{familia}_base'] += Decimal(grupo['base'] or 0) * factor
+            fila[f'{familia}_iva'] += Decimal(grupo['iva'] or 0) * factor
+
+    return {
+        mes: {
+            'filas': [_cerrar_fila(fila) for _, fila in sorted(datos['filas'].items())],
+            'sin_cotizacion': sorted(datos['sin_cotizacion']),
+        }
+        for mes, datos in meses.items()
+    }
+
+
+def _clave_version_mes(mes):
+    return f'{CLAVE_VERSION}:{mes:%Y-%m}'
+
+
+def _claves_cache(meses):
+    """{mes: clave de cache con la versión general y la del mes}, en una sola consulta"""
+    actuales = versiones.obtener_varias([CLAVE_VERSION] + [_clave_version_mes(mes) for mes in meses])
+    return {
+        mes: f'declaracion_iva:{mes:%Y-%m}:v{actuales[CLAVE_VERSION]}.{actuales[_clave_version_mes(mes)]}'
+        for mes in meses
+    }
+
+
+def obtener(desde, hasta):
+    """
+    Declaración de los meses entre desde y hasta, con los meses cerrados cacheados.
+
+    Los meses que no están en cache se calculan juntos (una consulta por familia).
+    """
+    meses = meses_entre(desde, hasta)
+    cerrados = [mes for mes in meses if mes_cerrado(mes)]
+    claves = _claves_cache(cerrados)
+    resultado = {}
+    en_cache = cache.get_many(list(claves.values()))
+    for mes in cerrados:
+        if claves[mes] in en_cache:
+            resultado[mes] = en_cache[claves[mes]]
+
+    faltantes = [mes for mes in meses if mes not in resultado]
+    if faltantes:
+        calculados = calcular(faltantes[0], faltantes[-1])
+        resultado.update({mes: calculados[mes] for mes in faltantes})
+        cache.set_many(
+            {claves[mes]: calculados[mes] for mes in faltantes if mes in claves},
+            timeout=TIMEOUT,
+        )
+    return [(mes, resultado[mes]) for mes in meses]
+
+
+def totales(meses):
+    """Suma de las filas de todos los meses: {campo: importe} para las columnas()"""
+    suma = {campo: CERO for campo, _ in columnas()}
+    for _, datos in meses:
+        for fila in datos['filas']:
+            for campo in suma:
+                suma[campo] += fila[campo]
+    return suma
+
+
+def tabla(meses):
+    """Meses con sus filas como listas de importes en el orden de columnas(), para la plantilla"""
+    campos = [campo for campo, _ in columnas()]
+    suma = totales(meses)
+    return {
+        'meses': [
+            {
+                'mes': mes,
+                'filas': [
+                    {'iva_nombre': fila['iva_nombre'], 'importes': [fila[campo] for campo in campos]}
+                    for fila in datos['filas']
+                ],
+                'sin_cotizacion': datos['sin_cotizacion'],
+            }
+            for mes, datos in meses
+        ],
+        'totales': [suma[campo] for campo in campos],
+    }
+
+
+def columnas():
+    """(campo, título) de las columnas de importes, en el orden del informe"""
+    resultado = []
+    for familia, (_, titulo) in FAMILIAS.items():
+        resultado.append((f'{familia}_base', f'{titulo} Base'))
+        resultado.append((f'{familia}_iva', f'{titulo} IVA'))
+    return resultado + [('debito', 'Débito Fiscal'), ('credito', 'Crédito Fiscal'), ('saldo', 'Saldo')]
+
+
+def filas_exportacion(meses):
+    """Encabezado y filas para exportacion.generar_csv / escribir_excel"""
+    importes = columnas()
+    encabezado = ['Mes', 'Código IVA', 'IVA', 'Tasa'] + [titulo for _, titulo in importes]
+    datos = (
+        [f"{fila['mes']:%m/%Y}", fila['iva_codigo'], fila['iva_nombre'], fila['tasa']]
+        + [fila[campo] for campo, _ in importes]
+        for _, datos_mes in meses
+        for fila in datos_mes['filas']
+    )
+    return encabezado, datos
+
+
+def invalidar(**kwargs):
+    """Descarta todos los meses cacheados"""
+    versiones.incrementar(CLAVE_VERSION)
+
+
+def invalidar_mes(*fechas):
+    """Descarta los meses cacheados de las fechas"""
+    for mes in {primer_dia(fecha) for fecha in fechas if fecha}:
+        versiones.incrementar(_clave_version_mes(mes))
+
+
+def _receptor_registrado(sender, cabezal, **kwargs):
+    invalidar_mes(cabezal.fecha_documento)
+
+
+def _receptor_linea(sender, instance, origin=None, **kwargs):
+    # Línea eliminada suelta; al eliminar el cabezal las líneas se borran en cascada
+    # y alcanza con el cabezal
+    if origin is None or origin is instance:
+        invalidar_mes(instance.transaccion.fecha_documento)
+
+
+def _receptor_cabezal_pre_save(sender, instance, raw=False, **kwargs):
+    instance._iva_fecha_anterior = None
+    if not raw and instance.pk:
+        instance._iva_fecha_anterior = type(instance).objects.filter(pk=instance.pk).values_list(
+            'fecha_documento', flat=True,
+        ).first()
+
+
+def _receptor_cabezal(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidar_mes(instance.fecha_documento, getattr(instance, '_iva_fecha_anterior', None))
+
+
+def conectar_senales():
+    """Descarta meses cacheados al escribir documentos, artículos o tasas (desde GerenciaLeStageConfig.ready)"""
+    from configuracion.articulos.models import IVA, Articulo, TipoCambio
+
+    for familia in FAMILIAS:
+        lineas = _lineas(familia)
+        cabezal = lineas.transaccion.field.related_model
+        uid = f'declaracion_iva_{familia}'
+        documento_registrado.connect(_receptor_registrado, sender=lineas, dispatch_uid=f'{uid}_registrado')
+        post_delete.connect(_receptor_linea, sender=lineas, dispatch_uid=f'{uid}_linea_delete')
+        pre_save.connect(_receptor_cabezal_pre_save, sender=cabezal, dispatch_uid=f'{uid}_pre_save')
+        post_save.connect(_receptor_cabezal, sender=cabezal, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(_receptor_cabezal, sender=cabezal, dispatch_uid=f'{uid}_delete')
+    for modelo in (Articulo, IVA, TipoCambio):
+        post_save.connect(invalidar, sender=modelo, dispatch_uid=f'declaracion_iva_save_{modelo.__name__}')
+        post_delete.connect(invalidar, sender=modelo, dispatch_uid=f'declaracion_iva_delete_{modelo.__name__}')
@@ -0,0 +1,38 @@
+"""
+Regenera el cubo de compras desde las líneas de compras y devoluciones de compra.
+
+Procesa un mes por vez (cada uno en su transacción), así nunca agrega ni
+carga en memoria más de un mes de documentos.
+
+Uso:
+    python manage.py reconstruir_cubo_compras
+    python manage.py reconstruir_cubo_compras --desde 2026-01
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gerencia_le_stage import cubo_compras
+
+
+class Command(BaseCommand):
+    help = 'Regenera el cubo de compras (mes x proveedor x artículo x tipo de documento x moneda)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', default='', help='Mes desde el que regenerar AAAA-MM (default: todo)')
+        parser.add_argument('--lote', type=int, default=2000, help='Filas por bulk_create (default: 2000)')
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = datetime.date.fromisoformat(f"{options['desde']}-01")
+            except ValueError:
+                raise CommandError(f"Mes inválido: {options['desde']} (use AAAA-MM)")
+
+        total = 0
+        meses = cubo_compras.reconstruir(desde, options['lote'])
+        for mes, filas in meses:
+            total += filas
+            self.stdout.write(f"{mes:%m/%Y}: {filas} filas")
+        self.stdout.write(self.style.SUCCESS(f"Cubo de compras regenerado: {len(meses)} meses, {total} filas"))
@@ -0,0 +1,38 @@
+"""
+Regenera el cubo de ventas desde las líneas de ventas y devoluciones.
+
+Procesa un mes por vez (cada uno en su transacción), así nunca agrega ni
+carga en memoria más de un mes de documentos.
+
+Uso:
+    python manage.py reconstruir_cubo_ventas
+    python manage.py reconstruir_cubo_ventas --desde 2026-01
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gerencia_le_stage import cubo_ventas
+
+
+class Command(BaseCommand):
+    help = 'Regenera el cubo de ventas (mes x cliente x artículo x canal x moneda x tipo de documento)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', default='', help='Mes desde el que regenerar AAAA-MM (default: todo)')
+        parser.add_argument('--lote', type=int, default=2000, help='Filas por bulk_create (default: 2000)')
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = datetime.date.fromisoformat(f"{options['desde']}-01")
+            except ValueError:
+                raise CommandError(f"Mes inválido: {options['desde']} (use AAAA-MM)")
+
+        total = 0
+        meses = cubo_ventas.reconstruir(desde, options['lote'])
+        for mes, filas in meses:
+            total += filas
+            self.stdout.write(f"{mes:%m/%Y}: {filas} filas")
+        self.stdout.write(self.style.SUCCESS(f"Cubo de ventas regenerado: {len(meses)} meses, {total} filas"))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def cargar_cubo(apps, schema_editor):
+    from gerencia_le_stage import cubo_ventas
+
+    for mes in cubo_ventas.meses_con_documentos(registro=apps):
+        cubo_ventas.reconstruir_mes(mes, registro=apps)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('canal_comercial', '0001_initial'),
+        ('articulos', '0004_costo_promedio'),
+        ('clientes', '0002_cuenta_corriente'),
+        ('documentos', '0001_initial'),
+        ('ventas_ingreso', '0005_costo_unitario'),
+        ('ventas_devoluciones', '0005_deposito'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuboVentas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes', verbose_name='Mes')),
+                ('cantidad', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Cantidad')),
+                ('sub_total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Sub Total')),
+                ('iva', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='IVA')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Total')),
+                ('fchhor', models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')),
+                ('articulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='articulos.articulo', verbose_name='Artículo')),
+                ('canal_comercial', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='canal_comercial.canalcomercial', verbose_name='Canal Comercial')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clientes.cliente', verbose_name='Cliente')),
+                ('moneda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='articulos.moneda', verbose_name='Moneda')),
+                ('tipo_documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='documentos.documento', verbose_name='Tipo de Documento')),
+            ],
+            options={
+                'verbose_name': 'Cubo de Ventas',
+                'verbose_name_plural': 'Cubo de Ventas',
+                'db_table': 'gerencia_cubo_ventas',
+                'ordering': ['-mes'],
+                'indexes': [models.Index(fields=['mes', 'cliente'], name='cubo_ventas_mes_cliente'), models.Index(fields=['moneda', 'mes'], name='cubo_ventas_moneda_mes')],
+            },
+        ),
+        migrations.RunPython(cargar_cubo, migrations.RunPython.noop),
+    ]
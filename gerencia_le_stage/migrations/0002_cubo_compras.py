@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def cargar_cubo(apps, schema_editor):
+    from gerencia_le_stage import cubo_compras
+
+    for mes in cubo_compras.meses_con_documentos(registro=apps):
+        cubo_compras.reconstruir_mes(mes, registro=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedores', '0001_initial'),
+        ('articulos', '0004_costo_promedio'),
+        ('documentos', '0001_initial'),
+        ('gerencia_le_stage', '0001_cubo_ventas'),
+        ('compras_ingreso', '0004_deposito'),
+        ('compras_devoluciones', '0002_deposito'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuboCompras',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes', verbose_name='Mes')),
+                ('cantidad', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Cantidad')),
+                ('sub_total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Sub Total')),
+                ('iva', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='IVA')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Total')),
+                ('fchhor', models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')),
+                ('articulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='articulos.articulo', verbose_name='Artículo')),
+                ('moneda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='articulos.moneda', verbose_name='Moneda')),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='proveedores.proveedor', verbose_name='Proveedor')),
+                ('tipo_documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='documentos.documento', verbose_name='Tipo de Documento')),
+            ],
+            options={
+                'verbose_name': 'Cubo de Compras',
+                'verbose_name_plural': 'Cubo de Compras',
+                'db_table': 'gerencia_cubo_compras',
+                'ordering': ['-mes'],
+                'indexes': [models.Index(fields=['mes', 'proveedor'], name='cubo_compras_mes_proveedor'), models.Index(fields=['moneda', 'mes'], name='cubo_compras_moneda_mes')],
+            },
+        ),
+        migrations.RunPython(cargar_cubo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:40
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def regenerar_meses_duplicados(apps, schema_editor):
+    # Meses con filas repetidas por registros concurrentes: se regeneran antes de agregar la clave única
+    from gerencia_le_stage import cubo_ventas
+
+    meses = apps.get_model('gerencia_le_stage', 'CuboVentas').objects.values(
+        'mes', 'cliente', 'articulo', 'moneda', 'tipo_documento',
+    ).annotate(filas=Count('id')).filter(filas__gt=1).values_list('mes', flat=True).distinct()
+    for mes in sorted(set(meses)):
+        cubo_ventas.reconstruir_mes(mes, registro=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerencia_le_stage', '0002_cubo_compras'),
+    ]
+
+    operations = [
+        migrations.RunPython(regenerar_meses_duplicados, migrations.RunPython.noop),
+    ]
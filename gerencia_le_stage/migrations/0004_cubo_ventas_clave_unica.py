@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerencia_le_stage', '0003_cubo_ventas_sin_duplicados'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='cuboventas',
+            constraint=models.UniqueConstraint(fields=('mes', 'cliente', 'articulo', 'moneda', 'tipo_documento'), name='cubo_ventas_clave_unica'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerencia_le_stage', '0005_cubo_compras_sin_duplicados'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='cubocompras',
+            constraint=models.UniqueConstraint(fields=('mes', 'proveedor', 'articulo', 'tipo_documento', 'moneda'), name='cubo_compras_clave_unica'),
+        ),
+    ]
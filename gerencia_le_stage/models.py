@@ -1,3 +1,126 @@
 from django.db import models
 
-# Create your models here.
+
+class CuboVentas(models.Model):
+    """
+    Ventas resumidas por mes, cliente, artículo, canal comercial, moneda y tipo de documento.
+
+    Las devoluciones suman con signo negativo bajo su propio tipo de documento,
+    así la suma de todos los tipos da la venta neta. La mantiene cubo_ventas.
+    """
+    mes = models.DateField(verbose_name='Mes', help_text='Primer día del mes')
+    cliente = models.ForeignKey(
+        'clientes.Cliente',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Cliente'
+    )
+    articulo = models.ForeignKey(
+        'articulos.Articulo',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Artículo'
+    )
+    canal_comercial = models.ForeignKey(
+        'canal_comercial.CanalComercial',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Canal Comercial'
+    )
+    moneda = models.ForeignKey(
+        'articulos.Moneda',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Moneda'
+    )
+    tipo_documento = models.ForeignKey(
+        'documentos.Documento',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Tipo de Documento'
+    )
+    cantidad = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Cantidad')
+    sub_total = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Sub Total')
+    iva = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='IVA')
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Total')
+    fchhor = models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        verbose_name = 'Cubo de Ventas'
+        verbose_name_plural = 'Cubo de Ventas'
+        ordering = ['-mes']
+        db_table = 'gerencia_cubo_ventas'
+        indexes = [
+            models.Index(fields=['mes', 'cliente'], name='cubo_ventas_mes_cliente'),
+            models.Index(fields=['moneda', 'mes'], name='cubo_ventas_moneda_mes'),
+        ]
+        constraints = [
+            # El canal comercial es el actual del cliente: no forma parte de la clave
+            models.UniqueConstraint(
+                fields=['mes', 'cliente', 'articulo', 'moneda', 'tipo_documento'],
+                name='cubo_ventas_clave_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.mes:%m/%Y} {self.cliente_id} {self.articulo_id} {self.moneda_id}: {self.total}"
+
+
+class CuboCompras(models.Model):
+    """
+    Compras resumidas por mes, proveedor, artículo, tipo de documento y moneda.
+
+    Las devoluciones de compra restan bajo su propio tipo de documento, así la
+    suma de todos los tipos da la compra neta. La mantiene cubo_compras.
+    """
+    mes = models.DateField(verbose_name='Mes', help_text='Primer día del mes')
+    proveedor = models.ForeignKey(
+        'proveedores.Proveedor',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Proveedor'
+    )
+    articulo = models.ForeignKey(
+        'articulos.Articulo',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Artículo'
+    )
+    tipo_documento = models.ForeignKey(
+        'documentos.Documento',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Tipo de Documento'
+    )
+    moneda = models.ForeignKey(
+        'articulos.Moneda',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Moneda'
+    )
+    cantidad = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Cantidad')
+    sub_total = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Sub Total')
+    iva = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='IVA')
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='Total')
+    fchhor = models.DateTimeField(auto_now=True, verbose_name='Fecha/Hora')
+
+    class Meta:
+        verbose_name = 'Cubo de Compras'
+        verbose_name_plural = 'Cubo de Compras'
+        ordering = ['-mes']
+        db_table = 'gerencia_cubo_compras'
+        indexes = [
+            models.Index(fields=['mes', 'proveedor'], name='cubo_compras_mes_proveedor'),
+            models.Index(fields=['moneda', 'mes'], name='cubo_compras_moneda_mes'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['mes', 'proveedor', 'articulo', 'tipo_documento', 'moneda'],
+                name='cubo_compras_clave_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.mes:%m/%Y} {self.proveedor_id} {self.articulo_id} {self.moneda_id}: {self.total}"
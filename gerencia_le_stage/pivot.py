@@ -0,0 +1,149 @@
+"""
+Tablas dinámicas (dimensión x mes) sobre los cubos de gerencia.
+
+Todas las sumas se resuelven sobre la tabla del cubo con GROUP BY; las
+descripciones de la dimensión (nombre del cliente, artículo, etc.) se buscan
+después con una sola consulta para las filas que se muestran.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import Sum
+
+
+CERO = Decimal('0')
+
+
+def primer_dia(fecha):
+    return fecha.replace(day=1)
+
+
+def siguiente_mes(mes):
+    return (mes + datetime.timedelta(days=32)).replace(day=1)
+
+
+def meses_entre(desde, hasta):
+    """Primeros días de mes entre desde y hasta (inclusive)"""
+    meses = []
+    mes = primer_dia(desde)
+    while mes <= hasta:
+        meses.append(mes)
+        mes = siguiente_mes(mes)
+    return meses
+
+
+def restar_meses(mes, cantidad):
+    """Primer día del mes que está cantidad meses antes"""
+    indice = mes.year * 12 + mes.month - 1 - cantidad
+    return datetime.date(indice // 12, indice % 12 + 1, 1)
+
+
+def mes_parametro(valor, por_defecto):
+    """Mes de un parámetro AAAA-MM (input type=month) o el valor por defecto"""
+    try:
+        return datetime.date.fromisoformat(f'{valor}-01')
+    except (TypeError, ValueError):
+        return por_defecto
+
+
+def pivotear(cubo, dimension, medida, desde, hasta, etiqueta, limite=50):
+    """
+    Tabla dinámica de la medida por dimensión (filas) y mes (columnas).
+
+    Args:
+        cubo: QuerySet del cubo ya filtrado (moneda, tipo de documento, etc.)
+        dimension: Campo del cubo para las filas (ej: 'cliente')
+        medida: Campo a sumar (ej: 'total')
+        etiqueta: Función {ids} -> {id: descripción}
+        limite: Filas a mostrar, las de mayor total
+
+    Returns:
+        dict: meses, filas [{'clave', 'nombre', 'valores', 'total'}],
+        totales_mes y total (los totales incluyen las filas fuera del límite)
+    """
+    meses = meses_entre(desde, hasta)
+    cubo = cubo.filter(mes__gte=meses[0], mes__lte=meses[-1]) if meses else cubo.none()
+
+    principales = list(
+        cubo.order_by().values(dimension).annotate(valor=Sum(medida)).order_by('-valor')[:limite]
+    )
+    claves = [fila[dimension] for fila in principales]
+    celdas = {
+        (fila[dimension], fila['mes']): fila['valor']
+        for fila in cubo.filter(**{f'{dimension}__in': [clave for clave in claves if clave is not None]})
+        .order_by().values(dimension, 'mes').annotate(valor=Sum(medida))
+    }
+    if None in claves:
+        celdas.update({
+            (None, fila['mes']): fila['valor']
+            for fila in cubo.filter(**{f'{dimension}__isnull': True}).order_by().values('mes').annotate(valor=Sum(medida))
+        })
+
+    nombres = etiqueta([clave for clave in claves if clave is not None])
+    filas = [
+        {
+            'clave': fila[dimension],
+            'nombre': nombres.get(fila[dimension], '-') if fila[dimension] is not None else 'Sin asignar',
+            'valores': [_redondear(celdas.get((fila[dimension], mes))) for mes in meses],
+            'total': _redondear(fila['valor']),
+        }
+        for fila in principales
+    ]
+    por_mes = dict(cubo.order_by().values_list('mes').annotate(valor=Sum(medida)))
+    return {
+        'meses': meses,
+        'filas': filas,
+        'totales_mes': [_redondear(por_mes.get(mes)) for mes in meses],
+        'total': _redondear(sum((valor or CERO for valor in por_mes.values()), CERO)),
+    }
+
+
+def top(cubo, dimension, medida, etiqueta, limite=10):
+    """Los limite valores de la dimensión con mayor suma de la medida: [{'clave', 'nombre', 'valor'}]"""
+    filas = list(
+        cubo.exclude(**{f'{dimension}__isnull': True}).order_by().values(dimension)
+        .annotate(valor=Sum(medida)).order_by('-valor')[:limite]
+    )
+    nombres = etiqueta([fila[dimension] for fila in filas])
+    return [
+        {'clave': fila[dimension], 'nombre': nombres.get(fila[dimension], '-'), 'valor': _redondear(fila['valor'])}
+        for fila in filas
+    ]
+
+
+def totales(cubo, medidas=('cantidad', 'sub_total', 'iva', 'total')):
+    """{medida: suma} del cubo filtrado, con un solo aggregate"""
+    sumas = cubo.aggregate(**{medida: Sum(medida) for medida in medidas})
+    return {medida: _redondear(valor) for medida, valor in sumas.items()}
+
+
+def periodo(request, meses=12):
+    """(desde, hasta) de los parámetros desde/hasta (AAAA-MM); por defecto los últimos meses"""
+    from django.utils import timezone
+
+    hasta = mes_parametro(request.GET.get('hasta'), timezone.localdate().replace(day=1))
+    desde = mes_parametro(request.GET.get('desde'), restar_meses(hasta, meses - 1))
+    return (desde, hasta) if desde <= hasta else (hasta, desde)
+
+
+def moneda_parametro(request):
+    """(moneda elegida, monedas activas); por defecto la moneda base"""
+    from configuracion.articulos.cotizaciones import MONEDA_BASE
+    from configuracion.articulos.models import Moneda
+
+    monedas = list(Moneda.objects.filter(activo='SI').values_list('codigo', flat=True))
+    moneda = request.GET.get('moneda', '')
+    return (moneda if moneda in monedas else MONEDA_BASE), monedas
+
+
+def _redondear(valor):
+    # SQLite devuelve algunas sumas de decimales con ruido de float
+    return Decimal(valor or 0).quantize(Decimal('0.01'))
+
+
+def filas_csv(tabla, titulo_dimension):
+    """Encabezado y filas de una tabla dinámica para exportacion.generar_csv"""
+    columnas = [titulo_dimension] + [f'{mes:%m/%Y}' for mes in tabla['meses']] + ['Total']
+    datos = [[fila['nombre']] + fila['valores'] + [fila['total']] for fila in tabla['filas']]
+    datos.append(['Total'] + tabla['totales_mes'] + [tabla['total']])
+    return columnas, datos
@@ -1,3 +1,148 @@
+import datetime
+from decimal import Decimal
+
+from django.db.models import Q
 from django.test import TestCase
 
-# Create your tests here.
+from compras.compras_ingreso.models import ComprasCabezal, ComprasLineas
+from configuracion.articulos.models import IVA, Articulo, Moneda, TipoArticulo
+from configuracion.clientes.models import Cliente
+from configuracion.documentos import precios
+from configuracion.documentos.models import Documento
+from configuracion.proveedores.models import Proveedor
+from configuracion.tablas.models import FormaPagoTipo
+from gerencia_le_stage import cubo_ventas, declaracion_iva
+from gerencia_le_stage.models import CuboVentas
+from ventas.ventas_devoluciones.models import VentasDevolucionesCabezal, VentasDevolucionesLineas
+from ventas.ventas_ingreso.models import VentasCabezal, VentasLineas
+
+
+MARZO = datetime.date(2025, 3, 1)
+
+ABRIL = datetime.date(2025, 4, 1)
+
+
+class DocumentosTestCase(TestCase):
+    """Datos comunes: un cliente, un proveedor y un artículo con IVA básico"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Moneda.objects.create(codigo='UYU', nombre='Peso uruguayo')
+        Moneda.objects.create(codigo='USD', nombre='Dólar')
+        for codigo in ('efactura', 'movcli', 'nc'):
+            Documento.objects.create(codigo=codigo, nombre=codigo)
+        iva = IVA.objects.create(codigo='iva_b', nombre='IVA Básico', valor=Decimal('0.22'))
+        servicio = TipoArticulo.objects.create(codigo='SER', nombre='Servicio')
+        cls.articulo = Articulo.objects.create(nombre='Servicio', tipo_articulo=servicio, iva=iva)
+        cls.cliente = Cliente.objects.create(codigo='C1', razon_social='Cliente')
+        cls.proveedor = Proveedor.objects.create(codigo='P1', razon='Proveedor')
+        cls.credito = FormaPagoTipo.objects.create(nombre='Crédito')
+
+    def vender(self, fecha, cantidad, tipo_documento='efactura', moneda='UYU'):
+        venta = VentasCabezal.objects.create(
+            id_cliente=self.cliente, tipo_documento_id=tipo_documento, numero_documento=str(fecha),
+            forma_pago='CREDITO', fecha_documento=fecha, moneda_id=moneda,
+        )
+        return VentasLineas.objects.create(
+            transaccion=venta, linea=1, id_articulo=self.articulo, cantidad=cantidad, precio_original=122,
+        )
+
+    def devolver(self, linea, fecha, cantidad):
+        devolucion = VentasDevolucionesCabezal.objects.create(
+            id_cliente=self.cliente, tipo_documento_id='nc', numero_documento=str(fecha),
+            forma_pago=self.credito, fecha_documento=fecha, moneda_id=linea.transaccion.moneda_id,
+        )
+        return VentasDevolucionesLineas.objects.create(
+            transaccion=devolucion, linea=1, id_articulo=self.articulo, id_venta_linea=linea,
+            numero_doc_afectado=linea.transaccion.numero_documento, cantidad=cantidad, precio=100,
+        )
+
+    def comprar(self, fecha, cantidad, moneda='UYU'):
+        compra = ComprasCabezal.objects.create(
+            id_proveedor=self.proveedor, tipo_documento_id='efactura', numero_documento=str(fecha),
+            forma_pago='CREDITO', fecha_documento=fecha, moneda_id=moneda,
+        )
+        return ComprasLineas.objects.create(
+            transaccion=compra, linea=1, id_articulo=self.articulo, cantidad=cantidad, precio_original=50,
+        )
+
+
+class CuboVentasTests(DocumentosTestCase):
+    """Agregación del cubo de ventas y su mantenimiento por tramos"""
+
+    def celdas_del_cubo(self):
+        return {
+            (fila.mes, fila.cliente_id, fila.articulo_id, fila.canal_comercial_id, fila.moneda_id, fila.tipo_documento_id): {
+                'cantidad': fila.cantidad, 'sub_total': fila.sub_total, 'iva': fila.iva, 'total': fila.total,
+            }
+            for fila in CuboVentas.objects.all()
+        }
+
+    def test_agregar_resta_las_devoluciones(self):
+        venta = self.vender(datetime.date(2025, 3, 10), 3)
+        self.vender(datetime.date(2025, 3, 20), 2)
+        self.devolver(venta, datetime.date(2025, 3, 25), 1)
+
+        celdas = cubo_ventas.agregar(Q())
+
+        self.assertEqual(celdas, {
+            (MARZO, self.cliente.pk, self.articulo.pk, None, 'UYU', 'efactura'): {
+                'cantidad': Decimal('5'), 'sub_total': Decimal('500'), 'iva': Decimal('110'), 'total': Decimal('610'),
+            },
+            (MARZO, self.cliente.pk, self.articulo.pk, None, 'UYU', 'nc'): {
+                'cantidad': Decimal('-1'), 'sub_total': Decimal('-100'), 'iva': Decimal('-22'), 'total': Decimal('-122'),
+            },
+        })
+
+    def test_cambio_de_mes_recalcula_los_dos_tramos(self):
+        venta = self.vender(datetime.date(2025, 3, 10), 3)
+        self.vender(datetime.date(2025, 4, 10), 1)
+
+        cabezal = venta.transaccion
+        cabezal.fecha_documento = datetime.date(2025, 4, 2)
+        cabezal.save()
+
+        self.assertEqual(set(CuboVentas.objects.values_list('mes', flat=True)), {ABRIL})
+        self.assertEqual(self.celdas_del_cubo(), {
+            clave: {medida: importe.quantize(Decimal('0.01')) for medida, importe in medidas.items()}
+            for clave, medidas in cubo_ventas.agregar(Q()).items()
+        })
+
+
+class DeclaracionIvaTests(DocumentosTestCase):
+    """Débito y crédito fiscal por tasa y por mes"""
+
+    def test_calcular(self):
+        self.vender(datetime.date(2025, 3, 10), 2)
+        self.comprar(datetime.date(2025, 3, 12), 4)
+        # No discrimina IVA: no integra la declaración
+        self.vender(datetime.date(2025, 3, 15), 10, tipo_documento='movcli')
+
+        filas = declaracion_iva.calcular(MARZO, MARZO)[MARZO]['filas']
+
+        self.assertEqual(len(filas), 1)
+        fila = filas[0]
+        self.assertEqual(fila['iva_codigo'], 'iva_b')
+        self.assertEqual(fila[f'{precios.VENTA}_base'], Decimal('200.00'))
+        self.assertEqual(fila['debito'], Decimal('44.00'))
+        self.assertEqual(fila[f'{precios.COMPRA}_base'], Decimal('200.00'))
+        self.assertEqual(fila['credito'], Decimal('44.00'))
+        self.assertEqual(fila['saldo'], Decimal('0.00'))
+
+    def test_devoluciones_y_meses(self):
+        venta = self.vender(datetime.date(2025, 3, 10), 2)
+        self.devolver(venta, datetime.date(2025, 4, 3), 1)
+
+        declaracion = declaracion_iva.calcular(MARZO, ABRIL)
+
+        self.assertEqual(list(declaracion), [MARZO, ABRIL])
+        self.assertEqual(declaracion[MARZO]['filas'][0]['saldo'], Decimal('44.00'))
+        self.assertEqual(declaracion[ABRIL]['filas'][0]['saldo'], Decimal('-22.00'))
+
+    def test_moneda_sin_cotizacion(self):
+        self.comprar(datetime.date(2025, 3, 12), 4, moneda='USD')
+
+        declaracion = declaracion_iva.calcular(MARZO, MARZO)[MARZO]
+
+        self.assertEqual(declaracion['filas'], [])
+        self.assertEqual(declaracion['sin_cotizacion'], [('USD', datetime.date(2025, 3, 12))])
@@ -7,5 +7,10 @@ urlpatterns = [
     # Control de Producción
     path('control-produccion/piezas-corte/', views.control_produccion_piezas_corte, name='control_produccion_piezas_corte'),
     path('control-produccion/piezas-corte/<int:id>/ver/', views.detalle_pieza_corte, name='detalle_pieza_corte'),
+
+    # Análisis Comercial
+    path('analisis/ventas/', views.cubo_ventas_pivot, name='cubo_ventas'),
+    path('analisis/compras/', views.gasto_proveedores, name='gasto_proveedores'),
+    path('analisis/iva/', views.declaracion_iva_mensual, name='declaracion_iva'),
 ]
 
@@ -1,18 +1,33 @@
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
 from django.db.models import Q
-from decimal import Decimal
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+import datetime
 from erp_demo.decorators import acceso_por_app
 from mineria_le_stage.models import PiezasCorteCantera
+from configuracion.articulos import cotizaciones
+from configuracion.tablas import exportacion
+from .models import CuboCompras, CuboVentas
+from . import costos_piezas, cubo_compras, cubo_ventas, declaracion_iva, pivot
 from erp_demo.config import EMPRESA_NOMBRE
 
 
+def _fecha_parametro(valor):
+    """Fecha de un parámetro AAAA-MM-DD (input type=date) o None si falta o no es válida"""
+    try:
+        return datetime.date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return None
+
+
 @acceso_por_app(['gerencia_le_stage'])
 def control_produccion_piezas_corte(request):
     """Vista de control de producción - Piezas de Corte con columnas calculadas"""
-    piezas = PiezasCorteCantera.objects.all().select_related(
-        'equipo_minero', 'equipo_corte'
-    ).order_by('-fecha_creacion')
+    # Los costos se calculan en la consulta: se puede ordenar por ellos y totalizar todo el filtro
+    piezas = costos_piezas.anotar_costos(
+        PiezasCorteCantera.objects.all().select_related('equipo_minero', 'equipo_corte')
+    )
     
     # Búsqueda
     busqueda = request.GET.get('busqueda', '')
@@ -20,47 +35,50 @@ def control_produccion_piezas_corte(request):
         piezas = piezas.filter(
             Q(nombre_piedra__icontains=busqueda) |
             Q(numero__icontains=busqueda) |
-            Q(equipo_minero__nombre__icontains=busqueda) |
-            Q(equipo_corte__nombre__icontains=busqueda)
+            Q(equipo_minero__nombre_equipo__icontains=busqueda) |
+            Q(equipo_corte__nombre_equipo__icontains=busqueda)
         )
     
+    # Rango de fechas de industria (las fechas inválidas se ignoran)
+    fecha_desde = _fecha_parametro(request.GET.get('fecha_desde'))
+    fecha_hasta = _fecha_parametro(request.GET.get('fecha_hasta'))
+    if fecha_desde:
+        piezas = piezas.filter(fecha_industria__gte=fecha_desde)
+    if fecha_hasta:
+        piezas = piezas.filter(fecha_industria__lte=fecha_hasta)
+    
+    orden = costos_piezas.orden_parametro(request.GET.get('orden'))
+    piezas = piezas.order_by(orden, '-id')
+    
     # Paginación
     paginator = Paginator(piezas, 20)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # Calcular columnas para cada pieza
-    piezas_con_calculos = []
-    for pieza in page_obj:
-        # Costo Tallado = kilos_despues_tallado * precio_por_kilo_tallado
-        costo_tallado = pieza.kilos_despues_tallado * pieza.precio_por_kilo_tallado
-        
-        # Extra Carlos (convertir de CharField a Decimal)
-        extra_carlos_decimal = Decimal('0')
-        if pieza.extra_carlos:
-            try:
-                extra_carlos_decimal = Decimal(str(pieza.extra_carlos).replace(',', '.'))
-            except (ValueError, TypeError):
-                extra_carlos_decimal = Decimal('0')
-        
-        # Costo Pulido = pulido_por_kilo * kilos_despues_tallado (sin extra_carlos)
-        costo_pulido = pieza.pulido_por_kilo * pieza.kilos_despues_tallado
-        
-        # Costos Industrialización = Costo Tallado + Costo Pulido + Extra Carlos
-        costos_industrializacion = costo_tallado + costo_pulido + extra_carlos_decimal
-        
-        piezas_con_calculos.append({
-            'pieza': pieza,
-            'costo_tallado': costo_tallado,
-            'costo_pulido': costo_pulido,
-            'extra_carlos_decimal': extra_carlos_decimal,
-            'costos_industrializacion': costos_industrializacion,
-        })
+    # Encabezados ordenables: clic en la columna actual invierte el orden
+    encabezados = [
+        {
+            'campo': campo,
+            'nombre': nombre,
+            'actual': orden.lstrip('-') == campo,
+            'descendente': orden == f'-{campo}',
+            'orden_siguiente': campo if orden == f'-{campo}' else f'-{campo}',
+        }
+        for campo, nombre in costos_piezas.ORDENES.items()
+    ]
+    parametros = request.GET.copy()
+    for clave in ('page', 'orden'):
+        parametros.pop(clave, None)
     
     context = {
-        'piezas_con_calculos': piezas_con_calculos,
         'piezas': page_obj,
+        'totales': costos_piezas.totales(piezas),
+        'encabezados': encabezados,
+        'orden': orden,
+        'parametros': parametros.urlencode(),
         'busqueda': busqueda,
+        'fecha_desde': fecha_desde.isoformat() if fecha_desde else '',
+        'fecha_hasta': fecha_hasta.isoformat() if fecha_hasta else '',
         'empresa_nombre': EMPRESA_NOMBRE,
         'titulo': 'Control de Producción - Piezas de Corte',
     }
@@ -71,33 +89,146 @@ def control_produccion_piezas_corte(request):
 def detalle_pieza_corte(request, id):
     """Vista de detalle completo de una pieza de corte (minería + industria)"""
     pieza = get_object_or_404(
-        PiezasCorteCantera.objects.select_related('equipo_minero', 'equipo_corte', 'tipo_proceso'),
+        costos_piezas.anotar_costos(
+            PiezasCorteCantera.objects.select_related('equipo_minero', 'equipo_corte', 'tipo_proceso')
+        ),
         id=id
     )
     
-    # Calcular costos
-    costo_tallado = pieza.kilos_despues_tallado * pieza.precio_por_kilo_tallado
-    
-    extra_carlos_decimal = Decimal('0')
-    if pieza.extra_carlos:
-        try:
-            extra_carlos_decimal = Decimal(str(pieza.extra_carlos).replace(',', '.'))
-        except (ValueError, TypeError):
-            extra_carlos_decimal = Decimal('0')
-    
-    # Costo Pulido sin extra_carlos
-    costo_pulido = pieza.pulido_por_kilo * pieza.kilos_despues_tallado
-    
-    # Costo Total = Costo Tallado + Costo Pulido + Extra Carlos
-    costo_total = costo_tallado + costo_pulido + extra_carlos_decimal
-    
     context = {
         'pieza': pieza,
-        'costo_tallado': costo_tallado,
-        'costo_pulido': costo_pulido,
-        'extra_carlos_decimal': extra_carlos_decimal,
-        'costo_total': costo_total,
+        'costo_tallado': pieza.costo_tallado,
+        'costo_pulido': pieza.costo_pulido,
+        'costo_total': pieza.costos_industrializacion,
         'empresa_nombre': EMPRESA_NOMBRE,
         'titulo': f'Detalle Pieza de Corte - {pieza.nombre_piedra or pieza.id}',
     }
     return render(request, 'gerencia_le_stage/control_produccion/detalle_pieza_corte.html', context)
+
+
+@acceso_por_app(['gerencia_le_stage'])
+def cubo_ventas_pivot(request):
+    """Tabla dinámica de ventas netas por dimensión y mes (lee solo el cubo de ventas)"""
+    desde, hasta = pivot.periodo(request)
+
+    dimension = request.GET.get('dimension', 'cliente')
+    if dimension not in cubo_ventas.DIMENSIONES:
+        dimension = 'cliente'
+    medida = request.GET.get('medida', 'total')
+    if medida not in cubo_ventas.TITULOS_MEDIDAS:
+        medida = 'total'
+
+    moneda, monedas = pivot.moneda_parametro(request)
+    cubo = CuboVentas.objects.filter(moneda=moneda)
+    tabla = pivot.pivotear(
+        cubo, dimension, medida, desde, hasta,
+        etiqueta=lambda ids: cubo_ventas.etiquetas(dimension, ids),
+    )
+
+    if request.GET.get('formato') == 'csv':
+        columnas, datos = pivot.filas_csv(tabla, cubo_ventas.DIMENSIONES[dimension])
+        response = StreamingHttpResponse(
+            exportacion.generar_csv(columnas, datos),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="cubo_ventas_{desde:%Y%m}_{hasta:%Y%m}_{moneda}.csv"'
+        return response
+
+    context = {
+        'tabla': tabla,
+        'desde': desde,
+        'hasta': hasta,
+        'dimension': dimension,
+        'medida': medida,
+        'moneda': moneda,
+        'monedas': monedas,
+        'dimensiones': cubo_ventas.DIMENSIONES.items(),
+        'medidas': cubo_ventas.TITULOS_MEDIDAS.items(),
+        'titulo_dimension': cubo_ventas.DIMENSIONES[dimension],
+        'empresa_nombre': EMPRESA_NOMBRE,
+        'titulo': 'Ventas Netas por Mes',
+    }
+    return render(request, 'gerencia_le_stage/analisis/cubo_ventas.html', context)
+
+
+@acceso_por_app(['gerencia_le_stage'])
+def gasto_proveedores(request):
+    """Gasto por proveedor y mes, con los principales proveedores y artículos (lee solo el cubo de compras)"""
+    desde, hasta = pivot.periodo(request)
+    moneda, monedas = pivot.moneda_parametro(request)
+
+    cubo = CuboCompras.objects.filter(moneda=moneda)
+    tabla = pivot.pivotear(
+        cubo, 'proveedor', 'sub_total', desde, hasta,
+        etiqueta=lambda ids: cubo_compras.etiquetas('proveedor', ids),
+    )
+
+    if request.GET.get('formato') == 'csv':
+        columnas, datos = pivot.filas_csv(tabla, 'Proveedor')
+        response = StreamingHttpResponse(
+            exportacion.generar_csv(columnas, datos),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="gasto_proveedores_{desde:%Y%m}_{hasta:%Y%m}_{moneda}.csv"'
+        return response
+
+    periodo = cubo.filter(mes__gte=desde, mes__lte=hasta)
+
+    context = {
+        'tabla': tabla,
+        'totales': pivot.totales(periodo),
+        'top_proveedores': pivot.top(
+            periodo, 'proveedor', 'sub_total', lambda ids: cubo_compras.etiquetas('proveedor', ids),
+        ),
+        'top_articulos': pivot.top(
+            periodo, 'articulo', 'sub_total', lambda ids: cubo_compras.etiquetas('articulo', ids),
+        ),
+        'desde': desde,
+        'hasta': hasta,
+        'moneda': moneda,
+        'monedas': monedas,
+        'empresa_nombre': EMPRESA_NOMBRE,
+        'titulo': 'Gasto por Proveedor',
+    }
+    return render(request, 'gerencia_le_stage/analisis/gasto_proveedores.html', context)
+
+
+@acceso_por_app(['gerencia_le_stage'])
+def declaracion_iva_mensual(request):
+    """Declaración de IVA por mes y tasa: débito de ventas, crédito de compras y saldo"""
+    anterior = pivot.restar_meses(timezone.localdate().replace(day=1), 1)
+    hasta = pivot.mes_parametro(request.GET.get('hasta'), anterior)
+    desde = pivot.mes_parametro(request.GET.get('desde'), hasta)
+    if desde > hasta:
+        desde, hasta = hasta, desde
+
+    meses = declaracion_iva.obtener(desde, hasta)
+
+    formato = request.GET.get('formato')
+    if formato in ('csv', 'xlsx'):
+        columnas, datos = declaracion_iva.filas_exportacion(meses)
+        nombre = f'declaracion_iva_{desde:%Y%m}_{hasta:%Y%m}'
+        if formato == 'csv':
+            response = StreamingHttpResponse(
+                exportacion.generar_csv(columnas, datos),
+                content_type='text/csv; charset=utf-8',
+            )
+            response['Content-Disposition'] = f'attachment; filename="{nombre}.csv"'
+            return response
+        return FileResponse(
+            exportacion.escribir_excel(columnas, datos),
+            as_attachment=True,
+            filename=f'{nombre}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    context = {
+        'tabla': declaracion_iva.tabla(meses),
+        'columnas': [titulo for _, titulo in declaracion_iva.columnas()],
+        'desde': desde,
+        'hasta': hasta,
+        'moneda_base': cotizaciones.MONEDA_BASE,
+        'empresa_nombre': EMPRESA_NOMBRE,
+        'titulo': 'Declaración de IVA',
+    }
+    return render(request, 'gerencia_le_stage/analisis/declaracion_iva.html', context)
@@ -42,7 +42,7 @@ class PiezasCorteCanteraFormIndustria(forms.ModelForm):
             'kilos_despues_tallado': forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01', 'min': '0'}),
             'precio_por_kilo_tallado': forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01', 'min': '0'}),
             'pulido_por_kilo': forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01', 'min': '0'}),
-            'extra_carlos': forms.TextInput(attrs={'class': 'form-control form-control-sm'}),
+            'extra_carlos': forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01'}),
         }
         labels = {
             'fecha_industria': 'Fecha Industria',
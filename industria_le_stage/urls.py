@@ -12,6 +12,7 @@ urlpatterns = [
     
     # Piezas Corte Cantera (Industria)
     path('piezas-corte-industria/', views.lista_piezas_corte_cantera_industria, name='lista_piezas_corte_cantera_industria'),
+    path('piezas-corte-industria/<int:id>/datos/', views.datos_industria_ajax, name='datos_industria_ajax'),
     path('piezas-corte-industria/<int:id>/guardar/', views.guardar_datos_industria_ajax, name='guardar_datos_industria_ajax'),
     path('piezas-corte-industria/<int:id>/ver/', views.detalle_pieza_corte_cantera_industria, name='detalle_pieza_corte_cantera_industria'),
 ]
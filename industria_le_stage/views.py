@@ -1,13 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from .models import TipoPulidoPiezas
 from .forms import TipoPulidoPiezasForm, PiezasCorteCanteraFormIndustria
 from mineria_le_stage.models import PiezasCorteCantera
+from configuracion.tablas import datos_referencia
 from erp_demo.config import EMPRESA_NOMBRE
 
+# Campos que carga industria (los del formulario inline)
+CAMPOS_INDUSTRIA = PiezasCorteCanteraFormIndustria._meta.fields
+
 # ==================== PROCESOS DE PULIDO PIEZAS DE CORTE ====================
 
 def lista_tipos_pulido_piezas(request):
@@ -93,44 +98,33 @@ def eliminar_tipo_pulido_piezas(request, id):
 
 def lista_piezas_corte_cantera_industria(request):
     """Lista de piezas corte cantera para industria - Solo muestra datos básicos"""
-    piezas = PiezasCorteCantera.objects.all().select_related('equipo_minero', 'equipo_corte', 'tipo_proceso').order_by('-fecha_creacion')
+    # Valores planos: el formulario de cada fila se arma en el navegador al desplegarla
+    piezas = PiezasCorteCantera.objects.order_by('-fecha_creacion').values(
+        'id', 'nombre_piedra', 'numero',
+        'equipo_minero__nombre_equipo', 'equipo_corte__nombre_equipo',
+        *CAMPOS_INDUSTRIA,
+    )
     
     busqueda = request.GET.get('busqueda', '')
     if busqueda:
         piezas = piezas.filter(
-            nombre_piedra__icontains=busqueda
-        ) | piezas.filter(
-            numero__icontains=busqueda
+            Q(nombre_piedra__icontains=busqueda) |
+            Q(numero__icontains=busqueda)
         )
     
     paginator = Paginator(piezas, 15)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # Preparar formularios para cada pieza (para desplegar inline)
-    piezas_con_formularios = []
     for pieza in page_obj:
-        form = PiezasCorteCanteraFormIndustria(instance=pieza)
         # Verificar si ya tiene datos de industria
-        tiene_datos_industria = any([
-            pieza.fecha_industria,
-            pieza.kilos_recepcion_industria > 0,
-            pieza.tipo_piedra,
-            pieza.tipo_proceso,
-            pieza.kilos_despues_tallado > 0,
-            pieza.precio_por_kilo_tallado > 0,
-            pieza.pulido_por_kilo > 0,
-            pieza.extra_carlos,
-        ])
-        piezas_con_formularios.append({
-            'pieza': pieza,
-            'form': form,
-            'tiene_datos_industria': tiene_datos_industria,
-        })
+        pieza['tiene_datos_industria'] = any(pieza[campo] for campo in CAMPOS_INDUSTRIA)
     
     context = {
-        'piezas_con_formularios': piezas_con_formularios,
         'piezas': page_obj,
+        'tipos_piedra': PiezasCorteCantera._meta.get_field('tipo_piedra').choices,
+        # Un único catálogo de tipos de pulido para todas las filas (cacheado en el navegador)
+        'datos_referencia': datos_referencia.urls_scripts('tipos_pulido_piezas'),
         'busqueda': busqueda,
         'empresa_nombre': EMPRESA_NOMBRE,
         'titulo': 'Piezas de Corte en Cantera',
@@ -138,6 +132,17 @@ def lista_piezas_corte_cantera_industria(request):
     return render(request, 'industria_le_stage/piezas_corte_cantera/lista_piezas_corte_cantera_industria.html', context)
 
 
+@require_http_methods(["GET"])
+def datos_industria_ajax(request, id):
+    """Datos de industria de una pieza para completar el formulario inline al desplegarlo"""
+    pieza = PiezasCorteCantera.objects.filter(id=id).values(*CAMPOS_INDUSTRIA).first()
+    if pieza is None:
+        return JsonResponse({'success': False, 'error': 'Pieza no encontrada.'}, status=404)
+    
+    datos = {campo: ('' if valor is None else str(valor)) for campo, valor in pieza.items()}
+    return JsonResponse({'success': True, 'datos': datos})
+
+
 @require_http_methods(["POST"])
 def guardar_datos_industria_ajax(request, id):
     """Guardar datos de industria vía AJAX"""
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:05
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+
+LOTE = 500
+
+MAXIMO = Decimal('1e13')
+
+
+def _parsear(texto):
+    """Importe del texto (coma o punto decimal, con o sin $); None si no es un número"""
+    texto = (texto or '').strip().replace('$', '').replace(' ', '').replace(',', '.')
+    if not texto:
+        return Decimal('0')
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        return None
+    if not valor.is_finite() or abs(valor) >= MAXIMO:
+        return None
+    return valor.quantize(Decimal('0.01'))
+
+
+def convertir_extra_carlos(apps, schema_editor):
+    """
+    Pasa el texto de extra_carlos al campo decimal, por lotes.
+
+    Si algún valor no es un número la migración falla con la lista de ids y
+    valores (y se revierte): hay que corregirlos en extra_carlos y volver a
+    migrar, así el texto original nunca se pierde al eliminar la columna.
+    """
+    PiezasCorteCantera = apps.get_model('mineria_le_stage', 'PiezasCorteCantera')
+
+    lote = []
+    invalidos = []
+    filas = PiezasCorteCantera.objects.exclude(extra_carlos_texto='').order_by('pk').values_list('pk', 'extra_carlos_texto')
+    for pk, texto in filas.iterator(chunk_size=LOTE):
+        valor = _parsear(texto)
+        if valor is None:
+            invalidos.append((pk, texto))
+            continue
+        if valor:
+            lote.append(PiezasCorteCantera(pk=pk, extra_carlos=valor))
+        if len(lote) >= LOTE:
+            PiezasCorteCantera.objects.bulk_update(lote, ['extra_carlos'])
+            lote = []
+    if lote:
+        PiezasCorteCantera.objects.bulk_update(lote, ['extra_carlos'])
+
+    if invalidos:
+        detalle = '\n'.join(f'  {pk}: {texto!r}' for pk, texto in invalidos)
+        raise ValueError(
+            f'Extra Carlos: {len(invalidos)} valor(es) no numérico(s) en PiezasCorteCantera. '
+            f'Corríjalos en extra_carlos antes de migrar (id: valor):\n{detalle}'
+        )
+
+
+def revertir_extra_carlos(apps, schema_editor):
+    """Vuelve a escribir el importe como texto (vacío si es 0)"""
+    PiezasCorteCantera = apps.get_model('mineria_le_stage', 'PiezasCorteCantera')
+
+    lote = []
+    for pk, valor in PiezasCorteCantera.objects.exclude(extra_carlos=0).order_by('pk').values_list(
+        'pk', 'extra_carlos',
+    ).iterator(chunk_size=LOTE):
+        lote.append(PiezasCorteCantera(pk=pk, extra_carlos_texto=str(valor)))
+        if len(lote) >= LOTE:
+            PiezasCorteCantera.objects.bulk_update(lote, ['extra_carlos_texto'])
+            lote = []
+    if lote:
+        PiezasCorteCantera.objects.bulk_update(lote, ['extra_carlos_texto'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mineria_le_stage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='piezascortecantera',
+            old_name='extra_carlos',
+            new_name='extra_carlos_texto',
+        ),
+        migrations.AddField(
+            model_name='piezascortecantera',
+            name='extra_carlos',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Extra Carlos'),
+        ),
+        migrations.RunPython(convertir_extra_carlos, revertir_extra_carlos),
+        migrations.RemoveField(
+            model_name='piezascortecantera',
+            name='extra_carlos_texto',
+        ),
+    ]
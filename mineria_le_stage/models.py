@@ -379,10 +379,11 @@ class PiezasCorteCantera(models.Model):
         verbose_name='Pulido por Kilo',
     )
     
-    extra_carlos = models.CharField(
-        max_length=200,
+    extra_carlos = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
         verbose_name='Extra Carlos',
-        blank=True,
     )
     
     # Auditoría
@@ -4,9 +4,11 @@ from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.forms import formset_factory
-from django.db.models import Sum
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.db import models
 from datetime import date
+from decimal import Decimal
 from .models import (
     Equipo, EquipoCorte, PiedrasCanteras, ProduccionEquipo, Costos,
     PiezasCorteCantera
@@ -319,17 +321,25 @@ def obtener_productos_familia(request):
 
 def lista_produccion_equipos(request):
     """Lista de producción agrupada por Equipo + Mes/Año"""
-    # Obtener todas las producciones agrupadas por equipo y mes
+    # Agrupación, totales, precio promedio y nombre del equipo en una sola consulta;
+    # el Paginator aplica LIMIT/OFFSET sobre la consulta agrupada
     producciones_agrupadas = ProduccionEquipo.objects.values(
         'id_equipo', 'mes_año'
     ).annotate(
-        total_puntos=Sum('puntos_calculados'),
-        total_valuacion=Sum('valuacion'),
-        total_kilos=Sum('kilos'),
+        nombre_equipo=F('id_equipo__nombre_equipo'),
+        total_puntos=Coalesce(Sum('puntos_calculados'), Value(Decimal('0')), output_field=DecimalField()),
+        total_valuacion=Coalesce(Sum('valuacion'), Value(Decimal('0')), output_field=DecimalField()),
+        total_kilos=Coalesce(Sum('kilos'), Value(Decimal('0')), output_field=DecimalField()),
+    ).annotate(
+        precio_promedio=Case(
+            When(total_kilos__gt=0, then=ExpressionWrapper(
+                F('total_valuacion') / F('total_kilos'), output_field=DecimalField()
+            )),
+            default=Value(Decimal('0')),
+            output_field=DecimalField(),
+        ),
     ).order_by('-mes_año', 'id_equipo')
     
-    # Calcular precio promedio para cada grupo
-    
     # Filtros opcionales
     equipo_id = request.GET.get('equipo_id')
     if equipo_id:
@@ -339,24 +349,7 @@ def lista_produccion_equipos(request):
     if mes_año:
         producciones_agrupadas = producciones_agrupadas.filter(mes_año=mes_año)
     
-    # Convertir a lista para poder paginar
-    producciones_list = []
-    for item in producciones_agrupadas:
-        equipo = Equipo.objects.get(id_equipo=item['id_equipo'])
-        total_valuacion = item['total_valuacion'] or 0
-        total_kilos = item['total_kilos'] or 0
-        precio_promedio = (total_valuacion / total_kilos) if total_kilos > 0 else 0
-        
-        producciones_list.append({
-            'equipo': equipo,
-            'mes_año': item['mes_año'],
-            'total_puntos': item['total_puntos'] or 0,
-            'total_valuacion': total_valuacion,
-            'total_kilos': total_kilos,
-            'precio_promedio': precio_promedio,
-        })
-    
-    paginator = Paginator(producciones_list, 15)
+    paginator = Paginator(producciones_agrupadas, 15)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -658,11 +651,12 @@ def lista_costos(request):
     """Lista de costos agrupada por Equipo + Mes/Año"""
     from datetime import datetime
     
-    # Obtener todas las costos agrupadas por equipo y fecha
+    # Agrupación, total y nombre del equipo en una sola consulta paginada en la base de datos
     costos_agrupados = Costos.objects.values(
         'id_equipo', 'fecha'
     ).annotate(
-        total_costo=Sum('costo_dolares'),
+        nombre_equipo=F('id_equipo__nombre_equipo'),
+        total_costo=Coalesce(Sum('costo_dolares'), Value(Decimal('0')), output_field=DecimalField()),
     ).order_by('-fecha', 'id_equipo')
     
     # Filtros opcionales
@@ -679,17 +673,7 @@ def lista_costos(request):
         except ValueError:
             messages.error(request, "Formato de fecha inválido. Use YYYY-MM.")
     
-    # Convertir a lista para poder paginar
-    costos_list = []
-    for item in costos_agrupados:
-        equipo = Equipo.objects.get(id_equipo=item['id_equipo'])
-        costos_list.append({
-            'equipo': equipo,
-            'fecha': item['fecha'],
-            'total_costo': item['total_costo'] or 0,
-        })
-    
-    paginator = Paginator(costos_list, 15)
+    paginator = Paginator(costos_agrupados, 15)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
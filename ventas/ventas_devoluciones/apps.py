@@ -6,3 +6,7 @@ class VentasDevolucionesConfig(AppConfig):
     name = 'ventas.ventas_devoluciones'
     verbose_name = 'Ventas Devoluciones'
 
+
+    def ready(self):
+        from configuracion.documentos import devoluciones
+        devoluciones.VENTAS.conectar_senales()
@@ -8,6 +8,8 @@ from configuracion.documentos.models import Documento
 from configuracion.articulos.models import Moneda, Articulo
 from configuracion.tablas.models import FormaPagoTipo
 from configuracion.disponibilidades.models import Disponibilidad
+from configuracion.disponibilidades import movimientos
+from configuracion.deposito.models import Deposito
 
 
 class VentasDevolucionesCabezalForm(forms.ModelForm):
@@ -46,6 +48,8 @@ class VentasDevolucionesCabezalForm(forms.ModelForm):
         
         # Disponibilidades activas (solo para contado)
         self.fields['disponibilidad'].queryset = Disponibilidad.objects.filter(activo='SI')
+        self.fields['deposito'].queryset = Deposito.objects.all()
+        self.fields['deposito'].required = False
         self.fields['disponibilidad'].required = False
         
         # En devoluciones de ventas, precio_iva_inc siempre es 'SI' (no editable)
@@ -93,13 +97,19 @@ class VentasDevolucionesCabezalForm(forms.ModelForm):
                 'disponibilidad': 'Debe seleccionar una disponibilidad para forma de pago contado.'
             })
         
+        # La disponibilidad se mueve en su moneda: el documento debe estar en la misma
+        if forma_pago and forma_pago.nombre == 'Contado':
+            error = movimientos.error_moneda(disponibilidad, cleaned_data.get('moneda'))
+            if error:
+                raise forms.ValidationError({'disponibilidad': error})
+        
         return cleaned_data
     
     class Meta:
         model = VentasDevolucionesCabezal
         fields = [ 'id_cliente', 'tipo_documento',
                     'serie_documento', 'numero_documento', 'forma_pago',
-                    'fecha_documento', 'moneda',
+                    'fecha_documento', 'moneda', 'deposito',
                      'precio_iva_inc', 'tipo_venta', 'disponibilidad',
                     'observaciones', 'sub_total', 'iva', 'importe_total']
         
@@ -111,6 +121,7 @@ class VentasDevolucionesCabezalForm(forms.ModelForm):
             'forma_pago': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_forma_pago'}),
             'fecha_documento': forms.DateInput(attrs={'class': 'form-control form-control-sm', 'type': 'date', 'id': 'id_fecha_documento'}),
             'moneda': forms.Select(attrs={'class': 'form-control form-control-sm'}),
+            'deposito': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_deposito'}),
             'precio_iva_inc': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_precio_iva_inc'}, choices=[('SI', 'Sí'), ('NO', 'No')]),
             'disponibilidad': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_disponibilidad', 'style': 'width: 100%; min-width: 350px;'}),
             'tipo_venta': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_tipo_venta'}),
@@ -1,21 +1,29 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-import json
 from .models import VentasDevolucionesCabezal, VentasDevolucionesLineas
 from .forms import (
     VentasDevolucionesCabezalForm, VentasDevolucionesLineasForm, VentasDevolucionesLineasFormSet
 )
 from configuracion.clientes.models import Cliente
+from configuracion.clientes import cuenta_corriente
 from configuracion.transacciones.models import Transaccion
 from configuracion.documentos.models import Documento
+from configuracion.documentos import devoluciones
+from configuracion.documentos.servicios import guardar_cabezal, registrar_lineas
 from configuracion.articulos.models import Articulo
+from configuracion.tablas import busqueda, datos_referencia
 from erp_demo.config import EMPRESA_NOMBRE
 
 
+# Documentos/líneas por página en las búsquedas de documento afectado
+POR_PAGINA_DOCUMENTOS = 50
+
+
 def lista_ventas_devoluciones(request):
     """Vista para listar todas las devoluciones de ventas con paginación"""
     ventas_devoluciones = VentasDevolucionesCabezal.objects.all().select_related(
@@ -89,24 +97,21 @@ def crear_venta_devolucion(request):
                 cabezal.monotributista = 'NO'
             cabezal.usuario = request.user.id if request.user.is_authenticated else None
             # La transacción y fecha_movimiento se generan automáticamente en el save()
-            cabezal.save()
+            guardar_cabezal(cabezal)
             
             # Guardar líneas - asegurar que tengan número de línea
             lineas = formset.save(commit=False)
-            lineas_guardadas = 0
-            for idx, linea in enumerate(lineas, start=1):
+            lineas_validas = []
+            for linea in lineas:
                 # Solo guardar si tiene artículo y cantidad válidos (ignorar líneas vacías)
-                if linea.id_articulo and linea.cantidad and linea.cantidad > 0:
-                    linea.transaccion = cabezal
-                    lineas_guardadas += 1
+                if linea.id_articulo_id and linea.cantidad and linea.cantidad > 0:
+                    lineas_validas.append(linea)
                     # Asignar número de línea si no tiene
                     if not linea.linea or linea.linea == 0:
-                        linea.linea = lineas_guardadas
-                    linea.save()
+                        linea.linea = len(lineas_validas)
             
-            # Eliminar líneas marcadas para eliminar
-            for obj in formset.deleted_objects:
-                obj.delete()
+            # Guardar en bloque, eliminar las marcadas y actualizar totales del cabezal
+            registrar_lineas(cabezal, lineas_validas, formset.deleted_objects)
             
             # Crear registro en tabla Transaccion
             try:
@@ -119,9 +124,6 @@ def crear_venta_devolucion(request):
                 )
             except Documento.DoesNotExist:
                 pass
-            
-            # Actualizar totales desde las líneas
-            cabezal.actualizar_totales()
         
             messages.success(request, f'Devolución de Venta {cabezal.transaccion} creada exitosamente.')
             return redirect('ventas_devoluciones:detalle_venta_devolucion', transaccion=cabezal.transaccion)
@@ -152,59 +154,13 @@ def crear_venta_devolucion(request):
         if len(formset.forms) > 1:
             formset.forms = formset.forms[:1]
     
-    # Obtener datos para JavaScript
-    clientes_data = []
-    for cliente in Cliente.objects.filter(activo='SI'):
-        clientes_data.append({
-            'id': cliente.id,
-            'codigo': cliente.codigo,
-            'razon_social': cliente.razon_social or '',
-            'nombre_comercial': cliente.nombre_comercial or '',
-        })
-    
-    
-    # Obtener artículos para el select - ordenar SER* primero (ACTIVO_COMERCIAL para ventas)
-    articulos_data = []
-    # Primero obtener artículos SER* (producto_id que empieza con SER)
-    articulos_ser = Articulo.objects.filter(
-        ACTIVO_COMERCIAL='SI',
-        producto_id__startswith='SER'
-    ).select_related('iva').order_by('producto_id')
-    
-    # Luego obtener el resto de artículos
-    articulos_otros = Articulo.objects.filter(
-        ACTIVO_COMERCIAL='SI'
-    ).exclude(
-        producto_id__startswith='SER'
-    ).select_related('iva').order_by('nombre')
-    
-    # Agregar primero los SER*
-    for articulo in articulos_ser:
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-            'es_ser': True,  # Flag para identificar artículos SER*
-        })
-    
-    # Luego agregar el resto
-    for articulo in articulos_otros:
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-            'es_ser': False,
-        })
-    
     context = {
         'form': form,
         'formset': formset,
         'titulo': 'Nueva Devolución de Venta',
         'empresa_nombre': EMPRESA_NOMBRE,
-        'clientes_data': json.dumps(clientes_data),
-        'articulos_data': json.dumps(articulos_data),
+        # Catálogos para JavaScript (se cargan desde /api/refdata/<tipo>, cacheados por versión)
+        'datos_referencia': datos_referencia.urls_scripts('clientes', 'articulos_comercial'),
     }
     return render(request, 'ventas_devoluciones/form_venta_devolucion.html', context)
 
@@ -239,25 +195,21 @@ def editar_venta_devolucion(request, transaccion):
                     cabezal.monotributista = 'NO'
             elif not cabezal.monotributista:
                 cabezal.monotributista = 'NO'
-            cabezal.save()
+            guardar_cabezal(cabezal)
             
             # Guardar líneas
             lineas = formset.save(commit=False)
-            lineas_guardadas = 0
-            for idx, linea in enumerate(lineas, start=1):
-                if linea.id_articulo and linea.cantidad and linea.cantidad > 0:
-                    linea.transaccion = cabezal
-                    lineas_guardadas += 1
+            lineas_validas = []
+            for linea in lineas:
+                # Solo guardar si tiene artículo y cantidad válidos (ignorar líneas vacías)
+                if linea.id_articulo_id and linea.cantidad and linea.cantidad > 0:
+                    lineas_validas.append(linea)
+                    # Asignar número de línea si no tiene
                     if not linea.linea or linea.linea == 0:
-                        linea.linea = lineas_guardadas
-                    linea.save()
-            
-            # Eliminar líneas marcadas para eliminar
-            for obj in formset.deleted_objects:
-                obj.delete()
+                        linea.linea = len(lineas_validas)
             
-            # Actualizar totales
-            cabezal.actualizar_totales()
+            # Guardar en bloque, eliminar las marcadas y actualizar totales del cabezal
+            registrar_lineas(cabezal, lineas_validas, formset.deleted_objects)
             
             messages.success(request, f'Devolución de venta {cabezal.transaccion} actualizada exitosamente.')
             return redirect('ventas_devoluciones:detalle_venta_devolucion', transaccion=cabezal.transaccion)
@@ -282,61 +234,14 @@ def editar_venta_devolucion(request, transaccion):
         form = VentasDevolucionesCabezalForm(instance=venta_devolucion)
         formset = VentasDevolucionesLineasFormSet(instance=venta_devolucion)
     
-    # Obtener datos para JavaScript
-    clientes_data = []
-    for cliente in Cliente.objects.filter(activo='SI'):
-        clientes_data.append({
-            'id': cliente.id,
-            'codigo': cliente.codigo,
-            'razon_social': cliente.razon_social or '',
-            'nombre_comercial': cliente.nombre_comercial or '',
-        })
-    
-
-    
-    # Obtener artículos para el select - ordenar SER* primero (ACTIVO_COMERCIAL para ventas)
-    articulos_data = []
-    # Primero obtener artículos SER* (producto_id que empieza con SER)
-    articulos_ser = Articulo.objects.filter(
-        ACTIVO_COMERCIAL='SI',
-        producto_id__startswith='SER'
-    ).select_related('iva').order_by('producto_id')
-    
-    # Luego obtener el resto de artículos
-    articulos_otros = Articulo.objects.filter(
-        ACTIVO_COMERCIAL='SI'
-    ).exclude(
-        producto_id__startswith='SER'
-    ).select_related('iva').order_by('nombre')
-    
-    # Agregar primero los SER*
-    for articulo in articulos_ser:
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-            'es_ser': True,  # Flag para identificar artículos SER*
-        })
-    
-    # Luego agregar el resto
-    for articulo in articulos_otros:
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-            'es_ser': False,
-        })
-    
     context = {
         'form': form,
         'formset': formset,
         'venta_devolucion': venta_devolucion,
         'titulo': f'Editar Devolución de Venta {venta_devolucion.transaccion}',
         'empresa_nombre': EMPRESA_NOMBRE,
-        'clientes_data': json.dumps(clientes_data),
-        'articulos_data': json.dumps(articulos_data),
+        # Catálogos para JavaScript (se cargan desde /api/refdata/<tipo>, cacheados por versión)
+        'datos_referencia': datos_referencia.urls_scripts('clientes', 'articulos_comercial'),
     }
     return render(request, 'ventas_devoluciones/form_venta_devolucion.html', context)
 
@@ -401,23 +306,13 @@ def buscar_clientes(request):
     try:
         query = request.GET.get('q', '').strip()
         
-        if not query:
-            clientes = Cliente.objects.filter(activo='SI').order_by('razon_social', 'nombre_comercial')[:50]
-        else:
-            clientes = Cliente.objects.filter(
-                activo='SI'
-            ).filter(
-                razon_social__icontains=query
-            ) | Cliente.objects.filter(
-                activo='SI'
-            ).filter(
-                nombre_comercial__icontains=query
-            ) | Cliente.objects.filter(
-                activo='SI'
-            ).filter(
-                codigo__icontains=query
-            )
-            clientes = clientes.distinct().order_by('razon_social', 'nombre_comercial')[:50]
+        # Búsqueda indexada (trigramas en PostgreSQL, FTS5 en SQLite), ordenada por relevancia
+        clientes = busqueda.buscar(
+            Cliente.objects.filter(activo='SI').order_by('razon_social', 'nombre_comercial'),
+            'clientes', query,
+        )
+        # Deuda en cuenta corriente de los clientes encontrados (una consulta a SaldoCliente)
+        saldos = cuenta_corriente.saldos_por_cliente(cliente.pk for cliente in clientes)
         
         resultados = []
         for cliente in clientes:
@@ -430,6 +325,10 @@ def buscar_clientes(request):
                 'razon_social': cliente.razon_social or '',
                 'nombre_comercial': cliente.nombre_comercial or '',
                 'text': nombre_display,  # Solo nombre, sin ID
+                'deuda': [
+                    {'moneda': saldo['moneda'], 'saldo': float(saldo['saldo'])}
+                    for saldo in saldos.get(cliente.pk, [])
+                ],
             })
         
         return JsonResponse({'results': resultados})
@@ -447,19 +346,11 @@ def buscar_articulos(request):
         query = request.GET.get('q', '').strip()
         
         # Buscar por nombre (modo por defecto) - ACTIVO_COMERCIAL para ventas
-        if not query:
-            articulos = Articulo.objects.filter(ACTIVO_COMERCIAL='SI').select_related('iva').order_by('nombre')[:50]
-        else:
-            articulos = Articulo.objects.filter(
-                ACTIVO_COMERCIAL='SI'
-            ).filter(
-                nombre__icontains=query
-            ) | Articulo.objects.filter(
-                ACTIVO_COMERCIAL='SI'
-            ).filter(
-                producto_id__icontains=query
-            )
-            articulos = articulos.distinct().select_related('iva').order_by('nombre')[:50]
+        # Búsqueda indexada (trigramas en PostgreSQL, FTS5 en SQLite), ordenada por relevancia
+        articulos = busqueda.buscar(
+            Articulo.objects.filter(ACTIVO_COMERCIAL='SI').select_related('iva').order_by('nombre'),
+            'articulos', query,
+        )
         
         resultados = []
         for articulo in articulos:
@@ -490,7 +381,11 @@ def obtener_ventas_cliente(request):
     - devmovcli → solo trae movcli
     - ncreexpo → solo trae factexpo
     
-    Si se pasa articulo_id, solo muestra las ventas que contienen ese artículo.
+    Solo trae ventas con alguna línea que todavía tenga cantidad para devolver,
+    las más nuevas primero. Si se pasa articulo_id, solo muestra las ventas con
+    saldo de ese artículo.
+    Paginado por cursor: la respuesta trae pagination.cursor para pedir la página
+    siguiente con ?cursor=... (None si no hay más).
     """
     try:
         cliente_id = request.GET.get('cliente_id', '').strip()
@@ -513,34 +408,25 @@ def obtener_ventas_cliente(request):
         # Obtener el tipo de documento de venta según el tipo de devolución
         tipo_documento_venta = mapeo_tipos.get(tipo_documento_devolucion)
         
-        # Filtrar ventas del cliente
+        # Filtrar ventas del cliente (índice cliente + tipo_documento + fecha_documento)
         ventas = VentasCabezal.objects.filter(
             id_cliente_id=cliente_id
-        ).select_related('tipo_documento', 'id_cliente')
+        ).select_related('tipo_documento')
         
         # Si se especificó tipo_documento_devolucion, filtrar por el tipo de venta correspondiente
         if tipo_documento_venta:
             ventas = ventas.filter(tipo_documento__codigo=tipo_documento_venta)
         
-        # Si se especificó articulo_id, filtrar solo las ventas que tienen ese artículo
+        # Solo ventas con líneas pendientes de devolver (del artículo, si se especificó)
+        lineas_pendientes = devoluciones.VENTAS.lineas_con_saldo(
+            VentasLineas.objects.filter(transaccion=OuterRef('pk'))
+        )
         if articulo_id:
-            # Obtener las transacciones de ventas que tienen este artículo
-            ventas_con_articulo = VentasLineas.objects.filter(
-                id_articulo_id=articulo_id
-            ).values_list('transaccion', flat=True).distinct()
-            
-            # Filtrar por cliente y tipo de documento si aplica
-            ventas_filtradas = VentasCabezal.objects.filter(
-                transaccion__in=ventas_con_articulo,
-                id_cliente_id=cliente_id
-            )
-            
-            if tipo_documento_venta:
-                ventas_filtradas = ventas_filtradas.filter(tipo_documento__codigo=tipo_documento_venta)
-            
-            ventas = ventas_filtradas.select_related('tipo_documento', 'id_cliente')
+            lineas_pendientes = lineas_pendientes.filter(id_articulo_id=articulo_id)
+        ventas = ventas.filter(Exists(lineas_pendientes))
         
-        ventas = ventas.order_by('-fecha_documento', '-transaccion')
+        # Continuar después de la última venta de la página anterior
+        ventas, siguiente = devoluciones.pagina_documentos(ventas, request.GET.get('cursor'), POR_PAGINA_DOCUMENTOS)
         
         resultados = []
         for venta in ventas:
@@ -552,7 +438,10 @@ def obtener_ventas_cliente(request):
                 'text': f"{venta.serie_documento or ''} {venta.numero_documento} ({venta.tipo_documento.codigo if venta.tipo_documento else ''})",
             })
         
-        return JsonResponse({'results': resultados})
+        return JsonResponse({
+            'results': resultados,
+            'pagination': {'cursor': siguiente, 'more': siguiente is not None},
+        })
     except Exception as e:
         import traceback
         print(f"Error en obtener_ventas_cliente: {e}")
@@ -564,7 +453,9 @@ def obtener_ventas_cliente(request):
 def obtener_lineas_venta(request):
     """
     API AJAX para obtener líneas de una venta específica.
+    Solo trae las líneas con cantidad pendiente de devolver (cantidad_disponible > 0).
     Si se pasa articulo_id, solo muestra las líneas de ese artículo.
+    Paginado por cursor (?cursor=..., pagination.cursor en la respuesta).
     """
     try:
         transaccion = request.GET.get('transaccion', '').strip()
@@ -582,16 +473,16 @@ def obtener_lineas_venta(request):
         except VentasCabezal.DoesNotExist:
             return JsonResponse({'results': [], 'error': 'Venta no encontrada'}, status=404)
         
-        # Obtener líneas de la venta
-        lineas = VentasLineas.objects.filter(
-            transaccion=venta
+        # Obtener líneas de la venta con saldo para devolver
+        lineas = devoluciones.VENTAS.lineas_con_saldo(
+            VentasLineas.objects.filter(transaccion=venta)
         ).select_related('id_articulo', 'id_articulo__iva')
         
         # Si se especificó articulo_id, filtrar solo las líneas de ese artículo
         if articulo_id:
             lineas = lineas.filter(id_articulo_id=articulo_id)
         
-        lineas = lineas.order_by('linea')
+        lineas, siguiente = devoluciones.pagina_lineas(lineas, request.GET.get('cursor'), POR_PAGINA_DOCUMENTOS)
         
         resultados = []
         for linea in lineas:
@@ -602,6 +493,8 @@ def obtener_lineas_venta(request):
                     'articulo_producto_id': linea.id_articulo.producto_id or '',
                     'articulo_nombre': linea.id_articulo.nombre or '',
                     'cantidad': float(linea.cantidad) if linea.cantidad else 0,
+                    'cantidad_devuelta': float(linea.cantidad_devuelta),
+                    'cantidad_disponible': float(linea.cantidad - linea.cantidad_devuelta),
                     'precio_original': float(linea.precio_original) if linea.precio_original else 0,
                     'precio_neto': float(linea.precio_neto) if linea.precio_neto else 0,
                     'id_venta_linea': linea.id,
@@ -610,6 +503,7 @@ def obtener_lineas_venta(request):
         
         return JsonResponse({
             'results': resultados,
+            'pagination': {'cursor': siguiente, 'more': siguiente is not None},
             'venta_info': {
                 'transaccion': venta.transaccion,
                 'serie_documento': venta.serie_documento or '',
@@ -0,0 +1,160 @@
+"""
+Antigüedad de deudores (ventas a crédito por fecha de vencimiento).
+
+El saldo pendiente de cada factura a crédito es su importe_total menos las
+devoluciones a crédito en su misma moneda que la afectan (por id_venta_linea). Las facturas con
+saldo se agrupan por cliente, canal comercial y moneda en una sola consulta
+(GROUP BY con SUM(CASE ...) por tramo), que usa el índice
+(forma_pago, fecha_vencimiento) de VentasCabezal. Las demás devoluciones a
+crédito (sin factura asociada, o asociadas a una factura contado o en otra
+moneda) quedan como crédito a favor del cliente en su moneda y se descuentan
+del neto, así el neto por cliente y moneda coincide con SaldoCliente.
+
+El resultado se cachea por fecha de corte; cualquier alta, modificación o baja
+de ventas o devoluciones incrementa su versión en la base
+(configuracion.tablas.versiones) y lo descarta en todos los procesos.
+"""
+from django.core.cache import cache
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+
+from configuracion.documentos import vencimientos
+from configuracion.documentos.senales import documento_registrado
+from configuracion.tablas import versiones
+
+
+TIMEOUT = 60 * 60 * 24
+
+CLAVE_VERSION = 'antiguedad_deudores'
+
+CAMPOS_GRUPO = ('id_cliente', 'canal', 'moneda')
+
+# Línea de devolución que descuenta el saldo de una factura a crédito
+APLICADA = Q(
+    id_venta_linea__transaccion__forma_pago='CREDITO',
+    id_venta_linea__transaccion__moneda=F('transaccion__moneda'),
+)
+
+
+def _facturas_pendientes():
+    """Facturas a crédito con su saldo pendiente (neto de devoluciones a crédito en su moneda)"""
+    from ventas.ventas_ingreso.models import VentasCabezal
+    from ventas.ventas_devoluciones.models import VentasDevolucionesLineas
+
+    devuelto = VentasDevolucionesLineas.objects.filter(
+        id_venta_linea__transaccion=OuterRef('pk'),
+        transaccion__moneda=OuterRef('moneda'),
+        transaccion__forma_pago__nombre='Crédito',
+    ).order_by().values('id_venta_linea__transaccion').annotate(suma=Sum('total')).values('suma')[:1]
+
+    return VentasCabezal.objects.filter(forma_pago='CREDITO').annotate(
+        pendiente=F('importe_total') - Coalesce(Subquery(devuelto), Value(vencimientos.CERO), output_field=vencimientos.DECIMAL),
+        vencimiento=Coalesce('fecha_vencimiento', 'fecha_documento'),
+    ).filter(pendiente__gt=0)
+
+
+def creditos_sin_aplicar():
+    """
+    Devoluciones a crédito que no descuentan una factura a crédito de su moneda, por cliente y moneda.
+
+    Returns:
+        list[dict]: Una fila por (cliente, moneda) con los datos del cliente e 'importe'
+    """
+    from ventas.ventas_devoluciones.models import VentasDevolucionesLineas
+
+    return list(VentasDevolucionesLineas.objects.filter(
+        transaccion__forma_pago__nombre='Crédito',
+    ).exclude(APLICADA).order_by().values(
+        id_cliente=F('transaccion__id_cliente'),
+        moneda=F('transaccion__moneda'),
+    ).annotate(
+        canal=F('transaccion__id_cliente__canal_comercial__nombre'),
+        cliente_codigo=F('transaccion__id_cliente__codigo'),
+        cliente_nombre=Coalesce('transaccion__id_cliente__razon_social', 'transaccion__id_cliente__nombre_comercial'),
+        importe=Sum('total'),
+    ))
+
+
+def _agregar_creditos(filas):
+    """
+    Agrega 'creditos' y 'neto' a las filas; los clientes que solo tienen
+    créditos sin aplicar suman una fila sin importes por tramo.
+    """
+    por_clave = {(fila['id_cliente'], fila['moneda']): fila for fila in filas}
+    for fila in filas:
+        fila['creditos'] = vencimientos.CERO
+    for credito in creditos_sin_aplicar():
+        fila = por_clave.get((credito['id_cliente'], credito['moneda']))
+        if fila is None:
+            fila = {campo: credito[campo] for campo in (*CAMPOS_GRUPO, 'cliente_codigo', 'cliente_nombre')}
+            fila.update({campo: vencimientos.CERO for campo, _ in vencimientos.titulos()}, total=vencimientos.CERO)
+            filas.append(vencimientos.redondear_filas([fila])[0])
+        fila['creditos'] = vencimientos.redondear(credito['importe'])
+    for fila in filas:
+        fila['neto'] = fila['total'] - fila['creditos']
+    filas.sort(key=lambda fila: (fila['moneda'], fila['cliente_nombre'] or '', fila['id_cliente']))
+    return filas
+
+
+def calcular(fecha_corte):
+    """
+    Antigüedad de deudores a la fecha de corte, sin cache.
+
+    Returns:
+        list[dict]: Una fila por (cliente, canal, moneda) con los importes por
+        tramo (claves de vencimientos.TRAMOS), 'total', 'creditos'
+        (devoluciones sin factura) y 'neto'
+    """
+    filas = _facturas_pendientes().annotate(
+        canal=F('id_cliente__canal_comercial__nombre'),
+    ).values(*CAMPOS_GRUPO).annotate(
+        cliente_codigo=F('id_cliente__codigo'),
+        cliente_nombre=Coalesce('id_cliente__razon_social', 'id_cliente__nombre_comercial'),
+        total=Sum('pendiente'),
+        **vencimientos.sumas_por_tramo(fecha_corte),
+    ).order_by('moneda', 'cliente_nombre', 'id_cliente')
+    return _agregar_creditos(vencimientos.redondear_filas(list(filas)))
+
+
+def obtener(fecha_corte=None):
+    """Antigüedad de deudores cacheada por fecha de corte (hoy por defecto)"""
+    from django.utils import timezone
+
+    fecha_corte = fecha_corte or timezone.localdate()
+    clave = f'antiguedad_deudores:{fecha_corte.isoformat()}:v{versiones.obtener(CLAVE_VERSION)}'
+    return cache.get_or_set(clave, lambda: calcular(fecha_corte), timeout=TIMEOUT)
+
+
+def filas_csv(filas):
+    """Encabezado y filas para exportar con exportacion.generar_csv"""
+    columnas = (
+        ['Código', 'Cliente', 'Canal Comercial', 'Moneda'] + [titulo for _, titulo in vencimientos.titulos()]
+        + ['Total', 'Créditos sin aplicar', 'Neto']
+    )
+    datos = (
+        [fila['cliente_codigo'], fila['cliente_nombre'], fila['canal'] or '', fila['moneda']]
+        + [fila[campo] for campo, _ in vencimientos.titulos()]
+        + [fila['total'], fila['creditos'], fila['neto']]
+        for fila in filas
+    )
+    return columnas, datos
+
+
+def invalidar(**kwargs):
+    """Descarta el informe cacheado (todas las fechas de corte)"""
+    versiones.incrementar(CLAVE_VERSION)
+
+
+def conectar_senales():
+    """Invalida el cache al escribir ventas o devoluciones (desde VentasIngresoConfig.ready)"""
+    from ventas.ventas_ingreso.models import VentasCabezal, VentasLineas
+    from ventas.ventas_devoluciones.models import VentasDevolucionesCabezal, VentasDevolucionesLineas
+
+    # El save() de una línea suelta también envía documento_registrado
+    for modelo in (VentasLineas, VentasDevolucionesLineas):
+        documento_registrado.connect(invalidar, sender=modelo, dispatch_uid=f'antiguedad_registrado_{modelo.__name__}')
+        post_delete.connect(invalidar, sender=modelo, dispatch_uid=f'antiguedad_delete_{modelo.__name__}')
+    for modelo in (VentasCabezal, VentasDevolucionesCabezal):
+        post_save.connect(invalidar, sender=modelo, dispatch_uid=f'antiguedad_save_{modelo.__name__}')
+        post_delete.connect(invalidar, sender=modelo, dispatch_uid=f'antiguedad_delete_{modelo.__name__}')
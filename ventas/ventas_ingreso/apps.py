@@ -6,3 +6,6 @@ class VentasIngresoConfig(AppConfig):
     name = 'ventas.ventas_ingreso'
     verbose_name = 'Ventas Ingreso'
 
+    def ready(self):
+        from ventas.ventas_ingreso import antiguedad
+        antiguedad.conectar_senales()
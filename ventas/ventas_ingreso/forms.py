@@ -8,6 +8,8 @@ from configuracion.documentos.models import Documento
 from configuracion.articulos.models import Moneda, Articulo
 from configuracion.tablas.models import PlazoPago
 from configuracion.disponibilidades.models import Disponibilidad
+from configuracion.disponibilidades import movimientos
+from configuracion.deposito.models import Deposito
 
 
 class VentasCabezalForm(forms.ModelForm):
@@ -42,6 +44,8 @@ class VentasCabezalForm(forms.ModelForm):
         
         # Disponibilidades activas (solo para contado)
         self.fields['disponibilidad'].queryset = Disponibilidad.objects.filter(activo='SI')
+        self.fields['deposito'].queryset = Deposito.objects.all()
+        self.fields['deposito'].required = False
         self.fields['disponibilidad'].required = False
         
         # En ventas, precio_iva_inc siempre es 'SI' (no editable)
@@ -99,6 +103,12 @@ class VentasCabezalForm(forms.ModelForm):
                 'disponibilidad': 'Debe seleccionar una disponibilidad para forma de pago contado.'
             })
         
+        # La disponibilidad se mueve en su moneda: el documento debe estar en la misma
+        if forma_pago == 'CONTADO':
+            error = movimientos.error_moneda(disponibilidad, cleaned_data.get('moneda'))
+            if error:
+                raise forms.ValidationError({'disponibilidad': error})
+        
         # Validar plazo solo si es crédito
         if forma_pago == 'CREDITO':
             if not plazo:
@@ -152,7 +162,7 @@ class VentasCabezalForm(forms.ModelForm):
         model = VentasCabezal
         fields = [
             'id_cliente', 'tipo_documento', 'serie_documento', 'numero_documento',
-            'forma_pago', 'fecha_documento', 'moneda',
+            'forma_pago', 'fecha_documento', 'moneda', 'deposito',
             'precio_iva_inc', 'plazo', 'fecha_vencimiento', 'disponibilidad',
             'tipo_venta', 'sub_total', 'iva', 'importe_total',
             'observaciones'
@@ -165,6 +175,7 @@ class VentasCabezalForm(forms.ModelForm):
             'forma_pago': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_forma_pago'}),
             'fecha_documento': forms.DateInput(attrs={'class': 'form-control form-control-sm', 'type': 'date', 'id': 'id_fecha_documento'}),
             'moneda': forms.Select(attrs={'class': 'form-control form-control-sm'}),
+            'deposito': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_deposito'}),
             'precio_iva_inc': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_precio_iva_inc', 'disabled': True, 'style': 'background-color: #e9ecef; cursor: not-allowed;'}, choices=[('SI', 'Sí'), ('NO', 'No')]),
             'plazo': forms.Select(attrs={'class': 'form-control form-control-sm', 'id': 'id_plazo'}),
             'fecha_vencimiento': forms.DateInput(attrs={'class': 'form-control form-control-sm', 'type': 'date', 'id': 'id_fecha_vencimiento'}),
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 10:05
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def cargar_cantidad_devuelta(apps, schema_editor):
+    """Inicializa cantidad_devuelta con las devoluciones ya registradas"""
+    VentasLineas = apps.get_model('ventas_ingreso', 'VentasLineas')
+    VentasDevolucionesLineas = apps.get_model('ventas_devoluciones', 'VentasDevolucionesLineas')
+
+    devuelto = VentasDevolucionesLineas.objects.filter(
+        id_venta_linea=OuterRef('pk')
+    ).order_by().values('id_venta_linea').annotate(total=Sum('cantidad')).values('total')[:1]
+
+    ids = VentasDevolucionesLineas.objects.filter(
+        id_venta_linea__isnull=False
+    ).values_list('id_venta_linea', flat=True).distinct()
+    VentasLineas.objects.filter(pk__in=ids).update(
+        cantidad_devuelta=Coalesce(Subquery(devuelto), Value(Decimal('0')), output_field=DecimalField(max_digits=15, decimal_places=2))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas_ingreso', '0001_initial'),
+        ('ventas_devoluciones', '0004_ventasdevolucionescabezal_monotributista'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventaslineas',
+            name='cantidad_devuelta',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Suma de las devoluciones de esta línea (la mantiene ventas_devoluciones)', max_digits=15, verbose_name='Cantidad Devuelta'),
+        ),
+        migrations.AddIndex(
+            model_name='ventascabezal',
+            index=models.Index(fields=['id_cliente', 'tipo_documento', 'fecha_documento'], name='ventas_cab_cli_tipo_fecha'),
+        ),
+        migrations.RunPython(cargar_cantidad_devuelta, migrations.RunPython.noop),
+    ]
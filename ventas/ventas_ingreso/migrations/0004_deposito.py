@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deposito', '0002_stock'),
+        ('ventas_ingreso', '0003_indice_vencimiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventascabezal',
+            name='deposito',
+            field=models.ForeignKey(blank=True, help_text='Depósito que mueve el stock de los artículos stockeables', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ventas', to='deposito.deposito', verbose_name='Depósito'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas_ingreso', '0004_deposito'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventaslineas',
+            name='costo_unitario',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, help_text='Costo promedio del artículo (UYU) a la fecha de la venta (lo mantiene articulos.costos)', max_digits=15, verbose_name='Costo Unitario'),
+        ),
+    ]
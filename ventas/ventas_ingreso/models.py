@@ -1,13 +1,15 @@
 from django.db import models
 from django.utils import timezone
-from django.db.models import Sum
 from decimal import Decimal
-from configuracion.transacciones.models import Transaccion
+from configuracion.transacciones.models import SecuenciaTransaccion
 from configuracion.clientes.models import Cliente
 from configuracion.documentos.models import Documento
 from configuracion.articulos.models import Moneda, Articulo
 from configuracion.tablas.models import PlazoPago
 from configuracion.disponibilidades.models import Disponibilidad
+from configuracion.deposito.models import Deposito
+from configuracion.documentos.servicios import actualizar_totales, linea_guardada, lineas_anteriores
+from configuracion.documentos import precios
 
 
 class VentasCabezal(models.Model):
@@ -102,6 +104,16 @@ class VentasCabezal(models.Model):
         help_text='Solo para forma de pago contado',
     )
     
+    deposito = models.ForeignKey(
+        Deposito,
+        on_delete=models.PROTECT,
+        related_name='ventas',
+        blank=True,
+        null=True,
+        verbose_name='Depósito',
+        help_text='Depósito que mueve el stock de los artículos stockeables',
+    )
+    
     observaciones = models.TextField(
         blank=True,
         null=True,
@@ -156,6 +168,12 @@ class VentasCabezal(models.Model):
         verbose_name_plural = 'Ventas Cabezal'
         ordering = ['-fchhor', '-transaccion']
         db_table = 'ventas_cabezal'
+        indexes = [
+            # Búsqueda de facturas de un cliente para devoluciones (más nuevas primero)
+            models.Index(fields=['id_cliente', 'tipo_documento', 'fecha_documento'], name='ventas_cab_cli_tipo_fecha'),
+            # Antigüedad de deudores: facturas a crédito por vencimiento
+            models.Index(fields=['forma_pago', 'fecha_vencimiento'], name='ventas_cab_fpago_venc'),
+        ]
     
     def __str__(self):
         return f"{self.transaccion} - {self.serie_documento} -{self.numero_documento}"
@@ -163,26 +181,7 @@ class VentasCabezal(models.Model):
     def save(self, *args, **kwargs):
         # Generar transacción automáticamente si no existe
         if not self.transaccion:
-            now = timezone.now()
-            año = str(now.year)[-2:]
-            mes = str(now.month).zfill(2)
-            prefijo = f"{año}{mes}"
-            
-            # Buscar última transacción del mes
-            ultima = Transaccion.objects.filter(
-                transaccion__startswith=prefijo
-            ).order_by('-transaccion').first()
-            
-            if ultima and ultima.transaccion:
-                try:
-                    ultimo_num = int(ultima.transaccion[4:])
-                    nuevo_num = ultimo_num + 1
-                except ValueError:
-                    nuevo_num = 1
-            else:
-                nuevo_num = 1
-            
-            self.transaccion = f"{prefijo}{str(nuevo_num).zfill(6)}"
+            self.transaccion = SecuenciaTransaccion.siguiente()
         
         # Asignar tipo_documento siempre como 'movcli' (Movimiento Cliente) por defecto
         if not self.tipo_documento_id:
@@ -221,23 +220,18 @@ class VentasCabezal(models.Model):
         
         # Si es "elegir", la fecha_vencimiento la ingresa el usuario manualmente (no se calcula)
         
-        super().save(*args, **kwargs)
+        # Actualizar totales desde las líneas antes de guardar, así el post_save
+        # ve los importes actuales (un cabezal nuevo todavía no tiene líneas)
+        if not self._state.adding:
+            self.actualizar_totales()
         
-        # Actualizar totales desde las líneas
-        self.actualizar_totales()
+        super().save(*args, **kwargs)
     
     def actualizar_totales(self):
         """Actualiza sub_total, iva e importe_total desde las líneas"""
-        lineas = self.lineas.all()
-        self.sub_total = lineas.aggregate(Sum('sub_total'))['sub_total__sum'] or 0
-        self.iva = lineas.aggregate(Sum('iva'))['iva__sum'] or 0
-        self.importe_total = lineas.aggregate(Sum('total'))['total__sum'] or 0
-        # Guardar sin llamar save() para evitar recursión
-        VentasCabezal.objects.filter(transaccion=self.transaccion).update(
-            sub_total=self.sub_total,
-            iva=self.iva,
-            importe_total=self.importe_total
-        )
+        # Una sola sentencia UPDATE; luego refrescar los valores en memoria
+        actualizar_totales(self)
+        self.refresh_from_db(fields=['sub_total', 'iva', 'importe_total'])
 
 
 class VentasLineas(models.Model):
@@ -313,6 +307,27 @@ class VentasLineas(models.Model):
         help_text='sub_total + iva',
     )
     
+    cantidad_devuelta = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='Cantidad Devuelta',
+        help_text='Suma de las devoluciones de esta línea (la mantiene ventas_devoluciones)',
+    )
+    
+    costo_unitario = models.DecimalField(
+        max_digits=15,
+        decimal_places=4,
+        default=0,
+        editable=False,
+        verbose_name='Costo Unitario',
+        help_text='Costo promedio del artículo (UYU) a la fecha de la venta (lo mantiene articulos.costos)',
+    )
+    
+    # Campos que mantienen otros documentos: no se pisan al editar la venta
+    CAMPOS_ACUMULADOS = ('cantidad_devuelta', 'costo_unitario')
+    
     class Meta:
         verbose_name = 'Venta Línea'
         verbose_name_plural = 'Ventas Líneas'
@@ -323,62 +338,38 @@ class VentasLineas(models.Model):
     def __str__(self):
         return f"{self.transaccion.transaccion} - Línea {self.linea}"
     
-    def save(self, *args, **kwargs):
+    def calcular_importes(self, contexto=None, tasas=None):
+        """
+        Calcula los importes de la línea (sin guardar).
+        
+        contexto y tasas permiten calcular un lote de líneas del mismo cabezal
+        sin repetir consultas (ver configuracion.documentos.precios).
+        """
         # Validar que precio_original no sea None
         if self.precio_original is None:
             self.precio_original = Decimal('0')
         
-        # Calcular precio_neto unitario (sin cantidad) - NO multiplicar por cantidad
-        descuento_decimal = Decimal(str(self.descuento)) / Decimal('100') if self.descuento else Decimal('0')
-        precio_neto_unitario = self.precio_original * (Decimal('1') - descuento_decimal)
-        
-        # precio_neto es solo el precio unitario después del descuento (SIN cantidad)
-        self.precio_neto = precio_neto_unitario
+        if contexto is None:
+            contexto = precios.contexto_cabezal(self.transaccion)
+        importes = precios.calcular_lineas(precios.VENTA, contexto, [{
+            'articulo': self.id_articulo_id,
+            'precio': self.precio_original,
+            'cantidad': self.cantidad,
+            'descuento': self.descuento,
+        }], tasas)[0]
         
-        # Verificar tipo de documento para determinar IVA
-        tipo_doc = self.transaccion.tipo_documento.codigo if self.transaccion.tipo_documento else None
-        es_movcli = tipo_doc == 'movcli'
-        es_factexpo = tipo_doc == 'factexpo'
-        es_efactura = tipo_doc == 'efactura'
-        
-        # Obtener IVA del artículo según tipo de documento
-        # En ventas, los precios SIEMPRE son con IVA incluido
-        # - efactura: discrimina el IVA del producto
-        # - factexpo: IVA = 0 (exportaciones sin IVA)
-        # - movcli: IVA = 0 (venta en negro)
-        if es_factexpo or es_movcli:
-            # Exportaciones o venta en negro: no cobra IVA, siempre es 0
-            iva_valor = Decimal('0')
-        elif es_efactura and self.id_articulo and self.id_articulo.iva:
-            # Factura electrónica: discrimina el IVA del artículo
-            iva_valor = Decimal(str(self.id_articulo.iva.valor))
-        else:
-            # Por defecto, sin IVA
-            iva_valor = Decimal('0')
-        
-        # En ventas, los precios SIEMPRE son con IVA incluido
-        # precio_neto_unitario ya incluye IVA, hay que desglosarlo
-        # precio_neto_unitario = sub_total_unitario + iva_unitario = sub_total_unitario * (1 + iva)
-        # sub_total_unitario = precio_neto_unitario / (1 + iva)
-        # iva_unitario = precio_neto_unitario - sub_total_unitario
-        if iva_valor > 0:
-            sub_total_unitario = precio_neto_unitario / (Decimal('1') + iva_valor)
-            iva_unitario = precio_neto_unitario - sub_total_unitario
-        else:
-            # Sin IVA (factexpo, movcli o artículo sin IVA)
-            sub_total_unitario = precio_neto_unitario
-            iva_unitario = Decimal('0')
-        
-        # Multiplicar por cantidad para sub_total e iva
-        self.sub_total = sub_total_unitario * self.cantidad
-        self.iva = iva_unitario * self.cantidad
-        
-        # Calcular total
-        self.total = self.sub_total + self.iva
+        self.precio_neto = importes['precio_neto']
+        self.sub_total = importes['sub_total']
+        self.iva = importes['iva']
+        self.total = importes['total']
+    
+    def save(self, *args, **kwargs):
+        self.calcular_importes()
+        anteriores = lineas_anteriores(type(self), [self.pk])
         
         super().save(*args, **kwargs)
         
-        # Actualizar totales del cabezal
+        # Actualizar totales del cabezal y los saldos que dependen de las líneas
         if self.transaccion:
-            self.transaccion.actualizar_totales()
+            linea_guardada(self, anteriores)
 
@@ -0,0 +1,102 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from configuracion.articulos.models import IVA, Articulo, Moneda, TipoArticulo
+from configuracion.clientes import cuenta_corriente
+from configuracion.clientes.models import Cliente
+from configuracion.documentos.models import Documento
+from configuracion.tablas.models import FormaPagoTipo
+from ventas.ventas_devoluciones.models import VentasDevolucionesCabezal, VentasDevolucionesLineas
+from ventas.ventas_ingreso import antiguedad
+from ventas.ventas_ingreso.models import VentasCabezal, VentasLineas
+
+
+CORTE = datetime.date(2025, 4, 20)
+
+
+class AntiguedadDeudoresTests(TestCase):
+    """Saldos pendientes por tramo, netos de devoluciones a crédito"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Moneda.objects.create(codigo='UYU', nombre='Peso uruguayo')
+        Moneda.objects.create(codigo='USD', nombre='Dólar')
+        Documento.objects.create(codigo='efactura', nombre='e-Factura')
+        Documento.objects.create(codigo='nc', nombre='Nota de crédito')
+        iva = IVA.objects.create(codigo='iva_b', nombre='IVA Básico', valor=Decimal('0.22'))
+        servicio = TipoArticulo.objects.create(codigo='SER', nombre='Servicio')
+        cls.articulo = Articulo.objects.create(nombre='Servicio', tipo_articulo=servicio, iva=iva)
+        cls.cliente = Cliente.objects.create(codigo='C1', razon_social='Cliente')
+        cls.otro = Cliente.objects.create(codigo='C2', razon_social='Otro cliente')
+        cls.credito = FormaPagoTipo.objects.create(nombre='Crédito')
+
+    def vender(self, vencimiento, cantidad, forma_pago='CREDITO', cliente=None):
+        venta = VentasCabezal.objects.create(
+            id_cliente=cliente or self.cliente, tipo_documento_id='efactura', numero_documento=str(vencimiento),
+            forma_pago=forma_pago, fecha_documento=vencimiento, fecha_vencimiento=vencimiento, moneda_id='UYU',
+            plazo='elegir',
+        )
+        return VentasLineas.objects.create(
+            transaccion=venta, linea=1, id_articulo=self.articulo, cantidad=cantidad, precio_original=122,
+        )
+
+    def devolver(self, cantidad, linea=None, cliente=None, moneda='UYU'):
+        devolucion = VentasDevolucionesCabezal.objects.create(
+            id_cliente=cliente or self.cliente, tipo_documento_id='nc', numero_documento='1',
+            forma_pago=self.credito, fecha_documento=CORTE, moneda_id=moneda,
+        )
+        return VentasDevolucionesLineas.objects.create(
+            transaccion=devolucion, linea=1, id_articulo=self.articulo, id_venta_linea=linea,
+            numero_doc_afectado=linea.transaccion.numero_documento if linea else '', cantidad=cantidad, precio=100,
+        )
+
+    def fila(self, filas, cliente, moneda='UYU'):
+        return next(fila for fila in filas if (fila['id_cliente'], fila['moneda']) == (cliente.pk, moneda))
+
+    def test_tramos_por_vencimiento(self):
+        self.vender(datetime.date(2025, 4, 25), 1)
+        self.vender(datetime.date(2025, 3, 10), 2)
+        self.vender(datetime.date(2024, 12, 1), 3)
+
+        fila = self.fila(antiguedad.calcular(CORTE), self.cliente)
+
+        self.assertEqual(fila['corriente'], Decimal('122.00'))
+        self.assertEqual(fila['d60'], Decimal('244.00'))
+        self.assertEqual(fila['mas120'], Decimal('366.00'))
+        self.assertEqual(fila['total'], Decimal('732.00'))
+        self.assertEqual(fila['neto'], Decimal('732.00'))
+
+    def test_devolucion_aplicada_descuenta_la_factura(self):
+        linea = self.vender(datetime.date(2025, 3, 10), 2)
+        self.devolver(1, linea)
+
+        fila = self.fila(antiguedad.calcular(CORTE), self.cliente)
+
+        self.assertEqual(fila['d60'], Decimal('122.00'))
+        self.assertEqual(fila['creditos'], Decimal('0.00'))
+
+    def test_devoluciones_sin_aplicar_son_creditos(self):
+        self.vender(datetime.date(2025, 3, 10), 2)
+        contado = self.vender(datetime.date(2025, 3, 10), 1, forma_pago='CONTADO')
+        self.devolver(1, contado)
+        self.devolver(1, cliente=self.otro, moneda='USD')
+
+        filas = antiguedad.calcular(CORTE)
+
+        fila = self.fila(filas, self.cliente)
+        self.assertEqual(fila['creditos'], Decimal('122.00'))
+        self.assertEqual(fila['neto'], Decimal('122.00'))
+        solo_credito = self.fila(filas, self.otro, 'USD')
+        self.assertEqual(solo_credito['total'], Decimal('0.00'))
+        self.assertEqual(solo_credito['neto'], Decimal('-122.00'))
+
+    def test_neto_coincide_con_la_cuenta_corriente(self):
+        linea = self.vender(datetime.date(2025, 3, 10), 3)
+        self.devolver(1, linea)
+        self.devolver(1)
+
+        fila = self.fila(antiguedad.calcular(CORTE), self.cliente)
+
+        self.assertEqual(fila['neto'], cuenta_corriente.saldo_actual(self.cliente.pk, 'UYU'))
@@ -8,6 +8,7 @@ urlpatterns = [
     # URLs para ventas
     path('ventas/', views.lista_ventas, name='lista_ventas'),
     path('ventas/nueva/', views.crear_venta, name='crear_venta'),
+    path('ventas/antiguedad-deudores/', views.antiguedad_deudores, name='antiguedad_deudores'),
     path('ventas/<str:transaccion>/', views.detalle_venta, name='detalle_venta'),
     path('ventas/<str:transaccion>/editar/', views.editar_venta, name='editar_venta'),
     path('ventas/<str:transaccion>/eliminar/', views.eliminar_venta, name='eliminar_venta'),
@@ -1,19 +1,23 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import transaction
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-import json
 from .models import VentasCabezal, VentasLineas
 from .forms import (
     VentasCabezalForm, VentasLineasForm, VentasLineasFormSet
 )
 from configuracion.clientes.models import Cliente
-from configuracion.tablas.models import PlazoPago
+from configuracion.clientes import cuenta_corriente
 from configuracion.transacciones.models import Transaccion
 from configuracion.documentos.models import Documento
+from configuracion.documentos import vencimientos
+from configuracion.documentos.servicios import guardar_cabezal, registrar_lineas
 from configuracion.articulos.models import Articulo
+from configuracion.articulos import cotizaciones
+from configuracion.tablas import busqueda, datos_referencia, exportacion
+from . import antiguedad
 from erp_demo.config import EMPRESA_NOMBRE
 
 
@@ -50,6 +54,55 @@ def lista_ventas(request):
     return render(request, 'ventas_ingreso/lista_ventas.html', context)
 
 
+def antiguedad_deudores(request):
+    """Vista del informe de antigüedad de deudores (ventas a crédito por vencimiento)"""
+    import datetime
+    from django.utils import timezone
+
+    try:
+        fecha_corte = datetime.date.fromisoformat(request.GET.get('fecha_corte', ''))
+    except ValueError:
+        fecha_corte = timezone.localdate()
+
+    filas = antiguedad.obtener(fecha_corte)
+
+    # Filtros sobre el informe cacheado
+    moneda = request.GET.get('moneda', '')
+    canal = request.GET.get('canal', '')
+    monedas = sorted({fila['moneda'] for fila in filas})
+    canales = sorted({fila['canal'] for fila in filas if fila['canal']})
+    if moneda:
+        filas = [fila for fila in filas if fila['moneda'] == moneda]
+    if canal:
+        filas = [fila for fila in filas if fila['canal'] == canal]
+
+    if request.GET.get('formato') == 'csv':
+        columnas, datos = antiguedad.filas_csv(filas)
+        response = StreamingHttpResponse(
+            exportacion.generar_csv(columnas, datos),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="antiguedad_deudores_{fecha_corte.isoformat()}.csv"'
+        return response
+
+    totales = vencimientos.totales(filas, campos_extra=('total', 'creditos', 'neto'))
+    context = {
+        'filas': filas,
+        'totales': totales,
+        'consolidado': cotizaciones.consolidar(totales, fecha_corte) if len(totales) > 1 else None,
+        'moneda_base': cotizaciones.MONEDA_BASE,
+        'tramos': vencimientos.titulos(),
+        'fecha_corte': fecha_corte,
+        'moneda': moneda,
+        'canal': canal,
+        'monedas': monedas,
+        'canales': canales,
+        'empresa_nombre': EMPRESA_NOMBRE,
+        'titulo': 'Antigüedad de Deudores',
+    }
+    return render(request, 'ventas_ingreso/antiguedad_deudores.html', context)
+
+
 @transaction.atomic
 def crear_venta(request):
     """Vista para crear una nueva venta con guardado transaccional"""
@@ -116,24 +169,21 @@ def crear_venta(request):
                     except Documento.DoesNotExist:
                         pass
                 # La transacción y fecha_movimiento se generan automáticamente en el save()
-                cabezal.save()
+                guardar_cabezal(cabezal)
                 
                 # Guardar líneas - asegurar que tengan número de línea
                 lineas = formset.save(commit=False)
-                lineas_guardadas = 0
-                for idx, linea in enumerate(lineas, start=1):
+                lineas_validas = []
+                for linea in lineas:
                     # Solo guardar si tiene artículo y cantidad válidos (ignorar líneas vacías)
-                    if linea.id_articulo and linea.cantidad and linea.cantidad > 0:
-                        linea.transaccion = cabezal
-                        lineas_guardadas += 1
+                    if linea.id_articulo_id and linea.cantidad and linea.cantidad > 0:
+                        lineas_validas.append(linea)
                         # Asignar número de línea si no tiene
                         if not linea.linea or linea.linea == 0:
-                            linea.linea = lineas_guardadas
-                        linea.save()
+                            linea.linea = len(lineas_validas)
                 
-                # Eliminar líneas marcadas para eliminar
-                for obj in formset.deleted_objects:
-                    obj.delete()
+                # Guardar en bloque, eliminar las marcadas y actualizar totales del cabezal
+                registrar_lineas(cabezal, lineas_validas, formset.deleted_objects)
                 
                 # Crear registro en tabla Transaccion
                 try:
@@ -146,9 +196,6 @@ def crear_venta(request):
                     )
                 except Documento.DoesNotExist:
                     pass
-                
-                # Actualizar totales desde las líneas
-                cabezal.actualizar_totales()
             
                 messages.success(request, f'Venta {cabezal.transaccion} creada exitosamente.')
                 return redirect('ventas_ingreso:detalle_venta', transaccion=cabezal.transaccion)
@@ -179,45 +226,13 @@ def crear_venta(request):
         if len(formset.forms) > 1:
             formset.forms = formset.forms[:1]
     
-    # Obtener datos para JavaScript
-    clientes_data = []
-    for cliente in Cliente.objects.filter(activo='SI'):
-        clientes_data.append({
-            'id': cliente.id,
-            'codigo': cliente.codigo,
-            'razon_social': cliente.razon_social or '',
-            'nombre_comercial': cliente.nombre_comercial or '',
-            'formadepago': cliente.forma_pago or '',  # Mapear forma_pago a formadepago para consistencia con compras
-        })
-    
-    formas_pago_data = []
-    for fp in PlazoPago.objects.all():
-        formas_pago_data.append({
-            'codigo': fp.codigo,
-            'descripcion': fp.descripcion,
-            'plazo_en_dias': int(fp.plazo_en_dias) if fp.plazo_en_dias else 0,
-            'fin_de_mes': bool(fp.fin_de_mes) if fp.fin_de_mes is not None else False,
-        })
-    
-    # Obtener artículos para el select (ACTIVO_COMERCIAL para ventas)
-    articulos_data = []
-    for articulo in Articulo.objects.filter(ACTIVO_COMERCIAL='SI').select_related('iva'):
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'precio_venta': float(articulo.precio_venta) if articulo.precio_venta else 0,
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-        })
-    
     context = {
         'form': form,
         'formset': formset,
         'titulo': 'Nueva Venta',
         'empresa_nombre': EMPRESA_NOMBRE,
-        'clientes_data': json.dumps(clientes_data),
-        'formas_pago_data': json.dumps(formas_pago_data),
-        'articulos_data': json.dumps(articulos_data),
+        # Catálogos para JavaScript (se cargan desde /api/refdata/<tipo>, cacheados por versión)
+        'datos_referencia': datos_referencia.urls_scripts('clientes', 'formas_pago', 'articulos_comercial'),
     }
     return render(request, 'ventas_ingreso/form_venta.html', context)
 
@@ -240,20 +255,13 @@ def editar_venta(request, transaccion):
         if form.is_valid() and formset.is_valid():
             # Guardar cabezal
             cabezal = form.save(commit=False)
-            cabezal.save()
+            guardar_cabezal(cabezal)
             
             # Guardar líneas
             lineas = formset.save(commit=False)
-            for linea in lineas:
-                linea.transaccion = cabezal
-                linea.save()
             
-            # Eliminar líneas marcadas para eliminar
-            for obj in formset.deleted_objects:
-                obj.delete()
-            
-            # Actualizar totales
-            cabezal.actualizar_totales()
+            # Guardar en bloque, eliminar las marcadas y actualizar totales del cabezal
+            registrar_lineas(cabezal, lineas, formset.deleted_objects)
             
             messages.success(request, f'Venta {cabezal.transaccion} actualizada exitosamente.')
             return redirect('ventas_ingreso:detalle_venta', transaccion=cabezal.transaccion)
@@ -263,46 +271,14 @@ def editar_venta(request, transaccion):
         form = VentasCabezalForm(instance=venta)
         formset = VentasLineasFormSet(instance=venta)
     
-    # Obtener datos para JavaScript
-    clientes_data = []
-    for cliente in Cliente.objects.filter(activo='SI'):
-        clientes_data.append({
-            'id': cliente.id,
-            'codigo': cliente.codigo,
-            'razon_social': cliente.razon_social or '',
-            'nombre_comercial': cliente.nombre_comercial or '',
-            'formadepago': cliente.forma_pago or '',  # Mapear forma_pago a formadepago para consistencia con compras
-        })
-    
-    formas_pago_data = []
-    for fp in PlazoPago.objects.all():
-        formas_pago_data.append({
-            'codigo': fp.codigo,
-            'descripcion': fp.descripcion,
-            'plazo_en_dias': int(fp.plazo_en_dias) if fp.plazo_en_dias else 0,
-            'fin_de_mes': bool(fp.fin_de_mes) if fp.fin_de_mes is not None else False,
-        })
-    
-    # Obtener artículos para el select (ACTIVO_COMERCIAL para ventas)
-    articulos_data = []
-    for articulo in Articulo.objects.filter(ACTIVO_COMERCIAL='SI').select_related('iva'):
-        articulos_data.append({
-            'id': articulo.id,
-            'nombre': articulo.nombre or '',
-            'producto_id': articulo.producto_id or '',
-            'precio_venta': float(articulo.precio_venta) if articulo.precio_venta else 0,
-            'iva_valor': float(articulo.iva.valor) if articulo.iva else 0,
-        })
-    
     context = {
         'form': form,
         'formset': formset,
         'venta': venta,
         'titulo': f'Editar Venta {venta.transaccion}',
         'empresa_nombre': EMPRESA_NOMBRE,
-        'clientes_data': json.dumps(clientes_data),
-        'formas_pago_data': json.dumps(formas_pago_data),
-        'articulos_data': json.dumps(articulos_data),
+        # Catálogos para JavaScript (se cargan desde /api/refdata/<tipo>, cacheados por versión)
+        'datos_referencia': datos_referencia.urls_scripts('clientes', 'formas_pago', 'articulos_comercial'),
     }
     return render(request, 'ventas_ingreso/form_venta.html', context)
 
@@ -368,23 +344,13 @@ def buscar_clientes(request):
     try:
         query = request.GET.get('q', '').strip()
         
-        if not query:
-            clientes = Cliente.objects.filter(activo='SI').order_by('razon_social', 'nombre_comercial')[:50]
-        else:
-            clientes = Cliente.objects.filter(
-                activo='SI'
-            ).filter(
-                razon_social__icontains=query
-            ) | Cliente.objects.filter(
-                activo='SI'
-            ).filter(
-                nombre_comercial__icontains=query
-            ) | Cliente.objects.filter(
-                activo='SI'
-            ).filter(
-                codigo__icontains=query
-            )
-            clientes = clientes.distinct().order_by('razon_social', 'nombre_comercial')[:50]
+        # Búsqueda indexada (trigramas en PostgreSQL, FTS5 en SQLite), ordenada por relevancia
+        clientes = busqueda.buscar(
+            Cliente.objects.filter(activo='SI').order_by('razon_social', 'nombre_comercial'),
+            'clientes', query,
+        )
+        # Deuda en cuenta corriente de los clientes encontrados (una consulta a SaldoCliente)
+        saldos = cuenta_corriente.saldos_por_cliente(cliente.pk for cliente in clientes)
         
         resultados = []
         for cliente in clientes:
@@ -397,6 +363,10 @@ def buscar_clientes(request):
                 'razon_social': cliente.razon_social or '',
                 'nombre_comercial': cliente.nombre_comercial or '',
                 'text': nombre_display,  # Solo nombre, sin ID
+                'deuda': [
+                    {'moneda': saldo['moneda'], 'saldo': float(saldo['saldo'])}
+                    for saldo in saldos.get(cliente.pk, [])
+                ],
                 'formadepago': cliente.forma_pago or '',  # Mapear forma_pago a formadepago para consistencia con compras
             })
         
@@ -415,19 +385,11 @@ def buscar_articulos(request):
         query = request.GET.get('q', '').strip()
         
         # Buscar por nombre (modo por defecto)
-        if not query:
-            articulos = Articulo.objects.filter(ACTIVO_COMERCIAL='SI').select_related('iva').order_by('nombre')[:50]
-        else:
-            articulos = Articulo.objects.filter(
-                ACTIVO_COMERCIAL='SI'
-            ).filter(
-                nombre__icontains=query
-            ) | Articulo.objects.filter(
-                ACTIVO_COMERCIAL='SI'
-            ).filter(
-                producto_id__icontains=query
-            )
-            articulos = articulos.distinct().select_related('iva').order_by('nombre')[:50]
+        # Búsqueda indexada (trigramas en PostgreSQL, FTS5 en SQLite), ordenada por relevancia
+        articulos = busqueda.buscar(
+            Articulo.objects.filter(ACTIVO_COMERCIAL='SI').select_related('iva').order_by('nombre'),
+            'articulos', query,
+        )
         
         resultados = []
         for articulo in articulos: